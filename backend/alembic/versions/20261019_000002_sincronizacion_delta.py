@@ -0,0 +1,91 @@
+"""
+Soporte para sincronización delta (?since=) de las listas.
+
+- Agrega updated_at a multas, reservas y pagos (las demás tablas ya lo tienen)
+- Agrega índices por updated_at en las tablas sincronizadas
+- Crea la tabla eliminaciones (tombstones de filas eliminadas)
+
+Revision ID: 20261019_000002
+Revises: 20241112_000001
+Create Date: 2026-10-19 00:00:02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000002"
+down_revision: Union[str, None] = "20241112_000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tablas sin updated_at en el esquema inicial
+TABLAS_SIN_UPDATED_AT = ("multas", "reservas", "pagos")
+
+# Índices por updated_at para las consultas "cambios desde"
+INDICES_UPDATED_AT = {
+    "idx_gastos_updated_at": "gastos_comunes",
+    "idx_multas_updated_at": "multas",
+    "idx_reservas_updated_at": "reservas",
+    "idx_pagos_updated_at": "pagos",
+    "idx_anuncios_updated_at": "anuncios",
+}
+
+
+def upgrade() -> None:
+    """
+    Agrega las columnas, índices y la tabla de eliminaciones.
+    """
+    for tabla in TABLAS_SIN_UPDATED_AT:
+        op.add_column(
+            tabla,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("CURRENT_TIMESTAMP"),
+                server_onupdate=sa.text("CURRENT_TIMESTAMP"),
+                nullable=False,
+            ),
+        )
+
+    for indice, tabla in INDICES_UPDATED_AT.items():
+        op.create_index(indice, tabla, ["updated_at"])
+
+    # ========================================================================
+    # TABLA: eliminaciones
+    # Tombstones de filas eliminadas para que los clientes sincronicen deletes
+    # ========================================================================
+    op.create_table(
+        "eliminaciones",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("tabla", sa.String(length=64), nullable=False),
+        sa.Column("registro_id", sa.BigInteger(), nullable=False),
+        sa.Column("vivienda_id", sa.BigInteger(), nullable=True),
+        sa.Column("usuario_id", sa.BigInteger(), nullable=True),
+        sa.Column("condominio_id", sa.BigInteger(), nullable=True),
+        sa.Column(
+            "eliminado_en",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    op.create_index("idx_eliminaciones_tabla_fecha", "eliminaciones", ["tabla", "eliminado_en"])
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración: elimina la tabla de eliminaciones, los índices y las columnas.
+    """
+    op.drop_index("idx_eliminaciones_tabla_fecha", table_name="eliminaciones")
+    op.drop_table("eliminaciones")
+
+    for indice, tabla in INDICES_UPDATED_AT.items():
+        op.drop_index(indice, table_name=tabla)
+
+    for tabla in TABLAS_SIN_UPDATED_AT:
+        op.drop_column(tabla, "updated_at")
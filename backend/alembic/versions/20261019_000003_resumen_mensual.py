@@ -0,0 +1,124 @@
+"""
+Tabla resumen_mensual: totales financieros materializados por condominio y mes.
+
+Crea la tabla y la llena con los datos existentes (backfill). Desde ahí la
+aplicación la mantiene de forma incremental; para recalcularla:
+python -m app.services.resumen_mensual
+
+Revision ID: 20261019_000003
+Revises: 20261019_000002
+Create Date: 2026-10-19 00:00:03
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000003"
+down_revision: Union[str, None] = "20261019_000002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO resumen_mensual (
+    condominio_id, ano, mes,
+    gastos_emitidos, monto_emitido, gastos_pendientes, monto_pendiente, vencimiento,
+    pagos, monto_recaudado, multas, monto_multas
+)
+SELECT
+    k.condominio_id, k.ano, k.mes,
+    COALESCE(g.gastos_emitidos, 0), COALESCE(g.monto_emitido, 0),
+    COALESCE(g.gastos_pendientes, 0), COALESCE(g.monto_pendiente, 0), g.vencimiento,
+    COALESCE(p.pagos, 0), COALESCE(p.monto_recaudado, 0),
+    COALESCE(m.multas, 0), COALESCE(m.monto_multas, 0)
+FROM (
+    SELECT v.condominio_id, gc.ano, gc.mes
+    FROM gastos_comunes gc JOIN viviendas v ON v.id = gc.vivienda_id
+    UNION
+    SELECT v.condominio_id, YEAR(mu.fecha_aplicada), MONTH(mu.fecha_aplicada)
+    FROM multas mu JOIN viviendas v ON v.id = mu.vivienda_id
+) k
+LEFT JOIN (
+    SELECT
+        v.condominio_id, gc.ano, gc.mes,
+        COUNT(*) AS gastos_emitidos,
+        SUM(gc.monto_total) AS monto_emitido,
+        SUM(CASE WHEN gc.estado = 'pendiente' THEN 1 ELSE 0 END) AS gastos_pendientes,
+        SUM(CASE WHEN gc.estado = 'pendiente' THEN gc.monto_total ELSE 0 END) AS monto_pendiente,
+        MIN(gc.vencimiento) AS vencimiento
+    FROM gastos_comunes gc JOIN viviendas v ON v.id = gc.vivienda_id
+    GROUP BY v.condominio_id, gc.ano, gc.mes
+) g ON g.condominio_id = k.condominio_id AND g.ano = k.ano AND g.mes = k.mes
+LEFT JOIN (
+    SELECT
+        v.condominio_id, gc.ano, gc.mes,
+        COUNT(*) AS pagos,
+        SUM(pa.monto_pagado) AS monto_recaudado
+    FROM pagos pa
+    JOIN gastos_comunes gc ON gc.id = pa.gasto_comun_id
+    JOIN viviendas v ON v.id = gc.vivienda_id
+    GROUP BY v.condominio_id, gc.ano, gc.mes
+) p ON p.condominio_id = k.condominio_id AND p.ano = k.ano AND p.mes = k.mes
+LEFT JOIN (
+    SELECT
+        v.condominio_id, YEAR(mu.fecha_aplicada) AS ano, MONTH(mu.fecha_aplicada) AS mes,
+        COUNT(*) AS multas,
+        SUM(mu.monto) AS monto_multas
+    FROM multas mu JOIN viviendas v ON v.id = mu.vivienda_id
+    GROUP BY v.condominio_id, YEAR(mu.fecha_aplicada), MONTH(mu.fecha_aplicada)
+) m ON m.condominio_id = k.condominio_id AND m.ano = k.ano AND m.mes = k.mes
+"""
+
+
+def upgrade() -> None:
+    """
+    Crea la tabla resumen_mensual y la llena con los datos actuales.
+    """
+    # ========================================================================
+    # TABLA: resumen_mensual
+    # Emitido / pendiente / recaudado / multas por (condominio, año, mes)
+    # ========================================================================
+    op.create_table(
+        "resumen_mensual",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("condominio_id", sa.BigInteger(), nullable=False),
+        sa.Column("ano", sa.Integer(), nullable=False),
+        sa.Column("mes", sa.Integer(), nullable=False),
+        sa.Column("gastos_emitidos", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("monto_emitido", sa.Numeric(16, 2), server_default="0", nullable=False),
+        sa.Column("gastos_pendientes", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("monto_pendiente", sa.Numeric(16, 2), server_default="0", nullable=False),
+        sa.Column("vencimiento", sa.Date(), nullable=True),
+        sa.Column("pagos", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("monto_recaudado", sa.Numeric(16, 2), server_default="0", nullable=False),
+        sa.Column("multas", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("monto_multas", sa.Numeric(16, 2), server_default="0", nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            server_onupdate=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.CheckConstraint("mes BETWEEN 1 AND 12", name="chk_resumen_mes"),
+        sa.ForeignKeyConstraint(
+            ["condominio_id"],
+            ["condominios.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("condominio_id", "ano", "mes", name="uq_resumen_condominio_ano_mes"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la tabla resumen_mensual.
+    """
+    op.drop_table("resumen_mensual")
@@ -0,0 +1,140 @@
+"""
+Cuenta corriente por vivienda: tablas movimientos_cuenta y saldos_vivienda.
+
+Crea las tablas y registra un movimiento por cada gasto común, multa y pago
+existente, más un abono por la parte no cubierta de cada gasto pagado sin
+pagos registrados (backfill). Desde ahí la aplicación agrega los movimientos; para
+conciliar nuevamente: python -m app.services.cuenta_corriente
+
+Revision ID: 20261019_000004
+Revises: 20261019_000003
+Create Date: 2026-10-19 00:00:04
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000004"
+down_revision: Union[str, None] = "20261019_000003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_MOVIMIENTOS = [
+    """
+    INSERT INTO movimientos_cuenta (vivienda_id, tipo, origen, referencia_id, monto, descripcion, created_at)
+    SELECT vivienda_id, 'cargo', 'gastos_comunes', id, monto_total, CONCAT('Gasto común #', id), created_at
+    FROM gastos_comunes
+    WHERE monto_total <> 0
+    """,
+    """
+    INSERT INTO movimientos_cuenta (vivienda_id, tipo, origen, referencia_id, monto, descripcion, created_at)
+    SELECT vivienda_id, 'cargo', 'multas', id, monto, CONCAT('Multa #', id), created_at
+    FROM multas
+    WHERE monto <> 0
+    """,
+    """
+    INSERT INTO movimientos_cuenta (vivienda_id, tipo, origen, referencia_id, monto, descripcion, created_at)
+    SELECT gc.vivienda_id, 'abono', 'pagos', pa.id, -pa.monto_pagado, CONCAT('Pago #', pa.id), pa.fecha_pago
+    FROM pagos pa JOIN gastos_comunes gc ON gc.id = pa.gasto_comun_id
+    WHERE pa.monto_pagado <> 0
+    """,
+    # Gastos marcados como pagados sin pagos registrados (o con pagos que no
+    # cubren su monto): un abono por la diferencia para que no queden como deuda
+    """
+    INSERT INTO movimientos_cuenta (vivienda_id, tipo, origen, referencia_id, monto, descripcion, created_at)
+    SELECT gc.vivienda_id, 'abono', 'gastos_pagados', gc.id, -(gc.monto_total - COALESCE(pa.pagado, 0)),
+           CONCAT('Gasto común pagado sin pago registrado #', gc.id), gc.updated_at
+    FROM gastos_comunes gc
+    LEFT JOIN (
+        SELECT gasto_comun_id, SUM(monto_pagado) AS pagado FROM pagos GROUP BY gasto_comun_id
+    ) pa ON pa.gasto_comun_id = gc.id
+    WHERE gc.estado = 'pagado' AND gc.monto_total > COALESCE(pa.pagado, 0)
+    """,
+]
+
+BACKFILL_SALDOS = """
+INSERT INTO saldos_vivienda (vivienda_id, saldo, ultimo_movimiento_id)
+SELECT vivienda_id, SUM(monto), MAX(id)
+FROM movimientos_cuenta
+GROUP BY vivienda_id
+"""
+
+
+def upgrade() -> None:
+    """
+    Crea las tablas de la cuenta corriente y las llena con los datos actuales.
+    """
+    # ========================================================================
+    # TABLA: movimientos_cuenta
+    # Libro append-only de cargos (+) y abonos (-) por vivienda
+    # ========================================================================
+    op.create_table(
+        "movimientos_cuenta",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("vivienda_id", sa.BigInteger(), nullable=False),
+        sa.Column("tipo", sa.String(length=10), nullable=False),
+        sa.Column("origen", sa.String(length=30), nullable=False),
+        sa.Column("referencia_id", sa.BigInteger(), nullable=True),
+        sa.Column("monto", sa.Numeric(14, 2), nullable=False),
+        sa.Column("descripcion", sa.String(length=255), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["vivienda_id"],
+            ["viviendas.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    op.create_index("idx_movimientos_vivienda_id", "movimientos_cuenta", ["vivienda_id", "id"])
+    op.create_index("idx_movimientos_origen", "movimientos_cuenta", ["origen", "referencia_id"])
+
+    # ========================================================================
+    # TABLA: saldos_vivienda
+    # Saldo vigente por vivienda (positivo = deuda)
+    # ========================================================================
+    op.create_table(
+        "saldos_vivienda",
+        sa.Column("vivienda_id", sa.BigInteger(), nullable=False),
+        sa.Column("saldo", sa.Numeric(14, 2), server_default="0", nullable=False),
+        sa.Column("ultimo_movimiento_id", sa.BigInteger(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            server_onupdate=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["vivienda_id"],
+            ["viviendas.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("vivienda_id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+    for sentencia in BACKFILL_MOVIMIENTOS:
+        op.execute(sentencia)
+    op.execute(BACKFILL_SALDOS)
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando las tablas de la cuenta corriente.
+    """
+    op.drop_table("saldos_vivienda")
+    op.drop_index("idx_movimientos_origen", table_name="movimientos_cuenta")
+    op.drop_index("idx_movimientos_vivienda_id", table_name="movimientos_cuenta")
+    op.drop_table("movimientos_cuenta")
@@ -0,0 +1,73 @@
+"""
+Tabla procesos_facturacion: emisiones masivas de gastos comunes con checkpoint.
+
+Revision ID: 20261019_000005
+Revises: 20261019_000004
+Create Date: 2026-10-19 00:00:05
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000005"
+down_revision: Union[str, None] = "20261019_000004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea la tabla procesos_facturacion.
+    """
+    # ========================================================================
+    # TABLA: procesos_facturacion
+    # Parámetros y checkpoint de cada emisión (condominio, año, mes)
+    # ========================================================================
+    op.create_table(
+        "procesos_facturacion",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("condominio_id", sa.BigInteger(), nullable=False),
+        sa.Column("ano", sa.Integer(), nullable=False),
+        sa.Column("mes", sa.Integer(), nullable=False),
+        sa.Column("valor_uf", sa.Numeric(12, 2), nullable=False),
+        sa.Column("vencimiento", sa.Date(), nullable=False),
+        sa.Column("estado", sa.String(length=20), server_default="en_curso", nullable=False),
+        sa.Column("ultimo_vivienda_id", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("gastos_creados", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("gastos_existentes", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("viviendas_sin_cargo", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            server_onupdate=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column("finalizado_en", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("mes BETWEEN 1 AND 12", name="chk_facturacion_mes"),
+        sa.ForeignKeyConstraint(
+            ["condominio_id"],
+            ["condominios.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("condominio_id", "ano", "mes", name="uq_facturacion_condominio_ano_mes"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la tabla procesos_facturacion.
+    """
+    op.drop_table("procesos_facturacion")
@@ -0,0 +1,34 @@
+"""
+Columna viviendas.alicuota: coeficiente de prorrateo de los gastos del condominio.
+
+Revision ID: 20261019_000006
+Revises: 20261019_000005
+Create Date: 2026-10-19 00:00:06
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000006"
+down_revision: Union[str, None] = "20261019_000005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Agrega la alícuota a las viviendas (0 = no participa del prorrateo).
+    """
+    op.add_column(
+        "viviendas",
+        sa.Column("alicuota", sa.Numeric(9, 6), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la columna alicuota.
+    """
+    op.drop_column("viviendas", "alicuota")
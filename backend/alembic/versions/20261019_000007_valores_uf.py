@@ -0,0 +1,40 @@
+"""
+Tabla valores_uf: caché persistente del valor diario de la UF.
+
+Revision ID: 20261019_000007
+Revises: 20261019_000006
+Create Date: 2026-10-19 00:00:07
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000007"
+down_revision: Union[str, None] = "20261019_000006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea la tabla valores_uf (un valor por fecha).
+    """
+    op.create_table(
+        "valores_uf",
+        sa.Column("fecha", sa.Date(), nullable=False),
+        sa.Column("valor", sa.Numeric(12, 2), nullable=False),
+        sa.Column("fuente", sa.String(length=20), server_default="cmf", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.PrimaryKeyConstraint("fecha"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la tabla valores_uf.
+    """
+    op.drop_table("valores_uf")
@@ -0,0 +1,79 @@
+"""
+Tablas abonos e imputaciones_abono: pagos imputados a varios cargos (FIFO).
+
+Revision ID: 20261019_000008
+Revises: 20261019_000007
+Create Date: 2026-10-19 00:00:08
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000008"
+down_revision: Union[str, None] = "20261019_000007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea las tablas abonos e imputaciones_abono.
+    """
+    # ========================================================================
+    # TABLA: abonos
+    # Monto recibido de una vivienda; lo no imputado queda como saldo a favor
+    # ========================================================================
+    op.create_table(
+        "abonos",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("vivienda_id", sa.BigInteger(), nullable=False),
+        sa.Column("usuario_id", sa.BigInteger(), nullable=False),
+        sa.Column("monto", sa.Numeric(14, 2), nullable=False),
+        sa.Column("monto_aplicado", sa.Numeric(14, 2), server_default="0", nullable=False),
+        sa.Column("saldo_a_favor", sa.Numeric(14, 2), server_default="0", nullable=False),
+        sa.Column("fecha_pago", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.Column("metodo_pago", sa.String(length=30), server_default="transferencia", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.CheckConstraint("monto > 0", name="chk_abonos_monto"),
+        sa.ForeignKeyConstraint(["vivienda_id"], ["viviendas.id"], onupdate="CASCADE", ondelete="RESTRICT"),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], onupdate="CASCADE", ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    op.create_index("idx_abonos_vivienda_id", "abonos", ["vivienda_id"])
+
+    # ========================================================================
+    # TABLA: imputaciones_abono
+    # Parte de un abono aplicada a un gasto común, multa o reserva
+    # ========================================================================
+    op.create_table(
+        "imputaciones_abono",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("abono_id", sa.BigInteger(), nullable=False),
+        sa.Column("vivienda_id", sa.BigInteger(), nullable=False),
+        sa.Column("tipo", sa.String(length=20), nullable=False),
+        sa.Column("referencia_id", sa.BigInteger(), nullable=False),
+        sa.Column("pago_id", sa.BigInteger(), nullable=True),
+        sa.Column("monto", sa.Numeric(14, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.CheckConstraint("monto > 0", name="chk_imputaciones_monto"),
+        sa.ForeignKeyConstraint(["abono_id"], ["abonos.id"], onupdate="CASCADE", ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["vivienda_id"], ["viviendas.id"], onupdate="CASCADE", ondelete="RESTRICT"),
+        sa.ForeignKeyConstraint(["pago_id"], ["pagos.id"], onupdate="CASCADE", ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    op.create_index("idx_imputaciones_abono_id", "imputaciones_abono", ["abono_id"])
+    op.create_index("idx_imputaciones_tipo_referencia", "imputaciones_abono", ["tipo", "referencia_id"])
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando las tablas de abonos.
+    """
+    op.drop_table("imputaciones_abono")
+    op.drop_table("abonos")
@@ -0,0 +1,49 @@
+"""
+Tabla claves_idempotencia: respuestas guardadas de peticiones con Idempotency-Key.
+
+Revision ID: 20261019_000009
+Revises: 20261019_000008
+Create Date: 2026-10-19 00:00:09
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000009"
+down_revision: Union[str, None] = "20261019_000008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea la tabla claves_idempotencia.
+    """
+    op.create_table(
+        "claves_idempotencia",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("usuario_id", sa.BigInteger(), nullable=False),
+        sa.Column("clave", sa.String(length=255), nullable=False),
+        sa.Column("huella", sa.String(length=64), nullable=False),
+        sa.Column("estado", sa.String(length=20), server_default="en_curso", nullable=False),
+        sa.Column("codigo_estado", sa.Integer(), nullable=True),
+        sa.Column("tipo_contenido", sa.String(length=100), nullable=True),
+        sa.Column("respuesta", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.Column("expira_en", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], onupdate="CASCADE", ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("usuario_id", "clave", name="uq_idempotencia_usuario_clave"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    op.create_index("idx_idempotencia_expira_en", "claves_idempotencia", ["expira_en"])
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la tabla claves_idempotencia.
+    """
+    op.drop_table("claves_idempotencia")
@@ -0,0 +1,48 @@
+"""
+Columnas multas.gasto_comun_id y multas.periodo_recargo para los recargos por mora.
+
+Revision ID: 20261019_000010
+Revises: 20261019_000009
+Create Date: 2026-10-19 00:00:10
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000010"
+down_revision: Union[str, None] = "20261019_000009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Vincula los recargos por mora con su gasto común; la restricción única
+    (gasto_comun_id, periodo_recargo) impide cobrar dos veces el mismo mes.
+    """
+    op.add_column("multas", sa.Column("gasto_comun_id", sa.BigInteger(), nullable=True))
+    op.add_column("multas", sa.Column("periodo_recargo", sa.Date(), nullable=True))
+    op.create_foreign_key(
+        "fk_multas_gasto_comun_id",
+        "multas",
+        "gastos_comunes",
+        ["gasto_comun_id"],
+        ["id"],
+        onupdate="CASCADE",
+        ondelete="SET NULL",
+    )
+    op.create_unique_constraint(
+        "uq_multas_recargo_gasto_periodo", "multas", ["gasto_comun_id", "periodo_recargo"]
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando las columnas de recargos por mora.
+    """
+    op.drop_constraint("fk_multas_gasto_comun_id", "multas", type_="foreignkey")
+    op.drop_constraint("uq_multas_recargo_gasto_periodo", "multas", type_="unique")
+    op.drop_column("multas", "periodo_recargo")
+    op.drop_column("multas", "gasto_comun_id")
@@ -0,0 +1,62 @@
+"""
+Planificador de tareas: liderazgo, ejecuciones y estado "vencido" de los gastos comunes.
+
+Revision ID: 20261019_000011
+Revises: 20261019_000010
+Create Date: 2026-10-19 00:00:11
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000011"
+down_revision: Union[str, None] = "20261019_000010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea las tablas del planificador, el índice (estado, vencimiento) y marca
+    como vencidos los gastos pendientes cuyo vencimiento ya pasó (después lo
+    hace la tarea nocturna vencer_gastos).
+    """
+    op.create_table(
+        "lider_planificador",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("dueno", sa.String(100), nullable=True),
+        sa.Column("expira_en", sa.DateTime(timezone=True), nullable=True),
+        mysql_charset="utf8mb4",
+        mysql_engine="InnoDB",
+    )
+    op.execute("INSERT INTO lider_planificador (id) VALUES (1)")
+
+    op.create_table(
+        "tareas_programadas",
+        sa.Column("nombre", sa.String(50), primary_key=True),
+        sa.Column("ultima_ejecucion", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duracion_ms", sa.Integer(), nullable=True),
+        sa.Column("resultado", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        mysql_charset="utf8mb4",
+        mysql_engine="InnoDB",
+    )
+
+    op.create_index("idx_gastos_estado_vencimiento", "gastos_comunes", ["estado", "vencimiento"])
+    op.execute(
+        "UPDATE gastos_comunes SET estado = 'vencido' "
+        "WHERE estado = 'pendiente' AND vencimiento < CURRENT_DATE"
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración: los gastos vencidos vuelven a "pendiente".
+    """
+    op.execute("UPDATE gastos_comunes SET estado = 'pendiente' WHERE estado = 'vencido'")
+    op.drop_index("idx_gastos_estado_vencimiento", table_name="gastos_comunes")
+    op.drop_table("tareas_programadas")
+    op.drop_table("lider_planificador")
@@ -0,0 +1,32 @@
+"""
+Columna claves_idempotencia.cabeceras: headers de la respuesta guardada.
+
+Revision ID: 20261019_000012
+Revises: 20261019_000011
+Create Date: 2026-10-19 00:00:12
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000012"
+down_revision: Union[str, None] = "20261019_000011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Agrega los headers de la respuesta (ej: Location) para repetirlos en los
+    reintentos con la misma Idempotency-Key.
+    """
+    op.add_column("claves_idempotencia", sa.Column("cabeceras", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la columna cabeceras.
+    """
+    op.drop_column("claves_idempotencia", "cabeceras")
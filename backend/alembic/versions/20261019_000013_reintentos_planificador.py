@@ -0,0 +1,36 @@
+"""
+Columnas de tareas_programadas para marcar la tarea en curso y reintentar las fallidas.
+
+Revision ID: 20261019_000013
+Revises: 20261019_000012
+Create Date: 2026-10-19 00:00:13
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000013"
+down_revision: Union[str, None] = "20261019_000012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Agrega en_curso_por, en_curso_desde y reintentar_desde: el horario de una
+    tarea queda ejecutado solo si termina sin error.
+    """
+    op.add_column("tareas_programadas", sa.Column("en_curso_por", sa.String(100), nullable=True))
+    op.add_column("tareas_programadas", sa.Column("en_curso_desde", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("tareas_programadas", sa.Column("reintentar_desde", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando las columnas de ejecución en curso y reintento.
+    """
+    op.drop_column("tareas_programadas", "reintentar_desde")
+    op.drop_column("tareas_programadas", "en_curso_desde")
+    op.drop_column("tareas_programadas", "en_curso_por")
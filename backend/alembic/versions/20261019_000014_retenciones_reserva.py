@@ -0,0 +1,64 @@
+"""
+Retenciones de horario compartidas entre procesos y plazo de pago de las reservas.
+
+Revision ID: 20261019_000014
+Revises: 20261019_000013
+Create Date: 2026-10-19 00:00:14
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic para control de versiones
+revision: str = "20261019_000014"
+down_revision: Union[str, None] = "20261019_000013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crea retenciones_reserva (las retenciones dejan de vivir en la memoria de
+    cada proceso, por lo que funcionan con varios workers) y agrega
+    reservas.pago_expira_en. Las reservas pendientes existentes quedan sin
+    plazo; el plazo se asigna a las reservas nuevas.
+    """
+    op.create_table(
+        "retenciones_reserva",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column(
+            "espacio_comun_id",
+            sa.BigInteger(),
+            sa.ForeignKey("espacios_comunes.id", onupdate="CASCADE", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "usuario_id",
+            sa.BigInteger(),
+            sa.ForeignKey("usuarios.id", onupdate="CASCADE", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("fecha_hora_inicio", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("fecha_hora_fin", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expira_en", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("espacio_comun_id", "fecha_hora_inicio", name="uq_retenciones_espacio_inicio"),
+        sa.CheckConstraint("fecha_hora_fin > fecha_hora_inicio", name="chk_retenciones_fechas"),
+        mysql_charset="utf8mb4",
+        mysql_engine="InnoDB",
+    )
+    op.create_index("idx_retenciones_expira_en", "retenciones_reserva", ["expira_en"])
+
+    op.add_column("reservas", sa.Column("pago_expira_en", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("idx_reservas_estado_pago_expira", "reservas", ["estado_pago", "pago_expira_en"])
+
+
+def downgrade() -> None:
+    """
+    Revierte la migración eliminando la tabla de retenciones y el plazo de pago.
+    """
+    op.drop_index("idx_reservas_estado_pago_expira", table_name="reservas")
+    op.drop_column("reservas", "pago_expira_en")
+    op.drop_index("idx_retenciones_expira_en", table_name="retenciones_reserva")
+    op.drop_table("retenciones_reserva")
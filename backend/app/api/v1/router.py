@@ -13,7 +13,7 @@ puedan acceder a ellas.
 from fastapi import APIRouter, Depends
 
 from app.core.auth import get_current_active_user
-from .routes import auth, gastos, reservas, pagos, dashboard, multas, anuncios, perfil, residentes, morosidad, viviendas
+from .routes import auth, gastos, reservas, pagos, dashboard, multas, anuncios, perfil, residentes, morosidad, viviendas, calendario, exportaciones, reportes, facturacion, uf
 
 # Router principal de la API
 api_router = APIRouter()
@@ -21,8 +21,11 @@ api_router = APIRouter()
 # ============================================================================
 # RUTAS PÚBLICAS (No requieren autenticación)
 # ============================================================================
-# Solo las rutas de autenticación (login, register) son públicas
+# Solo las rutas de autenticación (login, register) y los feeds de calendario son públicas
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+# Los feeds .ics se autentican con un token de suscripción en la URL porque
+# los clientes de calendario no envían el header Authorization
+api_router.include_router(calendario.router, prefix="/calendario", tags=["calendario"])
 
 # ============================================================================
 # RUTAS PROTEGIDAS (Requieren autenticación JWT)
@@ -42,6 +45,10 @@ protected_router.include_router(perfil.router, prefix="/perfil", tags=["perfil"]
 protected_router.include_router(residentes.router, prefix="/residentes", tags=["residentes"])
 protected_router.include_router(morosidad.router, prefix="/morosidad", tags=["morosidad"])
 protected_router.include_router(viviendas.router, prefix="/viviendas", tags=["viviendas"])
+protected_router.include_router(exportaciones.router, prefix="/exportaciones", tags=["exportaciones"])
+protected_router.include_router(reportes.router, prefix="/reportes", tags=["reportes"])
+protected_router.include_router(facturacion.router, prefix="/facturacion", tags=["facturacion"])
+protected_router.include_router(uf.router, prefix="/uf", tags=["uf"])
 
 # Incluir el router protegido en el router principal
 api_router.include_router(protected_router)
@@ -1,18 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List
+from sqlalchemy import and_, func, or_
+from typing import List, Optional
 from datetime import date
 
 from ....db.deps import get_db
 from ....core.auth import get_current_active_user
+from ....core.validadores import calcular_validador, respuesta_no_modificada
 from ....models.models import Anuncio, Usuario, Condominio
+from ....services.sincronizacion import abrir_delta, cursor_actual, eliminados_desde
 
 router = APIRouter()
 
+def _anuncio_a_dict(anuncio: Anuncio, autores: dict) -> dict:
+    return {
+        "id": anuncio.id,
+        "titulo": anuncio.titulo,
+        "contenido": anuncio.contenido,
+        "tipo": anuncio.tipo,
+        "autor": autores.get(anuncio.autor_id, "Desconocido"),
+        "fecha_publicacion": anuncio.fecha_publicacion.isoformat() if anuncio.fecha_publicacion else None,
+        "fecha_expiracion": anuncio.fecha_expiracion.isoformat() if anuncio.fecha_expiracion else None,
+        "created_at": anuncio.created_at.isoformat() if anuncio.created_at else None
+    }
+
+def _nombres_autores(db: Session, anuncios) -> dict:
+    autor_ids = list(set([a.autor_id for a in anuncios]))
+    if not autor_ids:
+        return {}
+    return {u.id: u.nombre_completo for u in db.query(Usuario).filter(Usuario.id.in_(autor_ids)).all()}
+
+def _es_visible(anuncio: Anuncio, hoy: date) -> bool:
+    return bool(anuncio.is_active) and (anuncio.fecha_expiracion is None or anuncio.fecha_expiracion >= hoy)
+
+def _delta_anuncios(db: Session, condominio_id: int, since: str, hoy: date) -> dict:
+    """
+    Cambios de anuncios desde el cursor.
+
+    Un anuncio desactivado o que expiró desde el cursor se informa como
+    eliminado, ya que deja de pertenecer a la lista de anuncios activos.
+    """
+    delta = abrir_delta(db, since)
+    modificados = db.query(Anuncio).filter(
+        Anuncio.condominio_id == condominio_id,
+        Anuncio.updated_at >= delta.desde
+    ).all()
+    visibles = [a for a in modificados if _es_visible(a, hoy)]
+    eliminados = [a.id for a in modificados if not _es_visible(a, hoy)]
+    
+    # Anuncios que expiraron por fecha, sin cambios en la BD
+    eliminados += [
+        fila.id for fila in db.query(Anuncio.id).filter(
+            Anuncio.condominio_id == condominio_id,
+            Anuncio.fecha_expiracion >= delta.desde.date(),
+            Anuncio.fecha_expiracion < hoy
+        ).all()
+    ]
+    eliminados += eliminados_desde(db, "anuncios", delta.desde, condominio_id=condominio_id)
+    
+    autores = _nombres_autores(db, visibles)
+    return delta.respuesta([_anuncio_a_dict(a, autores) for a in visibles], eliminados)
+
 @router.get("/condominio/{condominio_id}")
 async def obtener_anuncios_activos(
     condominio_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
@@ -21,53 +75,57 @@ async def obtener_anuncios_activos(
     
     Args:
         condominio_id: ID del condominio
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
     
     Returns:
-        Lista de anuncios activos
+        Lista de anuncios activos (304 si el If-None-Match coincide)
     """
     try:
         hoy = date.today()
+        if since:
+            return _delta_anuncios(db, condominio_id, since, hoy)
         
-        # Obtener anuncios activos que no hayan expirado
-        anuncios = db.query(Anuncio).filter(
+        filtros = (
             Anuncio.condominio_id == condominio_id,
             Anuncio.is_active == True,
             or_(
                 Anuncio.fecha_expiracion.is_(None),
                 Anuncio.fecha_expiracion >= hoy
             )
-        ).order_by(
+        )
+        
+        # La fecha forma parte del alcance: un anuncio puede expirar sin cambios en la BD
+        validador = calcular_validador(
+            ("anuncios", condominio_id, hoy),
+            db.query(
+                func.count(Anuncio.id), func.max(Anuncio.updated_at), func.max(Usuario.updated_at)
+            ).outerjoin(Usuario, Usuario.id == Anuncio.autor_id).filter(*filtros),
+        )
+        no_modificada = respuesta_no_modificada(request, validador)
+        if no_modificada is not None:
+            return no_modificada
+        validador.aplicar(response)
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
+        
+        # Obtener anuncios activos que no hayan expirado
+        anuncios = db.query(Anuncio).filter(*filtros).order_by(
             Anuncio.fecha_publicacion.desc(),
             Anuncio.created_at.desc()
         ).all()
         
         # Obtener información de autores
-        autor_ids = list(set([a.autor_id for a in anuncios]))
-        autores = {}
-        if autor_ids:
-            usuarios = db.query(Usuario).filter(Usuario.id.in_(autor_ids)).all()
-            for u in usuarios:
-                autores[u.id] = u.nombre_completo
+        autores = _nombres_autores(db, anuncios)
         
-        anuncios_response = []
-        for anuncio in anuncios:
-            anuncios_response.append({
-                "id": anuncio.id,
-                "titulo": anuncio.titulo,
-                "contenido": anuncio.contenido,
-                "tipo": anuncio.tipo,
-                "autor": autores.get(anuncio.autor_id, "Desconocido"),
-                "fecha_publicacion": anuncio.fecha_publicacion.isoformat() if anuncio.fecha_publicacion else None,
-                "fecha_expiracion": anuncio.fecha_expiracion.isoformat() if anuncio.fecha_expiracion else None,
-                "created_at": anuncio.created_at.isoformat() if anuncio.created_at else None
-            })
+        anuncios_response = [_anuncio_a_dict(anuncio, autores) for anuncio in anuncios]
         
         return {
             "anuncios": anuncios_response,
             "total": len(anuncios_response)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -76,6 +134,9 @@ async def obtener_anuncios_activos(
 
 @router.get("/activos")
 async def obtener_anuncios_activos_general(
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
@@ -83,6 +144,7 @@ async def obtener_anuncios_activos_general(
     Obtiene todos los anuncios activos del primer condominio (para MVP).
     
     Args:
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
     
     Returns:
@@ -97,8 +159,10 @@ async def obtener_anuncios_activos_general(
                 "total": 0
             }
         
-        return await obtener_anuncios_activos(condominio.id, db)
+        return await obtener_anuncios_activos(condominio.id, request, response, since, db)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,217 @@
+"""
+Rutas de feeds iCalendar (.ics) de reservas.
+
+Los clientes de calendario no pueden enviar el header Authorization, por lo que
+los feeds se autentican con un token de suscripción en la URL (?token=...).
+El token se obtiene desde GET /calendario/suscripciones con la sesión normal.
+
+- /calendario/espacios/{espacio_comun_id}.ics: ocupación de un espacio, sin
+  datos personales
+- /calendario/mis-reservas.ics: reservas del titular del token
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from jose import JWTError
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_active_user
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token
+from app.core.validadores import etag_coincide
+from app.db.deps import get_db
+from app.models.models import EspacioComun, Reserva, Usuario
+from app.services.ical import FeedRenderizado, feeds, renderizar_calendario
+
+router = APIRouter()
+
+# Claim que distingue los tokens de suscripción de los tokens de sesión
+SCOPE_ICAL = "ical"
+
+
+def _usuario_desde_token(token: str, db: Session) -> Usuario:
+    """
+    Valida un token de suscripción y retorna su titular.
+
+    Raises:
+        HTTPException 401: Si el token es inválido, expiró, no es de
+            suscripción o el usuario no está activo
+    """
+    credenciales_invalidas = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token de suscripción inválido",
+    )
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise credenciales_invalidas
+
+    if payload.get("scope") != SCOPE_ICAL or payload.get("sub") is None:
+        raise credenciales_invalidas
+
+    try:
+        usuario = db.query(Usuario).filter(Usuario.id == int(payload["sub"])).first()
+    except (TypeError, ValueError):
+        raise credenciales_invalidas
+
+    if usuario is None or not usuario.is_active:
+        raise credenciales_invalidas
+    return usuario
+
+
+def _respuesta_condicional(request: Request, feed: FeedRenderizado, nombre_archivo: str) -> Response:
+    """
+    Responde 304 si el cliente ya tiene la versión actual del feed.
+
+    If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+    """
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": format_datetime(feed.ultima_modificacion, usegmt=True),
+        "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+
+    if request.headers.get("if-none-match") is not None:
+        if etag_coincide(request, feed.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                desde = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                desde = None
+            if desde is not None and desde.tzinfo is not None and feed.ultima_modificacion <= desde:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    headers["Content-Disposition"] = f'inline; filename="{nombre_archivo}"'
+    return Response(content=feed.contenido, media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+def _desde_historial() -> datetime:
+    return datetime.now() - timedelta(days=settings.ICAL_DIAS_HISTORIAL)
+
+
+@router.get("/suscripciones")
+async def obtener_suscripciones(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Genera las URLs de suscripción a los feeds .ics para el usuario autenticado.
+
+    Returns:
+        URL del feed personal y de cada espacio común, con el token incluido
+    """
+    token = create_access_token(
+        subject=current_user.id,
+        expires_delta=timedelta(days=settings.ICAL_TOKEN_DIAS),
+        additional_claims={"scope": SCOPE_ICAL},
+    )
+    base = str(request.base_url).rstrip("/") + request.url.path.rsplit("/", 1)[0]
+
+    espacios = db.query(EspacioComun).order_by(EspacioComun.id.asc()).all()
+    return {
+        "mis_reservas": f"{base}/mis-reservas.ics?token={token}",
+        "espacios": [
+            {
+                "id": espacio.id,
+                "nombre": espacio.nombre,
+                "url": f"{base}/espacios/{espacio.id}.ics?token={token}",
+            }
+            for espacio in espacios
+        ],
+        "expira_en": (datetime.now(timezone.utc) + timedelta(days=settings.ICAL_TOKEN_DIAS)).isoformat(),
+    }
+
+
+@router.get("/espacios/{espacio_comun_id}.ics")
+async def feed_espacio(
+    espacio_comun_id: int,
+    request: Request,
+    token: str,
+    db: Session = Depends(get_db),
+):
+    """
+    Feed iCalendar con la ocupación de un espacio común.
+
+    Solo expone los horarios ocupados; no incluye datos de quien reservó.
+    """
+    _usuario_desde_token(token, db)
+
+    espacio = db.query(EspacioComun).filter(EspacioComun.id == espacio_comun_id).first()
+    if not espacio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Espacio {espacio_comun_id} no encontrado",
+        )
+
+    def _renderizar() -> bytes:
+        reservas = db.query(
+            Reserva.id, Reserva.fecha_hora_inicio, Reserva.fecha_hora_fin, Reserva.created_at
+        ).filter(
+            Reserva.espacio_comun_id == espacio.id,
+            Reserva.fecha_hora_fin >= _desde_historial(),
+        ).order_by(Reserva.fecha_hora_inicio.asc()).all()
+        return renderizar_calendario(
+            espacio.nombre,
+            (
+                {
+                    "uid": f"reserva-{r.id}@condominio",
+                    "inicio": r.fecha_hora_inicio,
+                    "fin": r.fecha_hora_fin,
+                    "titulo": f"Ocupado - {espacio.nombre}",
+                    "creado": r.created_at,
+                }
+                for r in reservas
+            ),
+        )
+
+    feed = feeds.obtener(("espacio", espacio.id), _renderizar)
+    return _respuesta_condicional(request, feed, f"espacio-{espacio.id}.ics")
+
+
+@router.get("/mis-reservas.ics")
+async def feed_usuario(
+    request: Request,
+    token: str,
+    db: Session = Depends(get_db),
+):
+    """
+    Feed iCalendar personal con las reservas del titular del token.
+    """
+    usuario = _usuario_desde_token(token, db)
+
+    def _renderizar() -> bytes:
+        reservas = db.query(
+            Reserva.id,
+            Reserva.fecha_hora_inicio,
+            Reserva.fecha_hora_fin,
+            Reserva.created_at,
+            Reserva.estado_pago,
+            EspacioComun.nombre,
+        ).join(
+            EspacioComun, EspacioComun.id == Reserva.espacio_comun_id
+        ).filter(
+            Reserva.usuario_id == usuario.id,
+            Reserva.fecha_hora_fin >= _desde_historial(),
+        ).order_by(Reserva.fecha_hora_inicio.asc()).all()
+        return renderizar_calendario(
+            f"Mis reservas - {usuario.nombre_completo}",
+            (
+                {
+                    "uid": f"reserva-{r.id}@condominio",
+                    "inicio": r.fecha_hora_inicio,
+                    "fin": r.fecha_hora_fin,
+                    "titulo": f"Reserva - {r.nombre}",
+                    "descripcion": f"Estado de pago: {r.estado_pago}",
+                    "creado": r.created_at,
+                }
+                for r in reservas
+            ),
+        )
+
+    feed = feeds.obtener(("usuario", usuario.id), _renderizar)
+    return _respuesta_condicional(request, feed, "mis-reservas.ics")
@@ -1,19 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy import func, and_, or_, case, tuple_
+from typing import Dict, Any, Optional
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 from ....db.deps import get_db
 from ....models.models import (
+    ESTADOS_GASTO_IMPAGO,
     Usuario, Vivienda, GastoComun, Multa, Reserva, Pago, 
-    ResidenteVivienda, EspacioComun, Condominio
+    ResidenteVivienda, EspacioComun, Condominio, ResumenMensual, SaldoVivienda
 )
 from ....core.auth import get_current_active_user
+from ....core.cache import CacheRespuestas
+from ....core.config import settings
+from ....core.single_flight import SingleFlight
+# Registra los hooks que mantienen resumen_mensual al escribir gastos, pagos y multas
+from ....services import resumen_mensual  # noqa: F401
+from ....services.cuenta_corriente import saldos
 
 router = APIRouter()
 
+# Caché de estadísticas por rol (y por usuario en el caso de residentes).
+# Se invalida al confirmar cambios en las tablas de las que dependen los KPIs.
+cache_dashboard = CacheRespuestas("dashboard", settings.DASHBOARD_CACHE_SEGUNDOS)
+
+vuelos_dashboard = SingleFlight("dashboard")
+
+TABLAS_DASHBOARD = {
+    tabla.__tablename__
+    for tabla in (Usuario, Vivienda, GastoComun, Multa, Reserva, Pago, ResidenteVivienda, EspacioComun, ResumenMensual, SaldoVivienda)
+}
+
 def decimal_to_float(value):
     """Convierte Decimal a float"""
     if isinstance(value, Decimal):
@@ -23,6 +41,7 @@ def decimal_to_float(value):
 @router.get("/stats/{usuario_id}")
 async def obtener_estadisticas_dashboard(
     usuario_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -34,7 +53,8 @@ async def obtener_estadisticas_dashboard(
         db: Sesión de base de datos
     
     Returns:
-        Estadísticas personalizadas según el rol
+        Estadísticas personalizadas según el rol. El header X-Cache indica
+        si la respuesta se sirvió desde caché (HIT) o se calculó (MISS)
     """
     try:
         # Validar acceso
@@ -66,21 +86,36 @@ async def obtener_estadisticas_dashboard(
         }
         frontend_role = role_mapping.get(rol, rol.lower())
         
-        stats = {}
+        # Las estadísticas de administración y conserjería son del condominio;
+        # las del residente son propias de cada usuario
+        clave_cache = (frontend_role, usuario_id) if frontend_role == 'residente' else (frontend_role,)
+        stats = cache_dashboard.obtener(clave_cache)
+        if stats is not None:
+            response.headers["X-Cache"] = "HIT"
+            return stats
         
-        if frontend_role == 'admin':
-            # Estadísticas para Administrador
-            stats = await _stats_administrador(db)
-        elif frontend_role == 'conserje':
-            # Estadísticas para Conserje
-            stats = await _stats_conserje(db)
-        elif frontend_role == 'residente':
-            # Estadísticas para Residente
-            stats = await _stats_residente(usuario_id, db)
-        else:
-            # Estadísticas genéricas
-            stats = await _stats_generico(db)
+        def _calcular(db_calculo: Session) -> Dict[str, Any]:
+            # Antes de la primera consulta: si un commit invalida el dashboard
+            # durante el cálculo, el resultado no se guarda
+            generacion = cache_dashboard.generacion()
+            if frontend_role == 'admin':
+                # Estadísticas para Administrador
+                stats = _stats_administrador(db_calculo)
+            elif frontend_role == 'conserje':
+                # Estadísticas para Conserje
+                stats = _stats_conserje(db_calculo)
+            elif frontend_role == 'residente':
+                # Estadísticas para Residente
+                stats = _stats_residente(usuario_id, db_calculo)
+            else:
+                # Estadísticas genéricas
+                stats = _stats_generico(db_calculo)
+            cache_dashboard.guardar(clave_cache, stats, TABLAS_DASHBOARD, generacion)
+            return stats
         
+        # Peticiones concurrentes con la misma clave comparten un solo cálculo
+        stats = await vuelos_dashboard.ejecutar(clave_cache, _calcular, sesion_peticion=db)
+        response.headers["X-Cache"] = "MISS"
         return stats
         
     except HTTPException:
@@ -91,7 +126,79 @@ async def obtener_estadisticas_dashboard(
             detail=f"Error al obtener estadísticas: {str(e)}"
         )
 
-async def _stats_administrador(db: Session) -> Dict[str, Any]:
+@router.get("/resumen-mensual")
+async def obtener_resumen_mensual(
+    condominio_id: Optional[int] = None,
+    meses: int = Query(12, ge=1, le=120),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Emitido vs. recaudado vs. vencido por mes, leído del resumen materializado.
+    
+    Args:
+        condominio_id: Filtrar por condominio (por defecto suma todos)
+        meses: Cantidad de meses hacia atrás, incluyendo el actual
+        db: Sesión de base de datos
+    
+    Returns:
+        Una fila por mes (incluso sin movimientos) en orden cronológico
+    """
+    if current_user.rol not in {"Administrador", "Directiva", "Super Admin"}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para consultar el resumen financiero",
+        )
+    
+    hoy = date.today()
+    periodos = []
+    ano, mes = hoy.year, hoy.month
+    for _ in range(meses):
+        periodos.append((ano, mes))
+        ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+    periodos.reverse()
+    
+    consulta = db.query(
+        ResumenMensual.ano,
+        ResumenMensual.mes,
+        func.sum(ResumenMensual.monto_emitido).label("emitido"),
+        func.sum(ResumenMensual.monto_recaudado).label("recaudado"),
+        func.sum(ResumenMensual.monto_pendiente).label("pendiente"),
+        # Pendiente de los condominios cuyo vencimiento del período ya pasó
+        func.sum(case(
+            (ResumenMensual.vencimiento < hoy, ResumenMensual.monto_pendiente),
+            else_=0
+        )).label("vencido"),
+        func.sum(ResumenMensual.gastos_emitidos).label("gastos_emitidos"),
+        func.sum(ResumenMensual.gastos_pendientes).label("gastos_pendientes"),
+        func.sum(ResumenMensual.monto_multas).label("multas"),
+    ).filter(
+        tuple_(ResumenMensual.ano, ResumenMensual.mes).in_(periodos)
+    )
+    if condominio_id is not None:
+        consulta = consulta.filter(ResumenMensual.condominio_id == condominio_id)
+    filas = {
+        (fila.ano, fila.mes): fila
+        for fila in consulta.group_by(ResumenMensual.ano, ResumenMensual.mes).all()
+    }
+    
+    resultado = []
+    for ano, mes in periodos:
+        fila = filas.get((ano, mes))
+        resultado.append({
+            "ano": ano,
+            "mes": mes,
+            "emitido": decimal_to_float(fila.emitido) if fila else 0.0,
+            "recaudado": decimal_to_float(fila.recaudado) if fila else 0.0,
+            "pendiente": decimal_to_float(fila.pendiente) if fila else 0.0,
+            "vencido": decimal_to_float(fila.vencido) if fila else 0.0,
+            "gastos_emitidos": int(fila.gastos_emitidos or 0) if fila else 0,
+            "gastos_pendientes": int(fila.gastos_pendientes or 0) if fila else 0,
+            "multas": decimal_to_float(fila.multas) if fila else 0.0,
+        })
+    return resultado
+
+def _stats_administrador(db: Session) -> Dict[str, Any]:
     """Estadísticas para Administrador"""
     # Total de residentes activos
     residentes_activos = db.query(Usuario).filter(
@@ -102,22 +209,18 @@ async def _stats_administrador(db: Session) -> Dict[str, Any]:
     # Total de viviendas
     total_viviendas = db.query(Vivienda).count()
     
-    # Gastos comunes del mes actual
+    # Gastos comunes emitidos y pagos recibidos del mes actual (resumen materializado)
     mes_actual = datetime.now().month
     ano_actual = datetime.now().year
-    gastos_mes = db.query(GastoComun).filter(
-        GastoComun.mes == mes_actual,
-        GastoComun.ano == ano_actual
-    ).all()
-    
-    total_gastos = sum(decimal_to_float(g.monto_total) for g in gastos_mes)
-    
-    # Pagos recibidos este mes
-    pagos_mes = db.query(Pago).join(GastoComun).filter(
-        GastoComun.mes == mes_actual,
-        GastoComun.ano == ano_actual
-    ).all()
-    gastos_pagados = sum(decimal_to_float(p.monto_pagado) for p in pagos_mes)
+    emitido, recaudado = db.query(
+        func.sum(ResumenMensual.monto_emitido),
+        func.sum(ResumenMensual.monto_recaudado)
+    ).filter(
+        ResumenMensual.mes == mes_actual,
+        ResumenMensual.ano == ano_actual
+    ).one()
+    total_gastos = decimal_to_float(emitido)
+    gastos_pagados = decimal_to_float(recaudado)
     
     # Reservas activas (futuras)
     reservas_activas = db.query(Reserva).filter(
@@ -125,14 +228,10 @@ async def _stats_administrador(db: Session) -> Dict[str, Any]:
     ).count()
     
     # Morosidad (gastos vencidos no pagados)
-    gastos_vencidos = db.query(GastoComun).filter(
-        GastoComun.vencimiento < datetime.now().date(),
-        GastoComun.estado == 'pendiente'
-    ).count()
+    gastos_vencidos = db.query(GastoComun).filter(GastoComun.estado == 'vencido').count()
     
     total_vencido = db.query(func.sum(GastoComun.monto_total)).filter(
-        GastoComun.vencimiento < datetime.now().date(),
-        GastoComun.estado == 'pendiente'
+        GastoComun.estado == 'vencido'
     ).scalar() or 0
     
     morosidad_porcentaje = 0
@@ -170,11 +269,11 @@ async def _stats_administrador(db: Session) -> Dict[str, Any]:
                 "color": "red"
             }
         ],
-        "chart_data": await _chart_data_administrador(db),
-        "recent_activity": await _actividad_reciente_admin(db)
+        "chart_data": _chart_data_administrador(db),
+        "recent_activity": _actividad_reciente_admin(db)
     }
 
-async def _stats_conserje(db: Session) -> Dict[str, Any]:
+def _stats_conserje(db: Session) -> Dict[str, Any]:
     """Estadísticas para Conserje"""
     # Pagos registrados hoy
     hoy = datetime.now().date()
@@ -231,10 +330,10 @@ async def _stats_conserje(db: Session) -> Dict[str, Any]:
                 "color": "red"
             }
         ],
-        "recent_activity": await _actividad_reciente_conserje(db)
+        "recent_activity": _actividad_reciente_conserje(db)
     }
 
-async def _stats_residente(usuario_id: int, db: Session) -> Dict[str, Any]:
+def _stats_residente(usuario_id: int, db: Session) -> Dict[str, Any]:
     """Estadísticas para Residente"""
     # Obtener viviendas del residente
     viviendas = db.query(ResidenteVivienda).filter(
@@ -256,23 +355,13 @@ async def _stats_residente(usuario_id: int, db: Session) -> Dict[str, Any]:
     # Gastos comunes pendientes
     gastos_pendientes = db.query(GastoComun).filter(
         GastoComun.vivienda_id.in_(vivienda_ids),
-        GastoComun.estado == 'pendiente'
+        GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO)
     ).all()
     
     total_pendiente = sum(decimal_to_float(g.monto_total) for g in gastos_pendientes)
     
-    # Pagos realizados este mes
-    mes_actual = datetime.now().month
-    ano_actual = datetime.now().year
-    pagos_mes = db.query(Pago).join(GastoComun).filter(
-        Pago.usuario_id == usuario_id,
-        GastoComun.mes == mes_actual,
-        GastoComun.ano == ano_actual
-    ).all()
-    total_pagado_mes = sum(decimal_to_float(p.monto_pagado) for p in pagos_mes)
-    
-    # Saldo (gastos pendientes - pagos realizados)
-    saldo = total_pendiente - total_pagado_mes
+    # Saldo de la cuenta corriente de sus viviendas (positivo = deuda)
+    saldo = decimal_to_float(sum(saldos(db, vivienda_ids).values()))
     
     # Mis reservas activas
     reservas_activas = db.query(Reserva).filter(
@@ -316,10 +405,10 @@ async def _stats_residente(usuario_id: int, db: Session) -> Dict[str, Any]:
                 "color": "orange"
             }
         ],
-        "recent_activity": await _actividad_reciente_residente(usuario_id, db)
+        "recent_activity": _actividad_reciente_residente(usuario_id, db)
     }
 
-async def _stats_generico(db: Session) -> Dict[str, Any]:
+def _stats_generico(db: Session) -> Dict[str, Any]:
     """Estadísticas genéricas"""
     return {
         "stats": [
@@ -328,34 +417,34 @@ async def _stats_generico(db: Session) -> Dict[str, Any]:
         "recent_activity": []
     }
 
-async def _chart_data_administrador(db: Session) -> Dict[str, Any]:
+def _chart_data_administrador(db: Session) -> Dict[str, Any]:
     """Datos para gráfico de administrador"""
     # Últimos 6 meses
-    meses = []
+    fechas = [datetime.now() - timedelta(days=30 * i) for i in range(5, -1, -1)]
+    meses = [fecha.strftime('%b') for fecha in fechas]
+    
+    # Emitido y recaudado por mes desde el resumen materializado (una fila por mes)
+    totales = {
+        (fila.ano, fila.mes): fila
+        for fila in db.query(
+            ResumenMensual.ano,
+            ResumenMensual.mes,
+            func.sum(ResumenMensual.monto_emitido).label("emitido"),
+            func.sum(ResumenMensual.monto_recaudado).label("recaudado")
+        ).filter(
+            or_(*[
+                and_(ResumenMensual.ano == fecha.year, ResumenMensual.mes == fecha.month)
+                for fecha in fechas
+            ])
+        ).group_by(ResumenMensual.ano, ResumenMensual.mes).all()
+    }
+    
     ingresos = []
     gastos = []
-    
-    for i in range(5, -1, -1):
-        fecha = datetime.now() - timedelta(days=30 * i)
-        mes = fecha.month
-        ano = fecha.year
-        
-        meses.append(fecha.strftime('%b'))
-        
-        # Gastos comunes del mes
-        gastos_mes = db.query(func.sum(GastoComun.monto_total)).filter(
-            GastoComun.mes == mes,
-            GastoComun.ano == ano
-        ).scalar() or 0
-        
-        # Pagos recibidos del mes
-        pagos_mes = db.query(func.sum(Pago.monto_pagado)).join(GastoComun).filter(
-            GastoComun.mes == mes,
-            GastoComun.ano == ano
-        ).scalar() or 0
-        
-        ingresos.append(decimal_to_float(pagos_mes))
-        gastos.append(decimal_to_float(gastos_mes))
+    for fecha in fechas:
+        fila = totales.get((fecha.year, fecha.month))
+        ingresos.append(decimal_to_float(fila.recaudado) if fila else 0.0)
+        gastos.append(decimal_to_float(fila.emitido) if fila else 0.0)
     
     return {
         "labels": meses,
@@ -375,7 +464,7 @@ async def _chart_data_administrador(db: Session) -> Dict[str, Any]:
         ]
     }
 
-async def _actividad_reciente_admin(db: Session) -> list:
+def _actividad_reciente_admin(db: Session) -> list:
     """Actividad reciente para administrador"""
     actividades = []
     
@@ -426,11 +515,11 @@ async def _actividad_reciente_admin(db: Session) -> list:
         act.pop("timestamp", None)
     return actividades[:5]
 
-async def _actividad_reciente_conserje(db: Session) -> list:
+def _actividad_reciente_conserje(db: Session) -> list:
     """Actividad reciente para conserje"""
-    return await _actividad_reciente_admin(db)
+    return _actividad_reciente_admin(db)
 
-async def _actividad_reciente_residente(usuario_id: int, db: Session) -> list:
+def _actividad_reciente_residente(usuario_id: int, db: Session) -> list:
     """Actividad reciente para residente"""
     actividades = []
     
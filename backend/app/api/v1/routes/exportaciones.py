@@ -0,0 +1,428 @@
+"""
+Exportaciones contables de pagos, gastos comunes, multas y morosidad.
+
+Cada endpoint entrega el resultado completo en streaming como CSV o NDJSON
+(?formato=csv|ndjson), leyendo la BD por lotes con cursor del lado del
+servidor. Filtros comunes:
+- desde / hasta: rango de fechas (inclusive) sobre la fecha propia de cada tabla
+- condominio_id: viviendas de un condominio
+- estado: estado del gasto común (pendiente, vencido, pagado) cuando aplica
+
+Para análisis de varios años se exponen además snapshots Parquet de pagos,
+gastos comunes y reservas particionados por condominio y año
+(/exportaciones/snapshots).
+"""
+import os
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy import case, func, select
+
+from ....core.auth import get_current_active_user
+from ....core.single_flight import SingleFlight
+from ....models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Multa, Pago, Usuario, Vivienda
+from ....services.exportacion import respuesta_exportacion, validar_formato
+from ....services.snapshots import (
+    PYARROW_DISPONIBLE,
+    TABLAS_SNAPSHOT,
+    generar_snapshots,
+    leer_manifiesto,
+    ruta_particion,
+)
+
+router = APIRouter()
+
+vuelos_snapshots = SingleFlight("snapshots")
+
+ROLES_EXPORTACION = {"Administrador", "Super Admin"}
+
+
+def _verificar_permisos(current_user: Usuario) -> None:
+    if current_user.rol not in ROLES_EXPORTACION:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para exportar datos financieros",
+        )
+
+
+def _verificar_rango(desde: Optional[date], hasta: Optional[date]) -> None:
+    if desde and hasta and desde > hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'desde' no puede ser posterior a 'hasta'",
+        )
+
+
+def _sufijo(desde: Optional[date], hasta: Optional[date]) -> str:
+    """Sufijo del nombre de archivo según el rango exportado"""
+    if desde or hasta:
+        return f"_{desde.isoformat() if desde else 'inicio'}_{hasta.isoformat() if hasta else 'hoy'}"
+    return f"_{date.today().isoformat()}"
+
+
+@router.get("/pagos")
+async def exportar_pagos(
+    formato: str = "csv",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    condominio_id: Optional[int] = None,
+    estado: Optional[str] = None,
+    metodo_pago: Optional[str] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Exporta los pagos registrados.
+
+    Args:
+        formato: "csv" o "ndjson"
+        desde: Fecha de pago mínima (inclusive)
+        hasta: Fecha de pago máxima (inclusive)
+        condominio_id: Solo pagos de viviendas de este condominio
+        estado: Estado del gasto común pagado
+        metodo_pago: Método de pago (webpay, transferencia, ...)
+        current_user: Usuario autenticado
+
+    Returns:
+        Archivo CSV/NDJSON en streaming, ordenado por fecha de pago
+    """
+    _verificar_permisos(current_user)
+    formato = validar_formato(formato)
+    _verificar_rango(desde, hasta)
+
+    consulta = (
+        select(
+            Pago.id.label("pago_id"),
+            Pago.fecha_pago.label("fecha_pago"),
+            Pago.monto_pagado.label("monto_pagado"),
+            Pago.metodo_pago.label("metodo_pago"),
+            Pago.gasto_comun_id.label("gasto_comun_id"),
+            GastoComun.mes.label("mes"),
+            GastoComun.ano.label("ano"),
+            GastoComun.estado.label("estado_gasto"),
+            Vivienda.id.label("vivienda_id"),
+            Vivienda.numero_vivienda.label("numero_vivienda"),
+            Vivienda.condominio_id.label("condominio_id"),
+            Usuario.id.label("usuario_id"),
+            Usuario.nombre_completo.label("usuario_nombre"),
+            Usuario.email.label("usuario_email"),
+        )
+        .join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+        .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+        .join(Usuario, Usuario.id == Pago.usuario_id)
+        .order_by(Pago.fecha_pago, Pago.id)
+    )
+    # La fecha de pago es un timestamp: comparar contra límites de día completo
+    if desde:
+        consulta = consulta.where(Pago.fecha_pago >= desde)
+    if hasta:
+        consulta = consulta.where(Pago.fecha_pago < hasta + timedelta(days=1))
+    if condominio_id is not None:
+        consulta = consulta.where(Vivienda.condominio_id == condominio_id)
+    if estado:
+        consulta = consulta.where(GastoComun.estado == estado)
+    if metodo_pago:
+        consulta = consulta.where(Pago.metodo_pago == metodo_pago)
+
+    return respuesta_exportacion(consulta, formato, "pagos" + _sufijo(desde, hasta))
+
+
+@router.get("/gastos")
+async def exportar_gastos(
+    formato: str = "csv",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    condominio_id: Optional[int] = None,
+    estado: Optional[str] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Exporta los gastos comunes con el monto pagado de cada uno.
+
+    Args:
+        formato: "csv" o "ndjson"
+        desde: Fecha de vencimiento mínima (inclusive)
+        hasta: Fecha de vencimiento máxima (inclusive)
+        condominio_id: Solo viviendas de este condominio
+        estado: Estado del gasto (pendiente, vencido, pagado)
+        current_user: Usuario autenticado
+
+    Returns:
+        Archivo CSV/NDJSON en streaming, ordenado por período y vivienda
+    """
+    _verificar_permisos(current_user)
+    formato = validar_formato(formato)
+    _verificar_rango(desde, hasta)
+
+    pagado = (
+        select(
+            Pago.gasto_comun_id,
+            func.sum(Pago.monto_pagado).label("monto_pagado"),
+        )
+        .group_by(Pago.gasto_comun_id)
+        .subquery()
+    )
+    consulta = (
+        select(
+            GastoComun.id.label("gasto_id"),
+            GastoComun.ano.label("ano"),
+            GastoComun.mes.label("mes"),
+            GastoComun.vencimiento.label("vencimiento"),
+            GastoComun.estado.label("estado"),
+            GastoComun.monto_total.label("monto_total"),
+            func.coalesce(pagado.c.monto_pagado, 0).label("monto_pagado"),
+            Vivienda.id.label("vivienda_id"),
+            Vivienda.numero_vivienda.label("numero_vivienda"),
+            Vivienda.condominio_id.label("condominio_id"),
+        )
+        .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+        .outerjoin(pagado, pagado.c.gasto_comun_id == GastoComun.id)
+        .order_by(GastoComun.ano, GastoComun.mes, Vivienda.numero_vivienda, GastoComun.id)
+    )
+    if desde:
+        consulta = consulta.where(GastoComun.vencimiento >= desde)
+    if hasta:
+        consulta = consulta.where(GastoComun.vencimiento <= hasta)
+    if condominio_id is not None:
+        consulta = consulta.where(Vivienda.condominio_id == condominio_id)
+    if estado:
+        consulta = consulta.where(GastoComun.estado == estado)
+
+    return respuesta_exportacion(consulta, formato, "gastos_comunes" + _sufijo(desde, hasta))
+
+
+@router.get("/multas")
+async def exportar_multas(
+    formato: str = "csv",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    condominio_id: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Exporta las multas aplicadas.
+
+    Args:
+        formato: "csv" o "ndjson"
+        desde: Fecha de aplicación mínima (inclusive)
+        hasta: Fecha de aplicación máxima (inclusive)
+        condominio_id: Solo viviendas de este condominio
+        current_user: Usuario autenticado
+
+    Returns:
+        Archivo CSV/NDJSON en streaming, ordenado por fecha de aplicación
+    """
+    _verificar_permisos(current_user)
+    formato = validar_formato(formato)
+    _verificar_rango(desde, hasta)
+
+    consulta = (
+        select(
+            Multa.id.label("multa_id"),
+            Multa.fecha_aplicada.label("fecha_aplicada"),
+            Multa.monto.label("monto"),
+            Multa.descripcion.label("descripcion"),
+            Vivienda.id.label("vivienda_id"),
+            Vivienda.numero_vivienda.label("numero_vivienda"),
+            Vivienda.condominio_id.label("condominio_id"),
+        )
+        .join(Vivienda, Vivienda.id == Multa.vivienda_id)
+        .order_by(Multa.fecha_aplicada, Multa.id)
+    )
+    if desde:
+        consulta = consulta.where(Multa.fecha_aplicada >= desde)
+    if hasta:
+        consulta = consulta.where(Multa.fecha_aplicada <= hasta)
+    if condominio_id is not None:
+        consulta = consulta.where(Vivienda.condominio_id == condominio_id)
+
+    return respuesta_exportacion(consulta, formato, "multas" + _sufijo(desde, hasta))
+
+
+@router.get("/morosidad")
+async def exportar_morosidad(
+    formato: str = "csv",
+    fecha_corte: Optional[date] = None,
+    condominio_id: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Exporta las viviendas morosas a una fecha de corte.
+
+    Una vivienda es morosa si tiene algún gasto común pendiente vencido antes
+    de la fecha de corte. El total adeudado suma todos sus gastos pendientes y
+    sus multas (mismo criterio que GET /morosidad/), calculado con agregados
+    en la BD en lugar de consultas por vivienda.
+
+    Args:
+        formato: "csv" o "ndjson"
+        fecha_corte: Fecha de referencia para los vencimientos (default: hoy)
+        condominio_id: Solo viviendas de este condominio
+        current_user: Usuario autenticado
+
+    Returns:
+        Archivo CSV/NDJSON en streaming, ordenado por días de atraso
+    """
+    _verificar_permisos(current_user)
+    formato = validar_formato(formato)
+    fecha_corte = fecha_corte or date.today()
+
+    gastos = (
+        select(
+            GastoComun.vivienda_id,
+            func.count(GastoComun.id).label("gastos_pendientes"),
+            func.sum(GastoComun.monto_total).label("total_gastos"),
+            func.min(
+                case((GastoComun.vencimiento < fecha_corte, GastoComun.vencimiento))
+            ).label("vencimiento_mas_antiguo"),
+        )
+        .where(GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO))
+        .group_by(GastoComun.vivienda_id)
+        .subquery()
+    )
+    multas = (
+        select(
+            Multa.vivienda_id,
+            func.count(Multa.id).label("multas_pendientes"),
+            func.sum(Multa.monto).label("total_multas"),
+        )
+        .group_by(Multa.vivienda_id)
+        .subquery()
+    )
+    total_multas = func.coalesce(multas.c.total_multas, 0)
+    consulta = (
+        select(
+            Vivienda.id.label("vivienda_id"),
+            Vivienda.numero_vivienda.label("numero_vivienda"),
+            Vivienda.condominio_id.label("condominio_id"),
+            gastos.c.gastos_pendientes.label("gastos_pendientes"),
+            gastos.c.total_gastos.label("total_gastos"),
+            func.coalesce(multas.c.multas_pendientes, 0).label("multas_pendientes"),
+            total_multas.label("total_multas"),
+            (gastos.c.total_gastos + total_multas).label("total_adeudado"),
+            gastos.c.vencimiento_mas_antiguo.label("vencimiento_mas_antiguo"),
+        )
+        .join(gastos, gastos.c.vivienda_id == Vivienda.id)
+        .outerjoin(multas, multas.c.vivienda_id == Vivienda.id)
+        .where(gastos.c.vencimiento_mas_antiguo.isnot(None))
+        .order_by(gastos.c.vencimiento_mas_antiguo, Vivienda.id)
+    )
+    if condominio_id is not None:
+        consulta = consulta.where(Vivienda.condominio_id == condominio_id)
+
+    return respuesta_exportacion(consulta, formato, f"morosidad_{fecha_corte.isoformat()}")
+
+
+def _verificar_pyarrow() -> None:
+    if not PYARROW_DISPONIBLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Los snapshots Parquet requieren pyarrow instalado en el servidor",
+        )
+
+
+@router.post("/snapshots")
+async def actualizar_snapshots(
+    forzar: bool = False,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Actualiza los snapshots Parquet de pagos, gastos comunes y reservas.
+
+    Solo se reescriben las particiones (condominio, año) que cambiaron desde
+    la ejecución anterior. Si ya hay una actualización en curso, la petición
+    espera esa misma ejecución.
+
+    Args:
+        forzar: Si es True reescribe todas las particiones
+        current_user: Usuario autenticado
+
+    Returns:
+        Resumen por tabla de particiones reescritas, sin cambios y eliminadas
+    """
+    _verificar_permisos(current_user)
+    _verificar_pyarrow()
+
+    try:
+        return await vuelos_snapshots.ejecutar(
+            ("snapshots", forzar),
+            lambda db: generar_snapshots(db, forzar=forzar),
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar snapshots: {str(e)}"
+        )
+
+
+@router.get("/snapshots")
+async def listar_snapshots(
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Lista las particiones disponibles de cada snapshot.
+
+    Returns:
+        Por tabla: fecha de generación y particiones con filas, fecha de
+        escritura y URL de descarga
+    """
+    _verificar_permisos(current_user)
+
+    resultado = {}
+    for nombre in TABLAS_SNAPSHOT:
+        manifiesto = leer_manifiesto(nombre)
+        resultado[nombre] = {
+            "generado_en": manifiesto.get("generado_en"),
+            "particiones": [
+                {
+                    "condominio_id": particion["condominio_id"],
+                    "ano": particion["ano"],
+                    "filas": particion["filas"],
+                    "escrito_en": particion["escrito_en"],
+                    "url": f"/api/v1/exportaciones/snapshots/{nombre}/{particion['condominio_id']}/{particion['ano']}",
+                }
+                for particion in manifiesto["particiones"].values()
+            ],
+        }
+    return resultado
+
+
+@router.get("/snapshots/{tabla}/{condominio_id}/{ano}")
+async def descargar_snapshot(
+    tabla: str,
+    condominio_id: int,
+    ano: int,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Descarga el archivo Parquet de una partición.
+
+    Args:
+        tabla: pagos, gastos_comunes o reservas
+        condominio_id: ID del condominio
+        ano: Año de la partición
+
+    Returns:
+        Archivo .parquet
+    """
+    _verificar_permisos(current_user)
+
+    if tabla not in TABLAS_SNAPSHOT:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tabla '{tabla}' sin snapshots. Disponibles: {', '.join(TABLAS_SNAPSHOT)}",
+        )
+    ruta = ruta_particion(tabla, condominio_id, ano)
+    if not os.path.exists(ruta):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="La partición no existe; ejecute POST /exportaciones/snapshots",
+        )
+    return FileResponse(
+        ruta,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{tabla}_condominio{condominio_id}_{ano}.parquet",
+    )
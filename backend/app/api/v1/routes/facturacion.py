@@ -0,0 +1,233 @@
+"""
+Rutas de facturación: emisión masiva de los gastos comunes del mes.
+
+- POST /facturacion/emisiones: crea los gastos comunes de un condominio para
+  un mes (o retoma una emisión interrumpida desde su checkpoint)
+- GET /facturacion/emisiones: historial de emisiones y su avance
+- GET /facturacion/emisiones/{proceso_id}: avance de una emisión
+- POST /facturacion/prorrateo: reparte los gastos del mes del condominio
+  entre sus viviendas según su alícuota
+
+La lógica está en app/services/facturacion.py (también usable por línea de
+comandos) y app/services/prorrateo.py.
+"""
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ....core.auth import get_current_active_user
+from ....core.idempotencia import RutaIdempotente
+from ....core.single_flight import SingleFlight
+from ....db.deps import get_db
+from ....models.models import Condominio, ProcesoFacturacion, Usuario
+from ....services.facturacion import emitir_gastos, proceso_a_dict
+from ....services.prorrateo import NUMPY_DISPONIBLE, prorratear
+from ....services.uf import UFNoDisponibleError
+
+router = APIRouter(route_class=RutaIdempotente)
+
+vuelos_facturacion = SingleFlight("facturacion")
+
+ROLES_FACTURACION = {"Administrador", "Super Admin"}
+
+
+class EmisionCreate(BaseModel):
+    condominio_id: int
+    ano: int = Field(..., ge=2000)
+    mes: int = Field(..., ge=1, le=12)
+    valor_uf: Optional[float] = Field(None, gt=0)  # Por defecto la UF del primer día del período
+    vencimiento: Optional[date] = None
+
+
+class LineaGasto(BaseModel):
+    descripcion: str
+    monto: float = Field(..., ge=0)
+
+
+class ProrrateoCreate(BaseModel):
+    condominio_id: int
+    ano: int = Field(..., ge=2000)
+    mes: int = Field(..., ge=1, le=12)
+    lineas: List[LineaGasto] = Field(..., min_length=1)
+    vencimiento: Optional[date] = None
+    aplicar: bool = True
+
+
+def _verificar_permisos(current_user: Usuario) -> None:
+    if current_user.rol not in ROLES_FACTURACION:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para emitir gastos comunes",
+        )
+
+
+@router.post("/emisiones")
+async def crear_emision(
+    emision: EmisionCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Emite los gastos comunes de un condominio para un mes.
+
+    Idempotente: las viviendas que ya tienen el gasto del período se omiten y
+    una emisión interrumpida se retoma desde su último lote confirmado
+    (con los mismos parámetros).
+
+    Args:
+        emision: Condominio, período, valor de la UF opcional (por defecto el
+            del primer día del período) y vencimiento opcional
+
+    Returns:
+        Avance del proceso, gastos creados en esta ejecución, duración y
+        filas por segundo
+
+    Raises:
+        HTTPException 404: Si el condominio no existe
+        HTTPException 409: Si hay una emisión en curso del período con otros parámetros
+        HTTPException 503: Si no se indica el valor de la UF y no está disponible
+    """
+    _verificar_permisos(current_user)
+
+    if not db.query(Condominio.id).filter(Condominio.id == emision.condominio_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Condominio no encontrado",
+        )
+
+    try:
+        # Corre en el threadpool con su propia sesión (confirma por lote);
+        # peticiones idénticas simultáneas comparten la misma ejecución
+        return await vuelos_facturacion.ejecutar(
+            ("emision", emision.condominio_id, emision.ano, emision.mes, emision.valor_uf, emision.vencimiento),
+            lambda sesion: emitir_gastos(
+                sesion,
+                condominio_id=emision.condominio_id,
+                ano=emision.ano,
+                mes=emision.mes,
+                valor_uf=emision.valor_uf,
+                vencimiento=emision.vencimiento,
+            ),
+            sesion_peticion=db,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except UFNoDisponibleError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al emitir gastos comunes: {str(e)}"
+        )
+
+
+@router.get("/emisiones")
+async def listar_emisiones(
+    condominio_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Lista las emisiones de gastos comunes, de la más reciente a la más antigua.
+
+    Args:
+        condominio_id: Filtrar por condominio
+    """
+    _verificar_permisos(current_user)
+
+    consulta = db.query(ProcesoFacturacion)
+    if condominio_id is not None:
+        consulta = consulta.filter(ProcesoFacturacion.condominio_id == condominio_id)
+    procesos = consulta.order_by(
+        ProcesoFacturacion.ano.desc(),
+        ProcesoFacturacion.mes.desc(),
+        ProcesoFacturacion.id.desc(),
+    ).all()
+    return {
+        "emisiones": [proceso_a_dict(proceso) for proceso in procesos],
+        "total": len(procesos),
+    }
+
+
+@router.get("/emisiones/{proceso_id}")
+async def obtener_emision(
+    proceso_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Obtiene el avance de una emisión (checkpoint y contadores).
+    """
+    _verificar_permisos(current_user)
+
+    proceso = db.query(ProcesoFacturacion).filter(ProcesoFacturacion.id == proceso_id).first()
+    if not proceso:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Emisión no encontrada",
+        )
+    return proceso_a_dict(proceso)
+
+
+@router.post("/prorrateo")
+async def crear_prorrateo(
+    prorrateo: ProrrateoCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Reparte los gastos del mes del condominio entre sus viviendas según su alícuota.
+
+    Crea los gastos comunes faltantes del período y actualiza los que siguen
+    pendientes; los ya pagados no se modifican. Con aplicar=false solo
+    retorna el cálculo (vista previa).
+
+    Args:
+        prorrateo: Condominio, período, líneas de gasto y vencimiento opcional
+
+    Returns:
+        Total, monto y participación de cada vivienda, y gastos creados,
+        actualizados y omitidos
+
+    Raises:
+        HTTPException 400: Si ninguna vivienda tiene alícuota
+        HTTPException 503: Si numpy no está instalado
+    """
+    _verificar_permisos(current_user)
+
+    if not NUMPY_DISPONIBLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El prorrateo no está disponible (falta numpy)",
+        )
+    if not db.query(Condominio.id).filter(Condominio.id == prorrateo.condominio_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Condominio no encontrado",
+        )
+
+    try:
+        return await run_in_threadpool(
+            prorratear,
+            db,
+            condominio_id=prorrateo.condominio_id,
+            ano=prorrateo.ano,
+            mes=prorrateo.mes,
+            lineas=[linea.model_dump() for linea in prorrateo.lineas],
+            vencimiento=prorrateo.vencimiento,
+            aplicar=prorrateo.aplicar,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al prorratear gastos: {str(e)}"
+        )
@@ -5,23 +5,69 @@ Este módulo proporciona endpoints para:
 - Listar gastos comunes de una vivienda específica
 - Listar gastos comunes de un usuario (todas sus viviendas)
 
+Ambas listas aceptan ?since=<cursor> para recibir solo los cambios y
+eliminaciones desde la última consulta (ver app/services/sincronizacion.py).
+
 Los gastos comunes son los gastos mensuales que cada vivienda debe pagar
 (mantenimiento, servicios, etc.).
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.auth import get_current_active_user
+from app.core.validadores import calcular_validador, respuesta_no_modificada
 from app.db.deps import get_db
 from app.models.models import GastoComun, ResidenteVivienda, Usuario, Vivienda
+from app.services.sincronizacion import abrir_delta, cursor_actual, eliminados_desde
 
 router = APIRouter()
 
 
+def _gasto_a_dict(gasto: GastoComun) -> dict:
+    return {
+        "id": gasto.id,
+        "mes": gasto.mes,
+        "ano": gasto.ano,
+        "monto_total": float(gasto.monto_total),
+        "estado": gasto.estado,
+        "vencimiento": gasto.vencimiento.isoformat() if gasto.vencimiento else None,
+        "created_at": gasto.created_at.isoformat() if gasto.created_at else None,
+    }
+
+
+def _gasto_con_vivienda(gasto: GastoComun, viviendas_info: dict) -> dict:
+    return {
+        "id": gasto.id,
+        "vivienda_id": gasto.vivienda_id,
+        "vivienda_numero": viviendas_info.get(gasto.vivienda_id, "N/A"),
+        "mes": gasto.mes,
+        "ano": gasto.ano,
+        "monto_total": float(gasto.monto_total),
+        "estado": gasto.estado,
+        "vencimiento": gasto.vencimiento.isoformat() if gasto.vencimiento else None,
+        "created_at": gasto.created_at.isoformat() if gasto.created_at else None,
+    }
+
+
+def _validador_gastos(alcance, db: Session, vivienda_ids):
+    """Validador de los gastos (y números de vivienda) de las viviendas indicadas"""
+    return calcular_validador(
+        alcance,
+        db.query(func.count(GastoComun.id), func.max(GastoComun.updated_at)).filter(
+            GastoComun.vivienda_id.in_(vivienda_ids)
+        ),
+        db.query(func.max(Vivienda.updated_at)).filter(Vivienda.id.in_(vivienda_ids)),
+    )
+
+
 @router.get("/vivienda/{vivienda_id}")
 async def listar_gastos(
     vivienda_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -34,11 +80,14 @@ async def listar_gastos(
     
     Args:
         vivienda_id: ID de la vivienda
+        since: Cursor de una consulta anterior; si se indica solo se retornan
+            los cambios y eliminaciones desde entonces
         db: Sesión de base de datos
         current_user: Usuario autenticado
         
     Returns:
-        Lista de gastos comunes ordenados por año y mes (más recientes primero)
+        Lista de gastos comunes ordenados por año y mes (más recientes primero).
+        Responde 304 si el If-None-Match del cliente coincide con la versión actual
         
     Raises:
         HTTPException 403: Si el usuario no tiene permisos
@@ -66,6 +115,24 @@ async def listar_gastos(
                 detail="No tienes permisos para ver los gastos de esta vivienda",
             )
 
+    if since:
+        delta = abrir_delta(db, since)
+        cambios = db.query(GastoComun).filter(
+            GastoComun.vivienda_id == vivienda_id,
+            GastoComun.updated_at >= delta.desde,
+        ).all()
+        return delta.respuesta(
+            [_gasto_a_dict(gasto) for gasto in cambios],
+            eliminados_desde(db, "gastos_comunes", delta.desde, vivienda_id=vivienda_id),
+        )
+
+    validador = _validador_gastos(("gastos_vivienda", vivienda_id), db, [vivienda_id])
+    no_modificada = respuesta_no_modificada(request, validador)
+    if no_modificada is not None:
+        return no_modificada
+    validador.aplicar(response)
+    response.headers["X-Sync-Cursor"] = cursor_actual(db)
+
     gastos = (
         db.query(GastoComun)
         .filter(GastoComun.vivienda_id == vivienda_id)
@@ -73,23 +140,15 @@ async def listar_gastos(
         .all()
     )
 
-    return [
-        {
-            "id": gasto.id,
-            "mes": gasto.mes,
-            "ano": gasto.ano,
-            "monto_total": float(gasto.monto_total),
-            "estado": gasto.estado,
-            "vencimiento": gasto.vencimiento.isoformat() if gasto.vencimiento else None,
-            "created_at": gasto.created_at.isoformat() if gasto.created_at else None,
-        }
-        for gasto in gastos
-    ]
+    return [_gasto_a_dict(gasto) for gasto in gastos]
 
 
 @router.get("/usuario/{usuario_id}")
 async def listar_gastos_usuario(
     usuario_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -105,6 +164,7 @@ async def listar_gastos_usuario(
     
     Args:
         usuario_id: ID del usuario
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
         current_user: Usuario autenticado
         
@@ -127,10 +187,34 @@ async def listar_gastos_usuario(
             ResidenteVivienda.usuario_id == usuario_id
         ).all()
         
-        if not viviendas_rel:
+        vivienda_ids = [rv.vivienda_id for rv in viviendas_rel]
+
+        if since:
+            delta = abrir_delta(db, since)
+            if not vivienda_ids:
+                return delta.respuesta([], [])
+            cambios = db.query(GastoComun).filter(
+                GastoComun.vivienda_id.in_(vivienda_ids),
+                GastoComun.updated_at >= delta.desde,
+            ).all()
+            viviendas_info = {
+                vivienda.id: vivienda.numero_vivienda
+                for vivienda in db.query(Vivienda).filter(Vivienda.id.in_(vivienda_ids)).all()
+            }
+            return delta.respuesta(
+                [_gasto_con_vivienda(gasto, viviendas_info) for gasto in cambios],
+                eliminados_desde(db, "gastos_comunes", delta.desde, vivienda_id=vivienda_ids),
+            )
+
+        if not vivienda_ids:
             return []
 
-        vivienda_ids = [rv.vivienda_id for rv in viviendas_rel]
+        validador = _validador_gastos(("gastos_usuario", usuario_id, tuple(sorted(vivienda_ids))), db, vivienda_ids)
+        no_modificada = respuesta_no_modificada(request, validador)
+        if no_modificada is not None:
+            return no_modificada
+        validador.aplicar(response)
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
 
         # Obtener todos los gastos de las viviendas del usuario
         gastos = (
@@ -145,20 +229,7 @@ async def listar_gastos_usuario(
         for vivienda in db.query(Vivienda).filter(Vivienda.id.in_(vivienda_ids)).all():
             viviendas_info[vivienda.id] = vivienda.numero_vivienda
 
-        return [
-            {
-                "id": gasto.id,
-                "vivienda_id": gasto.vivienda_id,
-                "vivienda_numero": viviendas_info.get(gasto.vivienda_id, "N/A"),
-                "mes": gasto.mes,
-                "ano": gasto.ano,
-                "monto_total": float(gasto.monto_total),
-                "estado": gasto.estado,
-                "vencimiento": gasto.vencimiento.isoformat() if gasto.vencimiento else None,
-                "created_at": gasto.created_at.isoformat() if gasto.created_at else None,
-            }
-            for gasto in gastos
-        ]
+        return [_gasto_con_vivienda(gasto, viviendas_info) for gasto in gastos]
 
     except HTTPException:
         raise
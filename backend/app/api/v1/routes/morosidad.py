@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func
+from collections import defaultdict
 from typing import List
 from decimal import Decimal
 from datetime import date, datetime, timedelta
 
 from ....db.deps import get_db
-from ....models.models import GastoComun, Vivienda, ResidenteVivienda, Usuario, Pago, Multa
+from ....models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Vivienda, ResidenteVivienda, Usuario, Pago, Multa
 from ....core.auth import get_current_active_user
+from ....core.single_flight import SingleFlight
+from ....services.cuenta_corriente import saldos
 
 router = APIRouter()
 
+vuelos_morosidad = SingleFlight("morosidad")
+
 def decimal_to_float(value):
     """Convierte Decimal a float"""
     if isinstance(value, Decimal):
@@ -29,97 +34,101 @@ async def obtener_morosidad(
     Returns:
         Lista de viviendas con pagos atrasados
     """
-    try:
-        if current_user.rol not in {"Administrador", "Conserje", "Directiva", "Super Admin"}:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para consultar la morosidad",
-            )
+    if current_user.rol not in {"Administrador", "Conserje", "Directiva", "Super Admin"}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para consultar la morosidad",
+        )
 
-        hoy = date.today()
-        
-        # Obtener gastos comunes vencidos y no pagados
-        gastos_vencidos = db.query(GastoComun).filter(
-            and_(
-                GastoComun.vencimiento < hoy,
-                GastoComun.estado == 'pendiente'
-            )
-        ).all()
-        
-        resultado = []
-        viviendas_procesadas = set()
-        
-        for gasto in gastos_vencidos:
-            if gasto.vivienda_id in viviendas_procesadas:
-                continue
-                
-            vivienda = db.query(Vivienda).filter(Vivienda.id == gasto.vivienda_id).first()
-            if not vivienda:
-                continue
-            
-            # Obtener residentes de la vivienda
-            residentes_rel = db.query(ResidenteVivienda).filter(
-                ResidenteVivienda.vivienda_id == gasto.vivienda_id
-            ).all()
-            
-            residentes_info = []
-            for rv in residentes_rel:
-                residente = db.query(Usuario).filter(Usuario.id == rv.usuario_id).first()
-                if residente:
-                    residentes_info.append({
-                        "id": residente.id,
-                        "nombre": residente.nombre_completo,
-                        "email": residente.email
-                    })
-            
-            # Calcular total adeudado
-            gastos_vivienda = db.query(GastoComun).filter(
-                and_(
-                    GastoComun.vivienda_id == gasto.vivienda_id,
-                    GastoComun.estado == 'pendiente'
-                )
-            ).all()
-            
-            multas_vivienda = db.query(Multa).filter(
-                Multa.vivienda_id == gasto.vivienda_id
-            ).all()
-            
-            total_gastos = sum(decimal_to_float(g.monto_total) for g in gastos_vivienda)
-            total_multas = sum(decimal_to_float(m.monto) for m in multas_vivienda)
-            total_adeudado = total_gastos + total_multas
-            
-            # Calcular días de atraso
-            dias_atraso = 0
-            if gasto.vencimiento:
-                dias_atraso = (hoy - gasto.vencimiento).days
-            
-            resultado.append({
-                "vivienda_id": vivienda.id,
-                "numero_vivienda": vivienda.numero_vivienda,
-                "residentes": residentes_info,
-                "total_adeudado": total_adeudado,
-                "gastos_pendientes": len(gastos_vivienda),
-                "multas_pendientes": len(multas_vivienda),
-                "dias_atraso": dias_atraso,
-                "fecha_vencimiento_mas_antigua": gasto.vencimiento.isoformat() if gasto.vencimiento else None
-            })
-            
-            viviendas_procesadas.add(gasto.vivienda_id)
-        
-        # Ordenar por días de atraso (mayor a menor)
-        resultado.sort(key=lambda x: x["dias_atraso"], reverse=True)
-        
-        total_morosidad = sum(r["total_adeudado"] for r in resultado)
-        
-        return {
-            "viviendas_morosas": resultado,
-            "total_viviendas": len(resultado),
-            "total_morosidad": total_morosidad
-        }
-        
+    try:
+        # El resultado es el mismo para todos los roles autorizados, por lo que
+        # las consultas concurrentes comparten un solo cálculo
+        return await vuelos_morosidad.ejecutar("morosidad", _calcular_morosidad, sesion_peticion=db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener morosidad: {str(e)}"
         )
 
+
+def _calcular_morosidad(db: Session) -> dict:
+    """
+    Calcula las viviendas morosas y el total adeudado.
+    
+    Una vivienda es morosa si tiene gastos comunes vencidos sin pagar; lo
+    adeudado es el saldo de su cuenta corriente. Se resuelve con una consulta
+    agrupada por dato en lugar de consultas por vivienda.
+    """
+    hoy = date.today()
+    
+    # Gasto vencido más antiguo por vivienda (estado asignado por la tarea
+    # nocturna vencer_gastos, con índice por estado y vencimiento)
+    vencidos = dict(
+        db.query(GastoComun.vivienda_id, func.min(GastoComun.vencimiento))
+        .filter(GastoComun.estado == 'vencido')
+        .group_by(GastoComun.vivienda_id)
+        .all()
+    )
+    if not vencidos:
+        return {"viviendas_morosas": [], "total_viviendas": 0, "total_morosidad": 0.0}
+    
+    vivienda_ids = list(vencidos)
+    viviendas = {
+        vivienda.id: vivienda
+        for vivienda in db.query(Vivienda).filter(Vivienda.id.in_(vivienda_ids)).all()
+    }
+    saldos_viviendas = saldos(db, vivienda_ids)
+    gastos_pendientes = dict(
+        db.query(GastoComun.vivienda_id, func.count(GastoComun.id))
+        .filter(GastoComun.vivienda_id.in_(vivienda_ids), GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO))
+        .group_by(GastoComun.vivienda_id)
+        .all()
+    )
+    multas = dict(
+        db.query(Multa.vivienda_id, func.count(Multa.id))
+        .filter(Multa.vivienda_id.in_(vivienda_ids))
+        .group_by(Multa.vivienda_id)
+        .all()
+    )
+    
+    # Residentes de todas las viviendas morosas
+    residentes = defaultdict(list)
+    for vivienda_id, residente in (
+        db.query(ResidenteVivienda.vivienda_id, Usuario)
+        .join(Usuario, Usuario.id == ResidenteVivienda.usuario_id)
+        .filter(ResidenteVivienda.vivienda_id.in_(vivienda_ids))
+        .all()
+    ):
+        residentes[vivienda_id].append({
+            "id": residente.id,
+            "nombre": residente.nombre_completo,
+            "email": residente.email
+        })
+    
+    resultado = []
+    for vivienda_id, vencimiento in vencidos.items():
+        vivienda = viviendas.get(vivienda_id)
+        if not vivienda:
+            continue
+        
+        resultado.append({
+            "vivienda_id": vivienda.id,
+            "numero_vivienda": vivienda.numero_vivienda,
+            "residentes": residentes[vivienda_id],
+            "total_adeudado": decimal_to_float(saldos_viviendas[vivienda_id]),
+            "gastos_pendientes": gastos_pendientes.get(vivienda_id, 0),
+            "multas_pendientes": multas.get(vivienda_id, 0),
+            "dias_atraso": (hoy - vencimiento).days,
+            "fecha_vencimiento_mas_antigua": vencimiento.isoformat()
+        })
+    
+    # Ordenar por días de atraso (mayor a menor)
+    resultado.sort(key=lambda x: x["dias_atraso"], reverse=True)
+    
+    total_morosidad = sum(r["total_adeudado"] for r in resultado)
+    
+    return {
+        "viviendas_morosas": resultado,
+        "total_viviendas": len(resultado),
+        "total_morosidad": total_morosidad
+    }
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from decimal import Decimal
 from pydantic import BaseModel
 from datetime import date
 
+from ....core.config import settings
 from ....db.deps import get_db
 from ....models.models import Multa, Vivienda, ResidenteVivienda, Usuario
 from ....core.auth import get_current_active_user
+from ....core.idempotencia import RutaIdempotente
+from ....core.validadores import calcular_validador, respuesta_no_modificada
+from ....services.sincronizacion import abrir_delta, cursor_actual, eliminados_desde
 
-router = APIRouter()
+router = APIRouter(route_class=RutaIdempotente)
 
 class MultaCreate(BaseModel):
     vivienda_id: int
@@ -17,15 +22,68 @@ class MultaCreate(BaseModel):
     descripcion: str
     fecha_aplicada: date
 
+class MultaLoteCreate(BaseModel):
+    multas: List[MultaCreate]
+
+def _validador_multas(alcance, db: Session, vivienda_ids=None):
+    """
+    Validador de una lista de multas: conteo (detecta eliminaciones) y último
+    updated_at (detecta altas y ediciones).
+    """
+    multas = db.query(func.count(Multa.id), func.max(Multa.updated_at))
+    viviendas = db.query(func.max(Vivienda.updated_at))
+    if vivienda_ids is not None:
+        multas = multas.filter(Multa.vivienda_id.in_(vivienda_ids))
+        viviendas = viviendas.filter(Vivienda.id.in_(vivienda_ids))
+    return calcular_validador(alcance, multas, viviendas)
+
 def decimal_to_float(value):
     """Convierte Decimal a float"""
     if isinstance(value, Decimal):
         return float(value)
     return value if value is not None else 0.0
 
+def _multa_a_dict(multa: Multa, viviendas_dict: dict) -> dict:
+    return {
+        "id": multa.id,
+        "vivienda_id": multa.vivienda_id,
+        "vivienda": viviendas_dict.get(multa.vivienda_id, "N/A"),
+        "monto": decimal_to_float(multa.monto),
+        "descripcion": multa.descripcion or "Sin descripción",
+        "fecha_aplicada": multa.fecha_aplicada.isoformat() if multa.fecha_aplicada else None,
+        "gasto_comun_id": multa.gasto_comun_id,
+        "created_at": multa.created_at.isoformat() if multa.created_at else None
+    }
+
+def _numeros_vivienda(db: Session, vivienda_ids) -> dict:
+    if not vivienda_ids:
+        return {}
+    return {
+        v.id: v.numero_vivienda
+        for v in db.query(Vivienda).filter(Vivienda.id.in_(list(vivienda_ids))).all()
+    }
+
+def _delta_multas(db: Session, since: str, vivienda_ids=None) -> dict:
+    """Cambios y eliminaciones de multas desde el cursor (todas o de las viviendas indicadas)"""
+    delta = abrir_delta(db, since)
+    consulta = db.query(Multa).filter(Multa.updated_at >= delta.desde)
+    alcance = {}
+    if vivienda_ids is not None:
+        consulta = consulta.filter(Multa.vivienda_id.in_(vivienda_ids))
+        alcance["vivienda_id"] = vivienda_ids
+    cambios = consulta.all()
+    viviendas_dict = _numeros_vivienda(db, {m.vivienda_id for m in cambios})
+    return delta.respuesta(
+        [_multa_a_dict(multa, viviendas_dict) for multa in cambios],
+        eliminados_desde(db, "multas", delta.desde, **alcance),
+    )
+
 @router.get("/residente/{usuario_id}")
 async def obtener_multas_residente(
     usuario_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -34,6 +92,7 @@ async def obtener_multas_residente(
     
     Args:
         usuario_id: ID del usuario autenticado
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
     
     Returns:
@@ -51,6 +110,11 @@ async def obtener_multas_residente(
             ResidenteVivienda.usuario_id == usuario_id
         ).all()
         
+        vivienda_ids = [v.vivienda_id for v in viviendas]
+        
+        if since:
+            return _delta_multas(db, since, vivienda_ids)
+        
         if not viviendas:
             return {
                 "multas": [],
@@ -58,7 +122,12 @@ async def obtener_multas_residente(
                 "total_pendiente": 0
             }
         
-        vivienda_ids = [v.vivienda_id for v in viviendas]
+        validador = _validador_multas(("multas", usuario_id, tuple(sorted(vivienda_ids))), db, vivienda_ids)
+        no_modificada = respuesta_no_modificada(request, validador)
+        if no_modificada is not None:
+            return no_modificada
+        validador.aplicar(response)
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
         
         # Obtener multas de las viviendas del residente
         multas = db.query(Multa).filter(
@@ -66,27 +135,10 @@ async def obtener_multas_residente(
         ).order_by(Multa.fecha_aplicada.desc()).all()
         
         # Obtener información de viviendas
-        viviendas_dict = {}
-        viviendas_db = db.query(Vivienda).filter(
-            Vivienda.id.in_(vivienda_ids)
-        ).all()
-        for v in viviendas_db:
-            viviendas_dict[v.id] = v.numero_vivienda
-        
-        multas_response = []
-        total = 0
-        for multa in multas:
-            monto = decimal_to_float(multa.monto)
-            total += monto
-            multas_response.append({
-                "id": multa.id,
-                "vivienda_id": multa.vivienda_id,
-                "vivienda": viviendas_dict.get(multa.vivienda_id, "N/A"),
-                "monto": monto,
-                "descripcion": multa.descripcion or "Sin descripción",
-                "fecha_aplicada": multa.fecha_aplicada.isoformat() if multa.fecha_aplicada else None,
-                "created_at": multa.created_at.isoformat() if multa.created_at else None
-            })
+        viviendas_dict = _numeros_vivienda(db, vivienda_ids)
+        
+        multas_response = [_multa_a_dict(multa, viviendas_dict) for multa in multas]
+        total = sum(multa["monto"] for multa in multas_response)
         
         return {
             "multas": multas_response,
@@ -94,6 +146,8 @@ async def obtener_multas_residente(
             "total_pendiente": total  # Todas las multas están pendientes por ahora
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -102,6 +156,9 @@ async def obtener_multas_residente(
 
 @router.get("/todas")
 async def obtener_todas_multas(
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -110,6 +167,7 @@ async def obtener_todas_multas(
     Solo accesible para administradores, conserjes y directiva.
     
     Args:
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
     
     Returns:
@@ -122,33 +180,24 @@ async def obtener_todas_multas(
                 detail="No tienes permisos para listar todas las multas",
             )
 
+        if since:
+            return _delta_multas(db, since)
+        
+        validador = _validador_multas(("multas_todas",), db)
+        no_modificada = respuesta_no_modificada(request, validador)
+        if no_modificada is not None:
+            return no_modificada
+        validador.aplicar(response)
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
+        
         # Obtener todas las multas
         multas = db.query(Multa).order_by(Multa.fecha_aplicada.desc()).all()
         
         # Obtener información de viviendas
-        vivienda_ids = list(set([m.vivienda_id for m in multas]))
-        viviendas_dict = {}
-        if vivienda_ids:
-            viviendas_db = db.query(Vivienda).filter(
-                Vivienda.id.in_(vivienda_ids)
-            ).all()
-            for v in viviendas_db:
-                viviendas_dict[v.id] = v.numero_vivienda
-        
-        multas_response = []
-        total = 0
-        for multa in multas:
-            monto = decimal_to_float(multa.monto)
-            total += monto
-            multas_response.append({
-                "id": multa.id,
-                "vivienda_id": multa.vivienda_id,
-                "vivienda": viviendas_dict.get(multa.vivienda_id, "N/A"),
-                "monto": monto,
-                "descripcion": multa.descripcion or "Sin descripción",
-                "fecha_aplicada": multa.fecha_aplicada.isoformat() if multa.fecha_aplicada else None,
-                "created_at": multa.created_at.isoformat() if multa.created_at else None
-            })
+        viviendas_dict = _numeros_vivienda(db, {m.vivienda_id for m in multas})
+        
+        multas_response = [_multa_a_dict(multa, viviendas_dict) for multa in multas]
+        total = sum(multa["monto"] for multa in multas_response)
         
         return {
             "multas": multas_response,
@@ -156,6 +205,8 @@ async def obtener_todas_multas(
             "total_pendiente": total
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -226,3 +277,109 @@ async def crear_multa(
             detail=f"Error al crear multa: {str(e)}"
         )
 
+@router.post("/lote")
+async def crear_multas_lote(
+    lote: MultaLoteCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Crea varias multas en una sola petición (ej: una infracción que afecta a
+    muchas viviendas).
+    Solo accesible para administradores y conserjes.
+
+    Las viviendas se validan con una sola consulta y las multas válidas se
+    insertan con un único INSERT en una transacción. Los ítems con errores
+    (vivienda inexistente o monto no positivo) no impiden crear el resto.
+
+    Args:
+        lote: Lista de multas a crear
+        db: Sesión de base de datos
+
+    Returns:
+        Resultado por ítem (en el orden recibido) y totales de creadas y con error
+    """
+    try:
+        if current_user.rol not in {"Administrador", "Conserje", "Super Admin"}:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para crear multas",
+            )
+        if not lote.multas:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El lote no contiene multas",
+            )
+        if len(lote.multas) > settings.MULTAS_LOTE_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El lote supera el máximo de {settings.MULTAS_LOTE_MAX_ITEMS} multas",
+            )
+
+        viviendas_dict = _numeros_vivienda(db, {m.vivienda_id for m in lote.multas})
+
+        resultados = []
+        filas = []
+        for indice, multa_data in enumerate(lote.multas):
+            resultado = {"indice": indice, "vivienda_id": multa_data.vivienda_id}
+            if multa_data.vivienda_id not in viviendas_dict:
+                resultado.update(estado="error", detail=f"Vivienda {multa_data.vivienda_id} no encontrada")
+            elif multa_data.monto <= 0:
+                resultado.update(estado="error", detail="El monto debe ser mayor que 0")
+            else:
+                resultado.update(estado="creada", vivienda=viviendas_dict[multa_data.vivienda_id])
+                filas.append({
+                    "vivienda_id": multa_data.vivienda_id,
+                    "monto": Decimal(str(multa_data.monto)).quantize(Decimal("0.01")),
+                    "descripcion": multa_data.descripcion,
+                    "fecha_aplicada": multa_data.fecha_aplicada,
+                })
+            resultados.append(resultado)
+
+        if filas:
+            maximo = db.query(func.coalesce(func.max(Multa.id), 0)).scalar()
+            db.execute(insert(Multa), filas)
+
+            # El INSERT masivo no devuelve IDs en MySQL: se leen las filas nuevas
+            # de las viviendas del lote y se asignan a los ítems por su contenido
+            # y en orden de ID
+            nuevas = {}
+            for multa_id, vivienda_id, monto, descripcion, fecha_aplicada in (
+                db.query(Multa.id, Multa.vivienda_id, Multa.monto, Multa.descripcion, Multa.fecha_aplicada)
+                .filter(Multa.id > maximo, Multa.vivienda_id.in_({f["vivienda_id"] for f in filas}))
+                .order_by(Multa.id.asc())
+            ):
+                clave = (vivienda_id, Decimal(monto), descripcion, fecha_aplicada)
+                nuevas.setdefault(clave, []).append(multa_id)
+            db.commit()
+
+            creadas = iter(filas)
+            for resultado in resultados:
+                if resultado["estado"] != "creada":
+                    continue
+                fila = next(creadas)
+                ids = nuevas.get(
+                    (fila["vivienda_id"], fila["monto"], fila["descripcion"], fila["fecha_aplicada"]), []
+                )
+                resultado.update(
+                    id=ids.pop(0) if ids else None,
+                    monto=decimal_to_float(fila["monto"]),
+                    descripcion=fila["descripcion"],
+                    fecha_aplicada=fila["fecha_aplicada"].isoformat(),
+                )
+
+        return {
+            "resultados": resultados,
+            "creadas": len(filas),
+            "errores": len(resultados) - len(filas),
+            "message": f"{len(filas)} multas creadas, {len(resultados) - len(filas)} con errores",
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear multas: {str(e)}"
+        )
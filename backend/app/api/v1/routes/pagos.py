@@ -1,13 +1,26 @@
+from datetime import date, datetime
 from decimal import Decimal
+import io
 import logging
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.auth import get_current_active_user
+from app.core.idempotencia import RutaIdempotente
+from app.core.single_flight import SingleFlight
+from app.services.conciliacion_bancaria import importar_cartola
+from app.services.cuenta_corriente import saldos
+from app.services.imputacion_pagos import abono_a_dict, registrar_abono, turno_vivienda
+from app.services.sincronizacion import abrir_delta, cursor_actual, eliminados_desde
+from app.services.uf import UFNoDisponibleError, cargos_en_pesos, cotizacion_a_dict, valor_uf
 from app.db.deps import get_db
 from app.models.models import (
+    Abono,
+    Condominio,
     GastoComun,
     Multa,
     Pago,
@@ -19,7 +32,19 @@ from app.models.models import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=RutaIdempotente)
+
+vuelos_pagos = SingleFlight("pagos")
+
+ROLES_PAGOS = {"Administrador", "Conserje", "Super Admin"}
+
+
+class AbonoCreate(BaseModel):
+    vivienda_id: int
+    monto: float = Field(..., gt=0)
+    fecha_pago: Optional[datetime] = None
+    metodo_pago: str = Field("transferencia", max_length=30)
+    aplicar: bool = True
 
 
 def _to_float(value: Any) -> float:
@@ -59,7 +84,12 @@ async def desglose_residente(
             logger.warning("DEBUG Pagos: No se encontraron viviendas para usuario_id=%s", usuario_id)
             return {
                 "viviendas": [],
+                "saldo": 0.0,
+                "saldos_viviendas": {},
                 "cargo_fijo_uf": 0.0,
+                "cargo_fijo_clp": None,
+                "cargos_fijos_clp": {},
+                "uf": None,
                 "gastos_comunes": [],
                 "multas": [],
                 "reservas": [],
@@ -111,9 +141,26 @@ async def desglose_residente(
             for reserva in reservas
         ]
 
+        # Saldo de la cuenta corriente (positivo = deuda), igual que en dashboard y morosidad
+        saldos_viviendas = {vivienda_id: _to_float(saldo) for vivienda_id, saldo in saldos(db, viv_ids).items()}
+
+        # Cargo fijo en pesos con la UF del día (caché diaria del backend); si
+        # no hay valor de la UF el desglose se entrega igual, sin conversión
+        try:
+            cotizacion = await run_in_threadpool(valor_uf, db)
+        except UFNoDisponibleError as e:
+            logger.warning("Pagos: sin valor de la UF para el desglose: %s", e)
+            cotizacion = None
+        cargos_clp = cargos_en_pesos(db, viv_ids, cotizacion.valor) if cotizacion else {}
+
         response_data = {
             "viviendas": viv_ids,
+            "saldo": sum(saldos_viviendas.values()),
+            "saldos_viviendas": saldos_viviendas,
             "cargo_fijo_uf": cargo_fijo_uf,
+            "cargo_fijo_clp": _to_float(cargos_clp.get(vivienda.id)) if cotizacion and vivienda else None,
+            "cargos_fijos_clp": {vivienda_id: _to_float(monto) for vivienda_id, monto in cargos_clp.items()},
+            "uf": cotizacion_a_dict(cotizacion, date.today()) if cotizacion else None,
             "gastos_comunes": gastos_payload,
             "multas": multas_payload,
             "reservas": reservas_payload,
@@ -129,12 +176,17 @@ async def desglose_residente(
 
 @router.get("/todos")
 async def listar_todos_pagos(
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
     """
     Obtiene todos los pagos registrados en el condominio.
     Solo accesible para administradores y conserjes.
+    
+    Con ?since=<cursor> retorna solo los pagos creados o modificados y los IDs
+    de los eliminados desde la consulta anterior.
     """
     if current_user.rol not in {"Administrador", "Conserje", "Super Admin"}:
         raise HTTPException(
@@ -142,38 +194,212 @@ async def listar_todos_pagos(
             detail="No tienes permisos para listar todos los pagos",
         )
 
-    try:
-        pagos = db.query(Pago).order_by(Pago.fecha_pago.desc()).all()
-        resultado = []
-
-        for pago in pagos:
-            usuario = db.query(Usuario).filter(Usuario.id == pago.usuario_id).first()
-            gasto = db.query(GastoComun).filter(GastoComun.id == pago.gasto_comun_id).first()
-            vivienda = None
-            if gasto:
-                vivienda = db.query(Vivienda).filter(Vivienda.id == gasto.vivienda_id).first()
-
-            resultado.append(
-                {
-                    "id": pago.id,
-                    "usuario_id": pago.usuario_id,
-                    "usuario_nombre": usuario.nombre_completo if usuario else "Desconocido",
-                    "vivienda": vivienda.numero_vivienda if vivienda else "N/A",
-                    "monto_pagado": _to_float(pago.monto_pagado),
-                    "fecha_pago": pago.fecha_pago.isoformat() if pago.fecha_pago else None,
-                    "metodo_pago": pago.metodo_pago or "webpay",
-                    "gasto_mes": gasto.mes if gasto else None,
-                    "gasto_ano": gasto.ano if gasto else None,
-                    "gasto_estado": gasto.estado if gasto else None,
-                }
-            )
-
-        return {
-            "pagos": resultado,
-            "total": len(resultado),
-            "total_monto": sum(item["monto_pagado"] for item in resultado),
-        }
+    if since:
+        delta = abrir_delta(db, since)
+        cambios = _pagos_a_dict(db, db.query(Pago).filter(Pago.updated_at >= delta.desde).all())
+        return delta.respuesta(cambios, eliminados_desde(db, "pagos", delta.desde))
 
+    try:
+        # El cursor se toma antes de leer los pagos
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
+        # Todos los roles autorizados ven el mismo listado: las consultas
+        # concurrentes comparten un solo cálculo
+        return await vuelos_pagos.ejecutar("pagos_todos", _listar_pagos, sesion_peticion=db)
     except Exception as exc:
         logger.error("ERROR Pagos: Exception en listar_todos_pagos: %s", exc, exc_info=True)
         raise
+
+
+@router.post("/importaciones")
+async def importar_pagos(
+    condominio_id: int,
+    archivo: UploadFile = File(...),
+    aplicar: bool = True,
+    codificacion: str = "utf-8-sig",
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Importa una cartola bancaria CSV y concilia sus abonos con los gastos
+    comunes pendientes del condominio.
+
+    Cada fila asociada crea un pago (transferencia) y deja su gasto como
+    pagado; con aplicar=false solo se retorna el reporte (vista previa).
+
+    Args:
+        condominio_id: Condominio de la cartola
+        archivo: CSV con columnas fecha, monto y vivienda (periodo opcional)
+        aplicar: False para no registrar los pagos
+        codificacion: Codificación del archivo (ej: latin-1 para cartolas de Excel)
+
+    Returns:
+        Reporte con las filas asociadas (y su gasto) y las sin asociar (y el motivo)
+
+    Raises:
+        HTTPException 400: Si el archivo no se puede leer o le faltan columnas
+        HTTPException 404: Si el condominio no existe
+    """
+    if current_user.rol not in ROLES_PAGOS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para importar pagos",
+        )
+    if not db.query(Condominio.id).filter(Condominio.id == condominio_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Condominio no encontrado",
+        )
+
+    try:
+        # El archivo se lee fila a fila desde el temporal del upload
+        texto = io.TextIOWrapper(archivo.file, encoding=codificacion, newline="")
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Codificación no soportada: {codificacion}",
+        )
+    try:
+        return await run_in_threadpool(
+            importar_cartola,
+            db,
+            condominio_id=condominio_id,
+            archivo=texto,
+            usuario_id=current_user.id,
+            aplicar=aplicar,
+        )
+    except ValueError as e:
+        # Incluye errores de decodificación del archivo
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as exc:
+        logger.error("ERROR Pagos: Exception en importar_pagos: %s", exc, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar pagos: {str(exc)}"
+        )
+
+
+@router.post("/abonos")
+async def crear_abono(
+    abono: AbonoCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Registra un pago de una vivienda y lo imputa a sus cargos pendientes.
+
+    El monto se aplica del cargo más antiguo al más reciente: gastos
+    comunes, luego multas y luego reservas con pago pendiente; lo que sobra
+    queda como saldo a favor. Antes se aplica el saldo a favor que la
+    vivienda tenga de abonos anteriores. Con aplicar=false solo retorna la
+    imputación (vista previa).
+
+    Args:
+        abono: Vivienda, monto, fecha y método de pago
+
+    Returns:
+        Imputaciones (cargo, monto y si quedó saldado), monto aplicado y saldo a favor
+
+    Raises:
+        HTTPException 404: Si la vivienda no existe
+    """
+    if current_user.rol not in ROLES_PAGOS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para registrar pagos",
+        )
+    usuario_id = current_user.id
+
+    # Los abonos de una misma vivienda se serializan: la sesión de la
+    # petición devuelve su conexión al pool y la petición espera su turno en
+    # el event loop, sin ocupar un hilo del threadpool
+    db.close()
+    try:
+        async with turno_vivienda(abono.vivienda_id):
+            return await run_in_threadpool(
+                registrar_abono,
+                db,
+                vivienda_id=abono.vivienda_id,
+                monto=abono.monto,
+                usuario_id=usuario_id,
+                fecha_pago=abono.fecha_pago,
+                metodo_pago=abono.metodo_pago,
+                aplicar=abono.aplicar,
+            )
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as exc:
+        logger.error("ERROR Pagos: Exception en crear_abono: %s", exc, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al registrar el pago: {str(exc)}"
+        )
+
+
+@router.get("/abonos")
+async def listar_abonos(
+    vivienda_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Lista los abonos de una vivienda con sus imputaciones, del más reciente
+    al más antiguo.
+    """
+    if current_user.rol not in ROLES_PAGOS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para listar pagos",
+        )
+    abonos = (
+        db.query(Abono)
+        .filter(Abono.vivienda_id == vivienda_id)
+        .order_by(Abono.id.desc())
+        .all()
+    )
+    return {
+        "abonos": [abono_a_dict(abono) for abono in abonos],
+        "total": len(abonos),
+    }
+
+
+def _pagos_a_dict(db: Session, pagos) -> list:
+    """Serializa pagos con el nombre del usuario y los datos de su gasto y vivienda"""
+    resultado = []
+
+    for pago in pagos:
+        usuario = db.query(Usuario).filter(Usuario.id == pago.usuario_id).first()
+        gasto = db.query(GastoComun).filter(GastoComun.id == pago.gasto_comun_id).first()
+        vivienda = None
+        if gasto:
+            vivienda = db.query(Vivienda).filter(Vivienda.id == gasto.vivienda_id).first()
+
+        resultado.append(
+            {
+                "id": pago.id,
+                "usuario_id": pago.usuario_id,
+                "usuario_nombre": usuario.nombre_completo if usuario else "Desconocido",
+                "vivienda": vivienda.numero_vivienda if vivienda else "N/A",
+                "monto_pagado": _to_float(pago.monto_pagado),
+                "fecha_pago": pago.fecha_pago.isoformat() if pago.fecha_pago else None,
+                "metodo_pago": pago.metodo_pago or "webpay",
+                "gasto_mes": gasto.mes if gasto else None,
+                "gasto_ano": gasto.ano if gasto else None,
+                "gasto_estado": gasto.estado if gasto else None,
+            }
+        )
+
+    return resultado
+
+
+def _listar_pagos(db: Session) -> dict:
+    """Arma el listado de todos los pagos con su usuario, vivienda y gasto"""
+    pagos = db.query(Pago).order_by(Pago.fecha_pago.desc()).all()
+    resultado = _pagos_a_dict(db, pagos)
+
+    return {
+        "pagos": resultado,
+        "total": len(resultado),
+        "total_monto": sum(item["monto_pagado"] for item in resultado),
+    }
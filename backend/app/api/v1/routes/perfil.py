@@ -6,8 +6,9 @@ from typing import Optional
 from ....db.deps import get_db
 from ....models.models import Usuario, ResidenteVivienda, Vivienda
 from ....core.auth import get_current_active_user
+from ....core.idempotencia import RutaIdempotente
 
-router = APIRouter()
+router = APIRouter(route_class=RutaIdempotente)
 
 class PerfilUpdate(BaseModel):
     nombre_completo: Optional[str] = None
@@ -0,0 +1,171 @@
+"""
+Reportes financieros y de uso para la administración y la directiva.
+
+Los reportes se calculan con un motor analítico embebido (DuckDB) sobre los
+snapshots Parquet de las tablas transaccionales, nunca con consultas de
+agregados sobre MySQL (ver app.services.reportes).
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+
+from ....core.auth import get_current_active_user
+from ....models.models import Usuario
+from ....services import reportes
+from ....services.snapshots import generar_snapshots
+from .exportaciones import vuelos_snapshots
+
+router = APIRouter()
+
+ROLES_REPORTES = {"Administrador", "Directiva", "Super Admin"}
+
+
+async def _asegurar_snapshot() -> None:
+    """
+    Refresca el snapshot si es más antiguo que la antigüedad máxima.
+
+    El refresco es incremental y se comparte con cualquier otra petición
+    (o exportación) que lo esté ejecutando. Si falla pero existe un snapshot
+    anterior, los reportes se sirven con ese.
+    """
+    if reportes.snapshot_vigente():
+        return
+    try:
+        await vuelos_snapshots.ejecutar(
+            ("snapshots", False),
+            lambda db: generar_snapshots(db, forzar=False),
+        )
+    except Exception as e:
+        if reportes.antiguedad_snapshot() is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"No hay snapshot disponible para los reportes: {str(e)}",
+            )
+        print(f"Advertencia: no se pudo refrescar el snapshot de reportes: {str(e)}")
+
+
+async def _reporte(
+    nombre: str,
+    current_user: Usuario,
+    calcular: Callable[[], List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    if current_user.rol not in ROLES_REPORTES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para consultar reportes",
+        )
+    if not reportes.DUCKDB_DISPONIBLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Los reportes requieren duckdb y pyarrow instalados en el servidor",
+        )
+
+    await _asegurar_snapshot()
+    try:
+        # DuckDB usa CPU: fuera del event loop
+        filas = await run_in_threadpool(calcular)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar el reporte: {str(e)}",
+        )
+
+    antiguedad = reportes.antiguedad_snapshot()
+    return {
+        "reporte": nombre,
+        "antiguedad_datos_segundos": int(antiguedad.total_seconds()) if antiguedad else None,
+        "filas": filas,
+    }
+
+
+@router.get("/recaudacion-mensual")
+async def reporte_recaudacion_mensual(
+    condominio_id: Optional[int] = None,
+    ano: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Monto emitido vs. recaudado por período de gasto común.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año del período
+
+    Returns:
+        Filas por (ano, mes) con emitido, recaudado y porcentaje recaudado
+    """
+    return await _reporte(
+        "recaudacion_mensual",
+        current_user,
+        lambda: reportes.recaudacion_mensual(condominio_id, ano),
+    )
+
+
+@router.get("/morosidad-tendencia")
+async def reporte_morosidad_tendencia(
+    condominio_id: Optional[int] = None,
+    meses: int = Query(12, ge=1, le=120),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Deuda vencida al cierre de cada uno de los últimos meses.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        meses: Cantidad de meses (1 a 120, incluye el mes en curso)
+
+    Returns:
+        Filas por corte con monto moroso, gastos y viviendas morosas
+    """
+    return await _reporte(
+        "morosidad_tendencia",
+        current_user,
+        lambda: reportes.tendencia_morosidad(condominio_id, meses),
+    )
+
+
+@router.get("/ingresos-reservas")
+async def reporte_ingresos_reservas(
+    condominio_id: Optional[int] = None,
+    ano: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Reservas, horas e ingresos por mes y espacio común.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año de la reserva
+
+    Returns:
+        Filas por (ano, mes, espacio) con montos pagados y pendientes
+    """
+    return await _reporte(
+        "ingresos_reservas",
+        current_user,
+        lambda: reportes.ingresos_reservas(condominio_id, ano),
+    )
+
+
+@router.get("/puntualidad")
+async def reporte_puntualidad(
+    condominio_id: Optional[int] = None,
+    ano: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Puntualidad de pago de los gastos comunes por vivienda.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año del período del gasto
+
+    Returns:
+        Filas por vivienda con pagos a tiempo, atrasados, impagos y porcentaje
+    """
+    return await _reporte(
+        "puntualidad",
+        current_user,
+        lambda: reportes.puntualidad_viviendas(condominio_id, ano),
+    )
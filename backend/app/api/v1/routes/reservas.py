@@ -1,30 +1,50 @@
 """
 Rutas para gestión de reservas de espacios comunes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
+from sqlalchemy import and_, insert, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 from app.core.auth import get_current_active_user
+from app.core.idempotencia import RutaIdempotente
+from app.core.config import settings
 from app.db.deps import get_db
 from app.schemas.reservas import (
     ReservaCreate, 
+    ReservaRecurrenteCreate,
     ReservaResponse, 
+    ReservaLoteResponse,
+    ConflictoOcurrencia,
+    RetencionResponse,
+    CancelacionLoteRequest,
+    CancelacionLoteResponse,
+    ReconciliacionResponse,
+    ReservaCambiosResponse,
     ReservaListResponse,
     EspacioComunResponse,
     DisponibilidadResponse,
+    DisponibilidadCompactaResponse,
+    DisponibilidadMultipleResponse,
     SlotDisponible,
     ErrorResponse
 )
 from app.models.models import Reserva, EspacioComun, Usuario
 from app.services.google_calendar_service import GoogleCalendarManager
 from app.core.google_calendar import ESPACIOS_COMUNES
+from app.services.recurrencia import expandir_ocurrencias
+from app.services.retenciones import liberar_reservas_impagas, plazo_pago, reserva_vigente, retenciones
+from app.services.ical import feeds
+from app.services.reconciliacion import reconciliar_calendarios
+from app.services.sincronizacion import abrir_delta, cursor_actual, eliminados_desde
 
-router = APIRouter()
+router = APIRouter(route_class=RutaIdempotente)
 
 # Intentar inicializar Google Calendar Manager, pero continuar sin él si falla
 try:
@@ -36,6 +56,23 @@ except Exception as e:
     GOOGLE_CALENDAR_AVAILABLE = False
 
 
+def _sin_tz(valor: datetime) -> datetime:
+    """Remueve la zona horaria para comparar con los valores leídos desde MySQL"""
+    if valor.tzinfo is not None:
+        return valor.replace(tzinfo=None)
+    return valor
+
+
+def _clave_espacio(nombre: Optional[str]) -> Optional[str]:
+    """Obtiene la clave de ESPACIOS_COMUNES (ej: 'quincho') a partir del nombre en BD"""
+    if not nombre:
+        return None
+    for key, info in ESPACIOS_COMUNES.items():
+        if info["nombre"].lower() == nombre.lower():
+            return key
+    return None
+
+
 def _generar_slots_prueba(fecha_inicio, fecha_fin, duracion_minutos=60):
     """Genera slots de prueba cuando Google Calendar no está disponible"""
     slots = []
@@ -118,9 +155,236 @@ async def listar_espacios(
 # DISPONIBILIDAD
 # ============================================================================
 
+def _parsear_rango(fecha_inicio: Optional[str], fecha_fin: Optional[str]) -> Tuple[datetime, datetime]:
+    """
+    Parsea el rango de fechas de una consulta de disponibilidad.
+    
+    Aplica los valores por defecto (hoy y 30 días desde hoy) y el rango
+    máximo DISPONIBILIDAD_MAX_DIAS.
+    
+    Raises:
+        HTTPException 400: Si las fechas son inválidas o el rango excede el máximo
+    """
+    try:
+        if fecha_inicio:
+            # Parsear como fecha ISO: "2025-10-25" → datetime con hora 00:00:00
+            fecha_inicio_dt = datetime.fromisoformat(fecha_inicio)
+        else:
+            fecha_inicio_dt = datetime.now().replace(hour=0, minute=0, second=0)
+        
+        if fecha_fin:
+            # Parsear como fecha ISO y configurar hora final del día
+            fecha_fin_dt = datetime.fromisoformat(fecha_fin).replace(hour=23, minute=59, second=59)
+        else:
+            fecha_fin_dt = (fecha_inicio_dt + timedelta(days=30)).replace(hour=23, minute=59, second=59)
+    except Exception as date_err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al parsear fechas: {str(date_err)}"
+        )
+    
+    # Limitar el rango para evitar respuestas y cálculos desproporcionados
+    dias_rango = (fecha_fin_dt.date() - fecha_inicio_dt.date()).days + 1
+    if dias_rango < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha de fin debe ser igual o posterior a la fecha de inicio"
+        )
+    if dias_rango > settings.DISPONIBILIDAD_MAX_DIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango solicitado ({dias_rango} días) excede el máximo de {settings.DISPONIBILIDAD_MAX_DIAS} días"
+        )
+    
+    return fecha_inicio_dt, fecha_fin_dt
+
+
+def _liberar_reservas_impagas(db: Session, espacio_id: int) -> None:
+    """Elimina las reservas del espacio cuyo plazo de pago venció, antes de verificar conflictos"""
+    liberar_reservas_impagas(
+        db, [espacio_id], calendar_manager if GOOGLE_CALENDAR_AVAILABLE else None
+    )
+
+
+def _espacios_db_por_clave(db: Session, claves: List[str]) -> Dict[str, EspacioComun]:
+    """Obtiene los espacios de la BD para las claves indicadas con una sola consulta"""
+    nombres = {clave: ESPACIOS_COMUNES[clave]["nombre"].lower() for clave in claves}
+    espacios_db = db.query(EspacioComun).filter(
+        or_(*[EspacioComun.nombre.ilike(f"%{nombre}%") for nombre in nombres.values()])
+    ).all()
+    resultado = {}
+    for clave, nombre in nombres.items():
+        for espacio_db in espacios_db:
+            if nombre in espacio_db.nombre.lower():
+                resultado[clave] = espacio_db
+                break
+    return resultado
+
+
+def _intervalos_ocupados(
+    db: Session,
+    espacio_ids: List[int],
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+) -> Dict[int, List[Tuple[datetime, datetime]]]:
+    """
+    Obtiene los intervalos ocupados (reservas y retenciones) por espacio.
+    
+    Las reservas de todos los espacios se leen con una sola consulta; las que
+    tienen el plazo de pago vencido no ocupan su horario. Los intervalos se
+    retornan sin zona horaria para compararlos con los slots.
+    """
+    ocupados: Dict[int, List[Tuple[datetime, datetime]]] = {espacio_id: [] for espacio_id in espacio_ids}
+    if not espacio_ids:
+        return ocupados
+    
+    reservas = db.query(
+        Reserva.espacio_comun_id, Reserva.fecha_hora_inicio, Reserva.fecha_hora_fin
+    ).filter(
+        Reserva.espacio_comun_id.in_(espacio_ids),
+        Reserva.fecha_hora_inicio < fecha_fin,
+        Reserva.fecha_hora_fin > fecha_inicio,
+        reserva_vigente()
+    ).all()
+    for r in reservas:
+        ocupados[r.espacio_comun_id].append((_sin_tz(r.fecha_hora_inicio), _sin_tz(r.fecha_hora_fin)))
+    
+    # Los horarios retenidos por pagos en curso también se muestran ocupados
+    for retencion in retenciones.activas(db, espacio_ids, _sin_tz(fecha_inicio), _sin_tz(fecha_fin)):
+        ocupados[retencion.espacio_comun_id].append((retencion.inicio, retencion.fin))
+    
+    return ocupados
+
+
+def _marcar_slots(slots: List[dict], ocupados: List[Tuple[datetime, datetime]]) -> None:
+    """Marca cada slot como no disponible si se solapa con algún intervalo ocupado"""
+    for slot in slots:
+        slot_inicio = _sin_tz(datetime.fromisoformat(slot["inicio"]))
+        slot_fin = _sin_tz(datetime.fromisoformat(slot["fin"]))
+        
+        # Hay solapamiento si NOT (fin <= inicio OR inicio >= fin)
+        tiene_conflicto = any(
+            not (slot_fin <= res_inicio or slot_inicio >= res_fin)
+            for res_inicio, res_fin in ocupados
+        )
+        slot["disponible"] = not tiene_conflicto
+
+
+def _marcar_slots_ocupados(
+    db: Session,
+    espacio: str,
+    slots: List[dict],
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+) -> None:
+    """Marca los slots de un espacio según sus reservas y retenciones activas"""
+    import sys
+    espacio_db = _espacios_db_por_clave(db, [espacio.lower()]).get(espacio.lower())
+    print(f"DEBUG: Buscando espacio '{espacio}', encontrado: {espacio_db.id if espacio_db else 'NO ENCONTRADO'}", file=sys.stderr, flush=True)
+    
+    ocupados: List[Tuple[datetime, datetime]] = []
+    if espacio_db:
+        ocupados = _intervalos_ocupados(db, [espacio_db.id], fecha_inicio, fecha_fin)[espacio_db.id]
+        print(f"DEBUG: Encontrados {len(ocupados)} intervalos ocupados para espacio {espacio_db.id} entre {fecha_inicio} y {fecha_fin}", file=sys.stderr, flush=True)
+    
+    _marcar_slots(slots, ocupados)
+
+
+def _disponibilidad_response(
+    espacio: str,
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    slots: List[dict],
+) -> DisponibilidadResponse:
+    """Construye la respuesta de disponibilidad en formato completo"""
+    return DisponibilidadResponse(
+        espacio=espacio,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        slots=[SlotDisponible(inicio=s["inicio"], fin=s["fin"], disponible=s["disponible"]) for s in slots]
+    )
+
+
+def _dias_compactos(slots: List[dict]) -> Iterator[Tuple[str, List[str], str]]:
+    """
+    Agrupa los slots por día y los codifica en formato compacto.
+    
+    Cada día se representa con la lista de horas de inicio ("HH:MM") y un
+    bitstring alineado con esa lista ("1" = disponible, "0" = ocupado).
+    
+    Yields:
+        Tuplas (fecha ISO, horarios, bitstring) en orden cronológico
+    """
+    fecha_actual = None
+    horarios: List[str] = []
+    bits: List[str] = []
+    for slot in slots:
+        inicio = slot["inicio"]
+        # Las fechas de los slots son ISO: "YYYY-MM-DDTHH:MM:SS[+TZ]"
+        fecha, hora = inicio[:10], inicio[11:16]
+        if fecha != fecha_actual:
+            if fecha_actual is not None:
+                yield fecha_actual, horarios, "".join(bits)
+            fecha_actual, horarios, bits = fecha, [], []
+        horarios.append(hora)
+        bits.append("1" if slot["disponible"] else "0")
+    if fecha_actual is not None:
+        yield fecha_actual, horarios, "".join(bits)
+
+
+def _respuesta_compacta(
+    espacio: str,
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    duracion_minutos: int,
+    slots: List[dict],
+):
+    """
+    Construye la respuesta de disponibilidad en formato compacto.
+    
+    Los horarios del primer día se envían una sola vez como metadata; los días
+    con una grilla distinta incluyen sus propios horarios. Para rangos mayores a
+    DISPONIBILIDAD_DIAS_STREAMING la respuesta se envía como NDJSON día por día:
+    la primera línea es la metadata y cada línea siguiente es un día.
+    """
+    dias = _dias_compactos(slots)
+    primero = next(dias, None)
+    horarios_base = primero[1] if primero else []
+    
+    def _dia(fecha: str, horarios: List[str], bits: str) -> dict:
+        dia = {"fecha": fecha, "disponibilidad": bits}
+        if horarios != horarios_base:
+            dia["horarios"] = horarios
+        return dia
+    
+    metadata = {
+        "espacio": espacio,
+        "fecha_inicio": fecha_inicio.isoformat(),
+        "fecha_fin": fecha_fin.isoformat(),
+        "duracion_minutos": duracion_minutos,
+        "horarios": horarios_base,
+    }
+    
+    if (fecha_fin.date() - fecha_inicio.date()).days + 1 > settings.DISPONIBILIDAD_DIAS_STREAMING:
+        def _lineas() -> Iterator[str]:
+            yield json.dumps(metadata) + "\n"
+            if primero:
+                yield json.dumps(_dia(*primero)) + "\n"
+            for dia in dias:
+                yield json.dumps(_dia(*dia)) + "\n"
+        
+        return StreamingResponse(_lineas(), media_type="application/x-ndjson")
+    
+    return DisponibilidadCompactaResponse(
+        **metadata,
+        dias=[_dia(*primero)] + [_dia(*dia) for dia in dias] if primero else []
+    )
+
+
 @router.get(
     "/espacios/{espacio}/disponibilidad",
-    response_model=DisponibilidadResponse,
+    response_model=Union[DisponibilidadResponse, DisponibilidadCompactaResponse],
+    response_model_exclude_none=True,
     summary="Obtener disponibilidad de un espacio",
     tags=["Disponibilidad"]
 )
@@ -129,6 +393,7 @@ async def obtener_disponibilidad(
     fecha_inicio: Optional[str] = None,
     fecha_fin: Optional[str] = None,
     duracion_minutos: int = 60,
+    formato: str = "completo",
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -140,6 +405,8 @@ async def obtener_disponibilidad(
         fecha_inicio: Fecha de inicio (default: hoy)
         fecha_fin: Fecha de fin (default: 30 días desde hoy)
         duracion_minutos: Duración deseada en minutos (default: 60)
+        formato: "completo" (un objeto por slot) o "compacto" (un bitstring
+            por día; NDJSON día por día para rangos largos)
     
     Returns:
         Lista de slots disponibles
@@ -151,37 +418,14 @@ async def obtener_disponibilidad(
             detail=f"Espacio '{espacio}' no válido. Use: multicancha, quincho, sala_eventos"
         )
     
-    # Valores por defecto y parsing de fechas
-    try:
-        # Convertir strings a datetime si es necesario
-        if fecha_inicio:
-            if isinstance(fecha_inicio, str):
-                # Parsear como fecha ISO: "2025-10-25" → datetime con hora 00:00:00
-                dt = datetime.fromisoformat(fecha_inicio)
-                fecha_inicio_dt = dt  # type: ignore
-            else:
-                fecha_inicio_dt = fecha_inicio  # type: ignore
-        else:
-            fecha_inicio_dt = datetime.now().replace(hour=0, minute=0, second=0)
-        
-        if fecha_fin:
-            if isinstance(fecha_fin, str):
-                # Parsear como fecha ISO y configurar hora final del día
-                dt = datetime.fromisoformat(fecha_fin)
-                fecha_fin_dt = dt.replace(hour=23, minute=59, second=59)  # type: ignore
-            else:
-                fecha_fin_dt = fecha_fin  # type: ignore
-        else:
-            fecha_fin_dt = (fecha_inicio_dt + timedelta(days=30)).replace(hour=23, minute=59, second=59)
-        
-        fecha_inicio = fecha_inicio_dt  # type: ignore
-        fecha_fin = fecha_fin_dt  # type: ignore
-    except Exception as date_err:
+    if formato not in {"completo", "compacto"}:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error al parsear fechas: {str(date_err)}"
+            detail=f"Formato '{formato}' no válido. Use: completo, compacto"
         )
     
+    fecha_inicio, fecha_fin = _parsear_rango(fecha_inicio, fecha_fin)
+    
     try:
         import sys
         print(f"DEBUG: Obteniendo disponibilidad para {espacio}", file=sys.stderr, flush=True)
@@ -209,77 +453,13 @@ async def obtener_disponibilidad(
             slots = _generar_slots_prueba(fecha_inicio, fecha_fin, duracion_minutos)
             print(f"DEBUG: Se generaron {len(slots)} slots", file=sys.stderr, flush=True)
         
-        # Obtener el espacio en la BD para verificar reservas existentes
-        espacio_nombre = ESPACIOS_COMUNES.get(espacio, {}).get('nombre', '')
-        espacio_db = db.query(EspacioComun).filter(
-            EspacioComun.nombre.ilike(f"%{espacio_nombre}%")
-        ).first()
-        
-        print(f"DEBUG: Buscando espacio '{espacio_nombre}', encontrado: {espacio_db.id if espacio_db else 'NO ENCONTRADO'}", file=sys.stderr, flush=True)
+        _marcar_slots_ocupados(db, espacio, slots, fecha_inicio, fecha_fin)
         
-        # Obtener todas las reservas existentes para este espacio
-        reservas_existentes = []
-        if espacio_db:
-            reservas_existentes = db.query(Reserva).filter(
-                Reserva.espacio_comun_id == espacio_db.id,
-                Reserva.fecha_hora_inicio < fecha_fin,
-                Reserva.fecha_hora_fin > fecha_inicio
-            ).all()
-            print(f"DEBUG: Encontradas {len(reservas_existentes)} reservas para espacio {espacio_db.id} entre {fecha_inicio} y {fecha_fin}", file=sys.stderr, flush=True)
-            for r in reservas_existentes:
-                print(f"DEBUG: Reserva ID {r.id}: {r.fecha_hora_inicio} - {r.fecha_hora_fin}", file=sys.stderr, flush=True)
-        
-        # Marcar slots ocupados
-        # Convertir reservas a tuplas de Python SIN timezone para evitar conflictos
-        reservas_python = []
-        for r in reservas_existentes:
-            res_inicio = r.fecha_hora_inicio
-            res_fin = r.fecha_hora_fin
-            # Remover timezone si existe
-            if hasattr(res_inicio, 'tzinfo') and res_inicio.tzinfo is not None:
-                res_inicio = res_inicio.replace(tzinfo=None)
-            if hasattr(res_fin, 'tzinfo') and res_fin.tzinfo is not None:
-                res_fin = res_fin.replace(tzinfo=None)
-            reservas_python.append((res_inicio, res_fin))
-        
-        for slot in slots:
-            slot_inicio = datetime.fromisoformat(slot["inicio"])
-            slot_fin = datetime.fromisoformat(slot["fin"])
-            
-            # Remover timezone de los slots también
-            if hasattr(slot_inicio, 'tzinfo') and slot_inicio.tzinfo is not None:
-                slot_inicio = slot_inicio.replace(tzinfo=None)
-            if hasattr(slot_fin, 'tzinfo') and slot_fin.tzinfo is not None:
-                slot_fin = slot_fin.replace(tzinfo=None)
-            
-            # Verificar si este slot se solapa con alguna reserva existente
-            tiene_conflicto = False
-            for res_inicio, res_fin in reservas_python:
-                # Hay solapamiento si NOT (fin <= inicio OR inicio >= fin)
-                if not (slot_fin <= res_inicio or slot_inicio >= res_fin):
-                    tiene_conflicto = True
-                    break
-            
-            # Marcar como no disponible si hay conflicto
-            slot["disponible"] = not tiene_conflicto
+        if formato == "compacto":
+            return _respuesta_compacta(espacio, fecha_inicio, fecha_fin, duracion_minutos, slots)
         
-        # Crear slots disponibles
-        slots_disponibles = []
-        for s in slots:
-            try:
-                slot_obj = SlotDisponible(inicio=s["inicio"], fin=s["fin"], disponible=s["disponible"])
-                slots_disponibles.append(slot_obj)
-            except Exception as slot_err:
-                logger.error(f"DEBUG: Error al crear SlotDisponible: {str(slot_err)}, slot: {s}")
-                raise
-        
-        response = DisponibilidadResponse(
-            espacio=espacio,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            slots=slots_disponibles
-        )
-        logger.error(f"DEBUG: Retornando respuesta con {len(slots_disponibles)} slots")
+        response = _disponibilidad_response(espacio, fecha_inicio, fecha_fin, slots)
+        logger.error(f"DEBUG: Retornando respuesta con {len(response.slots)} slots")
         return response
         
     except ValueError as e:
@@ -297,6 +477,82 @@ async def obtener_disponibilidad(
             detail=f"Error al obtener disponibilidad: {str(e)}"
         )
 
+
+@router.get(
+    "/disponibilidad",
+    response_model=DisponibilidadMultipleResponse,
+    summary="Obtener disponibilidad de varios espacios",
+    tags=["Disponibilidad"]
+)
+async def obtener_disponibilidad_multiple(
+    espacios: Optional[str] = None,
+    fecha_inicio: Optional[str] = None,
+    fecha_fin: Optional[str] = None,
+    duracion_minutos: int = 60,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Obtiene la disponibilidad de varios espacios en una sola petición.
+    
+    Los eventos de todos los calendarios se consultan con una única petición
+    batch a Google Calendar (un solo round trip) y las reservas de todos los
+    espacios con una sola consulta a la base de datos.
+    
+    Args:
+        espacios: Espacios separados por coma (default: todos)
+        fecha_inicio: Fecha de inicio (default: hoy)
+        fecha_fin: Fecha de fin (default: 30 días desde hoy)
+        duracion_minutos: Duración deseada en minutos (default: 60)
+    
+    Returns:
+        Disponibilidad de cada espacio solicitado
+    """
+    claves = [e.strip().lower() for e in espacios.split(",") if e.strip()] if espacios else list(ESPACIOS_COMUNES)
+    invalidos = [clave for clave in claves if clave not in ESPACIOS_COMUNES]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Espacios no válidos: {', '.join(invalidos)}. Use: multicancha, quincho, sala_eventos"
+        )
+    
+    fecha_inicio, fecha_fin = _parsear_rango(fecha_inicio, fecha_fin)
+    
+    slots_por_espacio: Dict[str, Optional[List[dict]]] = {clave: None for clave in claves}
+    if GOOGLE_CALENDAR_AVAILABLE and calendar_manager:
+        try:
+            slots_por_espacio.update(calendar_manager.get_disponibilidad_multiple(
+                claves, fecha_inicio, fecha_fin, duracion_minutos
+            ))
+        except Exception as cal_error:
+            print(f"Advertencia: Google Calendar no disponible, usando datos de prueba: {str(cal_error)}")
+    
+    try:
+        espacios_db = _espacios_db_por_clave(db, claves)
+        ocupados = _intervalos_ocupados(
+            db, [e.id for e in espacios_db.values()], fecha_inicio, fecha_fin
+        )
+        
+        resultado = []
+        for clave in claves:
+            slots = slots_por_espacio.get(clave)
+            if slots is None:
+                slots = _generar_slots_prueba(fecha_inicio, fecha_fin, duracion_minutos)
+            espacio_db = espacios_db.get(clave)
+            _marcar_slots(slots, ocupados.get(espacio_db.id, []) if espacio_db else [])
+            resultado.append(_disponibilidad_response(clave, fecha_inicio, fecha_fin, slots))
+        
+        return DisponibilidadMultipleResponse(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            espacios=resultado
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener disponibilidad: {str(e)}"
+        )
+
 # ============================================================================
 # RESERVAS
 # ============================================================================
@@ -316,6 +572,10 @@ async def crear_reserva(
     """
     Crea una nueva reserva para un espacio común.
     
+    En los espacios con pago la reserva queda "pendiente" con un plazo de
+    RESERVA_PAGO_PENDIENTE_HORAS: si vence sin pagos imputados, la reserva se
+    elimina y el horario vuelve a estar disponible.
+    
     Args:
         reserva_data: Datos de la reserva (espacio, fecha/hora)
         db: Sesión de base de datos
@@ -365,6 +625,8 @@ async def crear_reserva(
             detail=f"Espacio '{espacio}' no encontrado en la base de datos"
         )
     
+    _liberar_reservas_impagas(db, espacio_db.id)
+    
     # Buscar reservas que se solapen en el mismo espacio
     reserva_conflictiva = db.query(Reserva).filter(
         Reserva.espacio_comun_id == espacio_db.id,
@@ -378,6 +640,20 @@ async def crear_reserva(
             detail=f"El espacio ya está reservado en ese horario. Conflicto con reserva ID {reserva_conflictiva.id}"
         )
     
+    # Un horario retenido por el pago en curso de otro usuario tampoco está disponible
+    retencion_conflictiva = retenciones.conflicto(
+        db,
+        espacio_db.id,
+        _sin_tz(reserva_data.fecha_hora_inicio),
+        _sin_tz(reserva_data.fecha_hora_fin),
+        excluir_usuario_id=usuario_id
+    )
+    if retencion_conflictiva:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El horario está retenido por un pago en curso hasta {retencion_conflictiva.expira_en.isoformat()}"
+        )
+    
     try:
         # Obtener información del espacio
         espacio_info = ESPACIOS_COMUNES.get(espacio, {})
@@ -407,6 +683,7 @@ async def crear_reserva(
             fecha_hora_fin=reserva_data.fecha_hora_fin,
             monto_pago=monto_pago,
             estado_pago="pendiente" if monto_pago > 0 else "pagado",
+            pago_expira_en=plazo_pago() if monto_pago > 0 else None,
         )
         
         # Guardar ID de Google Event si está disponible
@@ -416,6 +693,7 @@ async def crear_reserva(
         db.add(nueva_reserva)
         db.commit()
         db.refresh(nueva_reserva)
+        feeds.invalidar(espacio_comun_id=nueva_reserva.espacio_comun_id, usuario_id=nueva_reserva.usuario_id)
         
         return ReservaResponse(
             id=nueva_reserva.id,
@@ -438,14 +716,524 @@ async def crear_reserva(
             detail=f"Error al crear reserva: {str(e)}"
         )
 
+@router.post(
+    "/recurrentes",
+    response_model=ReservaLoteResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear una serie de reservas recurrentes",
+    tags=["Reservas"]
+)
+async def crear_reservas_recurrentes(
+    serie: ReservaRecurrenteCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Crea todas las ocurrencias de una reserva semanal o mensual en una sola petición.
+    
+    A diferencia de llamar N veces a POST /reservas/:
+    - Los conflictos de todas las ocurrencias se detectan con una sola consulta
+    - Las reservas se insertan con un INSERT masivo en una única transacción
+    - Los eventos de Google Calendar se crean con peticiones batch
+    
+    Args:
+        serie: Regla de recurrencia y fecha y hora de inicio de la serie
+        db: Sesión de base de datos
+        current_user: Usuario autenticado (titular de todas las reservas)
+    
+    Returns:
+        Reservas creadas y ocurrencias omitidas por conflicto
+    """
+    espacio = serie.espacio.lower()
+    if espacio not in ESPACIOS_COMUNES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Espacio '{serie.espacio}' no válido"
+        )
+    
+    try:
+        ocurrencias = expandir_ocurrencias(
+            serie.fecha_hora_inicio,
+            serie.fecha_hora_fin,
+            serie.frecuencia.lower(),
+            intervalo=serie.intervalo,
+            repeticiones=serie.repeticiones,
+            hasta=serie.hasta,
+            dias_semana=serie.dias_semana,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    espacio_info = ESPACIOS_COMUNES.get(espacio, {})
+    espacio_db = db.query(EspacioComun).filter(
+        EspacioComun.nombre.ilike(f"%{espacio_info.get('nombre', '')}%")
+    ).first()
+    
+    if not espacio_db:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Espacio '{espacio}' no encontrado en la base de datos"
+        )
+    
+    _liberar_reservas_impagas(db, espacio_db.id)
+    
+    # Una sola consulta para todas las ocurrencias: cualquier reserva que se
+    # solape con al menos uno de los intervalos de la serie
+    reservas_conflictivas = db.query(
+        Reserva.id, Reserva.fecha_hora_inicio, Reserva.fecha_hora_fin
+    ).filter(
+        Reserva.espacio_comun_id == espacio_db.id,
+        or_(*[
+            and_(Reserva.fecha_hora_inicio < fin, Reserva.fecha_hora_fin > inicio)
+            for inicio, fin in ocurrencias
+        ])
+    ).all()
+    ocupados = [(r.id, _sin_tz(r.fecha_hora_inicio), _sin_tz(r.fecha_hora_fin)) for r in reservas_conflictivas]
+    
+    libres = []
+    conflictos = []
+    for inicio, fin in ocurrencias:
+        conflicto_id = next(
+            (rid for rid, ocupado_inicio, ocupado_fin in ocupados
+             if _sin_tz(inicio) < ocupado_fin and _sin_tz(fin) > ocupado_inicio),
+            None
+        )
+        if conflicto_id is not None:
+            conflictos.append(ConflictoOcurrencia(
+                fecha_hora_inicio=inicio,
+                fecha_hora_fin=fin,
+                reserva_conflictiva_id=conflicto_id
+            ))
+        elif retenciones.conflicto(db, espacio_db.id, _sin_tz(inicio), _sin_tz(fin), excluir_usuario_id=current_user.id):
+            conflictos.append(ConflictoOcurrencia(
+                fecha_hora_inicio=inicio,
+                fecha_hora_fin=fin,
+                retenido=True
+            ))
+        else:
+            libres.append((inicio, fin))
+    
+    if conflictos and not serie.omitir_conflictos:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"{len(conflictos)} de {len(ocurrencias)} ocurrencias tienen conflicto. "
+                f"Primera: {conflictos[0].fecha_hora_inicio.isoformat()}"
+            )
+        )
+    
+    if not libres:
+        return ReservaLoteResponse(
+            creadas=[], conflictos=conflictos, total_creadas=0, total_conflictos=len(conflictos)
+        )
+    
+    monto_pago = espacio_info.get("precio", 0) if espacio_info.get("requiere_pago") else 0
+    
+    # Crear los eventos de Google Calendar en batch (si está disponible)
+    eventos: List[Optional[dict]] = [None] * len(libres)
+    if GOOGLE_CALENDAR_AVAILABLE and calendar_manager:
+        try:
+            eventos = calendar_manager.crear_eventos_lote(
+                espacio,
+                f"Reserva - {espacio_info.get('nombre', espacio)}",
+                f"Reserva recurrente del usuario {current_user.nombre_completo} ({current_user.email})",
+                libres
+            )
+        except Exception as e:
+            print(f"Advertencia: No se pudieron crear eventos en Google Calendar: {str(e)}")
+    
+    filas = [
+        {
+            "espacio_comun_id": espacio_db.id,
+            "usuario_id": current_user.id,
+            "fecha_hora_inicio": inicio,
+            "fecha_hora_fin": fin,
+            "monto_pago": monto_pago,
+            "estado_pago": "pendiente" if monto_pago > 0 else "pagado",
+            "pago_expira_en": plazo_pago() if monto_pago > 0 else None,
+            "google_event_id": evento.get("id") if evento else None,
+        }
+        for (inicio, fin), evento in zip(libres, eventos)
+    ]
+    
+    try:
+        db.execute(insert(Reserva), filas)
+        db.commit()
+        feeds.invalidar(espacio_comun_id=espacio_db.id, usuario_id=current_user.id)
+    except Exception as e:
+        db.rollback()
+        # Deshacer los eventos ya creados para no dejar el calendario desincronizado
+        event_ids = [evento["id"] for evento in eventos if evento and "id" in evento]
+        if event_ids and calendar_manager:
+            try:
+                calendar_manager.eliminar_eventos_lote(espacio, event_ids)
+            except Exception as cal_error:
+                print(f"Advertencia: No se pudieron revertir eventos de Google Calendar: {str(cal_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear reservas recurrentes: {str(e)}"
+        )
+    
+    # MySQL no soporta RETURNING: recuperar las filas insertadas en una consulta
+    creadas = db.query(Reserva).filter(
+        Reserva.espacio_comun_id == espacio_db.id,
+        Reserva.usuario_id == current_user.id,
+        Reserva.fecha_hora_inicio.in_([inicio for inicio, _ in libres])
+    ).order_by(Reserva.fecha_hora_inicio.asc()).all()
+    
+    return ReservaLoteResponse(
+        creadas=[
+            ReservaResponse(
+                id=r.id,
+                espacio_comun_id=r.espacio_comun_id,
+                usuario_id=r.usuario_id,
+                fecha_hora_inicio=r.fecha_hora_inicio,
+                fecha_hora_fin=r.fecha_hora_fin,
+                monto_pago=r.monto_pago,
+                estado_pago=r.estado_pago,
+                created_at=r.created_at,
+                google_event_id=r.google_event_id
+            )
+            for r in creadas
+        ],
+        conflictos=conflictos,
+        total_creadas=len(creadas),
+        total_conflictos=len(conflictos)
+    )
+
+# ============================================================================
+# RETENCIONES TEMPORALES (espacios con pago)
+# ============================================================================
+
+def _retencion_response(retencion, espacio: str, monto_pago: float) -> RetencionResponse:
+    return RetencionResponse(
+        id=retencion.id,
+        espacio=espacio,
+        espacio_comun_id=retencion.espacio_comun_id,
+        fecha_hora_inicio=retencion.inicio,
+        fecha_hora_fin=retencion.fin,
+        monto_pago=monto_pago,
+        expira_en=retencion.expira_en
+    )
+
+
+@router.post(
+    "/retenciones",
+    response_model=RetencionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Retener un horario mientras se completa el pago",
+    tags=["Reservas"]
+)
+async def crear_retencion(
+    reserva_data: ReservaCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Retiene un horario de un espacio con pago durante RESERVA_RETENCION_MINUTOS.
+    
+    Mientras la retención está activa, el horario aparece ocupado en la
+    disponibilidad y ningún otro usuario puede reservarlo (en cualquier
+    worker: la retención se guarda en la base de datos). La retención se
+    convierte en reserva con POST /retenciones/{id}/confirmar; si no se
+    confirma, deja de retener el horario al expirar.
+    
+    Args:
+        reserva_data: Espacio y horario a retener
+        db: Sesión de base de datos
+        current_user: Usuario autenticado (titular de la retención)
+    
+    Returns:
+        Datos de la retención con su fecha de expiración
+    """
+    espacio = reserva_data.espacio.lower()
+    if espacio not in ESPACIOS_COMUNES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Espacio '{reserva_data.espacio}' no válido"
+        )
+    
+    if reserva_data.fecha_hora_fin <= reserva_data.fecha_hora_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La hora de fin debe ser posterior a la hora de inicio"
+        )
+    
+    espacio_info = ESPACIOS_COMUNES.get(espacio, {})
+    if not espacio_info.get("requiere_pago"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El espacio '{espacio}' no requiere pago; reserve directamente"
+        )
+    
+    espacio_db = db.query(EspacioComun).filter(
+        EspacioComun.nombre.ilike(f"%{espacio_info.get('nombre', '')}%")
+    ).first()
+    if not espacio_db:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Espacio '{espacio}' no encontrado en la base de datos"
+        )
+    
+    _liberar_reservas_impagas(db, espacio_db.id)
+    
+    try:
+        retencion = retenciones.crear(
+            db,
+            espacio_db.id,
+            current_user.id,
+            _sin_tz(reserva_data.fecha_hora_inicio),
+            _sin_tz(reserva_data.fecha_hora_fin)
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    # Con la fila del espacio bloqueada por la retención, ninguna confirmación
+    # puede insertar una reserva entre esta verificación y el commit
+    reserva_conflictiva = db.query(Reserva).filter(
+        Reserva.espacio_comun_id == espacio_db.id,
+        Reserva.fecha_hora_inicio < reserva_data.fecha_hora_fin,
+        Reserva.fecha_hora_fin > reserva_data.fecha_hora_inicio
+    ).first()
+    if reserva_conflictiva:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El espacio ya está reservado en ese horario. Conflicto con reserva ID {reserva_conflictiva.id}"
+        )
+    db.commit()
+    
+    return _retencion_response(retencion, espacio, espacio_info.get("precio", 0))
+
+
+@router.post(
+    "/retenciones/{retencion_id}/confirmar",
+    response_model=ReservaResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Confirmar el pago de una retención y crear la reserva",
+    tags=["Reservas"]
+)
+async def confirmar_retencion(
+    retencion_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Convierte una retención activa en una reserva.
+    
+    Solo el titular de la retención o un administrador/conserje pueden
+    confirmarla. La reserva queda "pagado" solo si la confirma un
+    administrador/conserje (pago verificado) o si el espacio no tiene costo;
+    si la confirma el titular queda "pendiente" hasta que se registre el pago
+    (con el plazo de RESERVA_PAGO_PENDIENTE_HORAS).
+    
+    La retención se elimina de la tabla en la misma transacción que inserta la
+    reserva (con la fila del espacio bloqueada), por lo que dos confirmaciones
+    simultáneas de la misma retención no crean dos reservas, y si la
+    confirmación falla la retención sigue vigente para reintentar.
+    
+    Args:
+        retencion_id: ID de la retención
+        db: Sesión de base de datos
+        current_user: Usuario autenticado
+    
+    Returns:
+        Datos de la reserva creada
+    """
+    retencion = retenciones.obtener(db, retencion_id)
+    if not retencion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Retención {retencion_id} no encontrada o expirada"
+        )
+    
+    es_personal = current_user.rol in {"Administrador", "Conserje", "Super Admin"}
+    if retencion.usuario_id != current_user.id and not es_personal:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para confirmar esta retención"
+        )
+    
+    _liberar_reservas_impagas(db, retencion.espacio_comun_id)
+    
+    try:
+        espacio_db = (
+            db.query(EspacioComun)
+            .filter(EspacioComun.id == retencion.espacio_comun_id)
+            .with_for_update()
+            .first()
+        )
+        retencion = retenciones.tomar(db, retencion_id)
+        if not retencion:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"La retención {retencion_id} ya fue confirmada o expiró"
+            )
+        
+        reserva_conflictiva = db.query(Reserva).filter(
+            Reserva.espacio_comun_id == retencion.espacio_comun_id,
+            Reserva.fecha_hora_inicio < retencion.fin,
+            Reserva.fecha_hora_fin > retencion.inicio
+        ).first()
+        if reserva_conflictiva:
+            # Horario ya reservado: la retención se descarta
+            db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"El espacio ya está reservado en ese horario. Conflicto con reserva ID {reserva_conflictiva.id}"
+            )
+        
+        espacio_key = None
+        if espacio_db:
+            for key, info in ESPACIOS_COMUNES.items():
+                if info["nombre"].lower() == espacio_db.nombre.lower():
+                    espacio_key = key
+                    break
+        espacio_info = ESPACIOS_COMUNES.get(espacio_key, {})
+        monto_pago = espacio_info.get("precio", 0)
+        
+        usuario = db.query(Usuario).filter(Usuario.id == retencion.usuario_id).first()
+        
+        google_event = {}
+        if espacio_key and usuario and GOOGLE_CALENDAR_AVAILABLE and calendar_manager:
+            try:
+                google_event = calendar_manager.crear_evento(
+                    espacio_key,
+                    f"Reserva - {espacio_info.get('nombre', espacio_key)}",
+                    f"Reserva del usuario {usuario.nombre_completo} ({usuario.email})",
+                    retencion.inicio,
+                    retencion.fin,
+                    usuario.email
+                )
+            except Exception as e:
+                print(f"Advertencia: No se pudo crear evento en Google Calendar: {str(e)}")
+        
+        nueva_reserva = Reserva(
+            espacio_comun_id=retencion.espacio_comun_id,
+            usuario_id=retencion.usuario_id,
+            fecha_hora_inicio=retencion.inicio,
+            fecha_hora_fin=retencion.fin,
+            monto_pago=monto_pago,
+            estado_pago="pagado" if es_personal or monto_pago <= 0 else "pendiente",
+            pago_expira_en=None if es_personal or monto_pago <= 0 else plazo_pago(),
+        )
+        if "id" in google_event:
+            nueva_reserva.google_event_id = google_event["id"]
+        
+        db.add(nueva_reserva)
+        db.commit()
+        db.refresh(nueva_reserva)
+        feeds.invalidar(espacio_comun_id=nueva_reserva.espacio_comun_id, usuario_id=nueva_reserva.usuario_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # La confirmación falló: el rollback deja la retención vigente para reintentar
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al confirmar retención: {str(e)}"
+        )
+    
+    return ReservaResponse(
+        id=nueva_reserva.id,
+        espacio_comun_id=nueva_reserva.espacio_comun_id,
+        usuario_id=nueva_reserva.usuario_id,
+        fecha_hora_inicio=nueva_reserva.fecha_hora_inicio,
+        fecha_hora_fin=nueva_reserva.fecha_hora_fin,
+        monto_pago=nueva_reserva.monto_pago,
+        estado_pago=nueva_reserva.estado_pago,
+        created_at=nueva_reserva.created_at,
+        google_event_id=nueva_reserva.google_event_id
+    )
+
+
+@router.delete(
+    "/retenciones/{retencion_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Liberar una retención antes de su expiración",
+    tags=["Reservas"]
+)
+async def liberar_retencion(
+    retencion_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Libera una retención (por ejemplo, cuando el usuario abandona el pago).
+    
+    Args:
+        retencion_id: ID de la retención
+        db: Sesión de base de datos
+        current_user: Usuario autenticado
+    
+    Returns:
+        Mensaje de confirmación
+    """
+    retencion = retenciones.obtener(db, retencion_id)
+    if not retencion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Retención {retencion_id} no encontrada o expirada"
+        )
+    
+    if retencion.usuario_id != current_user.id and current_user.rol not in {"Administrador", "Conserje", "Super Admin"}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para liberar esta retención"
+        )
+    
+    retenciones.liberar(db, retencion_id)
+    db.commit()
+    return {"message": "Retención liberada exitosamente", "retencion_id": retencion_id}
+
+def _reservas_a_items(db: Session, reservas, con_usuario: bool) -> List[ReservaListResponse]:
+    """Serializa reservas para las listas (con nombre de espacio y, opcionalmente, de usuario)"""
+    espacio_ids = {reserva.espacio_comun_id for reserva in reservas}
+    espacios = {
+        espacio.id: espacio.nombre
+        for espacio in db.query(EspacioComun).filter(EspacioComun.id.in_(espacio_ids)).all()
+    } if espacio_ids else {}
+    usuarios = {}
+    if con_usuario:
+        usuario_ids = {reserva.usuario_id for reserva in reservas}
+        if usuario_ids:
+            usuarios = {
+                usuario.id: usuario.nombre_completo
+                for usuario in db.query(Usuario).filter(Usuario.id.in_(usuario_ids)).all()
+            }
+    
+    return [
+        ReservaListResponse(
+            id=reserva.id,
+            espacio=espacios.get(reserva.espacio_comun_id, "Desconocido"),
+            fecha_hora_inicio=reserva.fecha_hora_inicio,
+            fecha_hora_fin=reserva.fecha_hora_fin,
+            estado_pago=reserva.estado_pago,
+            monto_pago=float(reserva.monto_pago),
+            usuario_nombre=usuarios.get(reserva.usuario_id, "Desconocido") if con_usuario else None
+        )
+        for reserva in reservas
+    ]
+
+
 @router.get(
     "/usuario/{usuario_id}",
-    response_model=List[ReservaListResponse],
+    response_model=Union[List[ReservaListResponse], ReservaCambiosResponse],
     summary="Listar reservas del usuario",
     tags=["Reservas"]
 )
 async def listar_reservas(
     usuario_id: int,
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -454,11 +1242,13 @@ async def listar_reservas(
     
     Args:
         usuario_id: ID del usuario
+        since: Cursor de una consulta anterior; si se indica solo se retornan
+            las reservas creadas/modificadas y los IDs de las canceladas
         db: Sesión de base de datos
         current_user: Usuario autenticado
     
     Returns:
-        Lista de reservas del usuario
+        Lista de reservas del usuario (o los cambios desde el cursor)
     """
     try:
         # Verificar permisos: solo puede ver sus propias reservas o ser admin/conserje
@@ -476,30 +1266,25 @@ async def listar_reservas(
                 detail=f"Usuario {usuario_id} no encontrado"
             )
         
+        if since:
+            delta = abrir_delta(db, since)
+            cambios = db.query(Reserva).filter(
+                Reserva.usuario_id == usuario_id,
+                Reserva.updated_at >= delta.desde
+            ).all()
+            return delta.respuesta(
+                _reservas_a_items(db, cambios, con_usuario=False),
+                eliminados_desde(db, "reservas", delta.desde, usuario_id=usuario_id)
+            )
+        
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
+        
         # Obtener reservas
         reservas = db.query(Reserva).filter(
             Reserva.usuario_id == usuario_id
         ).order_by(Reserva.fecha_hora_inicio.desc()).all()
         
-        resultado = []
-        for reserva in reservas:
-            espacio_db = db.query(EspacioComun).filter(
-                EspacioComun.id == reserva.espacio_comun_id
-            ).first()
-            
-            resultado.append(
-                ReservaListResponse(
-                    id=reserva.id,
-                    espacio=espacio_db.nombre if espacio_db else "Desconocido",
-                    fecha_hora_inicio=reserva.fecha_hora_inicio,
-                    fecha_hora_fin=reserva.fecha_hora_fin,
-                    estado_pago=reserva.estado_pago,
-                    monto_pago=float(reserva.monto_pago),
-                    usuario_nombre=None
-                )
-            )
-        
-        return resultado
+        return _reservas_a_items(db, reservas, con_usuario=False)
     
     except HTTPException:
         raise
@@ -511,11 +1296,13 @@ async def listar_reservas(
 
 @router.get(
     "/todas",
-    response_model=List[ReservaListResponse],
+    response_model=Union[List[ReservaListResponse], ReservaCambiosResponse],
     summary="Listar todas las reservas",
     tags=["Reservas"]
 )
 async def listar_todas_reservas(
+    response: Response,
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -524,11 +1311,12 @@ async def listar_todas_reservas(
     Solo accesible para administradores y conserjes.
     
     Args:
+        since: Cursor de una consulta anterior (sincronización delta)
         db: Sesión de base de datos
         current_user: Usuario autenticado
     
     Returns:
-        Lista de todas las reservas
+        Lista de todas las reservas (o los cambios desde el cursor)
     """
     if current_user.rol not in {"Administrador", "Conserje", "Super Admin"}:
         raise HTTPException(
@@ -536,31 +1324,20 @@ async def listar_todas_reservas(
             detail="No tienes permisos para ver todas las reservas"
         )
     
+    if since:
+        delta = abrir_delta(db, since)
+        cambios = db.query(Reserva).filter(Reserva.updated_at >= delta.desde).all()
+        return delta.respuesta(
+            _reservas_a_items(db, cambios, con_usuario=True),
+            eliminados_desde(db, "reservas", delta.desde)
+        )
+    
     try:
-
-        reservas = db.query(Reserva).order_by(Reserva.fecha_hora_inicio.desc()).all()
+        response.headers["X-Sync-Cursor"] = cursor_actual(db)
         
-        resultado = []
-        for reserva in reservas:
-            espacio_db = db.query(EspacioComun).filter(
-                EspacioComun.id == reserva.espacio_comun_id
-            ).first()
-            
-            # Obtener información del usuario
-            usuario_db = db.query(Usuario).filter(Usuario.id == reserva.usuario_id).first()
-            
-            reserva_response = ReservaListResponse(
-                id=reserva.id,
-                espacio=espacio_db.nombre if espacio_db else "Desconocido",
-                fecha_hora_inicio=reserva.fecha_hora_inicio,
-                fecha_hora_fin=reserva.fecha_hora_fin,
-                estado_pago=reserva.estado_pago,
-                monto_pago=float(reserva.monto_pago),
-                usuario_nombre=usuario_db.nombre_completo if usuario_db else "Desconocido"
-            )
-            resultado.append(reserva_response)
+        reservas = db.query(Reserva).order_by(Reserva.fecha_hora_inicio.desc()).all()
         
-        return resultado
+        return _reservas_a_items(db, reservas, con_usuario=True)
     
     except Exception as e:
         raise HTTPException(
@@ -629,8 +1406,10 @@ async def cancelar_reserva(
                     print(f"Advertencia: No se pudo eliminar evento de Google Calendar: {str(e)}")
         
         # Eliminar de la BD
+        espacio_comun_id, titular_id = reserva.espacio_comun_id, reserva.usuario_id
         db.delete(reserva)
         db.commit()
+        feeds.invalidar(espacio_comun_id=espacio_comun_id, usuario_id=titular_id)
         
         return {"message": "Reserva cancelada exitosamente", "reserva_id": reserva_id}
     
@@ -643,3 +1422,146 @@ async def cancelar_reserva(
             detail=f"Error al cancelar reserva: {str(e)}"
         )
 
+
+@router.post(
+    "/cancelaciones",
+    response_model=CancelacionLoteResponse,
+    summary="Cancelar varias reservas en una sola petición",
+    tags=["Reservas"]
+)
+async def cancelar_reservas_lote(
+    solicitud: CancelacionLoteRequest,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Cancela varias reservas a la vez.
+    
+    Las reservas se leen con una consulta, sus eventos se eliminan de Google
+    Calendar con peticiones batch (aunque pertenezcan a distintos calendarios)
+    y se borran de la BD con un solo DELETE.
+    
+    Args:
+        solicitud: IDs de las reservas a cancelar
+        db: Sesión de base de datos
+        current_user: Usuario autenticado
+    
+    Returns:
+        Resultado por reserva (canceladas, no encontradas, sin permiso)
+    """
+    ids_solicitados = list(dict.fromkeys(solicitud.reserva_ids))
+    es_staff = current_user.rol in {"Administrador", "Conserje", "Super Admin"}
+    
+    filas = db.query(
+        Reserva.id, Reserva.usuario_id, Reserva.espacio_comun_id, Reserva.google_event_id, EspacioComun.nombre
+    ).outerjoin(
+        EspacioComun, EspacioComun.id == Reserva.espacio_comun_id
+    ).filter(Reserva.id.in_(ids_solicitados)).all()
+    
+    encontradas = {fila.id: fila for fila in filas}
+    no_encontradas = [rid for rid in ids_solicitados if rid not in encontradas]
+    sin_permiso = [
+        fila.id for fila in filas
+        if fila.usuario_id != current_user.id and not es_staff
+    ]
+    a_cancelar = [fila for fila in filas if fila.id not in set(sin_permiso)]
+    
+    if not a_cancelar:
+        return CancelacionLoteResponse(
+            canceladas=[], no_encontradas=no_encontradas, sin_permiso=sin_permiso, eventos_calendario_eliminados=0
+        )
+    
+    # Eliminar de Google Calendar en batch; un fallo no impide la cancelación en la BD
+    eventos_eliminados = 0
+    eventos = [
+        (_clave_espacio(fila.nombre), fila.google_event_id)
+        for fila in a_cancelar
+        if fila.google_event_id and _clave_espacio(fila.nombre)
+    ]
+    if eventos and GOOGLE_CALENDAR_AVAILABLE and calendar_manager:
+        try:
+            eventos_eliminados = len(calendar_manager.eliminar_eventos_multiples(eventos))
+        except Exception as e:
+            print(f"Advertencia: No se pudieron eliminar eventos de Google Calendar: {str(e)}")
+    
+    try:
+        db.query(Reserva).filter(
+            Reserva.id.in_([fila.id for fila in a_cancelar])
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al cancelar reservas: {str(e)}"
+        )
+    
+    for fila in a_cancelar:
+        feeds.invalidar(espacio_comun_id=fila.espacio_comun_id, usuario_id=fila.usuario_id)
+    
+    return CancelacionLoteResponse(
+        canceladas=[fila.id for fila in a_cancelar],
+        no_encontradas=no_encontradas,
+        sin_permiso=sin_permiso,
+        eventos_calendario_eliminados=eventos_eliminados
+    )
+
+
+@router.post(
+    "/reconciliacion",
+    response_model=ReconciliacionResponse,
+    summary="Reconciliar reservas con Google Calendar",
+    tags=["Reservas"]
+)
+async def reconciliar_reservas(
+    fecha_inicio: Optional[datetime] = None,
+    fecha_fin: Optional[datetime] = None,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Corrige la deriva entre las reservas y los calendarios de Google.
+    
+    Crea los eventos que faltan, re-enlaza reservas a eventos existentes del
+    mismo horario y elimina los eventos huérfanos creados por la aplicación.
+    Solo disponible para administradores.
+    
+    Args:
+        fecha_inicio: Inicio del rango (por defecto, hoy)
+        fecha_fin: Fin del rango (por defecto, RECONCILIACION_DIAS días después)
+        dry_run: Si es True solo informa el diff sin aplicarlo
+        db: Sesión de base de datos
+        current_user: Usuario autenticado
+    
+    Returns:
+        Conteos de cada acción y tiempos por fase
+    """
+    if current_user.rol not in {"Administrador", "Super Admin"}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden reconciliar calendarios"
+        )
+    
+    if not (GOOGLE_CALENDAR_AVAILABLE and calendar_manager):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google Calendar no está configurado"
+        )
+    
+    if fecha_inicio and fecha_fin and fecha_fin <= fecha_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fecha_fin debe ser posterior a fecha_inicio"
+        )
+    
+    try:
+        return reconciliar_calendarios(
+            db, calendar_manager, fecha_inicio, fecha_fin, aplicar=not dry_run
+        )
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error al reconciliar con Google Calendar: {str(e)}"
+        )
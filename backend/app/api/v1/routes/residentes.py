@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 from decimal import Decimal
@@ -6,6 +7,7 @@ from decimal import Decimal
 from ....db.deps import get_db
 from ....models.models import Usuario, ResidenteVivienda, Vivienda, Condominio
 from ....core.auth import get_current_active_user
+from ....core.validadores import calcular_validador, respuesta_no_modificada
 
 router = APIRouter()
 
@@ -17,6 +19,8 @@ def decimal_to_float(value):
 
 @router.get("/")
 async def listar_residentes(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
@@ -34,11 +38,27 @@ async def listar_residentes(
                 detail="No tienes permisos para listar residentes",
             )
 
+        filtros = (Usuario.rol == 'Residente', Usuario.is_active == True)
+        
+        # ResidenteVivienda no tiene timestamps: las sumas de IDs detectan reasignaciones
+        validador = calcular_validador(
+            ("residentes",),
+            db.query(func.count(Usuario.id), func.max(Usuario.updated_at)).filter(*filtros),
+            db.query(
+                func.count(ResidenteVivienda.usuario_id),
+                func.sum(ResidenteVivienda.usuario_id),
+                func.sum(ResidenteVivienda.vivienda_id),
+            ),
+            db.query(func.max(Vivienda.updated_at)),
+            db.query(func.max(Condominio.updated_at)),
+        )
+        no_modificada = respuesta_no_modificada(request, validador)
+        if no_modificada is not None:
+            return no_modificada
+        validador.aplicar(response)
+        
         # Obtener todos los residentes activos
-        residentes = db.query(Usuario).filter(
-            Usuario.rol == 'Residente',
-            Usuario.is_active == True
-        ).all()
+        residentes = db.query(Usuario).filter(*filtros).all()
         
         resultado = []
         for residente in residentes:
@@ -0,0 +1,78 @@
+"""
+Rutas del valor de la UF.
+
+- GET /uf/hoy: valor de la UF del día
+- GET /uf/{fecha}: valor de la UF de una fecha pasada (AAAA-MM-DD)
+
+El valor se obtiene de la CMF una vez por fecha y se sirve desde caché
+(memoria y tabla valores_uf); ver app/services/uf.py.
+"""
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ....db.deps import get_db
+from ....services.uf import UFNoDisponibleError, cotizacion_a_dict, valor_uf
+
+router = APIRouter()
+
+# Segundos de caché en el cliente cuando se sirve un valor anterior (CMF caída)
+CACHE_NO_VIGENTE_SEGUNDOS = 60
+
+
+async def _responder(db: Session, fecha: date, response: Response) -> dict:
+    try:
+        # La consulta a la CMF es bloqueante: corre en el threadpool
+        cotizacion = await run_in_threadpool(valor_uf, db, fecha)
+    except UFNoDisponibleError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    resultado = cotizacion_a_dict(cotizacion, fecha)
+    if resultado["vigente"]:
+        # El valor de una fecha no cambia: el de hoy puede cachearse hasta medianoche
+        if fecha == date.today():
+            manana = datetime.combine(fecha + timedelta(days=1), datetime.min.time())
+            max_age = int((manana - datetime.now()).total_seconds())
+        else:
+            max_age = 86400
+    else:
+        max_age = CACHE_NO_VIGENTE_SEGUNDOS
+    response.headers["Cache-Control"] = f"private, max-age={max(max_age, 0)}"
+    return resultado
+
+
+@router.get("/hoy")
+async def obtener_uf_hoy(response: Response, db: Session = Depends(get_db)):
+    """
+    Obtiene el valor de la UF del día.
+
+    Returns:
+        fecha, valor en pesos, fuente y vigente (false si la CMF no respondió
+        y se entrega el último valor conocido)
+
+    Raises:
+        HTTPException 503: Si no hay valor de la UF disponible
+    """
+    return await _responder(db, date.today(), response)
+
+
+@router.get("/{fecha}")
+async def obtener_uf_fecha(fecha: date, response: Response, db: Session = Depends(get_db)):
+    """
+    Obtiene el valor de la UF de una fecha.
+
+    Args:
+        fecha: Fecha en formato AAAA-MM-DD (hoy o anterior)
+
+    Raises:
+        HTTPException 400: Si la fecha es posterior a hoy
+        HTTPException 503: Si no hay valor de la UF disponible
+    """
+    if fecha > date.today():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha no puede ser posterior a hoy"
+        )
+    return await _responder(db, fecha, response)
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ....db.deps import get_db
-from ....models.models import Vivienda, Condominio, Usuario
+from ....models.models import Vivienda, Condominio, Usuario, ResidenteVivienda
 from ....core.auth import get_current_active_user
+from ....core.idempotencia import RutaIdempotente
+from ....services.cuenta_corriente import estado_cuenta
+
+router = APIRouter(route_class=RutaIdempotente)
+
+
+class AlicuotaUpdate(BaseModel):
+    vivienda_id: int
+    alicuota: float = Field(..., ge=0, lt=1000)
 
-router = APIRouter()
 
 @router.get("/")
 async def listar_viviendas(
@@ -36,7 +46,9 @@ async def listar_viviendas(
                 "id": vivienda.id,
                 "numero_vivienda": vivienda.numero_vivienda,
                 "condominio_id": vivienda.condominio_id,
-                "condominio": condominio.nombre if condominio else "N/A"
+                "condominio": condominio.nombre if condominio else "N/A",
+                "cargo_fijo_uf": float(vivienda.cargo_fijo_uf or 0),
+                "alicuota": float(vivienda.alicuota or 0)
             })
         
         return {
@@ -50,3 +62,85 @@ async def listar_viviendas(
             detail=f"Error al obtener viviendas: {str(e)}"
         )
 
+
+@router.get("/{vivienda_id}/cuenta")
+async def obtener_cuenta_corriente(
+    vivienda_id: int,
+    limite: int = Query(50, ge=1, le=500),
+    antes_de: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Obtiene el saldo y la cartola de la cuenta corriente de una vivienda.
+    Accesible para administradores, conserjes, directiva y los residentes de la vivienda.
+    
+    Args:
+        vivienda_id: ID de la vivienda
+        limite: Cantidad máxima de movimientos
+        antes_de: Cursor de paginación ("siguiente" de la página anterior)
+    
+    Returns:
+        Saldo vigente (positivo = deuda) y movimientos del más reciente al más antiguo,
+        cada uno con el saldo posterior
+    """
+    if current_user.rol not in {"Administrador", "Conserje", "Directiva", "Super Admin"}:
+        es_residente = db.query(ResidenteVivienda).filter(
+            ResidenteVivienda.usuario_id == current_user.id,
+            ResidenteVivienda.vivienda_id == vivienda_id
+        ).first()
+        if not es_residente:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para consultar esta cuenta",
+            )
+    
+    if not db.query(Vivienda.id).filter(Vivienda.id == vivienda_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vivienda no encontrada",
+        )
+    
+    return estado_cuenta(db, vivienda_id, limite=limite, antes_de=antes_de)
+
+
+@router.put("/alicuotas")
+async def actualizar_alicuotas(
+    alicuotas: List[AlicuotaUpdate],
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Asigna la alícuota (coeficiente de prorrateo) de varias viviendas en lote.
+    Solo accesible para administradores.
+    
+    Args:
+        alicuotas: Lista de {vivienda_id, alicuota}
+    
+    Returns:
+        Cantidad de viviendas actualizadas
+    """
+    if current_user.rol not in {"Administrador", "Super Admin"}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para modificar alícuotas",
+        )
+    if not alicuotas:
+        return {"actualizadas": 0}
+    
+    ids = {item.vivienda_id for item in alicuotas}
+    existentes = {vivienda_id for (vivienda_id,) in db.query(Vivienda.id).filter(Vivienda.id.in_(ids))}
+    faltantes = sorted(ids - existentes)
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Viviendas no encontradas: {faltantes}",
+        )
+    
+    # UPDATE por clave primaria en lote
+    db.execute(update(Vivienda), [
+        {"id": item.vivienda_id, "alicuota": round(item.alicuota, 6)}
+        for item in alicuotas
+    ])
+    db.commit()
+    return {"actualizadas": len(ids)}
@@ -0,0 +1,178 @@
+"""
+Caché en memoria de respuestas invalidada por escrituras en la BD.
+
+Cada entrada se guarda junto con las tablas de las que depende. Los hooks de
+SQLAlchemy registran qué tablas modifica cada sesión y, en after_commit,
+descartan las entradas que dependen de ellas:
+- after_flush: filas agregadas, modificadas o eliminadas vía ORM
+- do_orm_execute: INSERT/UPDATE/DELETE masivos (insert(Modelo), query.delete())
+- after_rollback: descarta lo registrado, ya que nada se confirmó
+
+Un valor calculado con datos leídos antes de un commit no debe guardarse
+después de la invalidación de ese commit: el llamador toma generacion()
+antes de leer la BD y guardar() descarta el valor si alguna de sus tablas se
+invalidó entretanto.
+
+Además cada entrada expira tras un TTL como red de seguridad (con varios
+workers cada proceso tiene su propia caché y solo ve sus propios commits).
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Clave de Session.info donde se acumulan las tablas modificadas
+_TABLAS_MODIFICADAS = "tablas_modificadas"
+
+
+class CacheRespuestas:
+    """
+    Caché thread-safe de respuestas con TTL, dependencias por tabla y métricas.
+
+    Args:
+        nombre: Nombre de la caché (para métricas)
+        ttl_segundos: Tiempo máximo de vida de cada entrada
+    """
+
+    def __init__(self, nombre: str, ttl_segundos: float):
+        self.nombre = nombre
+        self.ttl_segundos = ttl_segundos
+        # clave -> (valor, expira_en, tablas)
+        self._entradas: Dict[Hashable, Tuple[Any, float, frozenset]] = {}
+        self._aciertos = 0
+        self._fallos = 0
+        self._invalidaciones = 0
+        self._expiradas = 0
+        self._descartadas = 0
+        # Contador de invalidaciones y generación de la última invalidación de cada tabla
+        self._generacion = 0
+        self._invalidada_en: Dict[str, int] = {}
+        self._limpiada_en = 0
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def generacion(self) -> int:
+        """Generación actual; se toma antes de leer los datos que se van a guardar"""
+        with self._lock:
+            return self._generacion
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """Retorna el valor cacheado o None si no existe o expiró"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] > time.monotonic():
+                self._aciertos += 1
+                return entrada[0]
+            if entrada is not None:
+                del self._entradas[clave]
+                self._expiradas += 1
+            self._fallos += 1
+            return None
+
+    def guardar(
+        self, clave: Hashable, valor: Any, tablas: Iterable[str], generacion: Optional[int] = None
+    ) -> bool:
+        """
+        Guarda un valor indicando las tablas de las que depende.
+
+        Args:
+            clave: Clave de la entrada
+            valor: Valor a cachear (no debe mutarse después de guardarlo)
+            tablas: Nombres de tabla cuyos cambios invalidan la entrada
+            generacion: generacion() tomada antes de leer los datos; si alguna
+                de las tablas se invalidó después, el valor no se guarda
+
+        Returns:
+            True si el valor se guardó
+        """
+        tablas = frozenset(tablas)
+        with self._lock:
+            if generacion is not None and (
+                self._limpiada_en > generacion
+                or any(self._invalidada_en.get(tabla, 0) > generacion for tabla in tablas)
+            ):
+                self._descartadas += 1
+                return False
+            self._entradas[clave] = (valor, time.monotonic() + self.ttl_segundos, tablas)
+            return True
+
+    def invalidar_tablas(self, tablas: Iterable[str]) -> int:
+        """Descarta las entradas que dependen de alguna de las tablas indicadas"""
+        tablas = set(tablas)
+        with self._lock:
+            self._generacion += 1
+            for tabla in tablas:
+                self._invalidada_en[tabla] = self._generacion
+            claves = [clave for clave, entrada in self._entradas.items() if entrada[2] & tablas]
+            for clave in claves:
+                del self._entradas[clave]
+            self._invalidaciones += len(claves)
+            return len(claves)
+
+    def limpiar(self) -> None:
+        """Descarta todas las entradas"""
+        with self._lock:
+            self._generacion += 1
+            self._limpiada_en = self._generacion
+            self._entradas.clear()
+
+    def metricas(self) -> Dict[str, Any]:
+        """Métricas de uso de la caché (expuestas en /healthz)"""
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                "entradas": len(self._entradas),
+                "ttl_segundos": self.ttl_segundos,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "tasa_aciertos": round(self._aciertos / consultas, 3) if consultas else None,
+                "invalidaciones": self._invalidaciones,
+                "expiradas": self._expiradas,
+                "descartadas": self._descartadas,
+            }
+
+
+# Todas las cachés del proceso; los hooks de SQLAlchemy invalidan en cada una
+_caches: List[CacheRespuestas] = []
+
+
+def metricas_caches() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todas las cachés registradas, por nombre"""
+    return {cache.nombre: cache.metricas() for cache in _caches}
+
+
+def _registrar_tablas(session: Session, tablas: Iterable[str]) -> None:
+    session.info.setdefault(_TABLAS_MODIFICADAS, set()).update(tablas)
+
+
+@event.listens_for(Session, "after_flush")
+def _tablas_desde_flush(session, flush_context):
+    objetos = list(session.new) + list(session.dirty) + list(session.deleted)
+    _registrar_tablas(
+        session,
+        {obj.__tablename__ for obj in objetos if hasattr(obj, "__tablename__")},
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _tablas_desde_ejecucion(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table is not None:
+        _registrar_tablas(orm_execute_state.session, {mapper.local_table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_despues_de_commit(session):
+    tablas = session.info.pop(_TABLAS_MODIFICADAS, None)
+    if tablas:
+        for cache in _caches:
+            cache.invalidar_tablas(tablas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_despues_de_rollback(session):
+    session.info.pop(_TABLAS_MODIFICADAS, None)
@@ -0,0 +1,129 @@
+"""
+Circuit breaker para llamadas a servicios externos.
+
+Cuando un servicio externo (ej: Google Calendar) está lento o caído, cada
+petición de la API esperaría el timeout antes de usar su fallback. El circuit
+breaker corta esas llamadas después de N fallos consecutivos:
+
+- cerrado: las llamadas pasan normalmente
+- abierto: las llamadas fallan de inmediato durante el periodo de enfriamiento
+- semi_abierto: pasado el enfriamiento se permite una llamada de prueba; si
+  funciona el circuito se cierra, si falla vuelve a abrirse
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMI_ABIERTO = "semi_abierto"
+
+
+class CircuitoAbiertoError(Exception):
+    """
+    Excepción lanzada cuando el circuito está abierto y la llamada se omite.
+    """
+
+    def __init__(self, servicio: str, reintentar_en: float):
+        super().__init__(
+            f"{servicio} no disponible temporalmente (circuito abierto, reintento en {reintentar_en:.0f}s)"
+        )
+        self.servicio = servicio
+        self.reintentar_en = reintentar_en
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker thread-safe con umbral de fallos y enfriamiento.
+
+    Args:
+        servicio: Nombre del servicio protegido (para mensajes y /healthz)
+        umbral_fallos: Fallos consecutivos que abren el circuito
+        enfriamiento_segundos: Tiempo que el circuito permanece abierto
+    """
+
+    def __init__(self, servicio: str, umbral_fallos: int, enfriamiento_segundos: float):
+        self.servicio = servicio
+        self.umbral_fallos = max(1, umbral_fallos)
+        self.enfriamiento_segundos = enfriamiento_segundos
+        self._estado = CERRADO
+        self._fallos_consecutivos = 0
+        self._abierto_desde: Optional[float] = None
+        self._prueba_en_curso = False
+        self._total_fallos = 0
+        self._total_rechazadas = 0
+        self._ultimo_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        """
+        Indica si se puede realizar una llamada al servicio.
+
+        En estado semi_abierto solo se permite una llamada de prueba a la vez.
+        """
+        with self._lock:
+            if self._estado == ABIERTO:
+                if time.monotonic() - self._abierto_desde >= self.enfriamiento_segundos:
+                    self._estado = SEMI_ABIERTO
+                    self._prueba_en_curso = False
+                else:
+                    self._total_rechazadas += 1
+                    return False
+            if self._estado == SEMI_ABIERTO:
+                if self._prueba_en_curso:
+                    self._total_rechazadas += 1
+                    return False
+                self._prueba_en_curso = True
+            return True
+
+    def verificar(self) -> None:
+        """
+        Lanza CircuitoAbiertoError si la llamada no está permitida.
+
+        Raises:
+            CircuitoAbiertoError: Si el circuito está abierto
+        """
+        if not self.permitir():
+            raise CircuitoAbiertoError(self.servicio, self._segundos_para_reintento())
+
+    def registrar_exito(self) -> None:
+        """Registra una llamada exitosa y cierra el circuito"""
+        with self._lock:
+            self._estado = CERRADO
+            self._fallos_consecutivos = 0
+            self._abierto_desde = None
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self, error: Optional[BaseException] = None) -> None:
+        """Registra un fallo; abre el circuito al alcanzar el umbral"""
+        with self._lock:
+            self._total_fallos += 1
+            self._fallos_consecutivos += 1
+            if error is not None:
+                self._ultimo_error = f"{type(error).__name__}: {str(error)[:200]}"
+            if self._estado == SEMI_ABIERTO or self._fallos_consecutivos >= self.umbral_fallos:
+                self._estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+            self._prueba_en_curso = False
+
+    def _segundos_para_reintento(self) -> float:
+        with self._lock:
+            if self._abierto_desde is None:
+                return 0.0
+            return max(0.0, self.enfriamiento_segundos - (time.monotonic() - self._abierto_desde))
+
+    def estado(self) -> Dict[str, Any]:
+        """Estado actual del circuito (expuesto en /healthz)"""
+        reintentar_en = self._segundos_para_reintento()
+        with self._lock:
+            return {
+                "servicio": self.servicio,
+                "estado": self._estado,
+                "fallos_consecutivos": self._fallos_consecutivos,
+                "umbral_fallos": self.umbral_fallos,
+                "enfriamiento_segundos": self.enfriamiento_segundos,
+                "reintentar_en_segundos": round(reintentar_en, 1) if self._estado == ABIERTO else None,
+                "total_fallos": self._total_fallos,
+                "total_rechazadas": self._total_rechazadas,
+                "ultimo_error": self._ultimo_error,
+            }
@@ -63,6 +63,154 @@ class Settings:
         self.GOOGLE_CALENDAR_ID_MULTICANCHA: str = os.getenv("GOOGLE_CALENDAR_ID_MULTICANCHA", "")
         self.GOOGLE_CALENDAR_ID_QUINCHO: str = os.getenv("GOOGLE_CALENDAR_ID_QUINCHO", "")
         self.GOOGLE_CALENDAR_ID_SALA_EVENTOS: str = os.getenv("GOOGLE_CALENDAR_ID_SALA_EVENTOS", "")
+        # Timeout (segundos) de cada operación de red con la API de Google Calendar
+        self.GOOGLE_CALENDAR_TIMEOUT_SEGUNDOS: float = float(os.getenv("GOOGLE_CALENDAR_TIMEOUT_SEGUNDOS", 5))
+        # Fallos consecutivos que abren el circuit breaker de Google Calendar
+        self.GOOGLE_CALENDAR_UMBRAL_FALLOS: int = int(os.getenv("GOOGLE_CALENDAR_UMBRAL_FALLOS", 3))
+        # Segundos que el circuito permanece abierto antes de una llamada de prueba
+        self.GOOGLE_CALENDAR_ENFRIAMIENTO_SEGUNDOS: float = float(
+            os.getenv("GOOGLE_CALENDAR_ENFRIAMIENTO_SEGUNDOS", 60)
+        )
+
+        # ========================================================================
+        # Configuración de Reservas
+        # ========================================================================
+        # Minutos que un horario de un espacio con pago queda retenido mientras
+        # el usuario completa el pago
+        self.RESERVA_RETENCION_MINUTOS: int = int(os.getenv("RESERVA_RETENCION_MINUTOS", 10))
+        # Horas que una reserva con pago pendiente bloquea el horario: si vence el
+        # plazo sin pagos imputados, la reserva se elimina y el horario se libera
+        self.RESERVA_PAGO_PENDIENTE_HORAS: int = int(os.getenv("RESERVA_PAGO_PENDIENTE_HORAS", 48))
+        # Rango máximo (en días) que acepta la consulta de disponibilidad
+        self.DISPONIBILIDAD_MAX_DIAS: int = int(os.getenv("DISPONIBILIDAD_MAX_DIAS", 92))
+        # A partir de cuántos días el formato compacto se envía como NDJSON día por día
+        self.DISPONIBILIDAD_DIAS_STREAMING: int = int(os.getenv("DISPONIBILIDAD_DIAS_STREAMING", 14))
+        # Días hacia adelante que revisa la reconciliación con Google Calendar
+        self.RECONCILIACION_DIAS: int = int(os.getenv("RECONCILIACION_DIAS", 92))
+        # Reservas leídas por consulta durante la reconciliación
+        self.RECONCILIACION_TAMANO_LOTE: int = int(os.getenv("RECONCILIACION_TAMANO_LOTE", 500))
+
+        # ========================================================================
+        # Configuración de Caché de Respuestas
+        # ========================================================================
+        # Segundos máximos que una estadística del dashboard se sirve desde caché
+        # (las escrituras en la BD la invalidan antes)
+        self.DASHBOARD_CACHE_SEGUNDOS: int = int(os.getenv("DASHBOARD_CACHE_SEGUNDOS", 60))
+
+        # ========================================================================
+        # Configuración de Sincronización Delta (?since=)
+        # ========================================================================
+        # Segundos que se retrocede el cursor para cubrir transacciones en curso
+        self.SINCRONIZACION_MARGEN_SEGUNDOS: int = int(os.getenv("SINCRONIZACION_MARGEN_SEGUNDOS", 5))
+        # Días que se conservan los registros de filas eliminadas
+        self.SINCRONIZACION_RETENCION_DIAS: int = int(os.getenv("SINCRONIZACION_RETENCION_DIAS", 30))
+
+        # ========================================================================
+        # Configuración de Exportaciones (CSV / NDJSON)
+        # ========================================================================
+        # Filas que se leen de la BD por lote con cursor del lado del servidor
+        self.EXPORTACION_TAMANO_LOTE: int = int(os.getenv("EXPORTACION_TAMANO_LOTE", 1000))
+        # Directorio donde se escriben los snapshots Parquet para análisis
+        self.SNAPSHOTS_DIR: str = os.getenv("SNAPSHOTS_DIR", "snapshots")
+        # Filas por lote al convertir a Arrow (tamaño de cada row group)
+        self.SNAPSHOTS_TAMANO_LOTE: int = int(os.getenv("SNAPSHOTS_TAMANO_LOTE", 50000))
+
+        # ========================================================================
+        # Configuración de Reportes (motor analítico embebido)
+        # ========================================================================
+        # Antigüedad máxima del snapshot que sirven los reportes antes de refrescarlo
+        self.REPORTES_ANTIGUEDAD_MAXIMA_MINUTOS: int = int(os.getenv("REPORTES_ANTIGUEDAD_MAXIMA_MINUTOS", 60))
+
+        # ========================================================================
+        # Configuración de Facturación (emisión de gastos comunes)
+        # ========================================================================
+        # Viviendas por lote; cada lote se confirma junto con el checkpoint
+        self.FACTURACION_TAMANO_LOTE: int = int(os.getenv("FACTURACION_TAMANO_LOTE", 1000))
+        # Día del mes en que vencen los gastos emitidos si no se indica otro vencimiento
+        self.FACTURACION_DIA_VENCIMIENTO: int = int(os.getenv("FACTURACION_DIA_VENCIMIENTO", 10))
+
+        # ========================================================================
+        # Configuración de Importación de Pagos (cartolas bancarias)
+        # ========================================================================
+        # Pagos por INSERT multi-fila / UPDATE de gastos al importar una cartola
+        self.IMPORTACION_PAGOS_TAMANO_LOTE: int = int(os.getenv("IMPORTACION_PAGOS_TAMANO_LOTE", 1000))
+        # Filas máximas por archivo (acota el tamaño del reporte de conciliación)
+        self.IMPORTACION_PAGOS_MAX_FILAS: int = int(os.getenv("IMPORTACION_PAGOS_MAX_FILAS", 50000))
+
+        # ========================================================================
+        # Configuración de Multas
+        # ========================================================================
+        # Multas máximas por petición en la creación por lote (POST /multas/lote)
+        self.MULTAS_LOTE_MAX_ITEMS: int = int(os.getenv("MULTAS_LOTE_MAX_ITEMS", 1000))
+        # Recargo por mora de los gastos comunes vencidos: "porcentaje" (del saldo
+        # pendiente del gasto) o "fijo" (monto en pesos), aplicado una vez por mes
+        self.RECARGO_MORA_TIPO: str = os.getenv("RECARGO_MORA_TIPO", "porcentaje")
+        self.RECARGO_MORA_VALOR: str = os.getenv("RECARGO_MORA_VALOR", "1.5")
+        # Días después del vencimiento antes de aplicar el primer recargo
+        self.RECARGO_MORA_DIAS_GRACIA: int = int(os.getenv("RECARGO_MORA_DIAS_GRACIA", 5))
+
+        # ========================================================================
+        # Configuración de la UF (API de la CMF)
+        # ========================================================================
+        # API key de la CMF (api.cmfchile.cl) para obtener el valor diario de la UF
+        self.CMF_API_KEY: str = os.getenv("CMF_API_KEY", "")
+        self.CMF_API_URL: str = os.getenv(
+            "CMF_API_URL", "https://api.cmfchile.cl/api-sbifv3/recursos_api/uf"
+        )
+        # Timeout (segundos) de cada consulta a la API de la CMF
+        self.CMF_TIMEOUT_SEGUNDOS: float = float(os.getenv("CMF_TIMEOUT_SEGUNDOS", 5))
+        # Fallos consecutivos que abren el circuit breaker de la CMF
+        self.CMF_UMBRAL_FALLOS: int = int(os.getenv("CMF_UMBRAL_FALLOS", 3))
+        # Segundos que el circuito permanece abierto antes de una llamada de prueba
+        self.CMF_ENFRIAMIENTO_SEGUNDOS: float = float(os.getenv("CMF_ENFRIAMIENTO_SEGUNDOS", 300))
+        # Valor fijo de la UF para desarrollo local y pruebas (reemplaza a la CMF si se define)
+        self.UF_VALOR_FIJO: str = os.getenv("UF_VALOR_FIJO", "")
+
+        # ========================================================================
+        # Configuración de Idempotencia (header Idempotency-Key)
+        # ========================================================================
+        # Horas que se guarda la respuesta de una petición para reintentos
+        self.IDEMPOTENCIA_HORAS: int = int(os.getenv("IDEMPOTENCIA_HORAS", 24))
+        # Segundos tras los cuales una petición "en curso" se considera abandonada
+        # (ej: el proceso se reinició) y un reintento puede ejecutarla de nuevo
+        self.IDEMPOTENCIA_EN_CURSO_SEGUNDOS: int = int(os.getenv("IDEMPOTENCIA_EN_CURSO_SEGUNDOS", 120))
+        # Tamaño máximo (comprimido) de una respuesta guardada; las mayores no se guardan
+        self.IDEMPOTENCIA_MAX_BYTES: int = int(os.getenv("IDEMPOTENCIA_MAX_BYTES", 65535))
+
+        # ========================================================================
+        # Configuración del Planificador de Tareas (en proceso)
+        # ========================================================================
+        # Inicia el planificador al levantar la API; con varios workers solo el
+        # líder (lider_planificador) ejecuta las tareas
+        self.PLANIFICADOR_ACTIVO: bool = os.getenv("PLANIFICADOR_ACTIVO", "true").lower() in ("1", "true", "si")
+        # Segundos entre ciclos (renovación del liderazgo y revisión de tareas pendientes)
+        self.PLANIFICADOR_INTERVALO_SEGUNDOS: int = int(os.getenv("PLANIFICADOR_INTERVALO_SEGUNDOS", 30))
+        # Segundos que dura el liderazgo sin renovarse antes de que otro proceso lo tome
+        self.PLANIFICADOR_LIDERAZGO_SEGUNDOS: int = int(os.getenv("PLANIFICADOR_LIDERAZGO_SEGUNDOS", 90))
+        # Minutos de espera antes de reintentar una tarea que terminó con error
+        self.PLANIFICADOR_REINTENTO_MINUTOS: int = int(os.getenv("PLANIFICADOR_REINTENTO_MINUTOS", 15))
+        # Minutos tras los cuales una tarea en curso se considera abandonada (ej: el
+        # proceso se cayó durante la ejecución) y otro líder puede reclamarla
+        self.PLANIFICADOR_EN_CURSO_MINUTOS: int = int(os.getenv("PLANIFICADOR_EN_CURSO_MINUTOS", 120))
+        # Hora (HH:MM) de las tareas nocturnas
+        self.PLANIFICADOR_HORA_NOCTURNA: str = os.getenv("PLANIFICADOR_HORA_NOCTURNA", "00:05")
+        # Tareas nocturnas habilitadas, en orden de ejecución (ver app/services/tareas_programadas.py);
+        # recargos_mora, reconstruir_cuentas, snapshots y reconciliar_calendarios son opcionales
+        self.PLANIFICADOR_TAREAS: str = os.getenv(
+            "PLANIFICADOR_TAREAS",
+            "aplicar_saldos_a_favor,vencer_gastos,reconstruir_resumen,purgar_eliminaciones,"
+            "purgar_idempotencia,purgar_retenciones,liberar_reservas_impagas,actualizar_uf",
+        )
+
+        # ========================================================================
+        # Configuración de Feeds iCalendar
+        # ========================================================================
+        # Segundos que un feed renderizado puede servirse sin re-renderizar
+        self.ICAL_CACHE_SEGUNDOS: int = int(os.getenv("ICAL_CACHE_SEGUNDOS", 900))
+        # Vigencia de los tokens de suscripción incluidos en las URLs de los feeds
+        self.ICAL_TOKEN_DIAS: int = int(os.getenv("ICAL_TOKEN_DIAS", 365))
+        # Días hacia atrás de reservas pasadas que se incluyen en los feeds
+        self.ICAL_DIAS_HISTORIAL: int = int(os.getenv("ICAL_DIAS_HISTORIAL", 90))
 
     @property
     def database_url(self) -> str:
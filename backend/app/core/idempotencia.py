@@ -0,0 +1,265 @@
+"""
+Idempotencia de peticiones de escritura con el header Idempotency-Key.
+
+Un cliente con red inestable puede reintentar un POST cuya respuesta no le
+llegó (ej: crear una reserva o registrar un pago). Si envía el header
+Idempotency-Key con un valor único por operación (ej: un UUID), el reintento
+recibe la respuesta original sin volver a ejecutar el endpoint:
+
+- Antes de ejecutar el endpoint se reclama la clave del usuario en
+  claves_idempotencia (restricción única): solo una de las peticiones con la
+  misma clave se ejecuta
+- La respuesta (código, tipo de contenido, headers y cuerpo comprimido con
+  zlib) se guarda en la misma fila y se repite en los reintentos con el
+  header Idempotent-Replayed: true
+- Un reintento mientras la original sigue en curso recibe 409 con
+  Retry-After; una clave reutilizada con otra petición (otra ruta o cuerpo)
+  recibe 422
+- Los cuerpos multipart (subida de archivos) no se leen antes del endpoint,
+  que los procesa en streaming: su huella usa el Content-Length en lugar del
+  contenido
+- Las respuestas de error (excepciones y códigos 5xx) no se guardan: el
+  reintento vuelve a ejecutar el endpoint
+- Las claves expiran tras IDEMPOTENCIA_HORAS (purgar_expiradas las elimina)
+
+Se activa por router con APIRouter(route_class=RutaIdempotente); sin el
+header las peticiones se procesan igual que siempre.
+"""
+import hashlib
+import json
+import zlib
+from datetime import timedelta
+from typing import Callable, Optional, Union
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import InvalidTokenError, get_token_subject
+from app.db.session import SessionLocal
+from app.models.models import ClaveIdempotencia
+from app.services.sincronizacion import ahora_bd
+
+HEADER_CLAVE = "Idempotency-Key"
+HEADER_REPETIDA = "Idempotent-Replayed"
+
+METODOS = {"POST", "PUT", "PATCH", "DELETE"}
+
+LARGO_MAXIMO_CLAVE = 255
+
+# Headers de la respuesta que no se guardan: se recalculan o no deben repetirse
+HEADERS_NO_GUARDADOS = {"content-length", "set-cookie"}
+
+
+def _usuario(request: Request) -> Optional[int]:
+    """ID del usuario del token Bearer (None si no hay token válido)"""
+    autorizacion = request.headers.get("Authorization", "")
+    esquema, _, token = autorizacion.partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    try:
+        return int(get_token_subject(token))
+    except (InvalidTokenError, ValueError):
+        return None
+
+
+def _es_multipart(request: Request) -> bool:
+    return "multipart/form-data" in request.headers.get("Content-Type", "")
+
+
+def _huella(request: Request, cuerpo: Optional[bytes]) -> str:
+    """SHA-256 de método, ruta, query y cuerpo (o su largo, si es multipart) de la petición"""
+    if cuerpo is None:
+        cuerpo = f"content-length:{request.headers.get('Content-Length', '')}".encode("ascii")
+    huella = hashlib.sha256()
+    for parte in (request.method, request.url.path, str(sorted(request.query_params.multi_items()))):
+        huella.update(parte.encode("utf-8"))
+        huella.update(b"\0")
+    huella.update(cuerpo)
+    return huella.hexdigest()
+
+
+def _reclamar(usuario_id: int, clave: str, huella: str) -> Union[int, Response]:
+    """
+    Reclama la clave para ejecutar la petición.
+
+    Returns:
+        ID del registro reclamado, o la respuesta a entregar sin ejecutar el
+        endpoint (respuesta guardada, 409 si sigue en curso o 422 si la clave
+        se usó con otra petición)
+    """
+    db = SessionLocal()
+    try:
+        ahora = ahora_bd(db)
+        # Segundo intento: la clave existente estaba expirada o abandonada
+        for _ in range(2):
+            try:
+                registro = ClaveIdempotencia(
+                    usuario_id=usuario_id,
+                    clave=clave,
+                    huella=huella,
+                    estado="en_curso",
+                    expira_en=ahora + timedelta(hours=settings.IDEMPOTENCIA_HORAS),
+                )
+                db.add(registro)
+                db.commit()
+                return registro.id
+            except IntegrityError:
+                db.rollback()
+
+            existente = (
+                db.query(ClaveIdempotencia)
+                .filter(ClaveIdempotencia.usuario_id == usuario_id, ClaveIdempotencia.clave == clave)
+                .first()
+            )
+            if existente is None:
+                continue
+            abandonada = (
+                existente.estado == "en_curso"
+                and existente.created_at <= ahora - timedelta(seconds=settings.IDEMPOTENCIA_EN_CURSO_SEGUNDOS)
+            )
+            if existente.expira_en <= ahora or abandonada:
+                db.query(ClaveIdempotencia).filter(ClaveIdempotencia.id == existente.id).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+                continue
+
+            if existente.huella != huella:
+                return JSONResponse(
+                    status_code=422,
+                    content={"detail": f"La {HEADER_CLAVE} ya se usó con otra petición"},
+                )
+            if existente.estado == "en_curso":
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": "La petición original con esta Idempotency-Key sigue en curso"},
+                    headers={"Retry-After": "1"},
+                )
+            respuesta = Response(
+                content=zlib.decompress(existente.respuesta) if existente.respuesta else b"",
+                status_code=existente.codigo_estado,
+                media_type=existente.tipo_contenido,
+            )
+            for nombre, valor in json.loads(existente.cabeceras or "[]"):
+                if nombre.lower() != "content-type":
+                    respuesta.headers.append(nombre, valor)
+            respuesta.headers[HEADER_REPETIDA] = "true"
+            return respuesta
+
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "No se pudo reservar la Idempotency-Key; reintente"},
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        db.close()
+
+
+def _liberar(registro_id: int) -> None:
+    """Elimina el registro para que un reintento vuelva a ejecutar el endpoint"""
+    db = SessionLocal()
+    try:
+        db.query(ClaveIdempotencia).filter(ClaveIdempotencia.id == registro_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _guardar(registro_id: int, respuesta: Response) -> None:
+    """Guarda la respuesta del endpoint o libera la clave si no se puede repetir"""
+    cuerpo = getattr(respuesta, "body", None)
+    if cuerpo is None or respuesta.status_code >= 500:
+        # Respuestas en streaming o errores del servidor: no se repiten
+        _liberar(registro_id)
+        return
+    comprimido = zlib.compress(bytes(cuerpo))
+    if len(comprimido) > settings.IDEMPOTENCIA_MAX_BYTES:
+        print(f"Advertencia: respuesta de {len(comprimido)} bytes no se guarda para idempotencia")
+        _liberar(registro_id)
+        return
+
+    cabeceras = [
+        [nombre, valor]
+        for nombre, valor in respuesta.headers.items()
+        if nombre.lower() not in HEADERS_NO_GUARDADOS
+    ]
+
+    db = SessionLocal()
+    try:
+        db.query(ClaveIdempotencia).filter(ClaveIdempotencia.id == registro_id).update(
+            {
+                "estado": "completado",
+                "codigo_estado": respuesta.status_code,
+                "tipo_contenido": respuesta.media_type or respuesta.headers.get("content-type"),
+                "cabeceras": json.dumps(cabeceras, ensure_ascii=False),
+                "respuesta": comprimido,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _ejecutar_idempotente(request: Request, clave: str, handler: Callable) -> Response:
+    clave = clave.strip()
+    if not clave or len(clave) > LARGO_MAXIMO_CLAVE:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": f"{HEADER_CLAVE} debe tener entre 1 y {LARGO_MAXIMO_CLAVE} caracteres"},
+        )
+    usuario_id = _usuario(request)
+    if usuario_id is None:
+        # Sin usuario no hay alcance para la clave; la autenticación del
+        # endpoint responderá 401
+        return await handler(request)
+
+    # El cuerpo queda en caché en el request y el endpoint lo vuelve a leer de
+    # ahí; los multipart no se leen para no cargar el archivo completo en memoria
+    cuerpo = None if _es_multipart(request) else await request.body()
+    reclamo = await run_in_threadpool(_reclamar, usuario_id, clave, _huella(request, cuerpo))
+    if isinstance(reclamo, Response):
+        return reclamo
+
+    try:
+        respuesta = await handler(request)
+    except Exception:
+        await run_in_threadpool(_liberar, reclamo)
+        raise
+    try:
+        await run_in_threadpool(_guardar, reclamo, respuesta)
+    except Exception as e:
+        # El endpoint ya se ejecutó: se responde igual; un reintento lo ejecutaría de nuevo
+        print(f"Advertencia: no se pudo guardar la respuesta idempotente: {e}")
+    return respuesta
+
+
+class RutaIdempotente(APIRoute):
+    """
+    Ruta que respeta el header Idempotency-Key en POST/PUT/PATCH/DELETE.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def handler_idempotente(request: Request) -> Response:
+            clave = request.headers.get(HEADER_CLAVE)
+            if clave is None or request.method not in METODOS:
+                return await handler(request)
+            return await _ejecutar_idempotente(request, clave, handler)
+
+        return handler_idempotente
+
+
+def purgar_expiradas(db: Session) -> int:
+    """Elimina las claves de idempotencia expiradas"""
+    eliminadas = db.query(ClaveIdempotencia).filter(
+        ClaveIdempotencia.expira_en < ahora_bd(db)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return eliminadas
@@ -0,0 +1,306 @@
+"""
+Planificador de tareas en proceso con elección de líder.
+
+Cada proceso de la API (worker de uvicorn) inicia un hilo que cada
+PLANIFICADOR_INTERVALO_SEGUNDOS:
+
+1. Intenta tomar o renovar el liderazgo: un UPDATE condicional sobre la fila
+   única de lider_planificador, que solo tiene éxito si el proceso ya es el
+   dueño o si el liderazgo del dueño anterior expiró. Si el líder se cae,
+   otro proceso lo reemplaza tras PLANIFICADOR_LIDERAZGO_SEGUNDOS
+2. Si es el líder, revisa las tareas en orden y ejecuta las que tienen un
+   horario pendiente. Antes de ejecutar reclama el horario con un UPDATE
+   condicional que marca la tarea en curso (en_curso_por/en_curso_desde):
+   aunque dos procesos se crean líderes durante un cambio de liderazgo, cada
+   horario se ejecuta una sola vez
+3. Solo si la tarea termina sin error el horario queda ejecutado
+   (ultima_ejecucion). Si falla, se reintenta en un ciclo posterior después
+   de PLANIFICADOR_REINTENTO_MINUTOS; si el proceso se cae durante la
+   ejecución, otro líder la reclama pasados PLANIFICADOR_EN_CURSO_MINUTOS
+
+Una tarea diaria cuyo horario pasó mientras ningún proceso estaba arriba se
+ejecuta en el primer ciclo del siguiente líder. El resultado (o el error) de
+cada ejecución queda en tareas_programadas.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, time as hora_del_dia, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import LiderPlanificador, TareaProgramada
+from app.services.sincronizacion import ahora_bd
+
+ID_LIDER = 1
+
+
+class Tarea(NamedTuple):
+    nombre: str
+    funcion: Callable[[Session], Any]
+    hora: Optional[hora_del_dia] = None  # diaria a esta hora
+    cada_minutos: Optional[int] = None  # o periódica
+
+
+def ultimo_horario(tarea: Tarea, ahora: datetime) -> datetime:
+    """Horario más reciente (<= ahora) en que le correspondía ejecutarse a la tarea"""
+    if tarea.hora is not None:
+        hoy = datetime.combine(ahora.date(), tarea.hora)
+        return hoy if ahora >= hoy else hoy - timedelta(days=1)
+    return ahora - timedelta(minutes=tarea.cada_minutos)
+
+
+def _a_json(resultado: Any) -> str:
+    return json.dumps(resultado, default=str, ensure_ascii=False)
+
+
+class Planificador:
+    """
+    Ejecuta tareas programadas en el proceso líder.
+
+    Args:
+        tareas: Tareas en orden de ejecución
+        intervalo_segundos: Segundos entre ciclos (default: PLANIFICADOR_INTERVALO_SEGUNDOS)
+        liderazgo_segundos: Vigencia del liderazgo (default: PLANIFICADOR_LIDERAZGO_SEGUNDOS)
+    """
+
+    def __init__(
+        self,
+        tareas: Iterable[Tarea],
+        intervalo_segundos: Optional[int] = None,
+        liderazgo_segundos: Optional[int] = None,
+    ):
+        self.tareas = list(tareas)
+        self.intervalo_segundos = intervalo_segundos or settings.PLANIFICADOR_INTERVALO_SEGUNDOS
+        self.liderazgo_segundos = liderazgo_segundos or settings.PLANIFICADOR_LIDERAZGO_SEGUNDOS
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.es_lider = False
+        self._tareas_registradas = False
+        self._en_curso: Optional[str] = None
+        self._ultimo_ciclo: Optional[datetime] = None
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def iniciar(self) -> None:
+        """Inicia el hilo del planificador (daemon)"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="planificador", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 10) -> None:
+        """Detiene el hilo (espera la tarea en curso hasta timeout) y cede el liderazgo"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        if self.es_lider:
+            self._ceder_liderazgo()
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            try:
+                self.ciclo()
+            except Exception as e:
+                print(f"Advertencia: ciclo del planificador falló: {e}")
+            self._detener.wait(self.intervalo_segundos)
+
+    # ------------------------------------------------------------------
+    # Liderazgo
+    # ------------------------------------------------------------------
+
+    def _tomar_liderazgo(self, db: Session) -> bool:
+        """Toma o renueva el liderazgo; False si otro proceso lo tiene vigente"""
+        ahora = ahora_bd(db)
+        tomadas = db.query(LiderPlanificador).filter(
+            LiderPlanificador.id == ID_LIDER,
+            or_(
+                LiderPlanificador.dueno == self.id,
+                LiderPlanificador.dueno.is_(None),
+                LiderPlanificador.expira_en.is_(None),
+                LiderPlanificador.expira_en < ahora,
+            ),
+        ).update(
+            {"dueno": self.id, "expira_en": ahora + timedelta(seconds=self.liderazgo_segundos)},
+            synchronize_session=False,
+        )
+        db.commit()
+
+        if not tomadas and db.query(LiderPlanificador.id).filter(LiderPlanificador.id == ID_LIDER).first() is None:
+            # Primera ejecución sin la fila creada por la migración
+            try:
+                db.add(LiderPlanificador(
+                    id=ID_LIDER, dueno=self.id, expira_en=ahora + timedelta(seconds=self.liderazgo_segundos)
+                ))
+                db.commit()
+                tomadas = 1
+            except IntegrityError:
+                db.rollback()
+
+        lider = bool(tomadas)
+        if lider != self.es_lider:
+            print(f"Planificador {self.id}: {'asume' if lider else 'pierde'} el liderazgo")
+        self.es_lider = lider
+        return lider
+
+    def _ceder_liderazgo(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(LiderPlanificador).filter(
+                LiderPlanificador.id == ID_LIDER, LiderPlanificador.dueno == self.id
+            ).update({"dueno": None, "expira_en": None}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            print(f"Advertencia: no se pudo ceder el liderazgo del planificador: {e}")
+        finally:
+            db.close()
+        self.es_lider = False
+
+    # ------------------------------------------------------------------
+    # Tareas
+    # ------------------------------------------------------------------
+
+    def _registrar_tareas(self, db: Session) -> None:
+        """Crea las filas de tareas_programadas que faltan"""
+        existentes = {
+            nombre for (nombre,) in db.query(TareaProgramada.nombre).filter(
+                TareaProgramada.nombre.in_([tarea.nombre for tarea in self.tareas])
+            )
+        }
+        for tarea in self.tareas:
+            if tarea.nombre in existentes:
+                continue
+            try:
+                db.add(TareaProgramada(nombre=tarea.nombre))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+        self._tareas_registradas = True
+
+    def _reclamar(self, db: Session, tarea: Tarea) -> Optional[datetime]:
+        """
+        Reclama el horario pendiente de la tarea y la marca en curso.
+
+        Returns:
+            Hora del reclamo, o None si no hay horario pendiente, otro proceso
+            la está ejecutando o falló hace menos de PLANIFICADOR_REINTENTO_MINUTOS
+        """
+        ahora = ahora_bd(db)
+        abandonada = ahora - timedelta(minutes=settings.PLANIFICADOR_EN_CURSO_MINUTOS)
+        reclamadas = db.query(TareaProgramada).filter(
+            TareaProgramada.nombre == tarea.nombre,
+            or_(
+                TareaProgramada.ultima_ejecucion.is_(None),
+                TareaProgramada.ultima_ejecucion < ultimo_horario(tarea, ahora),
+            ),
+            or_(TareaProgramada.en_curso_desde.is_(None), TareaProgramada.en_curso_desde < abandonada),
+            or_(TareaProgramada.reintentar_desde.is_(None), TareaProgramada.reintentar_desde <= ahora),
+        ).update({"en_curso_por": self.id, "en_curso_desde": ahora}, synchronize_session=False)
+        db.commit()
+        return ahora if reclamadas else None
+
+    def _cerrar(self, db: Session, tarea: Tarea, reclamo: datetime, error: Optional[str]) -> None:
+        """Marca el horario como ejecutado o, si la tarea falló, programa el reintento"""
+        if error is None:
+            valores = {"ultima_ejecucion": reclamo, "reintentar_desde": None}
+        else:
+            valores = {
+                "reintentar_desde": ahora_bd(db) + timedelta(minutes=settings.PLANIFICADOR_REINTENTO_MINUTOS),
+            }
+        valores.update({"en_curso_por": None, "en_curso_desde": None})
+        # Solo si el reclamo sigue siendo de este proceso (no se dio por abandonado)
+        db.query(TareaProgramada).filter(
+            TareaProgramada.nombre == tarea.nombre,
+            TareaProgramada.en_curso_por == self.id,
+        ).update(valores, synchronize_session=False)
+        db.commit()
+
+    def ejecutar(self, tarea: Tarea) -> Dict[str, Any]:
+        """
+        Ejecuta una tarea con su propia sesión y guarda el resultado.
+
+        Returns:
+            nombre, duracion_ms y resultado o error de la tarea
+        """
+        self._en_curso = tarea.nombre
+        inicio = time.monotonic()
+        resultado, error = None, None
+        db = SessionLocal()
+        try:
+            resultado = tarea.funcion(db)
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"
+            print(f"Advertencia: tarea programada {tarea.nombre} falló: {error}")
+        finally:
+            db.close()
+            self._en_curso = None
+        duracion_ms = int((time.monotonic() - inicio) * 1000)
+
+        db = SessionLocal()
+        try:
+            db.query(TareaProgramada).filter(TareaProgramada.nombre == tarea.nombre).update(
+                {
+                    "duracion_ms": duracion_ms,
+                    "resultado": None if error else _a_json(resultado),
+                    "error": error,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+        return {"nombre": tarea.nombre, "duracion_ms": duracion_ms, "resultado": resultado, "error": error}
+
+    def ciclo(self) -> List[Dict[str, Any]]:
+        """
+        Un ciclo del planificador: liderazgo y ejecución de las tareas pendientes.
+
+        Returns:
+            Ejecuciones realizadas (vacío si el proceso no es el líder)
+        """
+        ejecuciones = []
+        db = SessionLocal()
+        try:
+            self._ultimo_ciclo = datetime.now()
+            if not self._tomar_liderazgo(db):
+                return ejecuciones
+            if not self._tareas_registradas:
+                self._registrar_tareas(db)
+            for tarea in self.tareas:
+                if self._detener.is_set():
+                    break
+                reclamo = self._reclamar(db, tarea)
+                if reclamo is not None:
+                    ejecucion = self.ejecutar(tarea)
+                    self._cerrar(db, tarea, reclamo, ejecucion["error"])
+                    ejecuciones.append(ejecucion)
+                    # Una tarea larga no debe dejar expirar el liderazgo
+                    if not self._tomar_liderazgo(db):
+                        break
+        finally:
+            db.close()
+        return ejecuciones
+
+    def estado(self) -> Dict[str, Any]:
+        """Estado del planificador en este proceso (para /healthz)"""
+        return {
+            "id": self.id,
+            "lider": self.es_lider,
+            "activo": self._hilo is not None and self._hilo.is_alive(),
+            "tarea_en_curso": self._en_curso,
+            "ultimo_ciclo": self._ultimo_ciclo.isoformat() if self._ultimo_ciclo else None,
+            "tareas": [tarea.nombre for tarea in self.tareas],
+        }
@@ -160,6 +160,9 @@ def get_token_subject(token: str) -> str:
         subject = payload.get("sub")
         if subject is None:
             raise InvalidTokenError("Token sin subject")
+        # Los tokens con scope (ej: suscripción a feeds .ics) no sirven como sesión
+        if payload.get("scope") is not None:
+            raise InvalidTokenError("Token no válido para iniciar sesión")
         return str(subject)
     except JWTError as exc:
         raise InvalidTokenError("Token inválido o expirado") from exc
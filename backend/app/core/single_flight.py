@@ -0,0 +1,107 @@
+"""
+Coalescencia de peticiones idénticas concurrentes (single-flight).
+
+Cuando varias peticiones piden el mismo resultado costoso al mismo tiempo
+(ej: /morosidad/ al emitir los gastos del mes), solo la primera lo calcula;
+las demás esperan ese mismo cálculo y reciben su resultado (o su excepción).
+
+- El cálculo corre en el threadpool con su propia sesión de BD, de modo que
+  no bloquea el event loop y no depende de la petición que lo inició (si ese
+  cliente se desconecta, el cálculo sigue para los demás)
+- Las peticiones en espera liberan su conexión antes de esperar, por lo que N
+  peticiones iguales ocupan una sola conexión del pool durante el cálculo
+- No es una caché: al terminar el cálculo la clave se libera y la siguiente
+  petición calcula de nuevo
+"""
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+
+
+def _ejecutar_en_sesion(funcion: Callable[[Session], Any]) -> Any:
+    """Ejecuta la función con una sesión propia que se cierra al terminar"""
+    db = SessionLocal()
+    try:
+        return funcion(db)
+    finally:
+        db.close()
+
+
+class SingleFlight:
+    """
+    Grupo de cálculos en curso identificados por clave.
+
+    La clave debe incluir todo lo que cambia el resultado: ruta, parámetros y
+    alcance de autorización (ej: rol o usuario).
+
+    Args:
+        nombre: Nombre del grupo (para métricas)
+    """
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._en_curso: Dict[Hashable, asyncio.Future] = {}
+        self._ejecutadas = 0
+        self._compartidas = 0
+        _grupos.append(self)
+
+    async def ejecutar(
+        self,
+        clave: Hashable,
+        funcion: Callable[[Session], Any],
+        sesion_peticion: Optional[Session] = None,
+    ) -> Any:
+        """
+        Ejecuta funcion(db) o se une al cálculo en curso con la misma clave.
+
+        Args:
+            clave: Identifica el resultado (ruta, parámetros y alcance)
+            funcion: Cálculo síncrono que recibe una sesión de BD
+            sesion_peticion: Sesión de la petición; se cierra antes de esperar
+                para devolver su conexión al pool
+
+        Returns:
+            El resultado de funcion (compartido entre todas las peticiones)
+        """
+        if sesion_peticion is not None:
+            sesion_peticion.close()
+
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(run_in_threadpool(_ejecutar_en_sesion, funcion))
+            self._en_curso[clave] = tarea
+            tarea.add_done_callback(lambda t: self._terminar(clave, t))
+            self._ejecutadas += 1
+        else:
+            self._compartidas += 1
+
+        # shield: si una petición se cancela, el cálculo sigue para las demás
+        return await asyncio.shield(tarea)
+
+    def _terminar(self, clave: Hashable, tarea: asyncio.Future) -> None:
+        if self._en_curso.get(clave) is tarea:
+            del self._en_curso[clave]
+        # Marcar la excepción como consumida aunque nadie quede esperando
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def metricas(self) -> Dict[str, Any]:
+        """Métricas de coalescencia (expuestas en /healthz)"""
+        return {
+            "en_curso": len(self._en_curso),
+            "ejecutadas": self._ejecutadas,
+            "compartidas": self._compartidas,
+        }
+
+
+# Todos los grupos del proceso
+_grupos: List[SingleFlight] = []
+
+
+def metricas_single_flight() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todos los grupos registrados, por nombre"""
+    return {grupo.nombre: grupo.metricas() for grupo in _grupos}
@@ -0,0 +1,108 @@
+"""
+Validadores HTTP (ETag / Last-Modified) para endpoints de listas.
+
+En lugar de construir la lista y calcular un hash de la respuesta, cada
+endpoint describe su contenido con consultas de agregados baratas (COUNT,
+MAX(updated_at), ...) sobre las mismas tablas y filtros que usa la lista. Si
+el cliente ya tiene esa versión (If-None-Match) se responde 304 sin armar el
+payload.
+
+Notas:
+- El ETag es débil (W/): identifica la versión de los datos, no los bytes
+- Los 304 se deciden solo con If-None-Match. Un MAX(updated_at) no cambia al
+  eliminar filas, por lo que If-Modified-Since podría dar 304 con datos
+  obsoletos; Last-Modified se envía solo como información
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Hashable, List, Optional
+
+from fastapi import Request, Response, status
+
+
+class Validador:
+    """ETag y fecha de última modificación de una versión de los datos"""
+
+    def __init__(self, etag: str, ultima_modificacion: Optional[datetime] = None):
+        self.etag = etag
+        self.ultima_modificacion = ultima_modificacion
+
+    def headers(self) -> dict:
+        """Headers de validación para la respuesta"""
+        headers = {
+            "ETag": self.etag,
+            # El navegador puede guardar la respuesta pero debe revalidarla siempre
+            "Cache-Control": "private, no-cache",
+        }
+        if self.ultima_modificacion is not None:
+            headers["Last-Modified"] = format_datetime(self.ultima_modificacion, usegmt=True)
+        return headers
+
+    def aplicar(self, response: Response) -> None:
+        """Agrega los headers de validación a la respuesta del endpoint"""
+        response.headers.update(self.headers())
+
+
+def _a_utc(valor: datetime) -> datetime:
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def calcular_validador(alcance: Hashable, *consultas: Any) -> Validador:
+    """
+    Calcula el validador de una lista a partir de consultas de agregados.
+
+    Args:
+        alcance: Todo lo que cambia el contenido además de los datos
+            (ruta, parámetros, rol, fecha del día si filtra por fecha)
+        consultas: Queries de SQLAlchemy que retornan una sola fila de
+            agregados (ej: db.query(func.count(X.id), func.max(X.updated_at)))
+
+    Returns:
+        Validador con ETag débil y el mayor timestamp encontrado
+    """
+    valores: List[Any] = [alcance]
+    ultima: Optional[datetime] = None
+    for consulta in consultas:
+        fila = tuple(consulta.one())
+        valores.append(fila)
+        for valor in fila:
+            if isinstance(valor, datetime):
+                valor = _a_utc(valor)
+                if ultima is None or valor > ultima:
+                    ultima = valor
+    etag = 'W/"' + hashlib.sha1(repr(valores).encode("utf-8")).hexdigest() + '"'
+    return Validador(etag, ultima)
+
+
+def etag_coincide(request: Request, etag: str) -> bool:
+    """
+    Indica si el If-None-Match de la petición incluye el ETag (comparación débil).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    propio = etag[2:] if etag.startswith("W/") else etag
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == propio:
+            return True
+    return False
+
+
+def respuesta_no_modificada(request: Request, validador: Validador) -> Optional[Response]:
+    """
+    Retorna una respuesta 304 si el cliente ya tiene la versión actual.
+
+    Returns:
+        Response 304 o None si hay que construir la respuesta completa
+    """
+    if etag_coincide(request, validador.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validador.headers())
+    return None
@@ -5,15 +5,41 @@ Este módulo configura la aplicación FastAPI, incluyendo:
 - Configuración de CORS para desarrollo local
 - Endpoints de salud y raíz
 - Integración de todos los routers de la API
+- Inicio y detención del planificador de tareas nocturnas
 
 Documentación automática disponible en:
 - Swagger UI: http://localhost:8000/docs
 - ReDoc: http://localhost:8000/redoc
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
 from .api.v1.router import api_router
+from .core.config import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia el planificador de tareas al levantar la API y lo detiene al bajarla.
+
+    Cada worker inicia su planificador; solo el líder ejecuta las tareas
+    (ver app/core/planificador.py).
+    """
+    planificador = None
+    if settings.PLANIFICADOR_ACTIVO:
+        from .services.tareas_programadas import crear_planificador
+
+        planificador = crear_planificador()
+        planificador.iniciar()
+    app.state.planificador = planificador
+    yield
+    if planificador is not None:
+        await run_in_threadpool(planificador.detener)
 
 # Configuración de la aplicación FastAPI con metadatos para documentación
 app = FastAPI(
@@ -22,7 +48,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # ReDoc
-    openapi_url="/openapi.json"  # Esquema OpenAPI
+    openapi_url="/openapi.json",  # Esquema OpenAPI
+    lifespan=lifespan,
 )
 
 # Configuración de CORS para permitir peticiones desde el frontend
@@ -32,7 +59,8 @@ app.add_middleware(
     allow_origins=["http://localhost:3000", "http://localhost:3001", "http://127.0.0.1:3000", "http://127.0.0.1:3001"],
     allow_credentials=True,  # Permite enviar cookies y headers de autenticación
     allow_methods=["*"],  # Permite todos los métodos HTTP (GET, POST, PUT, DELETE, etc.)
-    allow_headers=["*"]  # Permite todos los headers (incluyendo Authorization)
+    allow_headers=["*"],  # Permite todos los headers (incluyendo Authorization)
+    expose_headers=["ETag", "X-Sync-Cursor", "Idempotent-Replayed"]  # Headers legibles desde el frontend
 )
 
 @app.get("/healthz")
@@ -44,11 +72,13 @@ async def healthz():
     - Monitoreo de salud del servicio
     - Verificación de conectividad con la base de datos
     - Diagnóstico de problemas de conexión
+    - Estado de los circuit breakers de Google Calendar y de la CMF
+    - Métricas de las cachés de respuestas y de la coalescencia de peticiones
+    - Estado del planificador de tareas en este proceso (líder o no)
     
     Returns:
         dict: Estado del servicio y conexión a la base de datos
     """
-    from .core.config import settings
     from .db.session import engine
     from sqlalchemy import text
     
@@ -61,10 +91,30 @@ async def healthz():
     except Exception as e:
         db_status = f"disconnected: {str(e)[:50]}"
     
+    # Estado del circuit breaker de Google Calendar (si la integración está instalada)
+    try:
+        from .services.google_calendar_service import circuito_google
+        google_calendar_status = circuito_google.estado()
+    except Exception as e:
+        google_calendar_status = {"estado": f"no disponible: {str(e)[:50]}"}
+
+    # Estado del circuit breaker de la API de la CMF (valor de la UF)
+    from .services.uf import circuito_cmf
+    
+    from .core.cache import metricas_caches
+    from .core.single_flight import metricas_single_flight
+    
+    planificador = getattr(app.state, "planificador", None)
+    
     return {
         "status": "ok",
         "service": "Condominio API",
         "database": db_status,
+        "google_calendar": google_calendar_status,
+        "cmf_uf": circuito_cmf.estado(),
+        "caches": metricas_caches(),
+        "single_flight": metricas_single_flight(),
+        "planificador": planificador.estado() if planificador else {"activo": False},
         "db_config": {
             "host": settings.DB_HOST,
             "port": settings.DB_PORT,
@@ -1,14 +1,23 @@
 from .models import (  # noqa: F401
     Base,
+    Abono,
     Anuncio,
+    ClaveIdempotencia,
     Condominio,
+    Eliminacion,
     EspacioComun,
     GastoComun,
+    ImputacionAbono,
     Multa,
+    MovimientoCuenta,
     Pago,
+    ProcesoFacturacion,
     Reserva,
     ResidenteVivienda,
+    ResumenMensual,
+    SaldoVivienda,
     Usuario,
+    ValorUF,
     Vivienda,
 )
 
@@ -24,4 +33,13 @@ __all__ = [
     "Reserva",
     "Pago",
     "Anuncio",
+    "Eliminacion",
+    "ResumenMensual",
+    "MovimientoCuenta",
+    "SaldoVivienda",
+    "ProcesoFacturacion",
+    "ValorUF",
+    "Abono",
+    "ImputacionAbono",
+    "ClaveIdempotencia",
 ]
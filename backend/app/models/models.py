@@ -13,8 +13,14 @@ Modelos principales:
 - Multa: Multas aplicadas a viviendas
 - EspacioComun: Espacios comunes disponibles para reserva
 - Reserva: Reservas de espacios comunes
+- RetencionReserva: Horarios retenidos mientras se completa el pago de una reserva
 - Pago: Pagos realizados por gastos comunes
 - Anuncio: Anuncios y comunicados del condominio
+- Eliminacion: Registro (tombstone) de filas eliminadas para la sincronización delta
+- ResumenMensual: Totales financieros materializados por condominio y mes
+- MovimientoCuenta: Libro (append-only) de cargos y abonos por vivienda
+- SaldoVivienda: Saldo vigente de la cuenta corriente de cada vivienda
+- ProcesoFacturacion: Emisión masiva de los gastos comunes de un mes (con checkpoint)
 """
 from sqlalchemy import (
     BigInteger,
@@ -26,8 +32,10 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     Numeric,
     String,
+    Text,
     UniqueConstraint,
 )
 from sqlalchemy.orm import declarative_base, relationship
@@ -105,6 +113,10 @@ class Vivienda(Base):
     
     # Cargo fijo mensual en UF (Unidad de Fomento)
     cargo_fijo_uf = Column(Numeric(10, 2), nullable=False, server_default="0")
+    
+    # Alícuota: coeficiente de participación en los gastos del condominio
+    # (se normaliza por la suma del condominio, puede expresarse en % o en fracción)
+    alicuota = Column(Numeric(9, 6), nullable=False, server_default="0")
 
     # Relaciones
     condominio = relationship("Condominio", back_populates="viviendas")
@@ -178,6 +190,11 @@ class ResidenteVivienda(Base):
     vivienda = relationship("Vivienda", back_populates="residentes")
 
 
+# Estados de un gasto común sin pagar: "vencido" lo asigna el proceso nocturno
+# (app.services.tareas_programadas.vencer_gastos) cuando pasa el vencimiento
+ESTADOS_GASTO_IMPAGO = ("pendiente", "vencido")
+
+
 class GastoComun(Base):
     __tablename__ = "gastos_comunes"
     __table_args__ = (
@@ -186,6 +203,8 @@ class GastoComun(Base):
         CheckConstraint("ano >= 2000", name="chk_ano"),
         CheckConstraint("monto_total >= 0", name="chk_monto_total"),
         Index("idx_gastos_vivienda_id", "vivienda_id"),
+        Index("idx_gastos_updated_at", "updated_at"),
+        Index("idx_gastos_estado_vencimiento", "estado", "vencimiento"),
         {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
     )
 
@@ -198,7 +217,7 @@ class GastoComun(Base):
     mes = Column(Integer, nullable=False)
     ano = Column(Integer, nullable=False)
     monto_total = Column(Numeric(14, 2), nullable=False)
-    estado = Column(String(20), nullable=False, server_default="pendiente")
+    estado = Column(String(20), nullable=False, server_default="pendiente")  # pendiente / vencido / pagado
     vencimiento = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(
@@ -216,7 +235,10 @@ class Multa(Base):
     __tablename__ = "multas"
     __table_args__ = (
         CheckConstraint("monto >= 0", name="chk_multa_monto"),
+        # Un recargo por mora por gasto común y período (ver app/services/recargos_mora.py)
+        UniqueConstraint("gasto_comun_id", "periodo_recargo", name="uq_multas_recargo_gasto_periodo"),
         Index("idx_multas_vivienda_id", "vivienda_id"),
+        Index("idx_multas_updated_at", "updated_at"),
         {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
     )
 
@@ -229,7 +251,19 @@ class Multa(Base):
     monto = Column(Numeric(14, 2), nullable=False)
     descripcion = Column(String(500))
     fecha_aplicada = Column(Date, nullable=False)
+    # Solo en recargos por mora: gasto común vencido y mes (día 1) del recargo
+    gasto_comun_id = Column(
+        BigInteger,
+        ForeignKey("gastos_comunes.id", onupdate="CASCADE", ondelete="SET NULL"),
+    )
+    periodo_recargo = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
 
     vivienda = relationship("Vivienda", back_populates="multas")
 
@@ -262,6 +296,8 @@ class Reserva(Base):
         CheckConstraint("fecha_hora_fin > fecha_hora_inicio", name="chk_reservas_fechas"),
         Index("idx_reservas_espacio_id", "espacio_comun_id"),
         Index("idx_reservas_usuario_id", "usuario_id"),
+        Index("idx_reservas_updated_at", "updated_at"),
+        Index("idx_reservas_estado_pago_expira", "estado_pago", "pago_expira_en"),
         {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
     )
 
@@ -280,19 +316,61 @@ class Reserva(Base):
     fecha_hora_fin = Column(DateTime(timezone=True), nullable=False)
     monto_pago = Column(Numeric(14, 2), nullable=False, server_default="0")
     estado_pago = Column(String(20), nullable=False, server_default="pendiente")
+    pago_expira_en = Column(DateTime(timezone=True))  # Plazo para pagar una reserva pendiente (None: sin plazo)
     google_event_id = Column(String(255))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
 
     espacio = relationship("EspacioComun", back_populates="reservas")
     usuario = relationship("Usuario", back_populates="reservas")
 
 
+class RetencionReserva(Base):
+    """
+    Horario de un espacio con pago retenido mientras el usuario completa el pago.
+
+    La tabla es compartida por todos los procesos de la API: una retención
+    creada en un worker bloquea el horario en los demás. Una fila con
+    expira_en vencida no retiene nada y se elimina en el siguiente barrido
+    (ver app.services.retenciones).
+    """
+    __tablename__ = "retenciones_reserva"
+    __table_args__ = (
+        UniqueConstraint("espacio_comun_id", "fecha_hora_inicio", name="uq_retenciones_espacio_inicio"),
+        CheckConstraint("fecha_hora_fin > fecha_hora_inicio", name="chk_retenciones_fechas"),
+        Index("idx_retenciones_expira_en", "expira_en"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(String(32), primary_key=True)  # UUID hex (va en la URL de confirmación)
+    espacio_comun_id = Column(
+        BigInteger,
+        ForeignKey("espacios_comunes.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    usuario_id = Column(
+        BigInteger,
+        ForeignKey("usuarios.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    fecha_hora_inicio = Column(DateTime(timezone=True), nullable=False)
+    fecha_hora_fin = Column(DateTime(timezone=True), nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class Pago(Base):
     __tablename__ = "pagos"
     __table_args__ = (
         CheckConstraint("monto_pagado >= 0", name="chk_pagos_monto"),
         Index("idx_pagos_gasto_id", "gasto_comun_id"),
         Index("idx_pagos_usuario_id", "usuario_id"),
+        Index("idx_pagos_updated_at", "updated_at"),
         {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
     )
 
@@ -310,6 +388,12 @@ class Pago(Base):
     monto_pagado = Column(Numeric(14, 2), nullable=False)
     fecha_pago = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     metodo_pago = Column(String(30), nullable=False, server_default="webpay")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
 
     gasto = relationship("GastoComun", back_populates="pagos")
     usuario = relationship("Usuario", back_populates="pagos")
@@ -319,6 +403,7 @@ class Anuncio(Base):
     __tablename__ = "anuncios"
     __table_args__ = (
         Index("idx_anuncios_condominio_id", "condominio_id"),
+        Index("idx_anuncios_updated_at", "updated_at"),
         {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
     )
 
@@ -348,4 +433,341 @@ class Anuncio(Base):
     )
 
     condominio = relationship("Condominio", back_populates="anuncios")
-    autor = relationship("Usuario", back_populates="anuncios")
\ No newline at end of file
+    autor = relationship("Usuario", back_populates="anuncios")
+
+
+class Eliminacion(Base):
+    """
+    Registro (tombstone) de una fila eliminada.
+
+    Permite que los clientes que sincronizan con ?since= se enteren de las
+    eliminaciones. Guarda las columnas de alcance de la fila eliminada para
+    filtrar por vivienda, usuario o condominio igual que las listas.
+    """
+    __tablename__ = "eliminaciones"
+    __table_args__ = (
+        Index("idx_eliminaciones_tabla_fecha", "tabla", "eliminado_en"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tabla = Column(String(64), nullable=False)
+    registro_id = Column(BigInteger, nullable=False)
+    vivienda_id = Column(BigInteger)
+    usuario_id = Column(BigInteger)
+    condominio_id = Column(BigInteger)
+    eliminado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ResumenMensual(Base):
+    """
+    Resumen financiero materializado de un condominio para un mes.
+
+    Se mantiene de forma incremental en la misma transacción que las
+    escrituras de gastos comunes, pagos y multas (ver
+    app.services.resumen_mensual), de modo que dashboards y gráficos leen un
+    registro por mes en lugar de agregar las tablas transaccionales.
+
+    - Gastos y pagos se agrupan por el período (mes, ano) del gasto común
+    - Multas se agrupan por el mes de fecha_aplicada
+    """
+    __tablename__ = "resumen_mensual"
+    __table_args__ = (
+        UniqueConstraint("condominio_id", "ano", "mes", name="uq_resumen_condominio_ano_mes"),
+        CheckConstraint("mes BETWEEN 1 AND 12", name="chk_resumen_mes"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    condominio_id = Column(
+        BigInteger,
+        ForeignKey("condominios.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    ano = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    gastos_emitidos = Column(Integer, nullable=False, server_default="0")
+    monto_emitido = Column(Numeric(16, 2), nullable=False, server_default="0")
+    gastos_pendientes = Column(Integer, nullable=False, server_default="0")
+    monto_pendiente = Column(Numeric(16, 2), nullable=False, server_default="0")
+    vencimiento = Column(Date)  # Vencimiento más próximo de los gastos del período
+    pagos = Column(Integer, nullable=False, server_default="0")
+    monto_recaudado = Column(Numeric(16, 2), nullable=False, server_default="0")
+    multas = Column(Integer, nullable=False, server_default="0")
+    monto_multas = Column(Numeric(16, 2), nullable=False, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class MovimientoCuenta(Base):
+    """
+    Movimiento de la cuenta corriente de una vivienda (solo se agregan filas).
+
+    Cada gasto común y multa genera un cargo (monto positivo) y cada pago un
+    abono (monto negativo). Si el origen se modifica o elimina no se editan
+    movimientos: se agrega uno de ajuste por la diferencia (ver
+    app.services.cuenta_corriente). El saldo de la vivienda es la suma de sus
+    movimientos.
+    """
+    __tablename__ = "movimientos_cuenta"
+    __table_args__ = (
+        Index("idx_movimientos_vivienda_id", "vivienda_id", "id"),
+        Index("idx_movimientos_origen", "origen", "referencia_id"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    vivienda_id = Column(
+        BigInteger,
+        ForeignKey("viviendas.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    tipo = Column(String(10), nullable=False)  # cargo / abono
+    origen = Column(String(30), nullable=False)  # gastos_comunes / multas / pagos
+    referencia_id = Column(BigInteger)  # ID de la fila de origen
+    monto = Column(Numeric(14, 2), nullable=False)  # Cargos positivos, abonos negativos
+    descripcion = Column(String(255))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SaldoVivienda(Base):
+    """
+    Saldo vigente de la cuenta corriente de una vivienda.
+
+    Se actualiza en la misma transacción que agrega los movimientos, de modo
+    que el saldo se lee con una fila por vivienda. Positivo = deuda.
+    """
+    __tablename__ = "saldos_vivienda"
+    __table_args__ = (
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    vivienda_id = Column(
+        BigInteger,
+        ForeignKey("viviendas.id", onupdate="CASCADE", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    saldo = Column(Numeric(14, 2), nullable=False, server_default="0")
+    ultimo_movimiento_id = Column(BigInteger)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class ProcesoFacturacion(Base):
+    """
+    Emisión de los gastos comunes de un condominio para un mes.
+
+    Guarda los parámetros y el avance (checkpoint) de la emisión: las
+    viviendas se procesan en orden de ID por lotes y cada lote se confirma
+    junto con ultimo_vivienda_id, de modo que una emisión interrumpida se
+    retoma desde el último lote confirmado sin duplicar gastos (ver
+    app.services.facturacion).
+    """
+    __tablename__ = "procesos_facturacion"
+    __table_args__ = (
+        UniqueConstraint("condominio_id", "ano", "mes", name="uq_facturacion_condominio_ano_mes"),
+        CheckConstraint("mes BETWEEN 1 AND 12", name="chk_facturacion_mes"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    condominio_id = Column(
+        BigInteger,
+        ForeignKey("condominios.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    ano = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    valor_uf = Column(Numeric(12, 2), nullable=False)  # Valor de la UF usado para convertir cargo_fijo_uf
+    vencimiento = Column(Date, nullable=False)
+    estado = Column(String(20), nullable=False, server_default="en_curso")  # en_curso / completado
+    ultimo_vivienda_id = Column(BigInteger, nullable=False, server_default="0")  # Checkpoint
+    gastos_creados = Column(Integer, nullable=False, server_default="0")
+    gastos_existentes = Column(Integer, nullable=False, server_default="0")
+    viviendas_sin_cargo = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    finalizado_en = Column(DateTime(timezone=True))
+
+
+class ValorUF(Base):
+    """
+    Valor diario de la Unidad de Fomento (UF) en pesos.
+
+    Caché persistente de los valores obtenidos del proveedor externo (CMF):
+    el valor de un día no cambia, por lo que cada fecha se consulta a lo más
+    una vez (ver app.services.uf).
+    """
+    __tablename__ = "valores_uf"
+    __table_args__ = ({"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},)
+
+    fecha = Column(Date, primary_key=True)
+    valor = Column(Numeric(12, 2), nullable=False)
+    fuente = Column(String(20), nullable=False, server_default="cmf")  # cmf / manual / fijo
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class Abono(Base):
+    """
+    Monto recibido de una vivienda e imputado a sus cargos pendientes.
+
+    El monto se aplica del cargo más antiguo al más reciente (gastos comunes,
+    luego multas y luego reservas; ver app.services.imputacion_pagos) y cada
+    aplicación queda en imputaciones_abono. Lo que sobra queda como saldo a
+    favor en la cuenta corriente.
+    """
+    __tablename__ = "abonos"
+    __table_args__ = (
+        CheckConstraint("monto > 0", name="chk_abonos_monto"),
+        Index("idx_abonos_vivienda_id", "vivienda_id"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    vivienda_id = Column(
+        BigInteger,
+        ForeignKey("viviendas.id", onupdate="CASCADE", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    usuario_id = Column(  # Quien registró el abono
+        BigInteger,
+        ForeignKey("usuarios.id", onupdate="CASCADE", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    monto = Column(Numeric(14, 2), nullable=False)
+    monto_aplicado = Column(Numeric(14, 2), nullable=False, server_default="0")
+    saldo_a_favor = Column(Numeric(14, 2), nullable=False, server_default="0")
+    fecha_pago = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    metodo_pago = Column(String(30), nullable=False, server_default="transferencia")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    imputaciones = relationship("ImputacionAbono", back_populates="abono", cascade="all,delete-orphan")
+
+
+class ImputacionAbono(Base):
+    """
+    Parte de un abono aplicada a un cargo (gasto común, multa o reserva).
+
+    Las imputaciones a gastos comunes crean además el Pago del gasto; las de
+    multas abonan directamente la cuenta corriente de la vivienda.
+    """
+    __tablename__ = "imputaciones_abono"
+    __table_args__ = (
+        CheckConstraint("monto > 0", name="chk_imputaciones_monto"),
+        Index("idx_imputaciones_abono_id", "abono_id"),
+        Index("idx_imputaciones_tipo_referencia", "tipo", "referencia_id"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    abono_id = Column(
+        BigInteger,
+        ForeignKey("abonos.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    vivienda_id = Column(
+        BigInteger,
+        ForeignKey("viviendas.id", onupdate="CASCADE", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    tipo = Column(String(20), nullable=False)  # gasto / multa / reserva
+    referencia_id = Column(BigInteger, nullable=False)  # ID del gasto, multa o reserva
+    pago_id = Column(  # Pago creado para el gasto común (solo tipo gasto)
+        BigInteger,
+        ForeignKey("pagos.id", onupdate="CASCADE", ondelete="SET NULL"),
+    )
+    monto = Column(Numeric(14, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    abono = relationship("Abono", back_populates="imputaciones")
+    pago = relationship("Pago")
+
+
+class ClaveIdempotencia(Base):
+    """
+    Respuesta guardada de una petición de escritura con header Idempotency-Key.
+
+    Un reintento con la misma clave (del mismo usuario) y la misma petición
+    recibe la respuesta guardada sin volver a ejecutar el endpoint (ver
+    app.core.idempotencia). Las filas expiran tras IDEMPOTENCIA_HORAS.
+    """
+    __tablename__ = "claves_idempotencia"
+    __table_args__ = (
+        UniqueConstraint("usuario_id", "clave", name="uq_idempotencia_usuario_clave"),
+        Index("idx_idempotencia_expira_en", "expira_en"),
+        {"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    usuario_id = Column(
+        BigInteger,
+        ForeignKey("usuarios.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+    )
+    clave = Column(String(255), nullable=False)
+    huella = Column(String(64), nullable=False)  # SHA-256 de método, ruta y cuerpo (o su largo)
+    estado = Column(String(20), nullable=False, server_default="en_curso")  # en_curso / completado
+    codigo_estado = Column(Integer)
+    tipo_contenido = Column(String(100))
+    cabeceras = Column(Text)  # Headers de la respuesta (JSON: [[nombre, valor], ...])
+    respuesta = Column(LargeBinary)  # Cuerpo comprimido con zlib
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False)
+
+
+class LiderPlanificador(Base):
+    """
+    Liderazgo del planificador de tareas entre los procesos de la API.
+
+    Una sola fila (id = 1): el proceso que la tiene con expira_en vigente es
+    el líder y el único que ejecuta las tareas programadas; la renueva en
+    cada ciclo (ver app.core.planificador).
+    """
+    __tablename__ = "lider_planificador"
+    __table_args__ = ({"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    dueno = Column(String(100))  # host:pid:sufijo aleatorio del proceso líder
+    expira_en = Column(DateTime(timezone=True))
+
+
+class TareaProgramada(Base):
+    """
+    Última ejecución de cada tarea del planificador.
+
+    El horario pendiente se reclama con un UPDATE condicional que marca la
+    tarea en curso antes de ejecutarla, por lo que cada horario se ejecuta
+    una sola vez aunque cambie el líder; ultima_ejecucion se actualiza solo
+    si la ejecución termina sin error (si falla, se reintenta desde
+    reintentar_desde).
+    """
+    __tablename__ = "tareas_programadas"
+    __table_args__ = ({"mysql_charset": "utf8mb4", "mysql_engine": "InnoDB"},)
+
+    nombre = Column(String(50), primary_key=True)
+    ultima_ejecucion = Column(DateTime(timezone=True))  # Último horario ejecutado con éxito
+    en_curso_por = Column(String(100))  # Planificador que la está ejecutando
+    en_curso_desde = Column(DateTime(timezone=True))
+    reintentar_desde = Column(DateTime(timezone=True))  # Tras una ejecución fallida
+    duracion_ms = Column(Integer)
+    resultado = Column(Text)  # JSON con el resumen de la tarea
+    error = Column(Text)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
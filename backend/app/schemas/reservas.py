@@ -11,7 +11,7 @@ Los modelos Pydantic validan automáticamente los datos de entrada
 y proporcionan documentación automática en Swagger UI.
 """
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 class EspacioComunResponse(BaseModel):
@@ -35,6 +35,29 @@ class DisponibilidadResponse(BaseModel):
     fecha_fin: datetime
     slots: List[SlotDisponible]
 
+class DisponibilidadMultipleResponse(BaseModel):
+    """Response de disponibilidad de varios espacios"""
+    fecha_inicio: datetime
+    fecha_fin: datetime
+    espacios: List[DisponibilidadResponse]
+
+class DiaDisponibilidadCompacta(BaseModel):
+    """Disponibilidad de un día en formato compacto"""
+    fecha: date
+    disponibilidad: str = Field(..., description="Bitstring alineado con los horarios: 1=disponible, 0=ocupado")
+    horarios: Optional[List[str]] = Field(
+        None, description="Horas de inicio (HH:MM) del día, solo si difieren de los horarios generales"
+    )
+
+class DisponibilidadCompactaResponse(BaseModel):
+    """Response de disponibilidad en formato compacto (un bitstring por día)"""
+    espacio: str
+    fecha_inicio: datetime
+    fecha_fin: datetime
+    duracion_minutos: int
+    horarios: List[str] = Field(..., description="Horas de inicio (HH:MM) comunes a todos los días")
+    dias: List[DiaDisponibilidadCompacta]
+
 class ReservaCreate(BaseModel):
     """Model para crear una reserva"""
     espacio: str = Field(..., description="Tipo de espacio: multicancha, quincho, sala_eventos")
@@ -50,6 +73,34 @@ class ReservaCreate(BaseModel):
             }
         }
 
+class ReservaRecurrenteCreate(BaseModel):
+    """Model para crear una serie de reservas recurrentes (subconjunto de RRULE)"""
+    espacio: str = Field(..., description="Tipo de espacio: multicancha, quincho, sala_eventos")
+    fecha_hora_inicio: datetime = Field(..., description="Inicio de la serie (fecha y hora de las ocurrencias)")
+    fecha_hora_fin: datetime = Field(..., description="Fin de la ocurrencia que comienza en fecha_hora_inicio")
+    frecuencia: str = Field(..., description="FREQ: semanal o mensual")
+    intervalo: int = Field(1, ge=1, description="INTERVAL: cada cuántas semanas/meses")
+    repeticiones: Optional[int] = Field(None, ge=1, description="COUNT: cantidad de ocurrencias")
+    hasta: Optional[date] = Field(None, description="UNTIL: última fecha de inicio permitida")
+    dias_semana: Optional[List[int]] = Field(None, description="BYDAY: 0=lunes ... 6=domingo")
+    omitir_conflictos: bool = Field(
+        False,
+        description="Si es True, se reservan solo las ocurrencias libres; si es False, un conflicto rechaza toda la serie"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "espacio": "multicancha",
+                "fecha_hora_inicio": "2025-10-25T18:00:00",
+                "fecha_hora_fin": "2025-10-25T19:00:00",
+                "frecuencia": "semanal",
+                "intervalo": 1,
+                "repeticiones": 12,
+                "dias_semana": [1, 3]
+            }
+        }
+
 class ReservaResponse(BaseModel):
     """Response model para una reserva"""
     id: int
@@ -62,6 +113,16 @@ class ReservaResponse(BaseModel):
     created_at: datetime
     google_event_id: Optional[str] = None
 
+class RetencionResponse(BaseModel):
+    """Response para una retención temporal de horario"""
+    id: str
+    espacio: str
+    espacio_comun_id: int
+    fecha_hora_inicio: datetime
+    fecha_hora_fin: datetime
+    monto_pago: float
+    expira_en: datetime
+
 class ReservaListResponse(BaseModel):
     """Response para listar reservas"""
     id: int
@@ -72,6 +133,61 @@ class ReservaListResponse(BaseModel):
     monto_pago: float
     usuario_nombre: Optional[str] = None
 
+class ReservaCambiosResponse(BaseModel):
+    """Cambios de una lista de reservas desde un cursor (sincronización delta)"""
+    cambios: List[ReservaListResponse]
+    eliminados: List[int]
+    cursor: str
+
+class ConflictoOcurrencia(BaseModel):
+    """Ocurrencia de una serie que no pudo reservarse"""
+    fecha_hora_inicio: datetime
+    fecha_hora_fin: datetime
+    reserva_conflictiva_id: Optional[int] = None
+    retenido: bool = Field(False, description="True si el conflicto es una retención de pago en curso")
+
+class ReservaLoteResponse(BaseModel):
+    """Response para la creación de reservas en lote"""
+    creadas: List[ReservaResponse]
+    conflictos: List[ConflictoOcurrencia]
+    total_creadas: int
+    total_conflictos: int
+
+class CancelacionLoteRequest(BaseModel):
+    """Model para cancelar varias reservas en una sola petición"""
+    reserva_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class CancelacionLoteResponse(BaseModel):
+    """Resultado por reserva de una cancelación en lote"""
+    canceladas: List[int]
+    no_encontradas: List[int]
+    sin_permiso: List[int]
+    eventos_calendario_eliminados: int
+
+class DuracionReconciliacion(BaseModel):
+    """Tiempos (ms) de cada fase de la reconciliación"""
+    lectura_calendarios: float
+    diff: float
+    escritura: float
+    total: float
+
+class ReconciliacionResponse(BaseModel):
+    """Resultado de reconciliar las reservas con Google Calendar"""
+    fecha_inicio: datetime
+    fecha_fin: datetime
+    aplicado: bool
+    calendarios_omitidos: List[str]
+    eventos_revisados: int
+    reservas_revisadas: int
+    reservas_sincronizadas: int
+    reservas_reenlazadas: int
+    eventos_faltantes: int
+    eventos_creados: int
+    eventos_fallidos: int
+    eventos_huerfanos: int
+    eventos_eliminados: int
+    duracion_ms: DuracionReconciliacion
+
 class ErrorResponse(BaseModel):
     """Model para respuestas de error"""
     detail: str
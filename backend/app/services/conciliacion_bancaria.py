@@ -0,0 +1,429 @@
+"""
+Importación de pagos desde cartolas bancarias (CSV) y conciliación con los
+gastos comunes pendientes.
+
+Columnas reconocidas (encabezado sin importar mayúsculas ni tildes):
+
+- fecha (fecha_pago, fecha_operacion): AAAA-MM-DD, DD-MM-AAAA o DD/MM/AAAA
+- monto (abono, monto_pagado, importe): "39486", "39.486" o "39.486,00"
+- vivienda (numero_vivienda, depto, departamento, unidad)
+- periodo (AAAA-MM o MM/AAAA) o mes y ano, opcionales
+- referencia (glosa, descripcion), opcional: solo se devuelve en el reporte
+
+El separador (; , o tabulación) se detecta en el encabezado.
+
+Conciliación:
+
+1. Una sola consulta lee los gastos pendientes del condominio con lo ya
+   pagado de cada uno y el residente de su vivienda; con ella se arman
+   índices hash en memoria por (vivienda, año, mes) y por (vivienda, monto
+   pendiente)
+2. El archivo se recorre fila a fila sin cargarlo completo. Cada fila se
+   asocia al gasto de su período si lo indica o, si no, al gasto pendiente
+   más antiguo de la vivienda cuyo saldo coincide con el monto. Un gasto se
+   asocia a lo más a una fila; el monto debe cubrir exactamente su saldo
+3. Los pagos asociados se insertan por lote (INSERT multi-fila) y sus gastos
+   pasan a "pagado" con un UPDATE ... WHERE id IN (...) por lote; ambos
+   pasan por los hooks de resumen_mensual y cuenta corriente. Antes de
+   insertar, los gastos del lote se bloquean (SELECT ... FOR UPDATE) y se
+   vuelven a validar su estado y saldo; los que cambiaron desde la lectura
+   inicial quedan sin asociar. Todo se confirma en una sola transacción al
+   final
+
+Volver a importar la misma cartola no duplica pagos, tampoco si dos
+importaciones corren a la vez: la segunda espera el bloqueo de los gastos y
+encuentra que ya no están pendientes.
+"""
+import csv
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Pago, ResidenteVivienda, Vivienda
+# Registra los hooks que actualizan resumen_mensual y la cuenta corriente
+from app.services import cuenta_corriente, resumen_mensual  # noqa: F401
+
+METODO_PAGO = "transferencia"
+
+ALIAS_COLUMNAS = {
+    "fecha": ("fecha", "fecha_pago", "fecha_operacion"),
+    "monto": ("monto", "abono", "monto_pagado", "importe"),
+    "vivienda": ("vivienda", "numero_vivienda", "depto", "departamento", "unidad"),
+    "periodo": ("periodo",),
+    "mes": ("mes",),
+    "ano": ("ano",),
+    "referencia": ("referencia", "glosa", "descripcion"),
+}
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+CENTAVO = Decimal("0.01")
+
+
+class _GastoPendiente:
+    __slots__ = ("id", "vivienda_id", "numero_vivienda", "ano", "mes", "pendiente", "usuario_id")
+
+    def __init__(self, fila) -> None:
+        self.id = fila.id
+        self.vivienda_id = fila.vivienda_id
+        self.numero_vivienda = fila.numero_vivienda
+        self.ano = fila.ano
+        self.mes = fila.mes
+        self.pendiente = (Decimal(fila.monto_total) - Decimal(fila.pagado)).quantize(CENTAVO)
+        self.usuario_id = fila.usuario_id
+
+
+def _sin_tildes(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def normalizar_vivienda(texto: str) -> str:
+    """'Dpto 101' -> 'DPTO101' (mayúsculas, solo letras y dígitos)"""
+    return re.sub(r"[^0-9A-Z]", "", _sin_tildes(texto).upper())
+
+
+def _normalizar_encabezado(texto: str) -> str:
+    """'Año' -> 'ano', 'Fecha Pago' -> 'fecha_pago'"""
+    return re.sub(r"\s+", "_", _sin_tildes(texto).strip().lower())
+
+
+def parsear_monto(texto: str) -> Decimal:
+    """
+    Convierte un monto de cartola a Decimal ("$ 39.486", "39.486,00", "39486").
+
+    Raises:
+        ValueError: Si el texto no es un monto válido
+    """
+    limpio = re.sub(r"[\s$]", "", texto or "")
+    if "," in limpio:
+        limpio = limpio.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"-?\d{1,3}(\.\d{3})+", limpio):
+        # Punto como separador de miles
+        limpio = limpio.replace(".", "")
+    try:
+        return Decimal(limpio).quantize(CENTAVO)
+    except InvalidOperation:
+        raise ValueError(f"monto inválido: {texto!r}")
+
+
+def parsear_fecha(texto: str) -> date:
+    """
+    Raises:
+        ValueError: Si la fecha no tiene un formato reconocido
+    """
+    texto = (texto or "").strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto[:10], formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"fecha inválida: {texto!r}")
+
+
+def parsear_periodo(texto: str) -> Tuple[int, int]:
+    """
+    'AAAA-MM', 'MM-AAAA' o 'MM/AAAA' -> (año, mes)
+
+    Raises:
+        ValueError: Si el período no tiene un formato reconocido
+    """
+    partes = re.split(r"[-/]", (texto or "").strip())
+    if len(partes) == 2 and all(parte.isdigit() for parte in partes):
+        ano, mes = (partes[0], partes[1]) if len(partes[0]) == 4 else (partes[1], partes[0])
+        if len(ano) == 4 and 1 <= int(mes) <= 12:
+            return int(ano), int(mes)
+    raise ValueError(f"período inválido: {texto!r}")
+
+
+def _detectar_delimitador(encabezado: str) -> str:
+    return max((";", ",", "\t"), key=encabezado.count)
+
+
+def _leer_filas(archivo: IO[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Recorre el CSV fila a fila con las columnas renombradas a su nombre canónico.
+
+    Raises:
+        ValueError: Si el archivo está vacío o faltan columnas obligatorias
+    """
+    encabezado = archivo.readline()
+    if not encabezado.strip():
+        raise ValueError("El archivo está vacío")
+    delimitador = _detectar_delimitador(encabezado)
+    columnas = [_normalizar_encabezado(nombre) for nombre in next(csv.reader([encabezado], delimiter=delimitador))]
+
+    posiciones: Dict[str, int] = {}
+    for canonica, alias in ALIAS_COLUMNAS.items():
+        for indice, nombre in enumerate(columnas):
+            if nombre in alias:
+                posiciones[canonica] = indice
+                break
+    faltantes = [nombre for nombre in ("fecha", "monto", "vivienda") if nombre not in posiciones]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias en el archivo: {', '.join(faltantes)}")
+
+    # Línea 1 = encabezado
+    for linea, valores in enumerate(csv.reader(archivo, delimiter=delimitador), start=2):
+        if not any(valor.strip() for valor in valores):
+            continue
+        yield linea, {
+            canonica: valores[indice].strip() if indice < len(valores) else ""
+            for canonica, indice in posiciones.items()
+        }
+
+
+def _gastos_pendientes(db: Session, condominio_id: int) -> List[_GastoPendiente]:
+    """Gastos pendientes del condominio con su saldo y residente (una consulta)"""
+    pagado = (
+        select(Pago.gasto_comun_id, func.sum(Pago.monto_pagado).label("pagado"))
+        .group_by(Pago.gasto_comun_id)
+        .subquery()
+    )
+    residente = (
+        select(func.min(ResidenteVivienda.usuario_id))
+        .where(ResidenteVivienda.vivienda_id == Vivienda.id)
+        .correlate(Vivienda)
+        .scalar_subquery()
+    )
+    consulta = (
+        select(
+            GastoComun.id,
+            GastoComun.vivienda_id,
+            Vivienda.numero_vivienda,
+            GastoComun.ano,
+            GastoComun.mes,
+            GastoComun.monto_total,
+            func.coalesce(pagado.c.pagado, 0).label("pagado"),
+            residente.label("usuario_id"),
+        )
+        .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+        .outerjoin(pagado, pagado.c.gasto_comun_id == GastoComun.id)
+        .where(Vivienda.condominio_id == condominio_id, GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO))
+        .order_by(GastoComun.ano.asc(), GastoComun.mes.asc(), GastoComun.id.asc())
+    )
+    return [_GastoPendiente(fila) for fila in db.execute(consulta)]
+
+
+def _indices(gastos: List[_GastoPendiente]):
+    """
+    Índices hash de los gastos pendientes:
+
+    - vivienda normalizada (y solo sus dígitos, si no es ambiguo) -> vivienda_id
+    - (vivienda_id, año, mes) -> gasto
+    - (vivienda_id, saldo) -> gastos del más antiguo al más reciente
+    """
+    por_nombre: Dict[str, int] = {}
+    por_digitos: Dict[str, set] = defaultdict(set)
+    por_periodo: Dict[Tuple[int, int, int], _GastoPendiente] = {}
+    por_monto: Dict[Tuple[int, Decimal], List[_GastoPendiente]] = defaultdict(list)
+    for gasto in gastos:
+        nombre = normalizar_vivienda(gasto.numero_vivienda)
+        por_nombre[nombre] = gasto.vivienda_id
+        digitos = re.sub(r"\D", "", nombre)
+        if digitos:
+            por_digitos[digitos].add(gasto.vivienda_id)
+        por_periodo[(gasto.vivienda_id, gasto.ano, gasto.mes)] = gasto
+        por_monto[(gasto.vivienda_id, gasto.pendiente)].append(gasto)
+    for digitos, viviendas in por_digitos.items():
+        if len(viviendas) == 1:
+            por_nombre.setdefault(digitos, next(iter(viviendas)))
+    return por_nombre, por_periodo, por_monto
+
+
+def _escribir_lote(db: Session, pagos: List[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Inserta los pagos del lote y marca sus gastos como pagados.
+
+    Returns:
+        gasto_comun_id -> motivo de los pagos descartados porque su gasto ya
+        no está pendiente o su saldo cambió
+    """
+    gasto_ids = sorted(pago["gasto_comun_id"] for pago in pagos)
+    # Lecturas con bloqueo: ven los datos confirmados más recientes y retienen
+    # los gastos hasta el commit
+    gastos = {
+        fila.id: fila
+        for fila in db.execute(
+            select(GastoComun.id, GastoComun.estado, GastoComun.monto_total)
+            .where(GastoComun.id.in_(gasto_ids))
+            .order_by(GastoComun.id)
+            .with_for_update()
+        )
+    }
+    pagado: Dict[int, Decimal] = defaultdict(Decimal)
+    for gasto_id, monto in db.execute(
+        select(Pago.gasto_comun_id, Pago.monto_pagado).where(Pago.gasto_comun_id.in_(gasto_ids)).with_for_update()
+    ):
+        pagado[gasto_id] += Decimal(monto)
+
+    descartados: Dict[int, str] = {}
+    validos = []
+    for pago in pagos:
+        gasto = gastos.get(pago["gasto_comun_id"])
+        if gasto is None or gasto.estado not in ESTADOS_GASTO_IMPAGO:
+            descartados[pago["gasto_comun_id"]] = "el gasto dejó de estar pendiente durante la importación"
+        elif Decimal(gasto.monto_total) - pagado[gasto.id] != pago["monto_pagado"]:
+            descartados[pago["gasto_comun_id"]] = "el saldo del gasto cambió durante la importación"
+        else:
+            validos.append(pago)
+
+    if validos:
+        db.execute(insert(Pago), validos)
+        db.execute(
+            update(GastoComun)
+            .where(GastoComun.id.in_([pago["gasto_comun_id"] for pago in validos]))
+            .values(estado="pagado")
+            .execution_options(synchronize_session=False)
+        )
+    return descartados
+
+
+def importar_cartola(
+    db: Session,
+    condominio_id: int,
+    archivo: IO[str],
+    usuario_id: int,
+    aplicar: bool = True,
+    tamano_lote: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Importa una cartola bancaria CSV y registra los pagos que calzan con
+    gastos comunes pendientes del condominio.
+
+    Args:
+        db: Sesión de base de datos (se confirma al final si aplicar)
+        condominio_id: ID del condominio de la cartola
+        archivo: CSV abierto en modo texto
+        usuario_id: Usuario al que se asignan los pagos de viviendas sin residente
+        aplicar: False para solo conciliar (vista previa)
+        tamano_lote: Pagos por INSERT/UPDATE (por defecto IMPORTACION_PAGOS_TAMANO_LOTE)
+
+    Returns:
+        Reporte con filas leídas, asociadas (con su gasto) y sin asociar (con
+        el motivo), y el monto total conciliado
+
+    Raises:
+        ValueError: Si el archivo no tiene las columnas obligatorias o supera
+            IMPORTACION_PAGOS_MAX_FILAS
+    """
+    tamano_lote = tamano_lote or settings.IMPORTACION_PAGOS_TAMANO_LOTE
+    por_nombre, por_periodo, por_monto = _indices(_gastos_pendientes(db, condominio_id))
+    conciliados = set()
+    descartados: Dict[int, str] = {}
+
+    asociadas: List[Dict[str, Any]] = []
+    sin_asociar: List[Dict[str, Any]] = []
+    lote: List[Dict[str, Any]] = []
+    total = Decimal("0")
+    leidas = 0
+
+    try:
+        for linea, fila in _leer_filas(archivo):
+            leidas += 1
+            if leidas > settings.IMPORTACION_PAGOS_MAX_FILAS:
+                raise ValueError(
+                    f"El archivo supera el máximo de {settings.IMPORTACION_PAGOS_MAX_FILAS} filas"
+                )
+            reporte = {"linea": linea, "vivienda": fila["vivienda"], "monto": fila["monto"], "fecha": fila["fecha"]}
+            if fila.get("referencia"):
+                reporte["referencia"] = fila["referencia"]
+
+            try:
+                monto = parsear_monto(fila["monto"])
+                fecha = parsear_fecha(fila["fecha"])
+                periodo = None
+                if fila.get("periodo"):
+                    periodo = parsear_periodo(fila["periodo"])
+                elif fila.get("mes") and fila.get("ano"):
+                    periodo = parsear_periodo(f"{fila['ano']}-{fila['mes']}")
+            except ValueError as e:
+                sin_asociar.append({**reporte, "motivo": str(e)})
+                continue
+            if monto <= 0:
+                sin_asociar.append({**reporte, "motivo": "monto no positivo (cargo)"})
+                continue
+
+            vivienda_id = por_nombre.get(normalizar_vivienda(fila["vivienda"]))
+            if vivienda_id is None:
+                sin_asociar.append({**reporte, "motivo": "vivienda sin gastos pendientes o inexistente"})
+                continue
+
+            if periodo is not None:
+                gasto = por_periodo.get((vivienda_id, *periodo))
+                if gasto is None or gasto.id in conciliados:
+                    sin_asociar.append({**reporte, "motivo": "sin gasto pendiente en el período"})
+                    continue
+                if gasto.pendiente != monto:
+                    sin_asociar.append({
+                        **reporte,
+                        "motivo": f"monto no coincide con el saldo del gasto ({gasto.pendiente})",
+                        "gasto_comun_id": gasto.id,
+                    })
+                    continue
+            else:
+                gasto = next(
+                    (candidato for candidato in por_monto.get((vivienda_id, monto), ()) if candidato.id not in conciliados),
+                    None,
+                )
+                if gasto is None:
+                    sin_asociar.append({**reporte, "motivo": "sin gasto pendiente con ese monto"})
+                    continue
+
+            conciliados.add(gasto.id)
+            total += monto
+            asociadas.append({
+                **reporte,
+                "gasto_comun_id": gasto.id,
+                "vivienda_id": gasto.vivienda_id,
+                "ano": gasto.ano,
+                "mes": gasto.mes,
+            })
+            lote.append({
+                "gasto_comun_id": gasto.id,
+                "usuario_id": gasto.usuario_id or usuario_id,
+                "monto_pagado": monto,
+                "fecha_pago": datetime.combine(fecha, datetime.min.time()),
+                "metodo_pago": METODO_PAGO,
+            })
+            if aplicar and len(lote) >= tamano_lote:
+                descartados.update(_escribir_lote(db, lote))
+                lote = []
+
+        if aplicar:
+            if lote:
+                descartados.update(_escribir_lote(db, lote))
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if descartados:
+        # Gastos pagados por otra importación (u otro pago) mientras se leía el archivo
+        vigentes = []
+        for asociada in asociadas:
+            motivo = descartados.get(asociada["gasto_comun_id"])
+            if motivo is None:
+                vigentes.append(asociada)
+                continue
+            total -= parsear_monto(asociada["monto"])
+            sin_asociar.append({**asociada, "motivo": motivo})
+        asociadas = vigentes
+        sin_asociar.sort(key=lambda fila: fila["linea"])
+
+    return {
+        "condominio_id": condominio_id,
+        "aplicado": aplicar,
+        "filas_leidas": leidas,
+        "filas_asociadas": len(asociadas),
+        "filas_sin_asociar": len(sin_asociar),
+        "monto_conciliado": float(total),
+        "asociadas": asociadas,
+        "sin_asociar": sin_asociar,
+    }
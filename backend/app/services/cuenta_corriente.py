@@ -0,0 +1,496 @@
+"""
+Cuenta corriente por vivienda: libro append-only de cargos y abonos.
+
+Cada gasto común y multa genera un cargo y cada pago un abono en
+movimientos_cuenta (también las imputaciones de abonos a multas y el saldo a
+favor que deja un abono), y el saldo de la vivienda se mantiene en saldos_vivienda,
+ambos en la misma transacción que la escritura de origen (hooks de
+SQLAlchemy, igual que app.services.resumen_mensual):
+
+- after_flush: filas agregadas, modificadas o eliminadas vía ORM
+- do_orm_execute: INSERT/UPDATE/DELETE masivos
+
+Los movimientos nunca se modifican. Para cada fila de origen afectada se
+compara su monto actual con la suma de sus movimientos registrados y se
+agrega un movimiento por la diferencia: un pago eliminado genera un cargo que
+lo revierte, un gasto cuyo monto cambia genera un ajuste, etc.
+
+Saldo positivo = deuda. reconstruir_cuentas() concilia todas las filas y
+recalcula los saldos desde el libro (backfill o corrección de deriva):
+
+    python -m app.services.cuenta_corriente [vivienda_id]
+
+Notas:
+- Las sentencias SQL escritas a mano (text()) o vía Core no pasan por los
+  hooks; después de usarlas hay que reconstruir las cuentas
+- Un gasto en estado "pagado" cuyos pagos registrados no cubren su monto
+  (ej: pagado en efectivo y marcado a mano, o datos históricos) recibe un
+  abono por la diferencia con origen "gastos_pagados", para que su cargo no
+  quede como deuda. Si el gasto vuelve a quedar impago o se registran sus
+  pagos, el abono se anula con un movimiento de ajuste
+"""
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Abono,
+    GastoComun,
+    ImputacionAbono,
+    MovimientoCuenta,
+    Multa,
+    Pago,
+    SaldoVivienda,
+)
+
+MOVIMIENTOS = MovimientoCuenta.__table__
+SALDOS = SaldoVivienda.__table__
+
+# Modelo de origen -> atributos que determinan su movimiento
+ORIGENES = {
+    GastoComun: ("vivienda_id", "monto_total", "estado"),
+    Multa: ("vivienda_id", "monto"),
+    Pago: ("gasto_comun_id", "monto_pagado"),
+    Abono: ("vivienda_id", "saldo_a_favor"),
+    ImputacionAbono: ("vivienda_id", "tipo", "monto"),
+}
+
+DESCRIPCIONES = {
+    "gastos_comunes": "Gasto común",
+    "multas": "Multa",
+    "pagos": "Pago",
+    "abonos": "Saldo a favor",
+    "imputaciones_abono": "Pago de multa",
+    "gastos_pagados": "Gasto común pagado sin pago registrado",
+}
+
+# Abonos que compensan los gastos pagados sin pagos registrados
+ORIGEN_GASTOS_PAGADOS = "gastos_pagados"
+
+TAMANO_LOTE = 500
+
+
+def _lotes(valores: Iterable[Any]) -> Iterable[List[Any]]:
+    valores = sorted(valores)
+    for inicio in range(0, len(valores), TAMANO_LOTE):
+        yield valores[inicio:inicio + TAMANO_LOTE]
+
+
+def _montos_actuales(conexion: Connection, modelo, ids: List[int]) -> Dict[Tuple[int, int], Decimal]:
+    """(referencia_id, vivienda_id) -> monto con signo según el estado actual de la BD"""
+    if modelo is GastoComun:
+        consulta = select(GastoComun.id, GastoComun.vivienda_id, GastoComun.monto_total)
+    elif modelo is Multa:
+        consulta = select(Multa.id, Multa.vivienda_id, Multa.monto)
+    elif modelo is Abono:
+        consulta = select(Abono.id, Abono.vivienda_id, -Abono.saldo_a_favor)
+    elif modelo is ImputacionAbono:
+        # Las imputaciones a gastos ya abonan vía su Pago y las reservas no
+        # forman parte de la cuenta de la vivienda
+        consulta = (
+            select(ImputacionAbono.id, ImputacionAbono.vivienda_id, -ImputacionAbono.monto)
+            .where(ImputacionAbono.tipo == "multa")
+        )
+    else:
+        consulta = (
+            select(Pago.id, GastoComun.vivienda_id, -Pago.monto_pagado)
+            .join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+        )
+    return {
+        (fila[0], fila[1]): Decimal(fila[2])
+        for fila in conexion.execute(consulta.where(modelo.id.in_(ids)))
+    }
+
+
+def _montos_pagados_sin_pago(conexion: Connection, ids: List[int]) -> Dict[Tuple[int, int], Decimal]:
+    """(gasto_id, vivienda_id) -> abono por la parte de un gasto "pagado" que sus pagos no cubren"""
+    pagado = (
+        select(Pago.gasto_comun_id, func.sum(Pago.monto_pagado).label("pagado"))
+        .where(Pago.gasto_comun_id.in_(ids))
+        .group_by(Pago.gasto_comun_id)
+        .subquery()
+    )
+    sin_pago = GastoComun.monto_total - func.coalesce(pagado.c.pagado, 0)
+    consulta = (
+        select(GastoComun.id, GastoComun.vivienda_id, -sin_pago)
+        .outerjoin(pagado, pagado.c.gasto_comun_id == GastoComun.id)
+        .where(GastoComun.id.in_(ids), GastoComun.estado == "pagado", sin_pago > 0)
+    )
+    return {(fila[0], fila[1]): Decimal(fila[2]) for fila in conexion.execute(consulta)}
+
+
+def _montos_registrados(conexion: Connection, origen: str, ids: List[int]) -> Dict[Tuple[int, int], Decimal]:
+    """(referencia_id, vivienda_id) -> suma de los movimientos ya registrados"""
+    consulta = (
+        select(MOVIMIENTOS.c.referencia_id, MOVIMIENTOS.c.vivienda_id, func.sum(MOVIMIENTOS.c.monto))
+        .where(MOVIMIENTOS.c.origen == origen, MOVIMIENTOS.c.referencia_id.in_(ids))
+        .group_by(MOVIMIENTOS.c.referencia_id, MOVIMIENTOS.c.vivienda_id)
+    )
+    return {(fila[0], fila[1]): Decimal(fila[2]) for fila in conexion.execute(consulta)}
+
+
+def conciliar(conexion: Connection, modelo, ids: Iterable[int]) -> int:
+    """
+    Agrega los movimientos que igualan el libro con las filas de origen indicadas.
+
+    Args:
+        conexion: Conexión de la transacción en curso
+        modelo: GastoComun, Multa, Pago, Abono o ImputacionAbono
+        ids: IDs de las filas de origen (existan o no)
+
+    Returns:
+        Cantidad de movimientos agregados
+    """
+    agregados = 0
+    for lote in _lotes(set(ids)):
+        agregados += _igualar(conexion, modelo.__tablename__, lote, _montos_actuales(conexion, modelo, lote))
+        if modelo is GastoComun:
+            agregados += _igualar(conexion, ORIGEN_GASTOS_PAGADOS, lote, _montos_pagados_sin_pago(conexion, lote))
+    return agregados
+
+
+def _igualar(
+    conexion: Connection,
+    origen: str,
+    ids: List[int],
+    actuales: Dict[Tuple[int, int], Decimal],
+) -> int:
+    """Agrega los movimientos de origen que faltan para igualar los montos actuales"""
+    registrados = _montos_registrados(conexion, origen, ids)
+
+    filas = []
+    deltas: Dict[int, Decimal] = defaultdict(Decimal)
+    for referencia_id, vivienda_id in sorted(set(actuales) | set(registrados)):
+        clave = (referencia_id, vivienda_id)
+        diferencia = actuales.get(clave, Decimal(0)) - registrados.get(clave, Decimal(0))
+        if not diferencia:
+            continue
+        descripcion = DESCRIPCIONES[origen]
+        if clave in registrados:
+            descripcion += " (ajuste)" if clave in actuales else " (anulado)"
+        filas.append({
+            "vivienda_id": vivienda_id,
+            "tipo": "cargo" if diferencia > 0 else "abono",
+            "origen": origen,
+            "referencia_id": referencia_id,
+            "monto": diferencia,
+            "descripcion": f"{descripcion} #{referencia_id}",
+        })
+        deltas[vivienda_id] += diferencia
+
+    if filas:
+        conexion.execute(insert(MOVIMIENTOS), filas)
+        _actualizar_saldos(conexion, deltas)
+    return len(filas)
+
+
+def _actualizar_saldos(conexion: Connection, deltas: Dict[int, Decimal]) -> None:
+    """
+    Suma los deltas a los saldos con un upsert (INSERT ... ON DUPLICATE KEY UPDATE).
+
+    El incremento lo hace la BD sobre la fila vigente, por lo que dos
+    transacciones que agregan los primeros movimientos de una vivienda no
+    chocan con la clave primaria ni calculan el saldo desde un snapshot sin
+    los movimientos de la otra. Una vivienda sin fila parte de saldo 0
+    (reconstruir_cuentas crea la fila de toda vivienda con movimientos).
+    """
+    ultimos = dict(conexion.execute(
+        select(MOVIMIENTOS.c.vivienda_id, func.max(MOVIMIENTOS.c.id))
+        .where(MOVIMIENTOS.c.vivienda_id.in_(list(deltas)))
+        .group_by(MOVIMIENTOS.c.vivienda_id)
+    ).all())
+    filas = [
+        {"vivienda_id": vivienda_id, "saldo": delta, "ultimo_movimiento_id": ultimos.get(vivienda_id)}
+        for vivienda_id, delta in deltas.items()
+    ]
+    if conexion.dialect.name == "sqlite":
+        sentencia = sqlite.insert(SALDOS)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=["vivienda_id"],
+            set_={
+                "saldo": SALDOS.c.saldo + sentencia.excluded.saldo,
+                "ultimo_movimiento_id": func.max(
+                    func.coalesce(SALDOS.c.ultimo_movimiento_id, 0), sentencia.excluded.ultimo_movimiento_id
+                ),
+                "updated_at": func.now(),
+            },
+        )
+    else:
+        sentencia = mysql.insert(SALDOS)
+        # onupdate de updated_at no aplica en ON DUPLICATE KEY UPDATE
+        sentencia = sentencia.on_duplicate_key_update(
+            saldo=SALDOS.c.saldo + sentencia.inserted.saldo,
+            ultimo_movimiento_id=func.greatest(
+                func.coalesce(SALDOS.c.ultimo_movimiento_id, 0), sentencia.inserted.ultimo_movimiento_id
+            ),
+            updated_at=func.now(),
+        )
+    conexion.execute(sentencia, filas)
+
+
+def _pagos_de_gastos(conexion: Connection, gasto_ids: Set[int]) -> Set[int]:
+    """Pagos de los gastos indicados (su vivienda es la del gasto)"""
+    pagos = set()
+    for lote in _lotes(gasto_ids):
+        pagos.update(conexion.execute(select(Pago.id).where(Pago.gasto_comun_id.in_(lote))).scalars())
+    return pagos
+
+
+def _gastos_de_pagos(conexion: Connection, pago_ids: Set[int]) -> Set[int]:
+    """Gastos de los pagos indicados (su abono por pago no registrado depende de ellos)"""
+    gastos = set()
+    for lote in _lotes(pago_ids):
+        gastos.update(conexion.execute(select(Pago.gasto_comun_id).where(Pago.id.in_(lote))).scalars())
+    return gastos
+
+
+# ============================================================================
+# Hooks de SQLAlchemy
+# ============================================================================
+
+def _gastos_del_pago(obj) -> Set[int]:
+    """Gasto actual y anterior (si cambió) de un pago del flush"""
+    return {gasto_id for gasto_id in inspect(obj).attrs["gasto_comun_id"].history.sum() if gasto_id is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_desde_flush(session, flush_context):
+    afectados: Dict[Any, Set[int]] = defaultdict(set)
+    gastos_reasignados: Set[int] = set()
+
+    for obj in list(session.new) + list(session.deleted):
+        if type(obj) in ORIGENES:
+            afectados[type(obj)].add(obj.id)
+            if type(obj) is Pago:
+                afectados[GastoComun].update(_gastos_del_pago(obj))
+    for obj in session.dirty:
+        modelo = type(obj)
+        if modelo not in ORIGENES:
+            continue
+        estado = inspect(obj)
+        if any(estado.attrs[nombre].history.has_changes() for nombre in ORIGENES[modelo]):
+            afectados[modelo].add(obj.id)
+            if modelo is GastoComun and estado.attrs["vivienda_id"].history.has_changes():
+                gastos_reasignados.add(obj.id)
+            if modelo is Pago:
+                afectados[GastoComun].update(_gastos_del_pago(obj))
+
+    if not afectados:
+        return
+
+    conexion = session.connection()
+    if gastos_reasignados:
+        # Los pagos del gasto pasan a la cuenta de la nueva vivienda
+        afectados[Pago] |= _pagos_de_gastos(conexion, gastos_reasignados)
+    for modelo, ids in afectados.items():
+        conciliar(conexion, modelo, ids)
+
+
+def _ids_afectados(conexion: Connection, modelo, orm_execute_state) -> Set[int]:
+    """IDs de las filas que tocará un UPDATE/DELETE masivo"""
+    parametros = orm_execute_state.parameters
+    if isinstance(parametros, list) and parametros and "id" in parametros[0]:
+        return {fila["id"] for fila in parametros}
+    consulta = select(modelo.id)
+    if orm_execute_state.statement.whereclause is not None:
+        consulta = consulta.where(orm_execute_state.statement.whereclause)
+    return set(conexion.execute(consulta).scalars())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_desde_sentencia(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    modelo = mapper.class_ if mapper is not None else None
+    if modelo not in ORIGENES:
+        return None
+
+    conexion = orm_execute_state.session.connection()
+    gastos: Set[int] = set()
+    if orm_execute_state.is_insert:
+        # Las filas insertadas son las de ID mayor al máximo previo
+        maximo = conexion.execute(select(func.coalesce(func.max(modelo.id), 0))).scalar()
+        resultado = orm_execute_state.invoke_statement()
+        ids = set(conexion.execute(select(modelo.id).where(modelo.id > maximo)).scalars())
+    else:
+        ids = _ids_afectados(conexion, modelo, orm_execute_state)
+        if modelo is Pago:
+            gastos = _gastos_de_pagos(conexion, ids)
+        resultado = orm_execute_state.invoke_statement()
+
+    if ids:
+        conciliar(conexion, modelo, ids)
+        if modelo is GastoComun and orm_execute_state.is_update:
+            conciliar(conexion, Pago, _pagos_de_gastos(conexion, ids))
+        if modelo is Pago:
+            conciliar(conexion, GastoComun, gastos | _gastos_de_pagos(conexion, ids))
+    return resultado
+
+
+# ============================================================================
+# Lecturas
+# ============================================================================
+
+def saldos(db: Session, vivienda_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """Saldo de cada vivienda indicada (0 si no tiene movimientos)"""
+    vivienda_ids = list(vivienda_ids)
+    resultado = {vivienda_id: Decimal(0) for vivienda_id in vivienda_ids}
+    if vivienda_ids:
+        resultado.update(
+            db.query(SaldoVivienda.vivienda_id, SaldoVivienda.saldo)
+            .filter(SaldoVivienda.vivienda_id.in_(vivienda_ids))
+            .all()
+        )
+    return resultado
+
+
+def estado_cuenta(
+    db: Session,
+    vivienda_id: int,
+    limite: int = 50,
+    antes_de: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Cartola de la cuenta corriente, del movimiento más reciente hacia atrás.
+
+    El saldo posterior a cada movimiento se obtiene restando desde el saldo
+    vigente, por lo que cada página cuesta O(limite) sin recorrer el libro.
+
+    Args:
+        db: Sesión de base de datos
+        vivienda_id: ID de la vivienda
+        limite: Cantidad máxima de movimientos
+        antes_de: Cursor de paginación (ID de movimiento, excluyente)
+
+    Returns:
+        Saldo vigente, movimientos y cursor de la página siguiente
+    """
+    saldo = saldos(db, [vivienda_id])[vivienda_id]
+
+    consulta = db.query(MovimientoCuenta).filter(MovimientoCuenta.vivienda_id == vivienda_id)
+    saldo_posterior = saldo
+    if antes_de is not None:
+        consulta = consulta.filter(MovimientoCuenta.id < antes_de)
+        # Saldo al final de la página = vigente - movimientos más nuevos que el cursor
+        posteriores = db.query(func.coalesce(func.sum(MovimientoCuenta.monto), 0)).filter(
+            MovimientoCuenta.vivienda_id == vivienda_id,
+            MovimientoCuenta.id >= antes_de,
+        ).scalar()
+        saldo_posterior = saldo - Decimal(posteriores)
+    movimientos = consulta.order_by(MovimientoCuenta.id.desc()).limit(limite + 1).all()
+
+    siguiente = None
+    if len(movimientos) > limite:
+        movimientos = movimientos[:limite]
+        siguiente = movimientos[-1].id
+
+    items = []
+    for movimiento in movimientos:
+        items.append({
+            "id": movimiento.id,
+            "fecha": movimiento.created_at.isoformat() if movimiento.created_at else None,
+            "tipo": movimiento.tipo,
+            "origen": movimiento.origen,
+            "referencia_id": movimiento.referencia_id,
+            "descripcion": movimiento.descripcion,
+            "monto": float(movimiento.monto),
+            "saldo": float(saldo_posterior),
+        })
+        saldo_posterior -= movimiento.monto
+
+    return {
+        "vivienda_id": vivienda_id,
+        "saldo": float(saldo),
+        "movimientos": items,
+        "siguiente": siguiente,
+    }
+
+
+# ============================================================================
+# Reconstrucción completa
+# ============================================================================
+
+def reconstruir_cuentas(db: Session, vivienda_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Concilia el libro con todas las filas de origen y recalcula los saldos.
+
+    Es idempotente: solo agrega movimientos por las diferencias encontradas.
+
+    Args:
+        db: Sesión de base de datos
+        vivienda_id: Limitar a una vivienda
+
+    Returns:
+        Movimientos agregados, saldos recalculados y duración en ms
+    """
+    inicio = time.perf_counter()
+    conexion = db.connection()
+    agregados = 0
+    for modelo in ORIGENES:
+        if modelo is Pago:
+            consulta = select(Pago.id).join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+            if vivienda_id is not None:
+                consulta = consulta.where(GastoComun.vivienda_id == vivienda_id)
+        else:
+            consulta = select(modelo.id)
+            if vivienda_id is not None:
+                consulta = consulta.where(modelo.vivienda_id == vivienda_id)
+        ids = set(conexion.execute(consulta).scalars())
+        # Filas con movimientos cuyo origen ya no existe (eliminadas sin hooks)
+        origenes = [modelo.__tablename__]
+        if modelo is GastoComun:
+            origenes.append(ORIGEN_GASTOS_PAGADOS)
+        registrados = select(MOVIMIENTOS.c.referencia_id).where(
+            MOVIMIENTOS.c.origen.in_(origenes)
+        ).distinct()
+        if vivienda_id is not None:
+            registrados = registrados.where(MOVIMIENTOS.c.vivienda_id == vivienda_id)
+        ids.update(conexion.execute(registrados).scalars())
+        agregados += conciliar(conexion, modelo, ids)
+
+    # Saldos desde cero a partir del libro
+    borrar = delete(SALDOS)
+    totales = select(
+        MOVIMIENTOS.c.vivienda_id,
+        func.sum(MOVIMIENTOS.c.monto),
+        func.max(MOVIMIENTOS.c.id),
+    ).group_by(MOVIMIENTOS.c.vivienda_id)
+    if vivienda_id is not None:
+        borrar = borrar.where(SALDOS.c.vivienda_id == vivienda_id)
+        totales = totales.where(MOVIMIENTOS.c.vivienda_id == vivienda_id)
+    conexion.execute(borrar)
+    conexion.execute(
+        insert(SALDOS).from_select(["vivienda_id", "saldo", "ultimo_movimiento_id"], totales)
+    )
+    contar = select(func.count()).select_from(SALDOS)
+    if vivienda_id is not None:
+        contar = contar.where(SALDOS.c.vivienda_id == vivienda_id)
+    cantidad = conexion.execute(contar).scalar()
+    db.commit()
+    return {
+        "movimientos_agregados": agregados,
+        "saldos": cantidad,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    # Backfill o corrección: python -m app.services.cuenta_corriente [vivienda_id]
+    import json
+    import sys
+
+    from app.db.session import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        vivienda = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(json.dumps(reconstruir_cuentas(sesion, vivienda), indent=2))
+    finally:
+        sesion.close()
@@ -0,0 +1,128 @@
+"""
+Exportación de consultas grandes en streaming (CSV / NDJSON).
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se
+escriben a la respuesta lote por lote, por lo que la memoria usada depende del
+tamaño del lote y no del total de filas exportadas.
+
+Notas:
+- La consulta se ejecuta con su propia sesión, abierta y cerrada por el
+  generador: la sesión de la petición (get_db) se cierra antes de que se
+  envíe el cuerpo de un StreamingResponse
+- Se consultan columnas, no entidades ORM, para no llenar el identity map
+- Si la BD falla a mitad de la exportación el status 200 ya fue enviado; la
+  respuesta queda truncada y el error se registra en el log
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+FORMATOS_EXPORTACION = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def validar_formato(formato: str) -> str:
+    """
+    Normaliza y valida el formato de exportación.
+
+    Raises:
+        HTTPException 400: Si el formato no es csv ni ndjson
+    """
+    formato = formato.lower()
+    if formato not in FORMATOS_EXPORTACION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato '{formato}' no soportado. Use: {', '.join(FORMATOS_EXPORTACION)}",
+        )
+    return formato
+
+
+def _valor_exportable(valor: Any) -> Any:
+    """Convierte Decimal y fechas a tipos serializables sin perder precisión"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _lotes_de_filas(consulta: Select, tamano_lote: int) -> Iterator[List[Any]]:
+    """Ejecuta la consulta con cursor del lado del servidor y entrega lotes de filas"""
+    db = SessionLocal()
+    try:
+        resultado = db.execute(consulta.execution_options(yield_per=tamano_lote))
+        for lote in resultado.partitions():
+            yield lote
+    except Exception as e:
+        print(f"Error durante la exportación (respuesta truncada): {e}")
+        raise
+    finally:
+        db.close()
+
+
+def _csv(consulta: Select, columnas: List[str], tamano_lote: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for lote in _lotes_de_filas(consulta, tamano_lote):
+        escritor.writerows([_valor_exportable(valor) for valor in fila] for fila in lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson(consulta: Select, columnas: List[str], tamano_lote: int) -> Iterator[str]:
+    for lote in _lotes_de_filas(consulta, tamano_lote):
+        yield "".join(
+            json.dumps(
+                {columna: _valor_exportable(valor) for columna, valor in zip(columnas, fila)},
+                ensure_ascii=False,
+            ) + "\n"
+            for fila in lote
+        )
+
+
+def respuesta_exportacion(
+    consulta: Select,
+    formato: str,
+    nombre_archivo: str,
+    tamano_lote: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Construye la respuesta en streaming de una exportación.
+
+    Args:
+        consulta: select() de columnas etiquetadas; las etiquetas se usan como
+            encabezados del CSV y como claves del NDJSON
+        formato: "csv" o "ndjson" (ya validado con validar_formato)
+        nombre_archivo: Nombre base del archivo descargado (sin extensión)
+        tamano_lote: Filas por lote (default: EXPORTACION_TAMANO_LOTE)
+
+    Returns:
+        StreamingResponse con Content-Disposition de descarga
+    """
+    columnas = [columna.key for columna in consulta.selected_columns]
+    tamano_lote = tamano_lote or settings.EXPORTACION_TAMANO_LOTE
+    generador = _csv if formato == "csv" else _ndjson
+    return StreamingResponse(
+        generador(consulta, columnas, tamano_lote),
+        media_type=FORMATOS_EXPORTACION[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre_archivo}.{formato}"',
+            "Cache-Control": "no-store",
+        },
+    )
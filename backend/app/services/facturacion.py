@@ -0,0 +1,319 @@
+"""
+Emisión masiva de los gastos comunes de un condominio para un mes.
+
+Cada vivienda con cargo fijo recibe un gasto común de
+cargo_fijo_uf × valor UF (redondeado a pesos) con el vencimiento indicado.
+Si no se indica el valor de la UF se usa el del primer día del período (o el
+de hoy para períodos futuros) según app.services.uf.
+
+- Las viviendas se recorren en orden de ID por lotes (keyset, sin OFFSET)
+- Por lote se descartan las viviendas que ya tienen el gasto del período
+  (uq_gastos_vivienda_mes_ano) y el resto se inserta con un solo INSERT
+  multi-fila
+- Cada lote se confirma junto con el checkpoint (ultimo_vivienda_id) en
+  procesos_facturacion, con la fila del proceso bloqueada (SELECT ... FOR
+  UPDATE): una emisión interrumpida se retoma desde el último lote confirmado
+  y dos ejecuciones simultáneas del mismo período no duplican gastos
+- Re-ejecutar una emisión completada recorre de nuevo las viviendas y solo
+  crea los gastos faltantes (ej: viviendas agregadas después)
+- Después de cada lote se aplica el saldo a favor de las viviendas con
+  gastos nuevos (app.services.imputacion_pagos.aplicar_saldos_a_favor)
+
+Uso por línea de comandos:
+
+    python -m app.services.facturacion <condominio_id> <ano> <mes> [valor_uf|-] [vencimiento AAAA-MM-DD]
+"""
+import calendar
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import GastoComun, ProcesoFacturacion, Vivienda
+# Los gastos insertados actualizan resumen_mensual y la cuenta corriente
+# también cuando la emisión corre desde la línea de comandos
+from app.services import cuenta_corriente, resumen_mensual  # noqa: F401
+from app.services import uf
+from app.services.imputacion_pagos import aplicar_saldos_a_favor
+
+
+def vencimiento_por_defecto(ano: int, mes: int) -> date:
+    """Día FACTURACION_DIA_VENCIMIENTO del mes (o el último día si el mes es más corto)"""
+    ultimo_dia = calendar.monthrange(ano, mes)[1]
+    return date(ano, mes, min(settings.FACTURACION_DIA_VENCIMIENTO, ultimo_dia))
+
+
+def monto_gasto(cargo_fijo_uf: Any, valor_uf: Decimal) -> Decimal:
+    """Cargo fijo en UF convertido a pesos (sin decimales)"""
+    return uf.uf_a_pesos(cargo_fijo_uf, valor_uf)
+
+
+def valor_uf_por_defecto(db: Session, condominio_id: int, ano: int, mes: int) -> Decimal:
+    """
+    Valor de la UF para emitir un período sin valor explícito.
+
+    Una emisión en curso se retoma con el valor con que partió; si no, se usa
+    la UF del primer día del período (o la de hoy si el período es futuro).
+
+    Raises:
+        UFNoDisponibleError: Si no hay valor de la UF disponible
+    """
+    en_curso = (
+        db.query(ProcesoFacturacion.valor_uf)
+        .filter(
+            ProcesoFacturacion.condominio_id == condominio_id,
+            ProcesoFacturacion.ano == ano,
+            ProcesoFacturacion.mes == mes,
+            ProcesoFacturacion.estado == "en_curso",
+        )
+        .scalar()
+    )
+    if en_curso is not None:
+        return Decimal(en_curso)
+    return uf.valor_uf(db, min(date(ano, mes, 1), date.today())).valor
+
+
+def proceso_a_dict(proceso: ProcesoFacturacion) -> Dict[str, Any]:
+    return {
+        "id": proceso.id,
+        "condominio_id": proceso.condominio_id,
+        "ano": proceso.ano,
+        "mes": proceso.mes,
+        "valor_uf": float(proceso.valor_uf),
+        "vencimiento": proceso.vencimiento.isoformat() if proceso.vencimiento else None,
+        "estado": proceso.estado,
+        "ultimo_vivienda_id": proceso.ultimo_vivienda_id,
+        "gastos_creados": proceso.gastos_creados,
+        "gastos_existentes": proceso.gastos_existentes,
+        "viviendas_sin_cargo": proceso.viviendas_sin_cargo,
+        "created_at": proceso.created_at.isoformat() if proceso.created_at else None,
+        "finalizado_en": proceso.finalizado_en.isoformat() if proceso.finalizado_en else None,
+    }
+
+
+def _preparar_proceso(
+    db: Session,
+    condominio_id: int,
+    ano: int,
+    mes: int,
+    valor_uf: Decimal,
+    vencimiento: date,
+) -> ProcesoFacturacion:
+    """Crea el proceso del período, lo retoma o lo reinicia si ya se completó"""
+    filtro = (
+        ProcesoFacturacion.condominio_id == condominio_id,
+        ProcesoFacturacion.ano == ano,
+        ProcesoFacturacion.mes == mes,
+    )
+    proceso = db.query(ProcesoFacturacion).filter(*filtro).with_for_update().first()
+    if proceso is None:
+        try:
+            proceso = ProcesoFacturacion(
+                condominio_id=condominio_id,
+                ano=ano,
+                mes=mes,
+                valor_uf=valor_uf,
+                vencimiento=vencimiento,
+                estado="en_curso",
+                ultimo_vivienda_id=0,
+                gastos_creados=0,
+                gastos_existentes=0,
+                viviendas_sin_cargo=0,
+            )
+            db.add(proceso)
+            db.commit()
+            return proceso
+        except IntegrityError:
+            # Otra ejecución creó el proceso al mismo tiempo: se retoma ese
+            db.rollback()
+            proceso = db.query(ProcesoFacturacion).filter(*filtro).with_for_update().one()
+
+    if proceso.estado == "en_curso":
+        if Decimal(proceso.valor_uf) != valor_uf or proceso.vencimiento != vencimiento:
+            db.rollback()
+            raise RuntimeError(
+                "Hay una emisión en curso para este período con otros parámetros "
+                f"(valor UF {proceso.valor_uf}, vencimiento {proceso.vencimiento.isoformat()}); "
+                "retómela con los mismos parámetros"
+            )
+    else:
+        # Nueva pasada sobre una emisión completada: solo crea los gastos faltantes
+        proceso.valor_uf = valor_uf
+        proceso.vencimiento = vencimiento
+        proceso.estado = "en_curso"
+        proceso.ultimo_vivienda_id = 0
+        proceso.gastos_creados = 0
+        proceso.gastos_existentes = 0
+        proceso.viviendas_sin_cargo = 0
+        proceso.finalizado_en = None
+    db.commit()
+    return proceso
+
+
+def emitir_gastos(
+    db: Session,
+    condominio_id: int,
+    ano: int,
+    mes: int,
+    valor_uf: Any = None,
+    vencimiento: Optional[date] = None,
+    tamano_lote: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Crea (o completa) los gastos comunes de un condominio para un mes.
+
+    Args:
+        db: Sesión de base de datos (se confirma por lote)
+        condominio_id: ID del condominio
+        ano: Año del período
+        mes: Mes del período (1-12)
+        valor_uf: Valor de la UF en pesos para convertir cargo_fijo_uf
+            (por defecto valor_uf_por_defecto)
+        vencimiento: Vencimiento de los gastos (por defecto vencimiento_por_defecto)
+        tamano_lote: Viviendas por lote (por defecto FACTURACION_TAMANO_LOTE)
+
+    Returns:
+        Estado del proceso más los gastos creados en esta ejecución, saldo a
+        favor aplicado, duración en ms y filas por segundo
+
+    Raises:
+        ValueError: Si el período o el valor de la UF no son válidos
+        RuntimeError: Si hay una emisión en curso del período con otros parámetros
+        UFNoDisponibleError: Si no se indica valor_uf y no hay valor de la UF disponible
+    """
+    if not 1 <= mes <= 12 or ano < 2000:
+        raise ValueError("Período inválido: mes debe estar entre 1 y 12 y año ser 2000 o posterior")
+    if valor_uf is None:
+        valor_uf = valor_uf_por_defecto(db, condominio_id, ano, mes)
+    valor_uf = Decimal(str(valor_uf))
+    if valor_uf <= 0:
+        raise ValueError("El valor de la UF debe ser mayor que 0")
+    vencimiento = vencimiento or vencimiento_por_defecto(ano, mes)
+    tamano_lote = tamano_lote or settings.FACTURACION_TAMANO_LOTE
+
+    inicio = time.perf_counter()
+    proceso_id = _preparar_proceso(db, condominio_id, ano, mes, valor_uf, vencimiento).id
+    creados = 0
+    lotes = 0
+    saldo_aplicado = 0.0
+
+    try:
+        while True:
+            # La fila del proceso queda bloqueada hasta el commit del lote
+            proceso = (
+                db.query(ProcesoFacturacion)
+                .filter(ProcesoFacturacion.id == proceso_id)
+                .with_for_update()
+                .populate_existing()
+                .one()
+            )
+            if proceso.estado == "completado":
+                # Otra ejecución simultánea terminó el período
+                db.commit()
+                break
+
+            viviendas = (
+                db.query(Vivienda.id, Vivienda.cargo_fijo_uf)
+                .filter(
+                    Vivienda.condominio_id == condominio_id,
+                    Vivienda.id > proceso.ultimo_vivienda_id,
+                )
+                .order_by(Vivienda.id.asc())
+                .limit(tamano_lote)
+                .all()
+            )
+            if not viviendas:
+                proceso.estado = "completado"
+                proceso.finalizado_en = func.now()
+                db.commit()
+                break
+
+            vivienda_ids = [vivienda_id for vivienda_id, _ in viviendas]
+            existentes = {
+                vivienda_id
+                for (vivienda_id,) in db.query(GastoComun.vivienda_id).filter(
+                    GastoComun.vivienda_id.in_(vivienda_ids),
+                    GastoComun.ano == ano,
+                    GastoComun.mes == mes,
+                )
+            }
+
+            filas = []
+            sin_cargo = 0
+            for vivienda_id, cargo_fijo_uf in viviendas:
+                if vivienda_id in existentes:
+                    continue
+                monto = monto_gasto(cargo_fijo_uf, valor_uf)
+                if monto <= 0:
+                    sin_cargo += 1
+                    continue
+                filas.append({
+                    "vivienda_id": vivienda_id,
+                    "mes": mes,
+                    "ano": ano,
+                    "monto_total": monto,
+                    "estado": "pendiente",
+                    "vencimiento": vencimiento,
+                })
+            if filas:
+                db.execute(insert(GastoComun), filas)
+
+            proceso.ultimo_vivienda_id = vivienda_ids[-1]
+            proceso.gastos_creados += len(filas)
+            proceso.gastos_existentes += len(existentes)
+            proceso.viviendas_sin_cargo += sin_cargo
+            db.commit()
+            creados += len(filas)
+            lotes += 1
+            if filas:
+                saldo_aplicado += aplicar_saldos_a_favor(
+                    db, [fila["vivienda_id"] for fila in filas]
+                )["monto_aplicado"]
+    except Exception:
+        # El proceso queda en el último checkpoint confirmado
+        db.rollback()
+        raise
+
+    duracion = time.perf_counter() - inicio
+    proceso = db.query(ProcesoFacturacion).filter(ProcesoFacturacion.id == proceso_id).one()
+    resultado = proceso_a_dict(proceso)
+    resultado.update({
+        "creados_en_ejecucion": creados,
+        "lotes": lotes,
+        "saldo_a_favor_aplicado": saldo_aplicado,
+        "duracion_ms": round(duracion * 1000, 1),
+        "filas_por_segundo": round(creados / duracion, 1) if duracion > 0 else None,
+    })
+    return resultado
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from app.db.session import SessionLocal
+
+    if len(sys.argv) < 4:
+        print("Uso: python -m app.services.facturacion <condominio_id> <ano> <mes> [valor_uf|-] [vencimiento AAAA-MM-DD]")
+        sys.exit(1)
+
+    sesion = SessionLocal()
+    try:
+        print(json.dumps(
+            emitir_gastos(
+                sesion,
+                condominio_id=int(sys.argv[1]),
+                ano=int(sys.argv[2]),
+                mes=int(sys.argv[3]),
+                valor_uf=sys.argv[4] if len(sys.argv) > 4 and sys.argv[4] != "-" else None,
+                vencimiento=date.fromisoformat(sys.argv[5]) if len(sys.argv) > 5 else None,
+            ),
+            indent=2,
+        ))
+    finally:
+        sesion.close()
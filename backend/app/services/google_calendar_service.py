@@ -13,12 +13,51 @@ sin necesidad de autenticación de usuario final.
 IMPORTANTE: Requiere configuración previa de credenciales y calendarios.
 """
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import os
+from zoneinfo import ZoneInfo
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
 from app.core.google_calendar import GOOGLE_SERVICE_ACCOUNT_KEY_PATH, GOOGLE_CALENDAR_IDS
 
+# Máximo de operaciones que Google Calendar acepta en una sola petición batch
+MAX_OPERACIONES_BATCH = 50
+
+# Zona horaria de las reservas y de los eventos que crea la aplicación
+ZONA_HORARIA = 'America/Santiago'
+
+# Marca (extendedProperties.private) de los eventos creados por la aplicación.
+# Permite distinguirlos de eventos cargados a mano en el calendario.
+ORIGEN_EVENTOS = 'condominio-app'
+
+# Circuit breaker compartido por todas las llamadas a Google Calendar del proceso.
+# Tras N fallos consecutivos las llamadas fallan de inmediato durante el
+# enfriamiento, y las rutas usan su fallback sin esperar el timeout.
+circuito_google = CircuitBreaker(
+    "Google Calendar",
+    umbral_fallos=settings.GOOGLE_CALENDAR_UMBRAL_FALLOS,
+    enfriamiento_segundos=settings.GOOGLE_CALENDAR_ENFRIAMIENTO_SEGUNDOS,
+)
+
+
+def _es_fallo_de_servicio(error: BaseException) -> bool:
+    """
+    Indica si un error refleja que Google Calendar está lento o caído.
+    
+    Los errores HTTP 4xx (ej: evento inexistente, permisos) son errores de la
+    petición y no deben abrir el circuito; sí lo hacen 429, 5xx, timeouts y
+    errores de red.
+    """
+    if isinstance(error, HttpError):
+        codigo = getattr(error.resp, "status", 500)
+        return codigo == 429 or codigo >= 500
+    return True
+
 class GoogleCalendarManager:
     """
     Manager para interactuar con Google Calendar API usando Service Account.
@@ -53,8 +92,35 @@ class GoogleCalendarManager:
         )
         
         # Crear cliente de Google Calendar API v3
-        self.service = build('calendar', 'v3', credentials=credentials)
+        # El timeout de httplib2 se aplica a cada operación de socket, de modo que
+        # una API colgada falla en segundos en lugar de bloquear la petición
+        http = AuthorizedHttp(
+            credentials,
+            http=httplib2.Http(timeout=settings.GOOGLE_CALENDAR_TIMEOUT_SEGUNDOS)
+        )
+        self.service = build('calendar', 'v3', http=http)
         self.credentials = credentials
+        self.circuito = circuito_google
+    
+    def _ejecutar(self, solicitud):
+        """
+        Ejecuta una petición (o batch) de la API pasando por el circuit breaker.
+        
+        Raises:
+            CircuitoAbiertoError: Si el circuito está abierto (sin llamar a la API)
+            Exception: El error original de la API si la llamada falla
+        """
+        self.circuito.verificar()
+        try:
+            resultado = solicitud.execute()
+        except Exception as e:
+            if _es_fallo_de_servicio(e):
+                self.circuito.registrar_fallo(e)
+            else:
+                self.circuito.registrar_exito()
+            raise
+        self.circuito.registrar_exito()
+        return resultado
     
     def get_disponibilidad(
         self, 
@@ -94,13 +160,13 @@ class GoogleCalendarManager:
             print(f"DEBUG GCal: Rango con TZ: {fecha_inicio.isoformat()} a {fecha_fin.isoformat()}", file=sys.stderr, flush=True)
             
             # Obtener eventos del calendario
-            events_result = self.service.events().list(
+            events_result = self._ejecutar(self.service.events().list(
                 calendarId=calendar_id,
                 timeMin=fecha_inicio.isoformat(),
                 timeMax=fecha_fin.isoformat(),
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
+            ))
             
             events = events_result.get('items', [])
             print(f"DEBUG GCal: Encontrados {len(events)} eventos", file=sys.stderr, flush=True)
@@ -121,6 +187,110 @@ class GoogleCalendarManager:
             print(f"DEBUG GCal ERROR: {str(e)}", file=sys.stderr, flush=True)
             raise Exception(f"Error al obtener disponibilidad de Google Calendar: {str(e)}")
     
+    def listar_eventos_multiples(
+        self,
+        espacios: List[str],
+        fecha_inicio: datetime,
+        fecha_fin: datetime
+    ) -> Dict[str, List[Dict]]:
+        """
+        Obtiene los eventos de varios calendarios con una sola petición batch.
+        
+        Cada calendario es una sub-petición del batch, por lo que consultar los
+        tres espacios cuesta un round trip en lugar de tres. Si algún calendario
+        tiene más páginas, las páginas siguientes de todos los calendarios
+        pendientes se piden juntas en un nuevo batch.
+        
+        Args:
+            espacios: Tipos de espacio a consultar
+            fecha_inicio: Inicio del rango
+            fecha_fin: Fin del rango
+            
+        Returns:
+            Diccionario espacio -> eventos. Los calendarios cuya consulta falló
+            no aparecen en el resultado (el llamador decide su fallback)
+        """
+        # Las fechas naive son hora local (igual que las reservas en la BD), por
+        # lo que la ventana pedida a Google debe llevar la zona del condominio
+        if fecha_inicio.tzinfo is None:
+            fecha_inicio = fecha_inicio.replace(tzinfo=ZoneInfo(ZONA_HORARIA))
+        if fecha_fin.tzinfo is None:
+            fecha_fin = fecha_fin.replace(tzinfo=ZoneInfo(ZONA_HORARIA))
+        
+        calendarios = {}
+        for espacio in espacios:
+            calendar_id = GOOGLE_CALENDAR_IDS.get(espacio)
+            if not calendar_id:
+                raise ValueError(f"Espacio '{espacio}' no válido")
+            calendarios[espacio] = calendar_id
+        
+        eventos: Dict[str, List[Dict]] = {espacio: [] for espacio in calendarios}
+        fallidos = set()
+        # espacio -> pageToken de la siguiente página (None para la primera)
+        pendientes: Dict[str, Optional[str]] = {espacio: None for espacio in calendarios}
+        
+        while pendientes:
+            siguientes: Dict[str, Optional[str]] = {}
+            
+            def _callback(request_id, response, exception):
+                if exception is not None:
+                    print(f"Advertencia: No se pudieron listar eventos de {request_id}: {str(exception)}")
+                    fallidos.add(request_id)
+                    return
+                eventos[request_id].extend(response.get('items', []))
+                if response.get('nextPageToken'):
+                    siguientes[request_id] = response['nextPageToken']
+            
+            batch = self.service.new_batch_http_request(callback=_callback)
+            for espacio, page_token in pendientes.items():
+                batch.add(
+                    self.service.events().list(
+                        calendarId=calendarios[espacio],
+                        timeMin=fecha_inicio.isoformat(),
+                        timeMax=fecha_fin.isoformat(),
+                        singleEvents=True,
+                        orderBy='startTime',
+                        maxResults=2500,
+                        timeZone=ZONA_HORARIA,
+                        pageToken=page_token
+                    ),
+                    request_id=espacio
+                )
+            try:
+                self._ejecutar(batch)
+            except Exception as e:
+                raise Exception(f"Error al obtener eventos de Google Calendar: {str(e)}")
+            pendientes = siguientes
+        
+        return {espacio: items for espacio, items in eventos.items() if espacio not in fallidos}
+    
+    def get_disponibilidad_multiple(
+        self,
+        espacios: List[str],
+        fecha_inicio: datetime,
+        fecha_fin: datetime,
+        duracion_minutos: int = 60
+    ) -> Dict[str, List[Dict]]:
+        """
+        Calcula la disponibilidad de varios espacios con un solo round trip.
+        
+        Returns:
+            Diccionario espacio -> slots disponibles, solo para los calendarios
+            que respondieron correctamente
+        """
+        eventos = self.listar_eventos_multiples(espacios, fecha_inicio, fecha_fin)
+        
+        from datetime import timezone
+        if fecha_inicio.tzinfo is None:
+            fecha_inicio = fecha_inicio.replace(tzinfo=timezone.utc)
+        if fecha_fin.tzinfo is None:
+            fecha_fin = fecha_fin.replace(tzinfo=timezone.utc)
+        
+        return {
+            espacio: self._calcular_slots_disponibles(fecha_inicio, fecha_fin, items, duracion_minutos)
+            for espacio, items in eventos.items()
+        }
+    
     def _calcular_slots_disponibles(
         self,
         fecha_inicio: datetime,
@@ -227,35 +397,121 @@ class GoogleCalendarManager:
             raise ValueError(f"Espacio '{espacio}' no válido")
         
         try:
-            event = {
-                'summary': titulo,
-                'description': descripcion,
-                'start': {
-                    'dateTime': fecha_inicio.isoformat(),
-                    'timeZone': 'America/Santiago',  # Ajusta según tu zona horaria
-                },
-                'end': {
-                    'dateTime': fecha_fin.isoformat(),
-                    'timeZone': 'America/Santiago',
-                },
-            }
+            event = self._construir_evento(titulo, descripcion, fecha_inicio, fecha_fin)
             
             # NOTA: No agregamos attendees porque Service Account no puede enviar invitaciones
             # Si necesitas invitar usuarios, requiere Domain-Wide Delegation
             # if email_asistente:
             #     event['attendees'] = [{'email': email_asistente}]
             
-            result = self.service.events().insert(
+            result = self._ejecutar(self.service.events().insert(
                 calendarId=calendar_id,
                 body=event,
                 sendUpdates='none'  # No enviar notificaciones
-            ).execute()
+            ))
             
             return result
             
         except Exception as e:
             raise Exception(f"Error al crear evento en Google Calendar: {str(e)}")
     
+    def _construir_evento(
+        self,
+        titulo: str,
+        descripcion: str,
+        fecha_inicio: datetime,
+        fecha_fin: datetime
+    ) -> Dict:
+        """
+        Construye el cuerpo de un evento de Google Calendar.
+        
+        Args:
+            titulo: Título del evento
+            descripcion: Descripción del evento
+            fecha_inicio: Fecha y hora de inicio
+            fecha_fin: Fecha y hora de fin
+            
+        Returns:
+            Diccionario con el formato esperado por events().insert
+        """
+        return {
+            'summary': titulo,
+            'description': descripcion,
+            'start': {
+                'dateTime': fecha_inicio.isoformat(),
+                'timeZone': ZONA_HORARIA,  # Ajusta según tu zona horaria
+            },
+            'end': {
+                'dateTime': fecha_fin.isoformat(),
+                'timeZone': ZONA_HORARIA,
+            },
+            'extendedProperties': {
+                'private': {'origen': ORIGEN_EVENTOS},
+            },
+        }
+    
+    def crear_eventos_lote(
+        self,
+        espacio: str,
+        titulo: str,
+        descripcion: str,
+        intervalos: List[Tuple[datetime, datetime]],
+        descripciones: Optional[List[str]] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Crea varios eventos en el calendario usando peticiones batch de la API.
+        
+        Google Calendar acepta hasta 50 operaciones por petición batch, por lo que
+        una serie de N reservas cuesta ceil(N / 50) round trips en lugar de N.
+        
+        Args:
+            espacio: Tipo de espacio ('multicancha', 'quincho', 'sala_eventos')
+            titulo: Título común de los eventos
+            descripcion: Descripción común de los eventos
+            intervalos: Lista de tuplas (inicio, fin) a crear
+            descripciones: Descripción por intervalo (reemplaza a `descripcion`)
+            
+        Returns:
+            Lista alineada con `intervalos`: el evento creado o None si esa
+            operación falló dentro del batch
+        """
+        calendar_id = GOOGLE_CALENDAR_IDS.get(espacio)
+        if not calendar_id:
+            raise ValueError(f"Espacio '{espacio}' no válido")
+        
+        resultados: List[Optional[Dict]] = [None] * len(intervalos)
+        
+        def _callback(request_id, response, exception):
+            # request_id es el índice del intervalo dentro de la lista original
+            if exception is None:
+                resultados[int(request_id)] = response
+            else:
+                print(f"Advertencia: Falló evento {request_id} del batch: {str(exception)}")
+        
+        try:
+            for desde in range(0, len(intervalos), MAX_OPERACIONES_BATCH):
+                batch = self.service.new_batch_http_request(callback=_callback)
+                for indice in range(desde, min(desde + MAX_OPERACIONES_BATCH, len(intervalos))):
+                    inicio, fin = intervalos[indice]
+                    batch.add(
+                        self.service.events().insert(
+                            calendarId=calendar_id,
+                            body=self._construir_evento(
+                                titulo,
+                                descripciones[indice] if descripciones else descripcion,
+                                inicio,
+                                fin
+                            ),
+                            sendUpdates='none'
+                        ),
+                        request_id=str(indice)
+                    )
+                self._ejecutar(batch)
+        except Exception as e:
+            raise Exception(f"Error al crear eventos en Google Calendar: {str(e)}")
+        
+        return resultados
+    
     def eliminar_evento(self, espacio: str, event_id: str) -> bool:
         """
         Elimina un evento del calendario de Google.
@@ -279,12 +535,77 @@ class GoogleCalendarManager:
             raise ValueError(f"Espacio '{espacio}' no válido")
         
         try:
-            self.service.events().delete(
+            self._ejecutar(self.service.events().delete(
                 calendarId=calendar_id,
                 eventId=event_id
-            ).execute()
+            ))
             
             return True
             
         except Exception as e:
             raise Exception(f"Error al eliminar evento de Google Calendar: {str(e)}")
+    
+    def eliminar_eventos_lote(self, espacio: str, event_ids: List[str]) -> int:
+        """
+        Elimina varios eventos de un mismo calendario usando peticiones batch.
+        
+        Args:
+            espacio: Tipo de espacio ('multicancha', 'quincho', 'sala_eventos')
+            event_ids: IDs de los eventos a eliminar
+            
+        Returns:
+            int: Cantidad de eventos eliminados correctamente
+        """
+        return len(self.eliminar_eventos_multiples([(espacio, event_id) for event_id in event_ids]))
+    
+    def eliminar_eventos_multiples(self, eventos: List[Tuple[str, str]]) -> set:
+        """
+        Elimina eventos de uno o varios calendarios usando peticiones batch.
+        
+        Un batch puede mezclar calendarios, por lo que cancelar N reservas de
+        distintos espacios cuesta ceil(N / 50) round trips. Un evento que ya no
+        existe (404/410) se considera eliminado. Las tuplas repetidas se
+        eliminan una sola vez.
+        
+        Args:
+            eventos: Lista de tuplas (espacio, event_id)
+            
+        Returns:
+            set: IDs de los eventos eliminados (o ya inexistentes)
+        """
+        for espacio, _ in eventos:
+            if not GOOGLE_CALENDAR_IDS.get(espacio):
+                raise ValueError(f"Espacio '{espacio}' no válido")
+        
+        # Los request_id de un batch deben ser únicos: sin duplicados, y
+        # posicionales por si el mismo ID aparece en dos calendarios
+        eventos = list(dict.fromkeys(eventos))
+        eliminados = set()
+        
+        def _callback(request_id, response, exception):
+            # request_id es el índice del evento dentro de la lista sin duplicados
+            event_id = eventos[int(request_id)][1]
+            if exception is None:
+                eliminados.add(event_id)
+            elif isinstance(exception, HttpError) and getattr(exception.resp, "status", None) in (404, 410):
+                eliminados.add(event_id)
+            else:
+                print(f"Advertencia: No se pudo eliminar evento {event_id}: {str(exception)}")
+        
+        try:
+            for desde in range(0, len(eventos), MAX_OPERACIONES_BATCH):
+                batch = self.service.new_batch_http_request(callback=_callback)
+                for indice in range(desde, min(desde + MAX_OPERACIONES_BATCH, len(eventos))):
+                    espacio, event_id = eventos[indice]
+                    batch.add(
+                        self.service.events().delete(
+                            calendarId=GOOGLE_CALENDAR_IDS[espacio],
+                            eventId=event_id
+                        ),
+                        request_id=str(indice)
+                    )
+                self._ejecutar(batch)
+        except Exception as e:
+            raise Exception(f"Error al eliminar eventos de Google Calendar: {str(e)}")
+        
+        return eliminados
@@ -0,0 +1,206 @@
+"""
+Generación y caché de feeds iCalendar (RFC 5545) de reservas.
+
+Este módulo permite que clientes de calendario (Google Calendar, Outlook,
+Apple Calendar) se suscriban a la ocupación de un espacio común o a las
+reservas de un usuario sin pasar por la API JSON.
+
+Los clientes de calendario consultan el feed cada pocos minutos, por lo que:
+- Cada feed se renderiza una sola vez y se guarda como blob en memoria
+- El blob se invalida al crear o cancelar una reserva que lo afecta, o al
+  cambiar su estado de pago
+- Cada blob tiene un ETag y un Last-Modified para responder 304 sin re-renderizar
+"""
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Zona horaria en la que se almacenan las reservas (igual que los eventos de Google Calendar)
+ZONA_HORARIA = "America/Santiago"
+
+PRODID = "-//Condominio App//Reservas//ES"
+
+# Clave de Session.info con los feeds a invalidar cuando se confirme la transacción
+_FEEDS_PENDIENTES = "feeds_ical_pendientes"
+
+
+def _escapar(texto: str) -> str:
+    """Escapa un valor de texto según RFC 5545 (sección 3.3.11)"""
+    return (
+        texto.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _plegar(linea: str) -> str:
+    """Pliega líneas de más de 75 octetos como exige RFC 5545 (sección 3.1)"""
+    datos = linea.encode("utf-8")
+    if len(datos) <= 75:
+        return linea
+    partes = []
+    while datos:
+        limite = 75 if not partes else 74
+        corte = min(limite, len(datos))
+        # No cortar en medio de un carácter UTF-8 multibyte
+        while corte < len(datos) and (datos[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(datos[:corte].decode("utf-8"))
+        datos = datos[corte:]
+    return "\r\n ".join(partes)
+
+
+def _fecha_ical(valor: datetime) -> str:
+    """
+    Formatea una fecha para DTSTART/DTEND.
+
+    Las fechas con zona horaria se envían en UTC; las fechas naive (como las
+    lee MySQL) se envían con TZID=America/Santiago.
+    """
+    if valor.tzinfo is not None:
+        return ":" + valor.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f";TZID={ZONA_HORARIA}:" + valor.strftime("%Y%m%dT%H%M%S")
+
+
+def _fecha_utc(valor: Optional[datetime]) -> str:
+    if valor is None:
+        valor = datetime.now(timezone.utc)
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def renderizar_calendario(nombre: str, eventos: Iterable[Dict]) -> bytes:
+    """
+    Renderiza un VCALENDAR con los eventos indicados.
+
+    Args:
+        nombre: Nombre visible del calendario (X-WR-CALNAME)
+        eventos: Diccionarios con uid, inicio, fin, titulo y opcionalmente
+            descripcion y creado
+
+    Returns:
+        bytes: Contenido del archivo .ics (UTF-8, líneas terminadas en CRLF)
+    """
+    lineas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escapar(nombre)}",
+        f"X-WR-TIMEZONE:{ZONA_HORARIA}",
+    ]
+    for evento in eventos:
+        lineas.extend([
+            "BEGIN:VEVENT",
+            f"UID:{evento['uid']}",
+            f"DTSTAMP:{_fecha_utc(evento.get('creado'))}",
+            f"DTSTART{_fecha_ical(evento['inicio'])}",
+            f"DTEND{_fecha_ical(evento['fin'])}",
+            f"SUMMARY:{_escapar(evento['titulo'])}",
+        ])
+        if evento.get("descripcion"):
+            lineas.append(f"DESCRIPTION:{_escapar(evento['descripcion'])}")
+        lineas.extend(["TRANSP:OPAQUE", "END:VEVENT"])
+    lineas.append("END:VCALENDAR")
+    return ("\r\n".join(_plegar(linea) for linea in lineas) + "\r\n").encode("utf-8")
+
+
+class FeedRenderizado:
+    """Blob de un feed ya renderizado con sus validadores HTTP"""
+
+    def __init__(self, contenido: bytes):
+        self.contenido = contenido
+        self.etag = '"' + hashlib.sha1(contenido).hexdigest() + '"'
+        # Precisión de segundos: es la que admite el header Last-Modified
+        self.ultima_modificacion = datetime.now(timezone.utc).replace(microsecond=0)
+        self.generado_en = datetime.now(timezone.utc)
+
+
+class CacheFeeds:
+    """
+    Caché en memoria de feeds renderizados.
+
+    Las claves son tuplas ("espacio", id) o ("usuario", id). Además de la
+    invalidación explícita, cada blob expira tras ICAL_CACHE_SEGUNDOS como red
+    de seguridad (por ejemplo, con varios workers cada uno tiene su caché).
+
+    Cada clave tiene un número de generación que invalidar() incrementa: un
+    feed renderizado mientras ocurría una invalidación (con datos leídos antes
+    del commit) se entrega, pero no se guarda.
+    """
+
+    def __init__(self, duracion: timedelta):
+        self.duracion = duracion
+        self._feeds: Dict[Tuple[str, int], FeedRenderizado] = {}
+        self._generaciones: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Tuple[str, int], renderizar: Callable[[], bytes]) -> FeedRenderizado:
+        """Retorna el feed cacheado o lo renderiza si no existe o expiró"""
+        ahora = datetime.now(timezone.utc)
+        with self._lock:
+            feed = self._feeds.get(clave)
+            if feed is not None and ahora - feed.generado_en < self.duracion:
+                return feed
+            generacion = self._generaciones.get(clave, 0)
+        # Renderizar fuera del lock: la consulta a la BD puede tardar
+        nuevo = FeedRenderizado(renderizar())
+        with self._lock:
+            if self._generaciones.get(clave, 0) != generacion:
+                return nuevo
+            anterior = self._feeds.get(clave)
+            # Si el contenido no cambió se conservan los validadores anteriores
+            if anterior is not None and anterior.etag == nuevo.etag:
+                anterior.generado_en = nuevo.generado_en
+                return anterior
+            self._feeds[clave] = nuevo
+            return nuevo
+
+    def invalidar(self, espacio_comun_id: Optional[int] = None, usuario_id: Optional[int] = None) -> None:
+        """Descarta los feeds afectados por un cambio en una reserva (llamar después del commit)"""
+        claves = []
+        if espacio_comun_id is not None:
+            claves.append(("espacio", int(espacio_comun_id)))
+        if usuario_id is not None:
+            claves.append(("usuario", int(usuario_id)))
+        with self._lock:
+            for clave in claves:
+                self._feeds.pop(clave, None)
+                self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+
+    def invalidar_al_confirmar(
+        self, db: Session, espacio_comun_id: Optional[int] = None, usuario_id: Optional[int] = None
+    ) -> None:
+        """
+        Invalida los feeds cuando se confirme la transacción de la sesión.
+
+        Para cambios hechos por servicios que no hacen el commit (ej: la
+        imputación de pagos que marca reservas como pagadas).
+        """
+        pendientes: List[Tuple[Optional[int], Optional[int]]] = db.info.setdefault(_FEEDS_PENDIENTES, [])
+        pendientes.append((espacio_comun_id, usuario_id))
+
+
+# Instancia compartida por el proceso
+feeds = CacheFeeds(timedelta(seconds=settings.ICAL_CACHE_SEGUNDOS))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_feeds_pendientes(session):
+    for espacio_comun_id, usuario_id in session.info.pop(_FEEDS_PENDIENTES, []):
+        feeds.invalidar(espacio_comun_id=espacio_comun_id, usuario_id=usuario_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_feeds_pendientes(session):
+    session.info.pop(_FEEDS_PENDIENTES, None)
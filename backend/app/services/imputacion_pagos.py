@@ -0,0 +1,455 @@
+"""
+Imputación de pagos (abonos) a los cargos pendientes de una vivienda.
+
+Un abono (ej: una transferencia que cubre tres meses) se aplica en orden FIFO:
+
+1. Gastos comunes pendientes, del período más antiguo al más reciente
+2. Multas, de la más antigua a la más reciente
+3. Reservas con pago pendiente de los residentes de la vivienda
+
+Cada cargo recibe lo que falta para saldarlo (o lo que queda del abono). Las
+imputaciones a gastos crean el Pago del gasto y los cargos saldados pasan a
+"pagado" con un UPDATE por tipo. Lo que sobra queda como saldo a favor en la
+cuenta corriente. Todo se escribe en una sola transacción.
+
+Saldo a favor: se aplica a los cargos que se emiten después del abono con
+aplicar_saldos_a_favor(), que imputa el saldo de los abonos anteriores
+(del más antiguo al más reciente) igual que un abono nuevo. Se ejecuta al
+emitir gastos comunes (facturación y prorrateo), antes de imputar cada abono
+nuevo de la vivienda y en la tarea nocturna aplicar_saldos_a_favor (cubre los
+cargos creados por otras vías, ej: multas).
+
+Concurrencia: los abonos de una misma vivienda se serializan y los de
+viviendas distintas no compiten entre sí:
+
+- Dentro del proceso, la ruta espera su turno_vivienda() (un asyncio.Lock
+  por vivienda, creado bajo demanda) antes de pasar al threadpool: las
+  peticiones en espera no ocupan un hilo ni una conexión del pool
+- Entre procesos, la fila de la vivienda se bloquea con SELECT ... FOR
+  UPDATE antes de leer los cargos; solo compiten las transacciones de la
+  misma vivienda y el bloqueo dura lo que toma escribir el abono
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    ESTADOS_GASTO_IMPAGO,
+    Abono,
+    GastoComun,
+    ImputacionAbono,
+    Multa,
+    Pago,
+    Reserva,
+    ResidenteVivienda,
+    Vivienda,
+)
+from app.services.ical import feeds
+# Registra los hooks que actualizan resumen_mensual y la cuenta corriente
+from app.services import cuenta_corriente, resumen_mensual  # noqa: F401
+
+METODO_SALDO_A_FAVOR = "saldo_a_favor"
+
+# Locks del event loop por vivienda y peticiones que los usan (se descartan
+# cuando nadie espera)
+_locks_vivienda: Dict[int, asyncio.Lock] = {}
+_usos_lock: Dict[int, int] = defaultdict(int)
+
+
+class CargoPendiente(NamedTuple):
+    tipo: str  # gasto / multa / reserva
+    id: int
+    descripcion: str
+    pendiente: Decimal
+
+
+@asynccontextmanager
+async def turno_vivienda(vivienda_id: int) -> AsyncIterator[None]:
+    """Espera (sin bloquear el event loop) a los abonos en curso de la misma vivienda"""
+    lock = _locks_vivienda.setdefault(vivienda_id, asyncio.Lock())
+    _usos_lock[vivienda_id] += 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _usos_lock[vivienda_id] -= 1
+        if not _usos_lock[vivienda_id]:
+            del _usos_lock[vivienda_id]
+            del _locks_vivienda[vivienda_id]
+
+
+def _imputado(tipo: str):
+    """Subconsulta: monto ya imputado por cargo de un tipo"""
+    return (
+        select(ImputacionAbono.referencia_id, func.sum(ImputacionAbono.monto).label("imputado"))
+        .where(ImputacionAbono.tipo == tipo)
+        .group_by(ImputacionAbono.referencia_id)
+        .subquery()
+    )
+
+
+def cargos_pendientes(db: Session, vivienda_id: int) -> List[CargoPendiente]:
+    """
+    Cargos con saldo pendiente de una vivienda en orden de imputación.
+
+    Args:
+        db: Sesión de base de datos
+        vivienda_id: ID de la vivienda
+
+    Returns:
+        Gastos comunes, multas y reservas pendientes, del más antiguo al más reciente
+    """
+    cargos: List[CargoPendiente] = []
+
+    pagado = (
+        select(Pago.gasto_comun_id, func.sum(Pago.monto_pagado).label("pagado"))
+        .group_by(Pago.gasto_comun_id)
+        .subquery()
+    )
+    gastos = db.execute(
+        select(GastoComun.id, GastoComun.ano, GastoComun.mes, GastoComun.monto_total, pagado.c.pagado)
+        .outerjoin(pagado, pagado.c.gasto_comun_id == GastoComun.id)
+        .where(GastoComun.vivienda_id == vivienda_id, GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO))
+        .order_by(GastoComun.ano.asc(), GastoComun.mes.asc(), GastoComun.id.asc())
+    )
+    for gasto_id, ano, mes, monto_total, ya_pagado in gastos:
+        cargos.append(CargoPendiente(
+            "gasto", gasto_id, f"Gasto común {mes:02d}/{ano}", Decimal(monto_total) - Decimal(ya_pagado or 0)
+        ))
+
+    imputado = _imputado("multa")
+    multas = db.execute(
+        select(Multa.id, Multa.descripcion, Multa.monto, imputado.c.imputado)
+        .outerjoin(imputado, imputado.c.referencia_id == Multa.id)
+        .where(Multa.vivienda_id == vivienda_id)
+        .order_by(Multa.fecha_aplicada.asc(), Multa.id.asc())
+    )
+    for multa_id, descripcion, monto, ya_imputado in multas:
+        cargos.append(CargoPendiente(
+            "multa", multa_id, f"Multa: {descripcion or ''}".strip(), Decimal(monto) - Decimal(ya_imputado or 0)
+        ))
+
+    imputado = _imputado("reserva")
+    residentes = select(ResidenteVivienda.usuario_id).where(ResidenteVivienda.vivienda_id == vivienda_id)
+    reservas = db.execute(
+        select(Reserva.id, Reserva.fecha_hora_inicio, Reserva.monto_pago, imputado.c.imputado)
+        .outerjoin(imputado, imputado.c.referencia_id == Reserva.id)
+        .where(
+            Reserva.usuario_id.in_(residentes),
+            Reserva.estado_pago == "pendiente",
+            Reserva.monto_pago > 0,
+        )
+        .order_by(Reserva.fecha_hora_inicio.asc(), Reserva.id.asc())
+    )
+    for reserva_id, inicio, monto_pago, ya_imputado in reservas:
+        cargos.append(CargoPendiente(
+            "reserva", reserva_id, f"Reserva {inicio:%d/%m/%Y %H:%M}", Decimal(monto_pago) - Decimal(ya_imputado or 0)
+        ))
+
+    return [cargo for cargo in cargos if cargo.pendiente > 0]
+
+
+def imputar(monto: Decimal, cargos: List[CargoPendiente]) -> List[Dict[str, Any]]:
+    """
+    Reparte un monto entre los cargos en el orden dado (FIFO).
+
+    Returns:
+        Imputaciones {tipo, referencia_id, descripcion, monto, saldado}
+    """
+    imputaciones = []
+    restante = monto
+    for cargo in cargos:
+        if restante <= 0:
+            break
+        aplicado = min(restante, cargo.pendiente)
+        restante -= aplicado
+        imputaciones.append({
+            "tipo": cargo.tipo,
+            "referencia_id": cargo.id,
+            "descripcion": cargo.descripcion,
+            "monto": aplicado,
+            "saldado": aplicado == cargo.pendiente,
+        })
+    return imputaciones
+
+
+def abono_a_dict(abono: Abono) -> Dict[str, Any]:
+    return {
+        "id": abono.id,
+        "vivienda_id": abono.vivienda_id,
+        "usuario_id": abono.usuario_id,
+        "monto": float(abono.monto),
+        "monto_aplicado": float(abono.monto_aplicado),
+        "saldo_a_favor": float(abono.saldo_a_favor),
+        "fecha_pago": abono.fecha_pago.isoformat() if abono.fecha_pago else None,
+        "metodo_pago": abono.metodo_pago,
+        "imputaciones": [
+            {
+                "tipo": imputacion.tipo,
+                "referencia_id": imputacion.referencia_id,
+                "pago_id": imputacion.pago_id,
+                "monto": float(imputacion.monto),
+            }
+            for imputacion in abono.imputaciones
+        ],
+    }
+
+
+def _bloquear_vivienda(db: Session, vivienda_id: int) -> None:
+    """SELECT ... FOR UPDATE de la vivienda: serializa los abonos de la vivienda entre procesos"""
+    bloqueada = (
+        db.query(Vivienda.id)
+        .filter(Vivienda.id == vivienda_id)
+        .with_for_update()
+        .first()
+    )
+    if bloqueada is None:
+        raise LookupError("Vivienda no encontrada")
+
+
+def _agregar_imputacion(
+    abono: Abono,
+    imputacion: Dict[str, Any],
+    monto: Decimal,
+    usuario_id: int,
+    fecha_pago: datetime,
+    metodo_pago: str,
+) -> None:
+    """Agrega al abono la imputación (y el Pago, si es un gasto común) por el monto indicado"""
+    pago = None
+    if imputacion["tipo"] == "gasto":
+        pago = Pago(
+            gasto_comun_id=imputacion["referencia_id"],
+            usuario_id=usuario_id,
+            monto_pagado=monto,
+            fecha_pago=fecha_pago,
+            metodo_pago=metodo_pago,
+        )
+    abono.imputaciones.append(ImputacionAbono(
+        vivienda_id=abono.vivienda_id,
+        tipo=imputacion["tipo"],
+        referencia_id=imputacion["referencia_id"],
+        pago=pago,
+        monto=monto,
+    ))
+
+
+def _marcar_saldados(db: Session, imputaciones: List[Dict[str, Any]]) -> None:
+    """
+    Cargos saldados: un UPDATE por tipo.
+
+    Una reserva con algún pago imputado deja de tener plazo de pago (ver
+    app.services.retenciones), aunque no quede saldada.
+    """
+    saldados = {
+        tipo: [i["referencia_id"] for i in imputaciones if i["tipo"] == tipo and i["saldado"]]
+        for tipo in ("gasto", "reserva")
+    }
+    reservas = {i["referencia_id"] for i in imputaciones if i["tipo"] == "reserva"}
+    if reservas:
+        db.execute(
+            update(Reserva)
+            .where(Reserva.id.in_(reservas))
+            .values(pago_expira_en=None)
+            .execution_options(synchronize_session=False)
+        )
+    if saldados["gasto"]:
+        db.execute(
+            update(GastoComun)
+            .where(GastoComun.id.in_(saldados["gasto"]))
+            .values(estado="pagado")
+            .execution_options(synchronize_session=False)
+        )
+    if saldados["reserva"]:
+        db.execute(
+            update(Reserva)
+            .where(Reserva.id.in_(saldados["reserva"]))
+            .values(estado_pago="pagado")
+            .execution_options(synchronize_session=False)
+        )
+        # El feed iCal personal muestra el estado de pago
+        usuarios = db.execute(
+            select(Reserva.usuario_id).where(Reserva.id.in_(saldados["reserva"])).distinct()
+        ).scalars()
+        for usuario_id in usuarios:
+            feeds.invalidar_al_confirmar(db, usuario_id=usuario_id)
+
+
+def _imputar_saldo_a_favor(db: Session, vivienda_id: int) -> List[Dict[str, Any]]:
+    """
+    Imputa el saldo a favor de los abonos de la vivienda a sus cargos pendientes.
+
+    Requiere la vivienda bloqueada (_bloquear_vivienda). Los abonos se
+    consumen del más antiguo al más reciente; una imputación que abarca dos
+    abonos queda como una imputación en cada uno.
+
+    Returns:
+        Imputaciones realizadas (como las de imputar())
+    """
+    abonos = (
+        db.query(Abono)
+        .filter(Abono.vivienda_id == vivienda_id, Abono.saldo_a_favor > 0)
+        .order_by(Abono.fecha_pago.asc(), Abono.id.asc())
+        .all()
+    )
+    if not abonos:
+        return []
+    disponible = sum((abono.saldo_a_favor for abono in abonos), Decimal(0))
+    imputaciones = imputar(disponible, cargos_pendientes(db, vivienda_id))
+    if not imputaciones:
+        return []
+
+    ahora = datetime.now()
+    abonos_restantes = iter(abonos)
+    abono = next(abonos_restantes)
+    for imputacion in imputaciones:
+        restante = imputacion["monto"]
+        while restante > 0:
+            if abono.saldo_a_favor <= 0:
+                abono = next(abonos_restantes)
+            parte = min(restante, abono.saldo_a_favor)
+            _agregar_imputacion(abono, imputacion, parte, abono.usuario_id, ahora, METODO_SALDO_A_FAVOR)
+            abono.saldo_a_favor -= parte
+            abono.monto_aplicado += parte
+            restante -= parte
+    db.flush()
+    _marcar_saldados(db, imputaciones)
+    return imputaciones
+
+
+def aplicar_saldos_a_favor(db: Session, vivienda_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """
+    Aplica el saldo a favor de las viviendas a los cargos emitidos después de sus abonos.
+
+    Cada vivienda se procesa en su propia transacción, con el mismo bloqueo
+    que registrar_abono.
+
+    Args:
+        db: Sesión de base de datos (se confirma por vivienda)
+        vivienda_ids: Limitar a estas viviendas (por defecto todas las que
+            tienen saldo a favor)
+
+    Returns:
+        Viviendas con saldo a favor, viviendas e imputaciones afectadas y monto aplicado
+    """
+    consulta = db.query(Abono.vivienda_id).filter(Abono.saldo_a_favor > 0).distinct()
+    if vivienda_ids is not None:
+        vivienda_ids = list(vivienda_ids)
+        if not vivienda_ids:
+            return {"viviendas_con_saldo": 0, "viviendas_aplicadas": 0, "imputaciones": 0, "monto_aplicado": 0.0}
+        consulta = consulta.filter(Abono.vivienda_id.in_(vivienda_ids))
+    con_saldo = sorted(vivienda_id for (vivienda_id,) in consulta)
+    # La lectura de cada vivienda debe ocurrir después de su bloqueo
+    db.rollback()
+
+    aplicadas, cantidad, total = 0, 0, Decimal(0)
+    for vivienda_id in con_saldo:
+        try:
+            _bloquear_vivienda(db, vivienda_id)
+            imputaciones = _imputar_saldo_a_favor(db, vivienda_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if imputaciones:
+            aplicadas += 1
+            cantidad += len(imputaciones)
+            total += sum((imputacion["monto"] for imputacion in imputaciones), Decimal(0))
+    return {
+        "viviendas_con_saldo": len(con_saldo),
+        "viviendas_aplicadas": aplicadas,
+        "imputaciones": cantidad,
+        "monto_aplicado": float(total),
+    }
+
+
+def registrar_abono(
+    db: Session,
+    vivienda_id: int,
+    monto: Any,
+    usuario_id: int,
+    fecha_pago: Optional[datetime] = None,
+    metodo_pago: str = "transferencia",
+    aplicar: bool = True,
+) -> Dict[str, Any]:
+    """
+    Registra un abono de una vivienda y lo imputa a sus cargos pendientes (FIFO).
+
+    La sesión no debe tener una transacción en curso: la lectura de los
+    cargos tiene que ocurrir después de obtener el bloqueo de la vivienda
+    para ver los abonos que otras peticiones confirmaron mientras se esperaba.
+
+    Args:
+        db: Sesión de base de datos sin transacción en curso (se confirma al final)
+        vivienda_id: ID de la vivienda
+        monto: Monto recibido en pesos (> 0)
+        usuario_id: Usuario que registra el abono
+        fecha_pago: Fecha del pago (por defecto ahora)
+        metodo_pago: Método de pago (transferencia, efectivo, ...)
+        aplicar: False para solo calcular la imputación (vista previa)
+
+    Returns:
+        Abono con sus imputaciones, monto aplicado, saldo a favor y saldo a
+        favor anterior que se aplicó antes del abono
+
+    Raises:
+        ValueError: Si el monto no es positivo
+        LookupError: Si la vivienda no existe
+        RuntimeError: Si la sesión tiene una transacción en curso
+    """
+    monto = Decimal(str(monto)).quantize(Decimal("0.01"))
+    if monto <= 0:
+        raise ValueError("El monto del abono debe ser mayor que 0")
+    if db.in_transaction():
+        raise RuntimeError("registrar_abono requiere una sesión sin transacción en curso")
+
+    try:
+        _bloquear_vivienda(db, vivienda_id)
+        # Saldo a favor de abonos anteriores: se aplica antes que el abono nuevo
+        previas = _imputar_saldo_a_favor(db, vivienda_id)
+
+        imputaciones = imputar(monto, cargos_pendientes(db, vivienda_id))
+        aplicado = sum((imputacion["monto"] for imputacion in imputaciones), Decimal(0))
+        resumen = {
+            "vivienda_id": vivienda_id,
+            "monto": float(monto),
+            "monto_aplicado": float(aplicado),
+            "saldo_a_favor": float(monto - aplicado),
+            "saldo_anterior_aplicado": float(sum((i["monto"] for i in previas), Decimal(0))),
+            "aplicado": aplicar,
+            "imputaciones": [
+                {**imputacion, "monto": float(imputacion["monto"])} for imputacion in imputaciones
+            ],
+        }
+        if not aplicar:
+            db.rollback()
+            return resumen
+
+        fecha_pago = fecha_pago or datetime.now()
+        abono = Abono(
+            vivienda_id=vivienda_id,
+            usuario_id=usuario_id,
+            monto=monto,
+            monto_aplicado=aplicado,
+            saldo_a_favor=monto - aplicado,
+            fecha_pago=fecha_pago,
+            metodo_pago=metodo_pago,
+        )
+        for imputacion in imputaciones:
+            _agregar_imputacion(abono, imputacion, imputacion["monto"], usuario_id, fecha_pago, metodo_pago)
+        db.add(abono)
+        db.flush()
+        _marcar_saldados(db, imputaciones)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    resumen["id"] = abono.id
+    return resumen
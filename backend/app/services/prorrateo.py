@@ -0,0 +1,204 @@
+"""
+Prorrateo de los gastos del condominio entre viviendas según su alícuota.
+
+Los gastos reales del mes (líneas: mantención, aseo, consumo eléctrico
+común, ...) son un total del condominio que se reparte según la alícuota
+(coeficiente de participación) de cada vivienda:
+
+    monto_i = total × alicuota_i / Σ alicuotas
+
+El cálculo es vectorizado con NumPy y exacto en pesos enteros:
+
+1. Las alícuotas se escalan a enteros (millonésimas, la precisión de la
+   columna) para no depender de la aritmética de punto flotante
+2. Cada vivienda recibe la parte entera de total × a_i / Σa
+3. Los pesos que quedan por el redondeo se asignan de a uno a las viviendas
+   con mayor resto (método del resto mayor; empates por ID de vivienda), de
+   modo que la suma de los montos es exactamente el total
+
+El resultado se escribe en gastos_comunes con un INSERT multi-fila para las
+viviendas sin gasto del período y un UPDATE por clave primaria en lote para
+las que ya lo tienen (si sigue pendiente); ambas sentencias pasan por los
+hooks de resumen_mensual y cuenta corriente. Después se aplica el saldo a
+favor de esas viviendas (app.services.imputacion_pagos).
+
+NumPy es una dependencia opcional: sin ella el prorrateo responde 503.
+"""
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Vivienda
+# Registra los hooks que actualizan resumen_mensual y la cuenta corriente
+from app.services import cuenta_corriente, resumen_mensual  # noqa: F401
+from app.services.facturacion import vencimiento_por_defecto
+from app.services.imputacion_pagos import aplicar_saldos_a_favor
+
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIBLE = False
+
+# Escala de las alícuotas (Numeric(9, 6) -> millonésimas)
+ESCALA_ALICUOTA = 10 ** 6
+
+LIMITE_INT64 = 2 ** 63
+
+
+def repartir(total: int, alicuotas: "np.ndarray") -> "np.ndarray":
+    """
+    Reparte un total entero según las alícuotas con el método del resto mayor.
+
+    Args:
+        total: Monto a repartir en pesos (entero, >= 0)
+        alicuotas: Alícuotas escaladas a enteros (int64, >= 0, suma > 0)
+
+    Returns:
+        Montos enteros por vivienda (int64) que suman exactamente total
+    """
+    suma = int(alicuotas.sum())
+    if total * int(alicuotas.max()) < LIMITE_INT64:
+        productos = alicuotas * total
+    else:
+        # total × a_i no cabe en int64: enteros de Python (exacto, más lento)
+        productos = alicuotas.astype(object) * total
+    base = (productos // suma).astype(np.int64)
+    restos = (productos % suma).astype(np.int64)
+    faltante = total - int(base.sum())
+    if faltante:
+        # Mayor resto primero; a igual resto, la vivienda de menor posición
+        orden = np.lexsort((np.arange(len(restos)), -restos))
+        base[orden[:faltante]] += 1
+    return base
+
+
+def prorratear(
+    db: Session,
+    condominio_id: int,
+    ano: int,
+    mes: int,
+    lineas: List[Dict[str, Any]],
+    vencimiento: Optional[date] = None,
+    aplicar: bool = True,
+) -> Dict[str, Any]:
+    """
+    Calcula y (opcionalmente) escribe los gastos comunes prorrateados del mes.
+
+    Args:
+        db: Sesión de base de datos
+        condominio_id: ID del condominio
+        ano: Año del período
+        mes: Mes del período (1-12)
+        lineas: Líneas de gasto del mes ({"descripcion", "monto"})
+        vencimiento: Vencimiento de los gastos nuevos (por defecto el de la facturación)
+        aplicar: False para solo calcular (vista previa)
+
+    Returns:
+        Total, detalle por vivienda, cantidad de gastos creados, actualizados
+        y omitidos (ya pagados) y saldo a favor aplicado
+
+    Raises:
+        RuntimeError: Si NumPy no está instalado
+        ValueError: Si no hay líneas, los montos son negativos o ninguna
+            vivienda tiene alícuota
+    """
+    if not NUMPY_DISPONIBLE:
+        raise RuntimeError("El prorrateo requiere numpy")
+    if not lineas:
+        raise ValueError("Debe indicar al menos una línea de gasto")
+    montos_lineas = [Decimal(str(linea["monto"])) for linea in lineas]
+    if any(monto < 0 for monto in montos_lineas):
+        raise ValueError("Los montos de las líneas no pueden ser negativos")
+    # Los gastos comunes se cobran en pesos enteros
+    total = int(sum(montos_lineas).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+    viviendas = (
+        db.query(Vivienda.id, Vivienda.numero_vivienda, Vivienda.alicuota)
+        .filter(Vivienda.condominio_id == condominio_id, Vivienda.alicuota > 0)
+        .order_by(Vivienda.id.asc())
+        .all()
+    )
+    if not viviendas:
+        raise ValueError("Ninguna vivienda del condominio tiene alícuota asignada")
+
+    ids = np.fromiter((fila[0] for fila in viviendas), dtype=np.int64, count=len(viviendas))
+    alicuotas = np.fromiter(
+        (int(Decimal(fila[2]) * ESCALA_ALICUOTA) for fila in viviendas),
+        dtype=np.int64,
+        count=len(viviendas),
+    )
+    montos = repartir(total, alicuotas)
+
+    existentes = {
+        fila.vivienda_id: fila
+        for fila in db.query(GastoComun.id, GastoComun.vivienda_id, GastoComun.estado).filter(
+            GastoComun.vivienda_id.in_(ids.tolist()),
+            GastoComun.ano == ano,
+            GastoComun.mes == mes,
+        )
+    }
+
+    vencimiento = vencimiento or vencimiento_por_defecto(ano, mes)
+    nuevos, actualizados, pagados = [], [], []
+    detalle = []
+    suma_alicuotas = Decimal(int(alicuotas.sum())) / ESCALA_ALICUOTA
+    for (vivienda_id, numero, alicuota), monto in zip(viviendas, montos.tolist()):
+        existente = existentes.get(vivienda_id)
+        if existente is None:
+            accion = "crear"
+            nuevos.append({
+                "vivienda_id": vivienda_id,
+                "mes": mes,
+                "ano": ano,
+                "monto_total": monto,
+                "estado": "pendiente",
+                "vencimiento": vencimiento,
+            })
+        elif existente.estado in ESTADOS_GASTO_IMPAGO:
+            accion = "actualizar"
+            actualizados.append({"id": existente.id, "monto_total": monto})
+        else:
+            accion = "omitir"
+            pagados.append(vivienda_id)
+        detalle.append({
+            "vivienda_id": vivienda_id,
+            "numero_vivienda": numero,
+            "alicuota": float(alicuota),
+            "participacion": float(Decimal(alicuota) / suma_alicuotas),
+            "monto": monto,
+            "accion": accion,
+        })
+
+    if aplicar:
+        if nuevos:
+            db.execute(insert(GastoComun), nuevos)
+        if actualizados:
+            db.execute(update(GastoComun), actualizados)
+        db.commit()
+        saldo_aplicado = aplicar_saldos_a_favor(
+            db, [vivienda["vivienda_id"] for vivienda in detalle if vivienda["accion"] != "omitir"]
+        )["monto_aplicado"]
+    else:
+        saldo_aplicado = 0.0
+
+    return {
+        "condominio_id": condominio_id,
+        "ano": ano,
+        "mes": mes,
+        "total": total,
+        "lineas": [
+            {"descripcion": linea.get("descripcion", ""), "monto": float(monto)}
+            for linea, monto in zip(lineas, montos_lineas)
+        ],
+        "aplicado": aplicar,
+        "gastos_creados": len(nuevos),
+        "gastos_actualizados": len(actualizados),
+        "gastos_omitidos_pagados": len(pagados),
+        "saldo_a_favor_aplicado": saldo_aplicado,
+        "viviendas": detalle,
+    }
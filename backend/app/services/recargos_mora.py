@@ -0,0 +1,181 @@
+"""
+Recargos por mora de los gastos comunes vencidos.
+
+Cada gasto común pendiente cuyo vencimiento (más los días de gracia) ya pasó
+recibe una multa de recargo por mes de atraso, según la regla configurada:
+
+- "porcentaje": RECARGO_MORA_VALOR % del saldo pendiente del gasto
+  (monto_total menos sus pagos), redondeado a pesos
+- "fijo": RECARGO_MORA_VALOR pesos por gasto
+
+Los recargos de todas las viviendas se crean con un solo INSERT ... SELECT
+sobre gastos_comunes, sin recorrer filas en Python. Cada recargo guarda su
+gasto (gasto_comun_id) y el mes del recargo (periodo_recargo, día 1): el
+SELECT excluye los gastos que ya tienen el recargo del mes y la restricción
+única uq_multas_recargo_gasto_periodo lo garantiza ante ejecuciones
+simultáneas, por lo que re-ejecutar el proceso en el mismo mes no duplica
+recargos.
+
+Uso por línea de comandos (ej: cron diario):
+
+    python -m app.services.recargos_mora [fecha_corte AAAA-MM-DD] [condominio_id]
+"""
+import time
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import String, cast, exists, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Multa, Pago, Vivienda
+# Los recargos insertados actualizan resumen_mensual y la cuenta corriente
+# también cuando el proceso corre desde la línea de comandos
+from app.services import cuenta_corriente, resumen_mensual  # noqa: F401
+
+TIPOS = ("porcentaje", "fijo")
+
+DESCRIPCION = "Recargo por mora gasto común "
+
+
+class ReglaRecargo(NamedTuple):
+    tipo: str  # porcentaje / fijo
+    valor: Decimal
+    dias_gracia: int
+
+
+def regla_recargo(
+    tipo: Optional[str] = None,
+    valor: Any = None,
+    dias_gracia: Optional[int] = None,
+) -> ReglaRecargo:
+    """
+    Regla de recargo con los valores indicados o los de la configuración.
+
+    Raises:
+        ValueError: Si el tipo, el valor o los días de gracia no son válidos
+    """
+    tipo = tipo or settings.RECARGO_MORA_TIPO
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de recargo inválido: {tipo} (use {' o '.join(TIPOS)})")
+    try:
+        valor = Decimal(str(settings.RECARGO_MORA_VALOR if valor is None else valor))
+    except InvalidOperation:
+        raise ValueError(f"Valor de recargo inválido: {valor}")
+    if valor <= 0:
+        raise ValueError("El valor del recargo debe ser mayor que 0")
+    dias_gracia = settings.RECARGO_MORA_DIAS_GRACIA if dias_gracia is None else dias_gracia
+    if dias_gracia < 0:
+        raise ValueError("Los días de gracia no pueden ser negativos")
+    return ReglaRecargo(tipo, valor, dias_gracia)
+
+
+def _consulta_recargos(regla: ReglaRecargo, fecha_corte: date, periodo: date, condominio_id: Optional[int]):
+    """SELECT con las filas de multas a insertar (vivienda, monto, descripción, ...)"""
+    pagado = (
+        select(Pago.gasto_comun_id, func.sum(Pago.monto_pagado).label("pagado"))
+        .group_by(Pago.gasto_comun_id)
+        .subquery()
+    )
+    pendiente = GastoComun.monto_total - func.coalesce(pagado.c.pagado, 0)
+    if regla.tipo == "porcentaje":
+        monto = func.round(pendiente * regla.valor / 100, 0)
+    else:
+        monto = literal(regla.valor)
+
+    ya_recargado = exists().where(
+        Multa.gasto_comun_id == GastoComun.id,
+        Multa.periodo_recargo == periodo,
+    )
+    consulta = (
+        select(
+            GastoComun.vivienda_id,
+            monto,
+            literal(DESCRIPCION) + cast(GastoComun.mes, String) + literal("/") + cast(GastoComun.ano, String),
+            literal(fecha_corte),
+            GastoComun.id,
+            literal(periodo),
+        )
+        .outerjoin(pagado, pagado.c.gasto_comun_id == GastoComun.id)
+        .where(
+            GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO),
+            GastoComun.vencimiento < fecha_corte - timedelta(days=regla.dias_gracia),
+            pendiente > 0,
+            monto > 0,
+            ~ya_recargado,
+        )
+    )
+    if condominio_id is not None:
+        consulta = consulta.join(Vivienda, Vivienda.id == GastoComun.vivienda_id).where(
+            Vivienda.condominio_id == condominio_id
+        )
+    return consulta
+
+
+def generar_recargos(
+    db: Session,
+    fecha_corte: Optional[date] = None,
+    regla: Optional[ReglaRecargo] = None,
+    condominio_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Crea los recargos por mora del mes de fecha_corte que aún no existen.
+
+    Args:
+        db: Sesión de base de datos (se confirma al final)
+        fecha_corte: Fecha de referencia para el atraso (por defecto hoy)
+        regla: Regla de recargo (por defecto la de la configuración)
+        condominio_id: Limitar a un condominio (por defecto todos)
+
+    Returns:
+        Resumen con el período, la regla aplicada y los recargos creados
+    """
+    inicio = time.monotonic()
+    fecha_corte = fecha_corte or date.today()
+    regla = regla or regla_recargo()
+    periodo = fecha_corte.replace(day=1)
+    columnas = ["vivienda_id", "monto", "descripcion", "fecha_aplicada", "gasto_comun_id", "periodo_recargo"]
+
+    # Segundo intento: otra ejecución simultánea insertó parte de los recargos
+    for intento in range(2):
+        try:
+            creados = db.execute(
+                insert(Multa).from_select(columnas, _consulta_recargos(regla, fecha_corte, periodo, condominio_id))
+            ).rowcount
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if intento:
+                raise
+
+    return {
+        "fecha_corte": fecha_corte.isoformat(),
+        "periodo": f"{periodo.month:02d}/{periodo.year}",
+        "condominio_id": condominio_id,
+        "regla": {"tipo": regla.tipo, "valor": float(regla.valor), "dias_gracia": regla.dias_gracia},
+        "recargos_creados": creados,
+        "duracion_ms": round((time.monotonic() - inicio) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from app.db.session import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        print(json.dumps(
+            generar_recargos(
+                sesion,
+                fecha_corte=date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None,
+                condominio_id=int(sys.argv[2]) if len(sys.argv) > 2 else None,
+            ),
+            indent=2,
+        ))
+    finally:
+        sesion.close()
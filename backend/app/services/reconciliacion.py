@@ -0,0 +1,291 @@
+"""
+Reconciliación entre las reservas de la BD y los calendarios de Google.
+
+Las rutas de reservas no fallan si Google Calendar no responde: el error solo
+se registra y la reserva se guarda sin evento (o el evento queda sin borrar).
+Este job corrige esa deriva en lote:
+
+1. Descarga una sola vez los eventos del rango de cada calendario (un batch
+   para todos los calendarios) y los indexa en memoria por event_id y por
+   intervalo (hash tables)
+2. Recorre las reservas del rango en bloques de tamaño fijo (keyset por id)
+   y cruza cada bloque contra los índices (hash join), sin consultar la API
+   por cada fila
+3. Aplica el diff en lote:
+   - Reservas sin evento: se re-enlazan a un evento huérfano del mismo
+     intervalo si existe; si no, se crea el evento (batch de la API)
+   - Eventos huérfanos creados por la aplicación: se eliminan (batch de la API)
+
+Los eventos que no fueron creados por la aplicación (ej: bloqueos cargados a
+mano por la administración) nunca se eliminan.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.google_calendar import ESPACIOS_COMUNES
+from app.models.models import EspacioComun, Reserva, Usuario
+from app.services.google_calendar_service import ORIGEN_EVENTOS, ZONA_HORARIA, GoogleCalendarManager
+from app.services.ical import feeds
+
+# Intervalo (inicio, fin) sin zona horaria, igual que se leen desde MySQL
+Intervalo = Tuple[datetime, datetime]
+
+
+def _fecha_evento(valor: Dict) -> Optional[datetime]:
+    """Convierte start/end de un evento a datetime naive en hora local"""
+    texto = valor.get("dateTime")
+    if not texto:
+        # Eventos de día completo: no corresponden a reservas
+        return None
+    # Las reservas se guardan en hora local: se convierte a America/Santiago
+    # antes de quitar la zona, sea cual sea el offset con que venga el evento
+    fecha = datetime.fromisoformat(texto.replace("Z", "+00:00"))
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(ZoneInfo(ZONA_HORARIA)).replace(tzinfo=None)
+    return fecha
+
+
+def _sin_tz(valor: datetime) -> datetime:
+    return valor.replace(tzinfo=None) if valor.tzinfo is not None else valor
+
+
+def _es_evento_de_la_app(evento: Dict) -> bool:
+    """
+    Indica si un evento fue creado por la aplicación.
+
+    Los eventos nuevos llevan la marca en extendedProperties; los creados
+    antes de la marca se reconocen por el título "Reserva - ...".
+    """
+    privadas = evento.get("extendedProperties", {}).get("private", {})
+    if privadas.get("origen") == ORIGEN_EVENTOS:
+        return True
+    return (evento.get("summary") or "").startswith("Reserva - ")
+
+
+class _IndiceCalendario:
+    """Eventos de un calendario indexados por ID y por intervalo"""
+
+    def __init__(self, eventos: List[Dict], ventana: Intervalo):
+        self.ventana = ventana
+        self.por_id: Dict[str, Dict] = {}
+        self.por_intervalo: Dict[Intervalo, List[str]] = {}
+        # Eventos de la app que caen completos dentro de la ventana
+        self.dentro_de_ventana: set = set()
+        for evento in eventos:
+            if evento.get("status") == "cancelled":
+                continue
+            self.por_id[evento["id"]] = evento
+            inicio = _fecha_evento(evento.get("start", {}))
+            fin = _fecha_evento(evento.get("end", {}))
+            if inicio is not None and fin is not None and _es_evento_de_la_app(evento):
+                self.por_intervalo.setdefault((inicio, fin), []).append(evento["id"])
+                if ventana[0] <= inicio and fin <= ventana[1]:
+                    self.dentro_de_ventana.add(evento["id"])
+        # Eventos que ya tienen reserva asociada (se completa durante el recorrido)
+        self.referenciados: set = set()
+
+    def tomar_huerfano(self, intervalo: Intervalo) -> Optional[str]:
+        """Retorna un evento de la app en ese intervalo que aún no tenga reserva"""
+        for event_id in self.por_intervalo.get(intervalo, []):
+            if event_id not in self.referenciados:
+                self.referenciados.add(event_id)
+                return event_id
+        return None
+
+    def huerfanos(self) -> List[str]:
+        """
+        Eventos creados por la app que ninguna reserva referencia.
+
+        Solo se consideran los eventos contenidos en la ventana: uno que la
+        cruza puede pertenecer a una reserva que la consulta no alcanzó a leer
+        """
+        return [
+            event_id for event_id in self.por_id
+            if event_id not in self.referenciados and event_id in self.dentro_de_ventana
+        ]
+
+
+def reconciliar_calendarios(
+    db: Session,
+    calendar_manager: GoogleCalendarManager,
+    fecha_inicio: Optional[datetime] = None,
+    fecha_fin: Optional[datetime] = None,
+    tamano_lote: Optional[int] = None,
+    aplicar: bool = True,
+) -> Dict:
+    """
+    Reconcilia las reservas de un rango con los eventos de Google Calendar.
+
+    Args:
+        db: Sesión de base de datos
+        calendar_manager: Cliente de Google Calendar
+        fecha_inicio: Inicio del rango (por defecto, hoy a las 00:00)
+        fecha_fin: Fin del rango (por defecto, RECONCILIACION_DIAS días después)
+        tamano_lote: Reservas leídas por consulta (por defecto, RECONCILIACION_TAMANO_LOTE)
+        aplicar: Si es False solo calcula el diff (dry run)
+
+    Returns:
+        Diccionario con los conteos de cada acción y los tiempos de cada fase
+        en milisegundos
+    """
+    inicio_job = time.perf_counter()
+    if fecha_inicio is None:
+        fecha_inicio = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if fecha_fin is None:
+        fecha_fin = fecha_inicio + timedelta(days=settings.RECONCILIACION_DIAS)
+    fecha_inicio, fecha_fin = _sin_tz(fecha_inicio), _sin_tz(fecha_fin)
+    tamano_lote = tamano_lote or settings.RECONCILIACION_TAMANO_LOTE
+
+    # Espacios de la BD que tienen calendario configurado
+    nombres = {info["nombre"].lower(): clave for clave, info in ESPACIOS_COMUNES.items()}
+    clave_por_espacio_id: Dict[int, str] = {}
+    for espacio in db.query(EspacioComun.id, EspacioComun.nombre).all():
+        clave = nombres.get((espacio.nombre or "").lower())
+        if clave:
+            clave_por_espacio_id[espacio.id] = clave
+
+    # Fase 1: cache local de eventos (un batch para todos los calendarios)
+    t0 = time.perf_counter()
+    eventos = calendar_manager.listar_eventos_multiples(
+        sorted(set(clave_por_espacio_id.values())), fecha_inicio, fecha_fin
+    )
+    indices = {
+        clave: _IndiceCalendario(items, (fecha_inicio, fecha_fin))
+        for clave, items in eventos.items()
+    }
+    ms_calendarios = (time.perf_counter() - t0) * 1000
+    # Un calendario cuya lectura falló se omite: sin su lista de eventos no se
+    # puede distinguir un evento faltante de uno no leído
+    omitidos = sorted(set(clave_por_espacio_id.values()) - set(indices))
+
+    # Fase 2: recorrer las reservas por bloques y cruzarlas con la cache
+    t0 = time.perf_counter()
+    revisadas = 0
+    sincronizadas = 0
+    reenlaces: List[Dict] = []
+    # espacio -> reservas que necesitan un evento nuevo
+    faltantes: Dict[str, List] = {}
+    ultimo_id = 0
+    while True:
+        bloque = db.query(
+            Reserva.id,
+            Reserva.espacio_comun_id,
+            Reserva.usuario_id,
+            Reserva.fecha_hora_inicio,
+            Reserva.fecha_hora_fin,
+            Reserva.google_event_id,
+            Usuario.nombre_completo,
+            Usuario.email,
+        ).join(
+            Usuario, Usuario.id == Reserva.usuario_id
+        ).filter(
+            Reserva.id > ultimo_id,
+            Reserva.espacio_comun_id.in_(list(clave_por_espacio_id)),
+            Reserva.fecha_hora_inicio < fecha_fin,
+            Reserva.fecha_hora_fin > fecha_inicio,
+        ).order_by(Reserva.id.asc()).limit(tamano_lote).all()
+        if not bloque:
+            break
+        ultimo_id = bloque[-1].id
+
+        for reserva in bloque:
+            indice = indices.get(clave_por_espacio_id[reserva.espacio_comun_id])
+            if indice is None:
+                continue
+            revisadas += 1
+            if reserva.google_event_id and reserva.google_event_id in indice.por_id:
+                indice.referenciados.add(reserva.google_event_id)
+                sincronizadas += 1
+                continue
+            intervalo = (_sin_tz(reserva.fecha_hora_inicio), _sin_tz(reserva.fecha_hora_fin))
+            event_id = indice.tomar_huerfano(intervalo)
+            if event_id is not None:
+                reenlaces.append({"id": reserva.id, "google_event_id": event_id})
+            else:
+                faltantes.setdefault(clave_por_espacio_id[reserva.espacio_comun_id], []).append(reserva)
+
+    huerfanos = [
+        (clave, event_id)
+        for clave, indice in indices.items()
+        for event_id in indice.huerfanos()
+    ]
+    ms_diff = (time.perf_counter() - t0) * 1000
+
+    # Fase 3: aplicar el diff en lote
+    t0 = time.perf_counter()
+    creados = 0
+    fallidos = 0
+    eliminados = 0
+    if aplicar:
+        actualizaciones = list(reenlaces)
+        for clave, reservas in faltantes.items():
+            nombre = ESPACIOS_COMUNES[clave]["nombre"]
+            resultados = calendar_manager.crear_eventos_lote(
+                clave,
+                f"Reserva - {nombre}",
+                "",
+                [(_sin_tz(r.fecha_hora_inicio), _sin_tz(r.fecha_hora_fin)) for r in reservas],
+                descripciones=[f"Reserva del usuario {r.nombre_completo} ({r.email})" for r in reservas],
+            )
+            for reserva, evento in zip(reservas, resultados):
+                if evento and "id" in evento:
+                    actualizaciones.append({"id": reserva.id, "google_event_id": evento["id"]})
+                    creados += 1
+                else:
+                    fallidos += 1
+
+        if actualizaciones:
+            # UPDATE por clave primaria en lote (executemany)
+            db.execute(update(Reserva), actualizaciones)
+            db.commit()
+
+        if huerfanos:
+            eliminados = len(calendar_manager.eliminar_eventos_multiples(huerfanos))
+
+        for clave in set(faltantes) | {clave for clave, _ in huerfanos}:
+            for espacio_id, clave_espacio in clave_por_espacio_id.items():
+                if clave_espacio == clave:
+                    feeds.invalidar(espacio_comun_id=espacio_id)
+    ms_escritura = (time.perf_counter() - t0) * 1000
+
+    return {
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "aplicado": aplicar,
+        "calendarios_omitidos": omitidos,
+        "eventos_revisados": sum(len(indice.por_id) for indice in indices.values()),
+        "reservas_revisadas": revisadas,
+        "reservas_sincronizadas": sincronizadas,
+        "reservas_reenlazadas": len(reenlaces),
+        "eventos_faltantes": sum(len(reservas) for reservas in faltantes.values()),
+        "eventos_creados": creados,
+        "eventos_fallidos": fallidos,
+        "eventos_huerfanos": len(huerfanos),
+        "eventos_eliminados": eliminados,
+        "duracion_ms": {
+            "lectura_calendarios": round(ms_calendarios, 1),
+            "diff": round(ms_diff, 1),
+            "escritura": round(ms_escritura, 1),
+            "total": round((time.perf_counter() - inicio_job) * 1000, 1),
+        },
+    }
+
+
+if __name__ == "__main__":
+    # Ejecución manual o desde cron: python -m app.services.reconciliacion
+    import json
+
+    from app.db.session import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        resumen = reconciliar_calendarios(sesion, GoogleCalendarManager())
+        print(json.dumps(resumen, default=str, indent=2, ensure_ascii=False))
+    finally:
+        sesion.close()
@@ -0,0 +1,136 @@
+"""
+Expansión de reglas de recurrencia para reservas periódicas.
+
+Este módulo implementa un subconjunto de RRULE (RFC 5545) suficiente para
+las reservas de clubes y de la administración:
+- FREQ: semanal o mensual
+- INTERVAL: cada cuántas semanas/meses se repite
+- COUNT / UNTIL: cantidad de ocurrencias o fecha límite
+- BYDAY: días de la semana (solo para frecuencia semanal)
+
+La expansión es puramente en memoria y no consulta la base de datos.
+"""
+import calendar
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+# Límite duro de ocurrencias por serie (dos años de reservas semanales)
+MAX_OCURRENCIAS = 104
+
+FRECUENCIAS_VALIDAS = {"semanal", "mensual"}
+
+
+def _sumar_meses(fecha: datetime, meses: int) -> Optional[datetime]:
+    """
+    Suma meses a una fecha manteniendo el día del mes.
+
+    Igual que RRULE, si el mes destino no tiene ese día (ej: 31 de abril)
+    la ocurrencia se omite en lugar de moverse al último día del mes.
+
+    Returns:
+        La nueva fecha o None si el día no existe en el mes destino
+    """
+    total = fecha.month - 1 + meses
+    ano = fecha.year + total // 12
+    mes = total % 12 + 1
+    if fecha.day > calendar.monthrange(ano, mes)[1]:
+        return None
+    return fecha.replace(year=ano, month=mes)
+
+
+def expandir_ocurrencias(
+    fecha_hora_inicio: datetime,
+    fecha_hora_fin: datetime,
+    frecuencia: str,
+    intervalo: int = 1,
+    repeticiones: Optional[int] = None,
+    hasta: Optional[date] = None,
+    dias_semana: Optional[Sequence[int]] = None,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Expande una regla de recurrencia en la lista de intervalos (inicio, fin).
+
+    Todas las ocurrencias conservan la hora y duración de fecha_hora_inicio/fin,
+    y ninguna comienza antes de fecha_hora_inicio. Con frecuencia mensual, o
+    semanal sin dias_semana, la primera ocurrencia es fecha_hora_inicio. Si
+    dias_semana no incluye su día de la semana, como en RRULE, la serie
+    comienza en el primer día indicado posterior a fecha_hora_inicio.
+
+    Args:
+        fecha_hora_inicio: Inicio de la serie (fecha y hora de las ocurrencias)
+        fecha_hora_fin: Fin de la ocurrencia que comienza en fecha_hora_inicio
+        frecuencia: "semanal" o "mensual"
+        intervalo: Cada cuántas semanas/meses se repite (>= 1)
+        repeticiones: Cantidad total de ocurrencias (COUNT)
+        hasta: Última fecha en que puede comenzar una ocurrencia (UNTIL)
+        dias_semana: Días de la semana (0=lunes ... 6=domingo), solo semanal
+
+    Returns:
+        Lista ordenada de tuplas (inicio, fin)
+
+    Raises:
+        ValueError: Si la regla es inválida o excede MAX_OCURRENCIAS
+    """
+    if frecuencia not in FRECUENCIAS_VALIDAS:
+        raise ValueError(f"Frecuencia '{frecuencia}' no válida. Use: semanal, mensual")
+    if intervalo < 1:
+        raise ValueError("El intervalo debe ser mayor o igual a 1")
+    if repeticiones is None and hasta is None:
+        raise ValueError("Debe indicar 'repeticiones' o 'hasta' para acotar la serie")
+    if fecha_hora_fin <= fecha_hora_inicio:
+        raise ValueError("La hora de fin debe ser posterior a la hora de inicio")
+    if dias_semana and frecuencia != "semanal":
+        raise ValueError("'dias_semana' solo aplica a la frecuencia semanal")
+
+    duracion = fecha_hora_fin - fecha_hora_inicio
+    limite = repeticiones if repeticiones is not None else MAX_OCURRENCIAS + 1
+    ocurrencias: List[Tuple[datetime, datetime]] = []
+
+    def _agregar(inicio: datetime) -> bool:
+        """Agrega una ocurrencia; retorna False cuando la serie terminó."""
+        if hasta is not None and inicio.date() > hasta:
+            return False
+        if len(ocurrencias) >= limite:
+            return False
+        ocurrencias.append((inicio, inicio + duracion))
+        return True
+
+    if frecuencia == "semanal":
+        dias = sorted(set(dias_semana)) if dias_semana else [fecha_hora_inicio.weekday()]
+        if any(d < 0 or d > 6 for d in dias):
+            raise ValueError("Los días de la semana deben estar entre 0 (lunes) y 6 (domingo)")
+        if duracion > timedelta(days=1):
+            raise ValueError("Una reserva semanal no puede durar más de un día")
+
+        # Recorrer semana a semana desde el lunes de la primera ocurrencia
+        lunes = fecha_hora_inicio - timedelta(days=fecha_hora_inicio.weekday())
+        semana = 0
+        continuar = True
+        while continuar:
+            for dia in dias:
+                inicio = lunes + timedelta(weeks=semana, days=dia)
+                if inicio < fecha_hora_inicio:
+                    continue
+                if not _agregar(inicio):
+                    continuar = False
+                    break
+            semana += intervalo
+            if len(ocurrencias) > MAX_OCURRENCIAS:
+                break
+    else:
+        paso = 0
+        # Protección contra series que nunca caen en un día válido
+        while paso <= (MAX_OCURRENCIAS + 1) * 12 * intervalo:
+            inicio = _sumar_meses(fecha_hora_inicio, paso)
+            paso += intervalo
+            if inicio is None:
+                continue
+            if not _agregar(inicio):
+                break
+            if len(ocurrencias) > MAX_OCURRENCIAS:
+                break
+
+    if len(ocurrencias) > MAX_OCURRENCIAS:
+        raise ValueError(f"La serie excede el máximo de {MAX_OCURRENCIAS} ocurrencias")
+
+    return ocurrencias
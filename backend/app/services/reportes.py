@@ -0,0 +1,353 @@
+"""
+Reportes analíticos servidos desde un motor columnar embebido (DuckDB).
+
+Los reportes no consultan MySQL: se calculan con DuckDB sobre los snapshots
+Parquet de pagos, gastos_comunes y reservas (ver app.services.snapshots). Los
+agregados pesados (ventanas, GROUP BY de años de historia) corren así fuera
+de la BD transaccional y no compiten con las reservas y los pagos.
+
+- Cada consulta abre una conexión DuckDB en memoria (es barata) con vistas
+  sobre los archivos Parquet, por lo que es segura entre hilos y siempre lee
+  la última versión escrita de cada partición
+- El snapshot se refresca de forma incremental cuando es más antiguo que
+  REPORTES_ANTIGUEDAD_MAXIMA_MINUTOS (solo se reescriben las particiones que
+  cambiaron)
+
+duckdb es una dependencia opcional: sin ella solo los reportes responden 503.
+"""
+import glob
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.snapshots import (
+    PYARROW_DISPONIBLE,
+    esquema_particionado,
+    leer_manifiesto,
+    ruta_tabla,
+)
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = PYARROW_DISPONIBLE
+except ImportError:
+    duckdb = None
+    DUCKDB_DISPONIBLE = False
+
+# Tablas del snapshot que usan los reportes
+TABLAS_REPORTES = ("pagos", "gastos_comunes", "reservas")
+
+
+def antiguedad_snapshot() -> Optional[timedelta]:
+    """
+    Antigüedad del snapshot más viejo de las tablas de reportes.
+
+    Returns:
+        timedelta desde la última generación o None si falta alguna tabla
+    """
+    generados = []
+    for nombre in TABLAS_REPORTES:
+        generado_en = leer_manifiesto(nombre).get("generado_en")
+        if not generado_en:
+            return None
+        generados.append(datetime.fromisoformat(generado_en))
+    return datetime.now() - min(generados)
+
+
+def snapshot_vigente() -> bool:
+    """Indica si el snapshot existe y no supera la antigüedad máxima configurada"""
+    antiguedad = antiguedad_snapshot()
+    return antiguedad is not None and antiguedad <= timedelta(
+        minutes=settings.REPORTES_ANTIGUEDAD_MAXIMA_MINUTOS
+    )
+
+
+def _conectar():
+    """Conexión DuckDB en memoria con una vista por tabla del snapshot"""
+    conexion = duckdb.connect(":memory:")
+    for nombre in TABLAS_REPORTES:
+        patron = os.path.join(ruta_tabla(nombre), "*", "*", "*.parquet")
+        if glob.glob(patron):
+            ruta = patron.replace("'", "''")
+            conexion.execute(
+                f"CREATE VIEW {nombre} AS SELECT * FROM read_parquet('{ruta}', hive_partitioning = true)"
+            )
+        else:
+            # Tabla sin filas todavía: vista vacía con el mismo esquema
+            conexion.register(nombre, esquema_particionado(nombre).empty_table())
+    return conexion
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _consultar(sql: str, parametros: List[Any]) -> List[Dict[str, Any]]:
+    conexion = _conectar()
+    try:
+        cursor = conexion.execute(sql, parametros)
+        columnas = [descripcion[0] for descripcion in cursor.description]
+        return [
+            {columna: _valor_json(valor) for columna, valor in zip(columnas, fila)}
+            for fila in cursor.fetchall()
+        ]
+    finally:
+        conexion.close()
+
+
+def _filtros(
+    condominio_id: Optional[int],
+    ano: Optional[int] = None,
+) -> Tuple[str, List[Any]]:
+    """Cláusula WHERE sobre las columnas de partición (DuckDB poda los archivos)"""
+    condiciones = ["TRUE"]
+    parametros: List[Any] = []
+    if condominio_id is not None:
+        condiciones.append("condominio_id = ?")
+        parametros.append(condominio_id)
+    if ano is not None:
+        condiciones.append("ano = ?")
+        parametros.append(ano)
+    return " AND ".join(condiciones), parametros
+
+
+def recaudacion_mensual(condominio_id: Optional[int] = None, ano: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Monto emitido y recaudado por período de gasto común.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año del período
+
+    Returns:
+        Filas (ano, mes, gastos_emitidos, emitido, recaudado, gastos_con_pago,
+        porcentaje_recaudado) ordenadas por período
+    """
+    where, parametros = _filtros(condominio_id, ano)
+    where_pagos, parametros_pagos = _filtros(condominio_id)
+    return _consultar(
+        f"""
+        WITH gastos AS (
+            SELECT id, ano, mes, monto_total FROM gastos_comunes WHERE {where}
+        ),
+        pagado AS (
+            SELECT gasto_comun_id, SUM(monto_pagado) AS monto
+            FROM pagos WHERE {where_pagos}
+            GROUP BY gasto_comun_id
+        )
+        SELECT
+            g.ano,
+            g.mes,
+            COUNT(*) AS gastos_emitidos,
+            SUM(g.monto_total) AS emitido,
+            COALESCE(SUM(p.monto), 0) AS recaudado,
+            COUNT(p.gasto_comun_id) AS gastos_con_pago,
+            ROUND(100 * COALESCE(SUM(p.monto), 0) / NULLIF(SUM(g.monto_total), 0), 1) AS porcentaje_recaudado
+        FROM gastos g
+        LEFT JOIN pagado p ON p.gasto_comun_id = g.id
+        GROUP BY g.ano, g.mes
+        ORDER BY g.ano, g.mes
+        """,
+        parametros + parametros_pagos,
+    )
+
+
+def _cortes_mensuales(meses: int, hoy: date) -> List[date]:
+    """
+    Fecha de corte (exclusiva) de cada uno de los últimos `meses` meses: el
+    primer día del mes siguiente, o mañana para el mes en curso.
+    """
+    cortes = [hoy + timedelta(days=1)]
+    ano, mes = hoy.year, hoy.month
+    for _ in range(meses - 1):
+        cortes.append(date(ano, mes, 1))
+        ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+    cortes.reverse()
+    return cortes
+
+
+def tendencia_morosidad(condominio_id: Optional[int] = None, meses: int = 12) -> List[Dict[str, Any]]:
+    """
+    Evolución de la deuda vencida al cierre de cada mes.
+
+    Un gasto común está moroso al corte si venció antes del corte y lo pagado
+    hasta esa fecha no cubre su monto. Los gastos marcados como pagados sin
+    pagos registrados se consideran pagados desde su última modificación.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        meses: Cantidad de meses hacia atrás (incluye el mes en curso)
+
+    Returns:
+        Filas (corte, monto_moroso, gastos_morosos, viviendas_morosas) en orden
+        cronológico; corte es el último día incluido
+    """
+    hoy = date.today()
+    cortes = _cortes_mensuales(meses, hoy)
+    where, parametros = _filtros(condominio_id)
+    filas = _consultar(
+        f"""
+        WITH cortes AS (
+            SELECT UNNEST(?::DATE[]) AS corte
+        ),
+        gastos AS (
+            SELECT id, vivienda_id, monto_total, vencimiento, estado, updated_at
+            FROM gastos_comunes
+            WHERE {where} AND vencimiento IS NOT NULL
+        ),
+        saldos AS (
+            SELECT
+                c.corte,
+                g.vivienda_id,
+                CASE
+                    WHEN g.estado = 'pagado' AND g.updated_at < c.corte THEN 0
+                    ELSE GREATEST(
+                        g.monto_total - COALESCE(SUM(p.monto_pagado) FILTER (WHERE p.fecha_pago < c.corte), 0),
+                        0
+                    )
+                END AS saldo
+            FROM cortes c
+            JOIN gastos g ON g.vencimiento < c.corte
+            LEFT JOIN pagos p ON p.gasto_comun_id = g.id
+            GROUP BY c.corte, g.id, g.vivienda_id, g.monto_total, g.estado, g.updated_at
+        )
+        SELECT
+            corte,
+            SUM(saldo) AS monto_moroso,
+            COUNT(*) FILTER (WHERE saldo > 0) AS gastos_morosos,
+            COUNT(DISTINCT vivienda_id) FILTER (WHERE saldo > 0) AS viviendas_morosas
+        FROM saldos
+        GROUP BY corte
+        """,
+        [cortes] + parametros,
+    )
+    por_corte = {fila["corte"]: fila for fila in filas}
+    return [
+        {
+            "corte": corte - timedelta(days=1),
+            "monto_moroso": por_corte.get(corte, {}).get("monto_moroso", 0.0),
+            "gastos_morosos": por_corte.get(corte, {}).get("gastos_morosos", 0),
+            "viviendas_morosas": por_corte.get(corte, {}).get("viviendas_morosas", 0),
+        }
+        for corte in cortes
+    ]
+
+
+def ingresos_reservas(condominio_id: Optional[int] = None, ano: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Reservas e ingresos por mes y espacio común.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año de la reserva
+
+    Returns:
+        Filas (ano, mes, espacio, reservas, horas_reservadas, monto_pagado,
+        monto_pendiente) ordenadas por mes y espacio
+    """
+    where, parametros = _filtros(condominio_id, ano)
+    return _consultar(
+        f"""
+        SELECT
+            YEAR(fecha_hora_inicio) AS ano,
+            MONTH(fecha_hora_inicio) AS mes,
+            espacio,
+            COUNT(*) AS reservas,
+            ROUND(SUM(EPOCH(fecha_hora_fin - fecha_hora_inicio)) / 3600, 1) AS horas_reservadas,
+            COALESCE(SUM(monto_pago) FILTER (WHERE estado_pago = 'pagado'), 0) AS monto_pagado,
+            COALESCE(SUM(monto_pago) FILTER (WHERE estado_pago <> 'pagado'), 0) AS monto_pendiente
+        FROM reservas
+        WHERE {where}
+        GROUP BY ALL
+        ORDER BY ano, mes, espacio
+        """,
+        parametros,
+    )
+
+
+def puntualidad_viviendas(condominio_id: Optional[int] = None, ano: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Puntualidad de pago de cada vivienda.
+
+    Un gasto se considera pagado en la fecha del pago que completa su monto
+    (suma acumulada de sus pagos). Solo se evalúan gastos ya vencidos o ya
+    pagados; los marcados como pagados sin pagos registrados no cuentan para
+    el porcentaje.
+
+    Args:
+        condominio_id: Filtrar por condominio
+        ano: Filtrar por año del período del gasto
+
+    Returns:
+        Filas por vivienda (gastos, a_tiempo, atrasados, impagos,
+        promedio_dias_atraso, porcentaje_puntualidad) de menor a mayor
+        puntualidad
+    """
+    where, parametros = _filtros(condominio_id, ano)
+    where_pagos, parametros_pagos = _filtros(condominio_id)
+    return _consultar(
+        f"""
+        WITH gastos AS (
+            SELECT id, vivienda_id, numero_vivienda, monto_total, vencimiento, estado
+            FROM gastos_comunes
+            WHERE {where} AND vencimiento IS NOT NULL
+        ),
+        acumulado AS (
+            SELECT
+                gasto_comun_id,
+                fecha_pago,
+                SUM(monto_pagado) OVER (
+                    PARTITION BY gasto_comun_id ORDER BY fecha_pago, id
+                    ROWS UNBOUNDED PRECEDING
+                ) AS acumulado
+            FROM pagos
+            WHERE {where_pagos}
+        ),
+        pagado_en AS (
+            SELECT a.gasto_comun_id, MIN(a.fecha_pago)::DATE AS fecha
+            FROM acumulado a
+            JOIN gastos g ON g.id = a.gasto_comun_id
+            WHERE a.acumulado >= g.monto_total
+            GROUP BY a.gasto_comun_id
+        ),
+        detalle AS (
+            SELECT
+                g.vivienda_id,
+                g.numero_vivienda,
+                CASE
+                    WHEN p.fecha IS NULL AND g.estado = 'pagado' THEN 'sin_registro'
+                    WHEN p.fecha IS NULL THEN 'impago'
+                    WHEN p.fecha <= g.vencimiento THEN 'a_tiempo'
+                    ELSE 'atrasado'
+                END AS clase,
+                CASE
+                    WHEN p.fecha IS NULL THEN NULL
+                    ELSE GREATEST(DATE_DIFF('day', g.vencimiento, p.fecha), 0)
+                END AS dias_atraso
+            FROM gastos g
+            LEFT JOIN pagado_en p ON p.gasto_comun_id = g.id
+            WHERE g.vencimiento < ? OR p.fecha IS NOT NULL
+        )
+        SELECT
+            vivienda_id,
+            ANY_VALUE(numero_vivienda) AS numero_vivienda,
+            COUNT(*) FILTER (WHERE clase <> 'sin_registro') AS gastos,
+            COUNT(*) FILTER (WHERE clase = 'a_tiempo') AS a_tiempo,
+            COUNT(*) FILTER (WHERE clase = 'atrasado') AS atrasados,
+            COUNT(*) FILTER (WHERE clase = 'impago') AS impagos,
+            ROUND(AVG(dias_atraso) FILTER (WHERE clase = 'atrasado'), 1) AS promedio_dias_atraso,
+            ROUND(
+                100.0 * COUNT(*) FILTER (WHERE clase = 'a_tiempo')
+                / NULLIF(COUNT(*) FILTER (WHERE clase <> 'sin_registro'), 0),
+                1
+            ) AS porcentaje_puntualidad
+        FROM detalle
+        GROUP BY vivienda_id
+        ORDER BY porcentaje_puntualidad NULLS LAST, vivienda_id
+        """,
+        parametros + parametros_pagos + [date.today()],
+    )
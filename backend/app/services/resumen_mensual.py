@@ -0,0 +1,608 @@
+"""
+Mantenimiento incremental de la tabla resumen_mensual.
+
+Cada escritura de gastos comunes, pagos o multas actualiza el resumen del
+(condominio, ano, mes) afectado en la misma transacción, con hooks de
+SQLAlchemy:
+
+- after_flush (escrituras vía ORM): las filas nuevas y los cambios de montos
+  y estados se aplican como deltas (UPDATE ... SET col = col + delta), sin
+  leer las tablas transaccionales. Los cambios que mueven filas entre
+  períodos o que pueden atrasar el vencimiento (eliminaciones, cambios de
+  vivienda/mes/año/vencimiento) recalculan solo los períodos involucrados
+- do_orm_execute (INSERT/UPDATE/DELETE masivos): los INSERT con valores se
+  aplican como deltas; en el resto se identifican los períodos afectados
+  antes y después de la sentencia y se recalculan en bloque
+
+Los períodos se recalculan con agregados acotados al período y un upsert
+(INSERT ... ON DUPLICATE KEY UPDATE): dos transacciones que escriben por
+primera vez en el mismo período no chocan con la restricción única ni se
+bloquean entre sí como con DELETE + INSERT. Un delta sobre un período que
+aún no existe lo recalcula. reconstruir_resumen() recalcula todo y sirve
+para el backfill inicial o para corregir deriva:
+
+    python -m app.services.resumen_mensual [condominio_id]
+
+Notas:
+- Las sentencias SQL escritas a mano (text()) o vía Core no pasan por los
+  hooks; después de usarlas hay que reconstruir el resumen
+"""
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, event, extract, func, inspect, insert, literal_column, select, tuple_, union, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.models import ESTADOS_GASTO_IMPAGO, GastoComun, Multa, Pago, ResumenMensual, Vivienda
+
+# (condominio_id, ano, mes)
+Clave = Tuple[int, int, int]
+
+TABLA = ResumenMensual.__table__
+
+METRICAS = (
+    "gastos_emitidos",
+    "monto_emitido",
+    "gastos_pendientes",
+    "monto_pendiente",
+    "pagos",
+    "monto_recaudado",
+    "multas",
+    "monto_multas",
+)
+
+# Atributos que determinan el período (o el vencimiento) de cada modelo: si
+# cambian, los períodos involucrados se recalculan en lugar de usar deltas
+ATRIBUTOS_PERIODO = {
+    GastoComun: ("vivienda_id", "mes", "ano", "vencimiento"),
+    Pago: ("gasto_comun_id",),
+    Multa: ("vivienda_id", "fecha_aplicada"),
+}
+ATRIBUTOS_MONTO = {
+    GastoComun: ("monto_total", "estado"),
+    Pago: ("monto_pagado",),
+    Multa: ("monto",),
+}
+
+TAMANO_LOTE_CLAVES = 500
+
+
+def _decimal(valor: Any) -> Decimal:
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor or 0))
+
+
+def _contribucion(modelo, valores: Dict[str, Any]) -> Dict[str, Decimal]:
+    """Aporte de una fila a las métricas de su período"""
+    if modelo is GastoComun:
+        monto = _decimal(valores.get("monto_total"))
+        pendiente = valores.get("estado", "pendiente") in ESTADOS_GASTO_IMPAGO
+        return {
+            "gastos_emitidos": Decimal(1),
+            "monto_emitido": monto,
+            "gastos_pendientes": Decimal(1 if pendiente else 0),
+            "monto_pendiente": monto if pendiente else Decimal(0),
+        }
+    if modelo is Pago:
+        return {"pagos": Decimal(1), "monto_recaudado": _decimal(valores.get("monto_pagado"))}
+    return {"multas": Decimal(1), "monto_multas": _decimal(valores.get("monto"))}
+
+
+def _lotes(valores: Iterable[Any]) -> Iterable[List[Any]]:
+    valores = list(valores)
+    for inicio in range(0, len(valores), TAMANO_LOTE_CLAVES):
+        yield valores[inicio:inicio + TAMANO_LOTE_CLAVES]
+
+
+# ============================================================================
+# Resolución de períodos
+# ============================================================================
+
+def _condominios(conexion: Connection, vivienda_ids: Set[int]) -> Dict[int, int]:
+    resultado = {}
+    for lote in _lotes(vivienda_ids):
+        for fila in conexion.execute(
+            select(Vivienda.id, Vivienda.condominio_id).where(Vivienda.id.in_(lote))
+        ):
+            resultado[fila[0]] = fila[1]
+    return resultado
+
+
+def _periodos_gastos(conexion: Connection, gasto_ids: Set[int]) -> Dict[int, Clave]:
+    resultado = {}
+    for lote in _lotes(gasto_ids):
+        for fila in conexion.execute(
+            select(GastoComun.id, Vivienda.condominio_id, GastoComun.ano, GastoComun.mes)
+            .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+            .where(GastoComun.id.in_(lote))
+        ):
+            resultado[fila[0]] = (fila[1], fila[2], fila[3])
+    return resultado
+
+
+def _claves_de_valores(conexion: Connection, modelo, filas: List[Dict[str, Any]]) -> List[Optional[Clave]]:
+    """Período de cada fila a partir de sus valores (None si no se puede determinar)"""
+    if modelo is Pago:
+        periodos = _periodos_gastos(
+            conexion, {fila["gasto_comun_id"] for fila in filas if fila.get("gasto_comun_id")}
+        )
+        return [periodos.get(fila.get("gasto_comun_id")) for fila in filas]
+
+    condominios = _condominios(
+        conexion, {fila["vivienda_id"] for fila in filas if fila.get("vivienda_id")}
+    )
+    claves = []
+    for fila in filas:
+        condominio_id = condominios.get(fila.get("vivienda_id"))
+        if modelo is GastoComun:
+            ano, mes = fila.get("ano"), fila.get("mes")
+        else:
+            fecha = fila.get("fecha_aplicada")
+            ano, mes = (fecha.year, fecha.month) if isinstance(fecha, date) else (None, None)
+        claves.append((condominio_id, ano, mes) if None not in (condominio_id, ano, mes) else None)
+    return claves
+
+
+def _claves_de_ids(conexion: Connection, modelo, ids: Set[int]) -> Set[Clave]:
+    """Períodos de las filas indicadas según su estado actual en la BD"""
+    if modelo is GastoComun:
+        columnas = (Vivienda.condominio_id, GastoComun.ano, GastoComun.mes)
+        base = select(*columnas).join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+    elif modelo is Pago:
+        columnas = (Vivienda.condominio_id, GastoComun.ano, GastoComun.mes)
+        base = (
+            select(*columnas)
+            .select_from(Pago)
+            .join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+            .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+        )
+    else:
+        columnas = (
+            Vivienda.condominio_id,
+            extract("year", Multa.fecha_aplicada),
+            extract("month", Multa.fecha_aplicada),
+        )
+        base = select(*columnas).join(Vivienda, Vivienda.id == Multa.vivienda_id)
+
+    claves = set()
+    for lote in _lotes(ids):
+        for fila in conexion.execute(base.where(modelo.id.in_(lote)).distinct()):
+            claves.add((int(fila[0]), int(fila[1]), int(fila[2])))
+    return claves
+
+
+# ============================================================================
+# Recalcular y aplicar deltas
+# ============================================================================
+
+def _consulta_agregados(condominio_id: Optional[int] = None, claves: Optional[List[Clave]] = None):
+    """
+    SELECT de las filas del resumen calculadas desde las tablas transaccionales.
+
+    Args:
+        condominio_id: Limitar a un condominio
+        claves: Limitar a los períodos indicados
+    """
+    def _subconsultas():
+        ano_multa = extract("year", Multa.fecha_aplicada)
+        mes_multa = extract("month", Multa.fecha_aplicada)
+        pendiente = GastoComun.estado.in_(ESTADOS_GASTO_IMPAGO)
+
+        gastos = (
+            select(
+                Vivienda.condominio_id.label("condominio_id"),
+                GastoComun.ano.label("ano"),
+                GastoComun.mes.label("mes"),
+                func.count(GastoComun.id).label("gastos_emitidos"),
+                func.sum(GastoComun.monto_total).label("monto_emitido"),
+                func.sum(case((pendiente, 1), else_=0)).label("gastos_pendientes"),
+                func.sum(case((pendiente, GastoComun.monto_total), else_=0)).label("monto_pendiente"),
+                func.min(GastoComun.vencimiento).label("vencimiento"),
+            )
+            .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+            .group_by(Vivienda.condominio_id, GastoComun.ano, GastoComun.mes)
+        )
+        pagos = (
+            select(
+                Vivienda.condominio_id.label("condominio_id"),
+                GastoComun.ano.label("ano"),
+                GastoComun.mes.label("mes"),
+                func.count(Pago.id).label("pagos"),
+                func.sum(Pago.monto_pagado).label("monto_recaudado"),
+            )
+            .select_from(Pago)
+            .join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+            .join(Vivienda, Vivienda.id == GastoComun.vivienda_id)
+            .group_by(Vivienda.condominio_id, GastoComun.ano, GastoComun.mes)
+        )
+        multas = (
+            select(
+                Vivienda.condominio_id.label("condominio_id"),
+                ano_multa.label("ano"),
+                mes_multa.label("mes"),
+                func.count(Multa.id).label("multas"),
+                func.sum(Multa.monto).label("monto_multas"),
+            )
+            .join(Vivienda, Vivienda.id == Multa.vivienda_id)
+            .group_by(Vivienda.condominio_id, ano_multa, mes_multa)
+        )
+
+        if condominio_id is not None:
+            gastos = gastos.where(Vivienda.condominio_id == condominio_id)
+            pagos = pagos.where(Vivienda.condominio_id == condominio_id)
+            multas = multas.where(Vivienda.condominio_id == condominio_id)
+        if claves is not None:
+            gastos = gastos.where(tuple_(Vivienda.condominio_id, GastoComun.ano, GastoComun.mes).in_(claves))
+            pagos = pagos.where(tuple_(Vivienda.condominio_id, GastoComun.ano, GastoComun.mes).in_(claves))
+            multas = multas.where(tuple_(Vivienda.condominio_id, ano_multa, mes_multa).in_(claves))
+        return gastos, pagos, multas
+
+    # Las subconsultas se arman dos veces (períodos y joins) para que cada
+    # una tenga sus propios parámetros del IN expandible
+    periodos = union(*(
+        select(sub.c.condominio_id, sub.c.ano, sub.c.mes)
+        for sub in (consulta.subquery() for consulta in _subconsultas())
+    )).subquery("k")
+    gastos, pagos, multas = _subconsultas()
+    gastos = gastos.subquery("g")
+    pagos = pagos.subquery("p")
+    multas = multas.subquery("m")
+
+    def _mismo_periodo(subconsulta):
+        return and_(
+            subconsulta.c.condominio_id == periodos.c.condominio_id,
+            subconsulta.c.ano == periodos.c.ano,
+            subconsulta.c.mes == periodos.c.mes,
+        )
+
+    return (
+        select(
+            periodos.c.condominio_id,
+            periodos.c.ano,
+            periodos.c.mes,
+            func.coalesce(gastos.c.gastos_emitidos, 0),
+            func.coalesce(gastos.c.monto_emitido, 0),
+            func.coalesce(gastos.c.gastos_pendientes, 0),
+            func.coalesce(gastos.c.monto_pendiente, 0),
+            gastos.c.vencimiento,
+            func.coalesce(pagos.c.pagos, 0),
+            func.coalesce(pagos.c.monto_recaudado, 0),
+            func.coalesce(multas.c.multas, 0),
+            func.coalesce(multas.c.monto_multas, 0),
+        )
+        .select_from(periodos)
+        .outerjoin(gastos, _mismo_periodo(gastos))
+        .outerjoin(pagos, _mismo_periodo(pagos))
+        .outerjoin(multas, _mismo_periodo(multas))
+    )
+
+
+COLUMNAS_INSERCION = [
+    "condominio_id", "ano", "mes",
+    "gastos_emitidos", "monto_emitido", "gastos_pendientes", "monto_pendiente", "vencimiento",
+    "pagos", "monto_recaudado", "multas", "monto_multas",
+]
+
+
+def _upsert(conexion: Connection, filas: List[Dict[str, Any]]) -> None:
+    """Inserta las filas del resumen o reemplaza las del mismo (condominio, ano, mes)"""
+    columnas = [columna for columna in COLUMNAS_INSERCION if columna not in ("condominio_id", "ano", "mes")]
+    if conexion.dialect.name == "sqlite":
+        sentencia = sqlite.insert(TABLA)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=["condominio_id", "ano", "mes"],
+            set_={**{columna: sentencia.excluded[columna] for columna in columnas}, "updated_at": func.now()},
+        )
+    else:
+        sentencia = mysql.insert(TABLA)
+        # onupdate de updated_at no aplica en ON DUPLICATE KEY UPDATE
+        sentencia = sentencia.on_duplicate_key_update(
+            {**{columna: sentencia.inserted[columna] for columna in columnas}, "updated_at": func.now()}
+        )
+    conexion.execute(sentencia, filas)
+
+
+def recalcular_periodos(conexion: Connection, claves: Iterable[Clave]) -> None:
+    """Recalcula desde las tablas transaccionales los períodos indicados"""
+    for lote in _lotes(set(claves)):
+        filas = []
+        for fila in conexion.execute(_consulta_agregados(claves=lote)):
+            valores = dict(zip(COLUMNAS_INSERCION, fila))
+            valores.update(ano=int(valores["ano"]), mes=int(valores["mes"]))
+            filas.append(valores)
+        if filas:
+            _upsert(conexion, filas)
+
+        # Períodos que quedaron sin gastos, pagos ni multas: se eliminan por
+        # ID, solo si existen
+        vacios = set(lote) - {(fila["condominio_id"], fila["ano"], fila["mes"]) for fila in filas}
+        if vacios:
+            ids = list(conexion.execute(
+                select(TABLA.c.id).where(tuple_(TABLA.c.condominio_id, TABLA.c.ano, TABLA.c.mes).in_(vacios))
+            ).scalars())
+            if ids:
+                conexion.execute(delete(TABLA).where(TABLA.c.id.in_(ids)))
+
+
+def _deltas(
+    conexion: Connection,
+    aportes: List[Tuple[Any, int, Dict[str, Any]]],
+    excluir: Set[Clave] = frozenset(),
+) -> Tuple[Dict[Clave, Dict[str, Decimal]], Dict[Clave, date]]:
+    """
+    Deltas por período de los aportes (modelo, signo, valores).
+
+    Args:
+        excluir: Períodos que se recalculan (sus aportes se ignoran)
+
+    Returns:
+        (deltas de las métricas, vencimiento mínimo de los gastos agregados)
+    """
+    deltas: Dict[Clave, Dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+    vencimientos: Dict[Clave, date] = {}
+    for modelo in ATRIBUTOS_PERIODO:
+        del_modelo = [(signo, valores) for tipo_modelo, signo, valores in aportes if tipo_modelo is modelo]
+        if not del_modelo:
+            continue
+        claves = _claves_de_valores(conexion, modelo, [valores for _, valores in del_modelo])
+        for clave, (signo, valores) in zip(claves, del_modelo):
+            # Sin período conocido (ej: pagos de un gasto eliminado en el mismo
+            # flush), el recálculo del gasto ya lo cubre
+            if clave is None or clave in excluir:
+                continue
+            for metrica, valor in _contribucion(modelo, valores).items():
+                deltas[clave][metrica] += signo * valor
+            vencimiento = valores.get("vencimiento") if modelo is GastoComun and signo > 0 else None
+            if vencimiento is not None and (clave not in vencimientos or vencimiento < vencimientos[clave]):
+                vencimientos[clave] = vencimiento
+    return deltas, vencimientos
+
+
+def _aplicar_deltas(
+    conexion: Connection,
+    deltas: Dict[Clave, Dict[str, Decimal]],
+    vencimientos: Optional[Dict[Clave, date]] = None,
+) -> Set[Clave]:
+    """
+    Suma los deltas a los períodos existentes.
+
+    Args:
+        vencimientos: Vencimiento de gastos agregados al período (el resumen
+            guarda el menor)
+
+    Returns:
+        Períodos que aún no existen en el resumen (deben recalcularse)
+    """
+    vencimientos = vencimientos or {}
+    faltantes = set()
+    for (condominio_id, ano, mes), metricas in deltas.items():
+        valores = {
+            columna: TABLA.c[columna] + delta
+            for columna, delta in metricas.items()
+            if delta
+        }
+        vencimiento = vencimientos.get((condominio_id, ano, mes))
+        if vencimiento is not None:
+            valores["vencimiento"] = case(
+                (TABLA.c.vencimiento.is_(None), vencimiento),
+                (TABLA.c.vencimiento > vencimiento, vencimiento),
+                else_=TABLA.c.vencimiento,
+            )
+        if not valores:
+            continue
+        resultado = conexion.execute(
+            update(TABLA)
+            .where(
+                TABLA.c.condominio_id == condominio_id,
+                TABLA.c.ano == ano,
+                TABLA.c.mes == mes,
+            )
+            .values(valores)
+        )
+        if resultado.rowcount == 0:
+            faltantes.add((condominio_id, ano, mes))
+    return faltantes
+
+
+# ============================================================================
+# Hooks de SQLAlchemy
+# ============================================================================
+
+def _valores(obj, atributos: Iterable[str], anteriores: bool) -> Tuple[Dict[str, Any], bool]:
+    """
+    Valores actuales o anteriores al flush de los atributos indicados.
+
+    Returns:
+        (valores, cambio): cambio indica si alguno de los atributos se modificó
+    """
+    estado = inspect(obj)
+    valores = {}
+    cambio = False
+    for nombre in atributos:
+        historial = estado.attrs[nombre].history
+        if historial.deleted or historial.added:
+            cambio = True
+        if anteriores and historial.deleted:
+            valores[nombre] = historial.deleted[0]
+        else:
+            valores[nombre] = estado.dict.get(nombre)
+    return valores, cambio
+
+
+def _sin_efecto(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history: al asignar un atributo expirado (ej: después de un commit)
+# se carga antes su valor anterior, necesario para calcular el delta
+for _modelo, _atributos in ATRIBUTOS_PERIODO.items():
+    for _nombre in _atributos + ATRIBUTOS_MONTO[_modelo]:
+        event.listen(getattr(_modelo, _nombre), "set", _sin_efecto, active_history=True, retval=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _cargar_atributos(session, flush_context, instances):
+    # Las filas modificadas o eliminadas con atributos expirados se cargan
+    # mientras existen en la BD, para conocer su período en after_flush
+    for obj in list(session.dirty) + list(session.deleted):
+        modelo = type(obj)
+        if modelo not in ATRIBUTOS_PERIODO:
+            continue
+        no_cargados = inspect(obj).unloaded
+        for nombre in ATRIBUTOS_PERIODO[modelo] + ATRIBUTOS_MONTO[modelo]:
+            if nombre in no_cargados:
+                getattr(obj, nombre)
+
+
+@event.listens_for(Session, "after_flush")
+def _actualizar_desde_flush(session, flush_context):
+    # (modelo, signo, valores) de cada aporte a sumar o restar
+    aportes: List[Tuple[Any, int, Dict[str, Any]]] = []
+    # (modelo, valores) de filas cuyos períodos deben recalcularse
+    recalculos: List[Tuple[Any, Dict[str, Any]]] = []
+
+    for coleccion, tipo in ((session.new, "nuevo"), (session.dirty, "modificado"), (session.deleted, "eliminado")):
+        for obj in coleccion:
+            modelo = type(obj)
+            if modelo not in ATRIBUTOS_PERIODO:
+                continue
+            atributos = ATRIBUTOS_PERIODO[modelo] + ATRIBUTOS_MONTO[modelo]
+
+            if tipo == "modificado":
+                anteriores, cambio_periodo = _valores(obj, ATRIBUTOS_PERIODO[modelo], anteriores=True)
+                anteriores.update(_valores(obj, ATRIBUTOS_MONTO[modelo], anteriores=True)[0])
+                actuales, cambio = _valores(obj, atributos, anteriores=False)
+                if not cambio:
+                    continue
+                if cambio_periodo:
+                    recalculos.extend([(modelo, anteriores), (modelo, actuales)])
+                else:
+                    aportes.extend([(modelo, -1, anteriores), (modelo, 1, actuales)])
+                continue
+
+            valores, _ = _valores(obj, atributos, anteriores=False)
+            if modelo is GastoComun and tipo == "eliminado":
+                # Puede atrasar el vencimiento del período: recalcular
+                recalculos.append((modelo, valores))
+            else:
+                aportes.append((modelo, 1 if tipo == "nuevo" else -1, valores))
+
+    if not aportes and not recalculos:
+        return
+
+    conexion = session.connection()
+    recalcular: Set[Clave] = set()
+    for modelo in ATRIBUTOS_PERIODO:
+        filas = [valores for tipo_modelo, valores in recalculos if tipo_modelo is modelo]
+        if filas:
+            recalcular.update(clave for clave in _claves_de_valores(conexion, modelo, filas) if clave)
+
+    deltas, vencimientos = _deltas(conexion, aportes, excluir=recalcular)
+    recalcular |= _aplicar_deltas(conexion, deltas, vencimientos)
+    if recalcular:
+        recalcular_periodos(conexion, recalcular)
+
+
+def _ids_afectados(conexion: Connection, modelo, orm_execute_state) -> Set[int]:
+    """IDs de las filas que tocará un UPDATE/DELETE masivo"""
+    parametros = orm_execute_state.parameters
+    if isinstance(parametros, list) and parametros and "id" in parametros[0]:
+        # UPDATE por clave primaria en lote: session.execute(update(Modelo), [{"id": ...}, ...])
+        return {fila["id"] for fila in parametros}
+    consulta = select(modelo.id)
+    if orm_execute_state.statement.whereclause is not None:
+        consulta = consulta.where(orm_execute_state.statement.whereclause)
+    return {fila[0] for fila in conexion.execute(consulta)}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _actualizar_desde_sentencia(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    modelo = mapper.class_ if mapper is not None else None
+    if modelo not in ATRIBUTOS_PERIODO:
+        return None
+
+    conexion = orm_execute_state.session.connection()
+    claves: Set[Clave] = set()
+    ids: Set[int] = set()
+    parametros = orm_execute_state.parameters
+    filas = parametros if isinstance(parametros, list) else [parametros] if parametros else []
+    maximo = None
+    if not orm_execute_state.is_insert:
+        ids = _ids_afectados(conexion, modelo, orm_execute_state)
+        claves |= _claves_de_ids(conexion, modelo, ids)
+    elif not filas:
+        # INSERT ... SELECT: los períodos se leen de las filas nuevas (ID mayor al máximo previo)
+        maximo = conexion.execute(select(func.coalesce(func.max(modelo.id), 0))).scalar()
+
+    resultado = orm_execute_state.invoke_statement()
+
+    if maximo is not None:
+        ids = set(conexion.execute(select(modelo.id).where(modelo.id > maximo)).scalars())
+        claves |= _claves_de_ids(conexion, modelo, ids)
+    elif orm_execute_state.is_insert:
+        deltas, vencimientos = _deltas(conexion, [(modelo, 1, fila) for fila in filas])
+        claves |= _aplicar_deltas(conexion, deltas, vencimientos)
+    elif orm_execute_state.is_update:
+        # El UPDATE puede haber movido filas a otro período
+        claves |= _claves_de_ids(conexion, modelo, ids)
+
+    if claves:
+        recalcular_periodos(conexion, claves)
+    return resultado
+
+
+# ============================================================================
+# Reconstrucción completa
+# ============================================================================
+
+def reconstruir_resumen(db: Session, condominio_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recalcula el resumen completo (o de un condominio) desde cero.
+
+    Args:
+        db: Sesión de base de datos
+        condominio_id: Limitar a un condominio
+
+    Returns:
+        Cantidad de períodos escritos y duración en ms
+    """
+    inicio = time.perf_counter()
+    conexion = db.connection()
+    borrar = delete(TABLA)
+    if condominio_id is not None:
+        borrar = borrar.where(TABLA.c.condominio_id == condominio_id)
+    conexion.execute(borrar)
+    conexion.execute(
+        insert(TABLA).from_select(COLUMNAS_INSERCION, _consulta_agregados(condominio_id=condominio_id))
+    )
+    contar = select(func.count(literal_column("*"))).select_from(TABLA)
+    if condominio_id is not None:
+        contar = contar.where(TABLA.c.condominio_id == condominio_id)
+    periodos = conexion.execute(contar).scalar()
+    db.commit()
+    return {
+        "periodos": periodos,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    # Backfill o corrección: python -m app.services.resumen_mensual [condominio_id]
+    import json
+    import sys
+
+    from app.db.session import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        condominio = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(json.dumps(reconstruir_resumen(sesion, condominio), indent=2))
+    finally:
+        sesion.close()
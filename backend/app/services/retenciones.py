@@ -0,0 +1,279 @@
+"""
+Retenciones temporales de horarios para espacios comunes con pago.
+
+Los espacios con pago no se reservan directamente: el horario se "retiene"
+por unos minutos mientras el residente completa el pago, y la reserva se crea
+al confirmar la retención. Así:
+- Un checkout abandonado no bloquea el horario indefinidamente
+- Dos usuarios no pueden pagar el mismo horario al mismo tiempo
+
+Las retenciones se guardan en la tabla retenciones_reserva, compartida por
+todos los workers de la API:
+- Crear una retención bloquea la fila del espacio (SELECT ... FOR UPDATE),
+  por lo que la verificación de solapamiento y el INSERT son atómicos; la
+  clave única (espacio, inicio) respalda a los motores sin bloqueo de filas
+- Una retención vencida (expira_en <= ahora) se ignora en todas las consultas
+  y se elimina en el siguiente barrido (al retener el mismo espacio, o con la
+  tarea nocturna purgar_retenciones)
+- Confirmar una retención la elimina en la misma transacción que inserta la
+  reserva: si la confirmación falla, el rollback la deja intacta
+
+Las operaciones de TablaRetenciones no hacen commit: lo hace la ruta que las
+llama.
+
+Una reserva con pago pendiente tampoco bloquea el horario indefinidamente:
+se crea con un plazo (pago_expira_en, RESERVA_PAGO_PENDIENTE_HORAS) que se
+anula al imputarle un pago. Vencido el plazo, la reserva deja de aparecer
+ocupada en la disponibilidad y liberar_reservas_impagas() la elimina (antes
+de verificar conflictos al reservar, y con la tarea nocturna del mismo nombre).
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.google_calendar import ESPACIOS_COMUNES
+from app.models.models import EspacioComun, Reserva, RetencionReserva
+from app.services.ical import feeds
+
+
+def _sin_tz(valor: datetime) -> datetime:
+    return valor.replace(tzinfo=None) if valor.tzinfo is not None else valor
+
+
+@dataclass
+class Retencion:
+    """Retención temporal de un intervalo de un espacio común"""
+    id: str
+    espacio_comun_id: int
+    usuario_id: int
+    inicio: datetime
+    fin: datetime
+    expira_en: datetime
+
+    @classmethod
+    def desde_fila(cls, fila: RetencionReserva) -> "Retencion":
+        return cls(
+            id=fila.id,
+            espacio_comun_id=fila.espacio_comun_id,
+            usuario_id=fila.usuario_id,
+            inicio=_sin_tz(fila.fecha_hora_inicio),
+            fin=_sin_tz(fila.fecha_hora_fin),
+            expira_en=_sin_tz(fila.expira_en),
+        )
+
+
+class TablaRetenciones:
+    """
+    Acceso a la tabla retenciones_reserva.
+
+    Todas las consultas filtran por expira_en, por lo que una retención
+    vencida deja de retener el horario aunque su fila aún no se haya borrado.
+    """
+
+    def __init__(self, duracion: timedelta):
+        self.duracion = duracion
+
+    @staticmethod
+    def _ahora() -> datetime:
+        return datetime.now()
+
+    def purgar_expiradas(self, db: Session, espacio_comun_id: Optional[int] = None) -> int:
+        """
+        Elimina las retenciones vencidas (de un espacio o de todos).
+
+        Returns:
+            Cantidad de retenciones eliminadas
+        """
+        sentencia = delete(RetencionReserva).where(RetencionReserva.expira_en <= self._ahora())
+        if espacio_comun_id is not None:
+            sentencia = sentencia.where(RetencionReserva.espacio_comun_id == espacio_comun_id)
+        return db.execute(sentencia.execution_options(synchronize_session=False)).rowcount
+
+    def crear(
+        self, db: Session, espacio_comun_id: int, usuario_id: int, inicio: datetime, fin: datetime
+    ) -> Retencion:
+        """
+        Crea una retención para el intervalo indicado.
+
+        Bloquea la fila del espacio hasta el commit de la transacción, por lo
+        que dos retenciones simultáneas del mismo espacio se serializan. Si el
+        INSERT choca con la clave única, la transacción se revierte.
+
+        Raises:
+            ValueError: Si el intervalo ya está retenido por otra retención activa
+        """
+        db.query(EspacioComun.id).filter(EspacioComun.id == espacio_comun_id).with_for_update().first()
+        ahora = self._ahora()
+        self.purgar_expiradas(db, espacio_comun_id)
+
+        conflicto = self.conflicto(db, espacio_comun_id, inicio, fin)
+        if conflicto is not None:
+            raise ValueError(
+                f"El horario está retenido por otro pago en curso hasta {conflicto.expira_en.isoformat()}"
+            )
+
+        fila = RetencionReserva(
+            id=uuid.uuid4().hex,
+            espacio_comun_id=espacio_comun_id,
+            usuario_id=usuario_id,
+            fecha_hora_inicio=inicio,
+            fecha_hora_fin=fin,
+            expira_en=ahora + self.duracion,
+        )
+        db.add(fila)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Otra retención con el mismo inicio ganó la carrera
+            db.rollback()
+            raise ValueError("El horario está retenido por otro pago en curso")
+        return Retencion.desde_fila(fila)
+
+    def _activas_query(self, db: Session, espacio_ids: List[int], desde: datetime, hasta: datetime):
+        return db.query(RetencionReserva).filter(
+            RetencionReserva.espacio_comun_id.in_(espacio_ids),
+            RetencionReserva.fecha_hora_inicio < hasta,
+            RetencionReserva.fecha_hora_fin > desde,
+            RetencionReserva.expira_en > self._ahora(),
+        )
+
+    def conflicto(
+        self,
+        db: Session,
+        espacio_comun_id: int,
+        inicio: datetime,
+        fin: datetime,
+        excluir_usuario_id: Optional[int] = None,
+    ) -> Optional[Retencion]:
+        """
+        Retorna una retención activa que se solape con el intervalo, si existe.
+
+        Args:
+            excluir_usuario_id: Ignora las retenciones de este usuario (su propio checkout)
+        """
+        consulta = self._activas_query(db, [espacio_comun_id], inicio, fin)
+        if excluir_usuario_id is not None:
+            consulta = consulta.filter(RetencionReserva.usuario_id != excluir_usuario_id)
+        fila = consulta.first()
+        return Retencion.desde_fila(fila) if fila is not None else None
+
+    def activas(self, db: Session, espacio_ids: List[int], desde: datetime, hasta: datetime) -> List[Retencion]:
+        """Lista las retenciones activas de los espacios que se solapan con el rango"""
+        if not espacio_ids:
+            return []
+        filas = self._activas_query(db, espacio_ids, desde, hasta).all()
+        return [Retencion.desde_fila(fila) for fila in filas]
+
+    def obtener(self, db: Session, retencion_id: str) -> Optional[Retencion]:
+        """Obtiene una retención activa por ID (None si no existe o expiró)"""
+        fila = db.query(RetencionReserva).filter(
+            RetencionReserva.id == retencion_id,
+            RetencionReserva.expira_en > self._ahora(),
+        ).first()
+        return Retencion.desde_fila(fila) if fila is not None else None
+
+    def liberar(self, db: Session, retencion_id: str) -> bool:
+        """Elimina una retención antes de su expiración"""
+        return db.execute(
+            delete(RetencionReserva)
+            .where(RetencionReserva.id == retencion_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount > 0
+
+    def tomar(self, db: Session, retencion_id: str) -> Optional[Retencion]:
+        """
+        Quita y retorna una retención activa en una sola operación.
+
+        El DELETE condicional bloquea la fila: si dos peticiones confirman la
+        misma retención a la vez, solo una la obtiene y la otra recibe None.
+        Si la transacción se revierte, la retención vuelve a estar vigente.
+        """
+        retencion = self.obtener(db, retencion_id)
+        if retencion is None:
+            return None
+        eliminadas = db.execute(
+            delete(RetencionReserva)
+            .where(RetencionReserva.id == retencion_id, RetencionReserva.expira_en > self._ahora())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        return retencion if eliminadas == 1 else None
+
+
+# Instancia compartida por el proceso (el estado vive en la base de datos)
+retenciones = TablaRetenciones(timedelta(minutes=settings.RESERVA_RETENCION_MINUTOS))
+
+
+def plazo_pago(ahora: Optional[datetime] = None) -> datetime:
+    """Plazo de pago de una reserva pendiente creada ahora"""
+    return (ahora or datetime.now()) + timedelta(hours=settings.RESERVA_PAGO_PENDIENTE_HORAS)
+
+
+def reserva_vigente(ahora: Optional[datetime] = None):
+    """Condición SQL de las reservas que bloquean su horario (pagadas o dentro del plazo de pago)"""
+    return or_(
+        Reserva.estado_pago != "pendiente",
+        Reserva.pago_expira_en.is_(None),
+        Reserva.pago_expira_en > (ahora or datetime.now()),
+    )
+
+
+def liberar_reservas_impagas(db: Session, espacio_ids: Optional[List[int]] = None, calendar_manager=None) -> int:
+    """
+    Elimina las reservas pendientes cuyo plazo de pago venció.
+
+    Las filas se bloquean antes del DELETE, por lo que una reserva que recibe
+    un pago entretanto (el pago anula su plazo) no se elimina. Hace commit;
+    luego elimina los eventos de Google Calendar (si se entrega el cliente;
+    si no, los elimina la reconciliación) e invalida los feeds iCal.
+
+    Args:
+        db: Sesión de base de datos
+        espacio_ids: Espacios a revisar (por defecto, todos)
+        calendar_manager: Cliente de Google Calendar (opcional)
+
+    Returns:
+        Cantidad de reservas eliminadas
+    """
+    consulta = db.query(
+        Reserva.id, Reserva.espacio_comun_id, Reserva.usuario_id, Reserva.google_event_id
+    ).filter(
+        Reserva.estado_pago == "pendiente",
+        Reserva.pago_expira_en <= datetime.now(),
+    )
+    if espacio_ids is not None:
+        consulta = consulta.filter(Reserva.espacio_comun_id.in_(espacio_ids))
+    vencidas = consulta.with_for_update().all()
+    if vencidas:
+        db.query(Reserva).filter(
+            Reserva.id.in_([fila.id for fila in vencidas])
+        ).delete(synchronize_session=False)
+    # También libera los bloqueos de la lectura cuando no hubo vencidas
+    db.commit()
+    if not vencidas:
+        return 0
+
+    if calendar_manager is not None:
+        claves = {info["nombre"].lower(): clave for clave, info in ESPACIOS_COMUNES.items()}
+        nombres = dict(db.query(EspacioComun.id, EspacioComun.nombre).filter(
+            EspacioComun.id.in_({fila.espacio_comun_id for fila in vencidas})
+        ).all())
+        eventos = [
+            (claves[(nombres.get(fila.espacio_comun_id) or "").lower()], fila.google_event_id)
+            for fila in vencidas
+            if fila.google_event_id and (nombres.get(fila.espacio_comun_id) or "").lower() in claves
+        ]
+        if eventos:
+            try:
+                calendar_manager.eliminar_eventos_multiples(eventos)
+            except Exception as e:
+                print(f"Advertencia: No se pudieron eliminar eventos de Google Calendar: {str(e)}")
+
+    for fila in vencidas:
+        feeds.invalidar(espacio_comun_id=fila.espacio_comun_id, usuario_id=fila.usuario_id)
+    return len(vencidas)
@@ -0,0 +1,205 @@
+"""
+Sincronización delta ("cambios desde") de las listas de la API.
+
+En lugar de descargar la lista completa después de cada cambio, un cliente
+guarda el cursor que recibe (header X-Sync-Cursor o campo "cursor") y en la
+siguiente consulta envía ?since=<cursor>. La respuesta trae solo:
+- cambios: filas creadas o modificadas desde el cursor (updated_at >= cursor)
+- eliminados: IDs de filas eliminadas desde el cursor (tabla eliminaciones)
+
+Las eliminaciones se registran automáticamente con hooks de SQLAlchemy, tanto
+para db.delete(obj) como para DELETE masivos (query.delete()).
+
+Notas:
+- El cursor se calcula con el reloj de la BD (el mismo que llena updated_at)
+  y se retrocede SINCRONIZACION_MARGEN_SEGUNDOS para no perder filas de
+  transacciones que confirmaron justo después de la consulta. Un cliente
+  puede recibir una fila repetida, por lo que debe aplicar los cambios como
+  upsert por ID
+- Los tombstones se conservan SINCRONIZACION_RETENCION_DIAS días; un cursor
+  más antiguo responde 410 y el cliente debe descargar la lista completa
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Eliminacion
+
+# Tablas con tombstones -> columnas de alcance que se copian al tombstone
+TABLAS_SINCRONIZADAS = {
+    "gastos_comunes": ("vivienda_id",),
+    "multas": ("vivienda_id",),
+    "pagos": ("usuario_id",),
+    "reservas": ("usuario_id",),
+    "anuncios": ("condominio_id",),
+}
+
+PREFIJO_CURSOR = "v1:"
+
+
+def _tombstone(tabla: str, registro_id: int, alcance: Dict[str, Any]) -> Dict[str, Any]:
+    fila = {"tabla": tabla, "registro_id": registro_id}
+    fila.update(alcance)
+    return fila
+
+
+def _insertar_tombstones(session: Session, filas: List[Dict[str, Any]]) -> None:
+    # Por la conexión de la transacción en curso: se confirman o revierten
+    # junto con el DELETE que los origina
+    # Agrupadas por columnas de alcance: un executemany requiere las mismas
+    # claves en todas las filas
+    grupos: Dict[tuple, List[Dict[str, Any]]] = {}
+    for fila in filas:
+        grupos.setdefault(tuple(sorted(fila)), []).append(fila)
+    for grupo in grupos.values():
+        session.connection().execute(insert(Eliminacion.__table__), grupo)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_eliminaciones_orm(session, flush_context):
+    filas = []
+    for obj in session.deleted:
+        tabla = getattr(obj, "__tablename__", None)
+        if tabla in TABLAS_SINCRONIZADAS:
+            filas.append(_tombstone(
+                tabla,
+                obj.id,
+                {columna: getattr(obj, columna) for columna in TABLAS_SINCRONIZADAS[tabla]},
+            ))
+    _insertar_tombstones(session, filas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_eliminaciones_masivas(orm_execute_state):
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.local_table.name not in TABLAS_SINCRONIZADAS:
+        return
+    tabla = mapper.local_table.name
+    modelo = mapper.class_
+    columnas = TABLAS_SINCRONIZADAS[tabla]
+
+    # Leer antes del DELETE las filas que va a eliminar
+    consulta = select(modelo.id, *[getattr(modelo, columna) for columna in columnas])
+    if orm_execute_state.statement.whereclause is not None:
+        consulta = consulta.where(orm_execute_state.statement.whereclause)
+    filas = orm_execute_state.session.execute(consulta).all()
+    _insertar_tombstones(orm_execute_state.session, [
+        _tombstone(tabla, fila[0], dict(zip(columnas, fila[1:])))
+        for fila in filas
+    ])
+
+
+def ahora_bd(db: Session) -> datetime:
+    """Hora actual según la BD (sin zona horaria, como se leen los timestamps)"""
+    valor = db.query(func.now()).scalar()
+    if isinstance(valor, str):
+        # SQLite retorna CURRENT_TIMESTAMP como texto
+        valor = datetime.fromisoformat(valor)
+    return valor.replace(tzinfo=None) if valor.tzinfo is not None else valor
+
+
+def _codificar_cursor(desde: datetime) -> str:
+    texto = PREFIJO_CURSOR + desde.replace(microsecond=0).isoformat()
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> Optional[datetime]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        texto = base64.urlsafe_b64decode(cursor + relleno).decode("utf-8")
+        if not texto.startswith(PREFIJO_CURSOR):
+            return None
+        return datetime.fromisoformat(texto[len(PREFIJO_CURSOR):])
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def cursor_actual(db: Session) -> str:
+    """
+    Cursor para la próxima sincronización.
+
+    Debe calcularse antes de leer los datos que se entregan con él.
+    """
+    return _codificar_cursor(ahora_bd(db) - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS))
+
+
+class Delta:
+    """Consulta "cambios desde" abierta a partir de un cursor"""
+
+    def __init__(self, desde: datetime, cursor: str):
+        self.desde = desde
+        self.cursor = cursor
+
+    def respuesta(self, cambios: List[Any], eliminados: List[int]) -> Dict[str, Any]:
+        """Cuerpo de la respuesta delta"""
+        return {
+            "cambios": cambios,
+            "eliminados": sorted(set(eliminados)),
+            "cursor": self.cursor,
+        }
+
+
+def abrir_delta(db: Session, since: str) -> Delta:
+    """
+    Valida el cursor recibido y prepara la consulta delta.
+
+    Raises:
+        HTTPException 400: Si el cursor no es válido
+        HTTPException 410: Si el cursor es más antiguo que la retención de
+            tombstones (el cliente debe descargar la lista completa)
+    """
+    desde = _decodificar_cursor(since)
+    if desde is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor 'since' inválido",
+        )
+    ahora = ahora_bd(db)
+    if desde < ahora - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="El cursor expiró; descargue la lista completa",
+        )
+    return Delta(desde, _codificar_cursor(ahora - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS)))
+
+
+def eliminados_desde(db: Session, tabla: str, desde: datetime, **alcance: Any) -> List[int]:
+    """
+    IDs de las filas de una tabla eliminadas desde la fecha indicada.
+
+    Args:
+        db: Sesión de base de datos
+        tabla: Nombre de la tabla (ej: "multas")
+        desde: Fecha del cursor
+        alcance: Filtros por columna de alcance (valor o lista de valores),
+            ej: vivienda_id=[1, 2]
+    """
+    consulta = db.query(Eliminacion.registro_id).filter(
+        Eliminacion.tabla == tabla,
+        Eliminacion.eliminado_en >= desde,
+    )
+    for columna, valor in alcance.items():
+        campo = getattr(Eliminacion, columna)
+        if isinstance(valor, (list, tuple, set)):
+            consulta = consulta.filter(campo.in_(list(valor)))
+        else:
+            consulta = consulta.filter(campo == valor)
+    return [fila.registro_id for fila in consulta.all()]
+
+
+def purgar_eliminaciones(db: Session) -> int:
+    """Elimina los tombstones más antiguos que la retención configurada"""
+    limite = ahora_bd(db) - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS)
+    eliminadas = db.query(Eliminacion).filter(
+        Eliminacion.eliminado_en < limite
+    ).delete(synchronize_session=False)
+    db.commit()
+    return eliminadas
@@ -0,0 +1,435 @@
+"""
+Snapshots columnares (Parquet) de las tablas financieras para análisis.
+
+Escribe pagos, gastos_comunes y reservas particionados por condominio y año con
+layout Hive, legible directamente por pyarrow.dataset, DuckDB, pandas o
+Spark:
+
+    <SNAPSHOTS_DIR>/<tabla>/condominio_id=<id>/ano=<año>/datos.parquet
+
+Como en todo layout Hive, condominio_id y ano van en la ruta y no se repiten
+dentro de los archivos.
+
+1. Una consulta GROUP BY calcula la huella de cada partición (cantidad de
+   filas, suma de IDs, suma de montos y MAX(updated_at)); un insert o delete
+   siempre cambia la huella
+2. Se compara contra el manifiesto de la ejecución anterior
+   (<tabla>/_manifiesto.json). Se reescriben las particiones cuya huella
+   cambió o cuyo MAX(updated_at) es posterior al corte de la ejecución
+   anterior (un update puede no cambiar los agregados si ocurre en el mismo
+   segundo); las particiones que ya no existen se eliminan
+3. Cada partición se lee con cursor del lado del servidor (yield_per) y cada
+   lote de filas se convierte a un RecordBatch de Arrow columna por columna,
+   que se escribe como un row group. El archivo se escribe aparte y se
+   reemplaza al terminar, por lo que un lector nunca ve una partición a medias
+
+pyarrow es una dependencia opcional: sin ella la API funciona igual y solo
+los snapshots responden 503.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import extract, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import EspacioComun, GastoComun, Pago, Reserva, Vivienda
+from app.services.sincronizacion import ahora_bd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_DISPONIBLE = False
+
+ARCHIVO_PARTICION = "datos.parquet"
+ARCHIVO_MANIFIESTO = "_manifiesto.json"
+
+# Evita dos ejecuciones simultáneas escribiendo los mismos archivos
+_lock_snapshots = threading.Lock()
+
+
+class TablaSnapshot:
+    """
+    Definición de una tabla exportada a snapshots.
+
+    Args:
+        nombre: Nombre de la tabla (y del directorio del snapshot)
+        columnas: Pares (nombre, tipo Arrow como texto) en orden
+        consulta: select() de las columnas, con las etiquetas de `columnas`
+        condominio: Expresión del condominio de cada fila
+        ano: Expresión del año de la partición (para el GROUP BY de huellas)
+        filtro_ano: Función año -> condición sobre un rango indexable
+        huella: Agregados de la partición; el último debe ser MAX(updated_at)
+    """
+
+    def __init__(self, nombre, columnas, consulta, condominio, ano, filtro_ano, huella):
+        self.nombre = nombre
+        self.columnas = columnas
+        self.consulta = consulta
+        self.condominio = condominio
+        self.ano = ano
+        self.filtro_ano = filtro_ano
+        self.huella = huella
+
+
+def _rango_anual(columna) -> Callable[[int], Any]:
+    return lambda ano: (columna >= date(ano, 1, 1)) & (columna < date(ano + 1, 1, 1))
+
+
+TABLAS_SNAPSHOT: Dict[str, TablaSnapshot] = {
+    "pagos": TablaSnapshot(
+        nombre="pagos",
+        columnas=[
+            ("id", "int64"),
+            ("gasto_comun_id", "int64"),
+            ("vivienda_id", "int64"),
+            ("usuario_id", "int64"),
+            ("monto_pagado", "decimal"),
+            ("fecha_pago", "timestamp"),
+            ("metodo_pago", "string"),
+            ("mes_gasto", "int16"),
+            ("ano_gasto", "int16"),
+            ("updated_at", "timestamp"),
+        ],
+        consulta=select(
+            Pago.id.label("id"),
+            Pago.gasto_comun_id.label("gasto_comun_id"),
+            GastoComun.vivienda_id.label("vivienda_id"),
+            Pago.usuario_id.label("usuario_id"),
+            Pago.monto_pagado.label("monto_pagado"),
+            Pago.fecha_pago.label("fecha_pago"),
+            Pago.metodo_pago.label("metodo_pago"),
+            GastoComun.mes.label("mes_gasto"),
+            GastoComun.ano.label("ano_gasto"),
+            Pago.updated_at.label("updated_at"),
+        )
+        .join(GastoComun, GastoComun.id == Pago.gasto_comun_id)
+        .join(Vivienda, Vivienda.id == GastoComun.vivienda_id),
+        condominio=Vivienda.condominio_id,
+        ano=extract("year", Pago.fecha_pago),
+        filtro_ano=_rango_anual(Pago.fecha_pago),
+        huella=(
+            func.count(Pago.id),
+            func.sum(Pago.id),
+            func.sum(Pago.monto_pagado),
+            func.max(Pago.updated_at),
+        ),
+    ),
+    "gastos_comunes": TablaSnapshot(
+        nombre="gastos_comunes",
+        columnas=[
+            ("id", "int64"),
+            ("vivienda_id", "int64"),
+            ("numero_vivienda", "string"),
+            ("mes", "int16"),
+            ("monto_total", "decimal"),
+            ("estado", "string"),
+            ("vencimiento", "date"),
+            ("created_at", "timestamp"),
+            ("updated_at", "timestamp"),
+        ],
+        consulta=select(
+            GastoComun.id.label("id"),
+            GastoComun.vivienda_id.label("vivienda_id"),
+            Vivienda.numero_vivienda.label("numero_vivienda"),
+            GastoComun.mes.label("mes"),
+            GastoComun.monto_total.label("monto_total"),
+            GastoComun.estado.label("estado"),
+            GastoComun.vencimiento.label("vencimiento"),
+            GastoComun.created_at.label("created_at"),
+            GastoComun.updated_at.label("updated_at"),
+        )
+        .join(Vivienda, Vivienda.id == GastoComun.vivienda_id),
+        condominio=Vivienda.condominio_id,
+        ano=GastoComun.ano,
+        filtro_ano=lambda ano: GastoComun.ano == ano,
+        huella=(
+            func.count(GastoComun.id),
+            func.sum(GastoComun.id),
+            func.sum(GastoComun.monto_total),
+            func.max(GastoComun.updated_at),
+        ),
+    ),
+    "reservas": TablaSnapshot(
+        nombre="reservas",
+        columnas=[
+            ("id", "int64"),
+            ("espacio_comun_id", "int64"),
+            ("espacio", "string"),
+            ("usuario_id", "int64"),
+            ("fecha_hora_inicio", "timestamp"),
+            ("fecha_hora_fin", "timestamp"),
+            ("monto_pago", "decimal"),
+            ("estado_pago", "string"),
+            ("created_at", "timestamp"),
+            ("updated_at", "timestamp"),
+        ],
+        consulta=select(
+            Reserva.id.label("id"),
+            Reserva.espacio_comun_id.label("espacio_comun_id"),
+            EspacioComun.nombre.label("espacio"),
+            Reserva.usuario_id.label("usuario_id"),
+            Reserva.fecha_hora_inicio.label("fecha_hora_inicio"),
+            Reserva.fecha_hora_fin.label("fecha_hora_fin"),
+            Reserva.monto_pago.label("monto_pago"),
+            Reserva.estado_pago.label("estado_pago"),
+            Reserva.created_at.label("created_at"),
+            Reserva.updated_at.label("updated_at"),
+        )
+        .join(EspacioComun, EspacioComun.id == Reserva.espacio_comun_id),
+        condominio=EspacioComun.condominio_id,
+        ano=extract("year", Reserva.fecha_hora_inicio),
+        filtro_ano=_rango_anual(Reserva.fecha_hora_inicio),
+        huella=(
+            func.count(Reserva.id),
+            func.sum(Reserva.id),
+            func.sum(Reserva.monto_pago),
+            func.max(Reserva.updated_at),
+        ),
+    ),
+}
+
+
+def _tipo_arrow(tipo: str):
+    # Los montos son Numeric(14, 2) en MySQL: decimal exacto, sin pasar por float
+    return {
+        "int64": pa.int64(),
+        "int16": pa.int16(),
+        "decimal": pa.decimal128(14, 2),
+        "timestamp": pa.timestamp("us"),
+        "date": pa.date32(),
+        "string": pa.string(),
+    }[tipo]
+
+
+def _esquema(tabla: TablaSnapshot):
+    return pa.schema([(nombre, _tipo_arrow(tipo)) for nombre, tipo in tabla.columnas])
+
+
+def esquema_particionado(nombre: str):
+    """Esquema Arrow de una tabla tal como se lee el dataset (con las columnas de partición)"""
+    return _esquema(TABLAS_SNAPSHOT[nombre]).append(
+        pa.field("condominio_id", pa.int32())
+    ).append(pa.field("ano", pa.int32()))
+
+
+def ruta_tabla(nombre: str) -> str:
+    """Directorio raíz del snapshot de una tabla"""
+    return os.path.join(settings.SNAPSHOTS_DIR, nombre)
+
+
+def _sin_tz(valor: Any) -> Any:
+    if isinstance(valor, datetime) and valor.tzinfo is not None:
+        return valor.replace(tzinfo=None)
+    return valor
+
+
+def _lote_a_arrow(lote: List[Tuple], esquema) -> "pa.RecordBatch":
+    """Convierte un lote de filas a un RecordBatch transponiéndolo a columnas"""
+    columnas = list(zip(*lote))
+    arreglos = []
+    for indice, campo in enumerate(esquema):
+        valores = columnas[indice]
+        if pa.types.is_timestamp(campo.type):
+            valores = [_sin_tz(valor) for valor in valores]
+        arreglos.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(arreglos, schema=esquema)
+
+
+def clave_particion(condominio_id: int, ano: int) -> str:
+    """Ruta relativa (estilo Hive) de una partición"""
+    return f"condominio_id={condominio_id}/ano={ano}"
+
+
+def ruta_particion(nombre: str, condominio_id: int, ano: int) -> str:
+    """Ruta del archivo Parquet de una partición"""
+    return os.path.join(ruta_tabla(nombre), clave_particion(condominio_id, ano), ARCHIVO_PARTICION)
+
+
+def leer_manifiesto(nombre: str) -> Dict[str, Any]:
+    """Manifiesto de la última ejecución de una tabla (vacío si no existe)"""
+    ruta = os.path.join(ruta_tabla(nombre), ARCHIVO_MANIFIESTO)
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {"particiones": {}}
+
+
+def _guardar_manifiesto(nombre: str, manifiesto: Dict[str, Any]) -> None:
+    ruta = os.path.join(ruta_tabla(nombre), ARCHIVO_MANIFIESTO)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def _huellas(db: Session, tabla: TablaSnapshot) -> Dict[Tuple[int, int], Tuple[str, Optional[datetime]]]:
+    """
+    Huella y MAX(updated_at) de cada partición (condominio, año) calculadas en
+    un solo GROUP BY.
+    """
+    condominio = tabla.condominio.label("condominio_id")
+    ano = tabla.ano.label("ano")
+    consulta = (
+        tabla.consulta.with_only_columns(condominio, ano, *tabla.huella)
+        .group_by(condominio, ano)
+    )
+    huellas = {}
+    for fila in db.execute(consulta):
+        valores = [_sin_tz(valor) for valor in fila[2:]]
+        ultima = valores[-1]
+        if isinstance(ultima, str):
+            # SQLite retorna MAX() de timestamps como texto
+            ultima = datetime.fromisoformat(ultima)
+        huellas[(int(fila[0]), int(fila[1]))] = ("|".join(str(valor) for valor in valores), ultima)
+    return huellas
+
+
+def _escribir_particion(db: Session, tabla: TablaSnapshot, condominio_id: int, ano: int) -> int:
+    """Escribe una partición completa; retorna la cantidad de filas escritas"""
+    esquema = _esquema(tabla)
+    destino = ruta_particion(tabla.nombre, condominio_id, ano)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = destino + ".tmp"
+
+    consulta = (
+        tabla.consulta
+        .where(tabla.condominio == condominio_id, tabla.filtro_ano(ano))
+        .order_by(tabla.consulta.selected_columns[0])
+        .execution_options(yield_per=settings.SNAPSHOTS_TAMANO_LOTE)
+    )
+    filas = 0
+    try:
+        with pq.ParquetWriter(temporal, esquema, compression="zstd") as escritor:
+            for lote in db.execute(consulta).partitions():
+                escritor.write_batch(_lote_a_arrow(lote, esquema))
+                filas += len(lote)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return filas
+
+
+def _eliminar_particion(nombre: str, clave: str) -> None:
+    directorio = os.path.join(ruta_tabla(nombre), clave)
+    shutil.rmtree(directorio, ignore_errors=True)
+    # Quitar el directorio del condominio si quedó vacío
+    padre = os.path.dirname(directorio)
+    if os.path.isdir(padre) and not os.listdir(padre):
+        os.rmdir(padre)
+
+
+def generar_snapshots(
+    db: Session,
+    tablas: Optional[List[str]] = None,
+    forzar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Genera o actualiza los snapshots Parquet de las tablas financieras.
+
+    Args:
+        db: Sesión de base de datos
+        tablas: Tablas a procesar (default: todas las de TABLAS_SNAPSHOT)
+        forzar: Si es True reescribe todas las particiones aunque no cambiaron
+
+    Returns:
+        Resumen por tabla (particiones reescritas, sin cambios, eliminadas y
+        filas escritas) y la duración total en ms
+
+    Raises:
+        RuntimeError: Si pyarrow no está instalado o ya hay una ejecución en curso
+    """
+    if not PYARROW_DISPONIBLE:
+        raise RuntimeError("pyarrow no está instalado")
+    if not _lock_snapshots.acquire(blocking=False):
+        raise RuntimeError("Ya hay una generación de snapshots en curso")
+
+    inicio = time.perf_counter()
+    try:
+        resumen: Dict[str, Any] = {"tablas": {}}
+        for nombre in tablas or list(TABLAS_SNAPSHOT):
+            tabla = TABLAS_SNAPSHOT[nombre]
+            manifiesto = leer_manifiesto(nombre)
+            anterior = manifiesto["particiones"]
+            corte_anterior = manifiesto.get("corte")
+            corte_anterior = datetime.fromisoformat(corte_anterior) if corte_anterior else None
+            # Filas modificadas después de este corte se incluyen en la próxima ejecución
+            corte = ahora_bd(db) - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS)
+            actuales = _huellas(db, tabla)
+            os.makedirs(ruta_tabla(nombre), exist_ok=True)
+
+            particiones = {}
+            reescritas = sin_cambios = filas_escritas = 0
+            for (condominio_id, ano), (huella, ultima_modificacion) in sorted(actuales.items()):
+                clave = clave_particion(condominio_id, ano)
+                previa = anterior.get(clave)
+                if (
+                    not forzar
+                    and previa is not None
+                    and previa["huella"] == huella
+                    and not (
+                        corte_anterior
+                        and ultima_modificacion
+                        and ultima_modificacion >= corte_anterior
+                    )
+                    and os.path.exists(ruta_particion(nombre, condominio_id, ano))
+                ):
+                    particiones[clave] = previa
+                    sin_cambios += 1
+                    continue
+                filas = _escribir_particion(db, tabla, condominio_id, ano)
+                particiones[clave] = {
+                    "condominio_id": condominio_id,
+                    "ano": ano,
+                    "huella": huella,
+                    "filas": filas,
+                    "escrito_en": datetime.now().isoformat(timespec="seconds"),
+                }
+                reescritas += 1
+                filas_escritas += filas
+
+            eliminadas = [clave for clave in anterior if clave not in particiones]
+            for clave in eliminadas:
+                _eliminar_particion(nombre, clave)
+
+            _guardar_manifiesto(nombre, {
+                "tabla": nombre,
+                "generado_en": datetime.now().isoformat(timespec="seconds"),
+                "corte": corte.isoformat(),
+                "particiones": particiones,
+            })
+            resumen["tablas"][nombre] = {
+                "particiones": len(particiones),
+                "reescritas": reescritas,
+                "sin_cambios": sin_cambios,
+                "eliminadas": len(eliminadas),
+                "filas_escritas": filas_escritas,
+            }
+        resumen["duracion_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resumen
+    finally:
+        _lock_snapshots.release()
+
+
+if __name__ == "__main__":
+    # Ejecución manual o desde cron: python -m app.services.snapshots [--forzar]
+    import sys
+
+    from app.db.session import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        print(json.dumps(generar_snapshots(sesion, forzar="--forzar" in sys.argv), indent=2, ensure_ascii=False))
+    finally:
+        sesion.close()
@@ -0,0 +1,181 @@
+"""
+Tareas nocturnas del planificador (app.core.planificador).
+
+- aplicar_saldos_a_favor: imputa el saldo a favor de las viviendas a los
+  cargos emitidos después de sus abonos (antes de vencer y recargar)
+- vencer_gastos: los gastos comunes pendientes cuyo vencimiento pasó quedan
+  en estado "vencido" (un UPDATE por conjunto); las consultas de morosidad
+  filtran por el estado indexado en lugar de comparar fechas
+- recargos_mora: recargos por mora de los gastos vencidos (opcional)
+- reconstruir_resumen / reconstruir_cuentas: recalculan resumen_mensual y la
+  cuenta corriente desde cero (corrigen cualquier deriva de los hooks)
+- purgar_eliminaciones / purgar_idempotencia / purgar_retenciones: eliminan
+  tombstones, claves de idempotencia y retenciones de horario expiradas
+- liberar_reservas_impagas: elimina las reservas cuyo plazo de pago venció
+- actualizar_uf: obtiene (y guarda) el valor de la UF del día
+- snapshots / reconciliar_calendarios: snapshots Parquet y reconciliación
+  con Google Calendar (opcionales, requieren sus dependencias)
+
+Las tareas habilitadas y su orden se configuran con PLANIFICADOR_TAREAS; todas
+corren a la PLANIFICADOR_HORA_NOCTURNA.
+
+Uso por línea de comandos (ejecuta las tareas indicadas de inmediato, sin
+elección de líder):
+
+    python -m app.services.tareas_programadas <tarea> [tarea ...]
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.planificador import Planificador, Tarea
+from app.models.models import GastoComun
+from app.services import cuenta_corriente, resumen_mensual
+
+
+def vencer_gastos(db: Session, fecha: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Actualiza el estado de los gastos comunes impagos según su vencimiento.
+
+    Args:
+        db: Sesión de base de datos (se confirma al final)
+        fecha: Fecha de referencia (por defecto hoy)
+
+    Returns:
+        Gastos que pasaron a "vencido" y gastos vencidos que volvieron a
+        "pendiente" (ej: se postergó su vencimiento)
+    """
+    hoy = fecha or date.today()
+    vencidos = db.execute(
+        update(GastoComun)
+        .where(GastoComun.estado == "pendiente", GastoComun.vencimiento < hoy)
+        .values(estado="vencido")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    reabiertos = db.execute(
+        update(GastoComun)
+        .where(
+            GastoComun.estado == "vencido",
+            or_(GastoComun.vencimiento.is_(None), GastoComun.vencimiento >= hoy),
+        )
+        .values(estado="pendiente")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return {"fecha": hoy.isoformat(), "vencidos": vencidos, "reabiertos": reabiertos}
+
+
+def _aplicar_saldos_a_favor(db: Session) -> Dict[str, Any]:
+    from app.services.imputacion_pagos import aplicar_saldos_a_favor
+
+    return aplicar_saldos_a_favor(db)
+
+
+def _recargos_mora(db: Session) -> Dict[str, Any]:
+    from app.services.recargos_mora import generar_recargos
+
+    return generar_recargos(db)
+
+
+def _purgar_eliminaciones(db: Session) -> Dict[str, Any]:
+    from app.services.sincronizacion import purgar_eliminaciones
+
+    return {"eliminados": purgar_eliminaciones(db)}
+
+
+def _purgar_idempotencia(db: Session) -> Dict[str, Any]:
+    from app.core.idempotencia import purgar_expiradas
+
+    return {"eliminadas": purgar_expiradas(db)}
+
+
+def _purgar_retenciones(db: Session) -> Dict[str, Any]:
+    from app.services.retenciones import retenciones
+
+    eliminadas = retenciones.purgar_expiradas(db)
+    db.commit()
+    return {"eliminadas": eliminadas}
+
+
+def _liberar_reservas_impagas(db: Session) -> Dict[str, Any]:
+    from app.services.retenciones import liberar_reservas_impagas
+
+    # Sin cliente de Google: los eventos huérfanos los elimina la reconciliación
+    return {"eliminadas": liberar_reservas_impagas(db)}
+
+
+def _actualizar_uf(db: Session) -> Dict[str, Any]:
+    from app.services.uf import cotizacion_a_dict, valor_uf
+
+    hoy = date.today()
+    return cotizacion_a_dict(valor_uf(db, hoy), hoy)
+
+
+def _snapshots(db: Session) -> Dict[str, Any]:
+    from app.services.snapshots import generar_snapshots
+
+    return generar_snapshots(db)
+
+
+def _reconciliar_calendarios(db: Session) -> Dict[str, Any]:
+    from app.services.google_calendar_service import GoogleCalendarManager
+    from app.services.reconciliacion import reconciliar_calendarios
+
+    return reconciliar_calendarios(db, GoogleCalendarManager())
+
+
+# Orden recomendado: el estado de los gastos antes de recargos y resúmenes
+TAREAS: Dict[str, Callable[[Session], Any]] = {
+    "aplicar_saldos_a_favor": _aplicar_saldos_a_favor,
+    "vencer_gastos": vencer_gastos,
+    "recargos_mora": _recargos_mora,
+    "reconstruir_resumen": resumen_mensual.reconstruir_resumen,
+    "reconstruir_cuentas": cuenta_corriente.reconstruir_cuentas,
+    "purgar_eliminaciones": _purgar_eliminaciones,
+    "purgar_idempotencia": _purgar_idempotencia,
+    "purgar_retenciones": _purgar_retenciones,
+    "liberar_reservas_impagas": _liberar_reservas_impagas,
+    "actualizar_uf": _actualizar_uf,
+    "snapshots": _snapshots,
+    "reconciliar_calendarios": _reconciliar_calendarios,
+}
+
+
+def tareas_activas() -> List[Tarea]:
+    """Tareas de PLANIFICADOR_TAREAS a la hora nocturna configurada"""
+    hora = datetime.strptime(settings.PLANIFICADOR_HORA_NOCTURNA, "%H:%M").time()
+    tareas = []
+    for nombre in settings.PLANIFICADOR_TAREAS.split(","):
+        nombre = nombre.strip()
+        if not nombre:
+            continue
+        if nombre not in TAREAS:
+            print(f"Advertencia: tarea programada desconocida en PLANIFICADOR_TAREAS: {nombre}")
+            continue
+        tareas.append(Tarea(nombre, TAREAS[nombre], hora=hora))
+    return tareas
+
+
+def crear_planificador() -> Planificador:
+    return Planificador(tareas_activas())
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python -m app.services.tareas_programadas <tarea> [tarea ...]")
+        print("Tareas: " + ", ".join(TAREAS))
+        sys.exit(1)
+
+    planificador = Planificador([])
+    for nombre in sys.argv[1:]:
+        if nombre not in TAREAS:
+            print(f"Tarea desconocida: {nombre}")
+            sys.exit(1)
+        ejecucion = planificador.ejecutar(Tarea(nombre, TAREAS[nombre]))
+        print(json.dumps(ejecucion, default=str, indent=2, ensure_ascii=False))
@@ -0,0 +1,317 @@
+"""
+Valor diario de la UF con caché en memoria y en la base de datos.
+
+El valor de la UF de un día no cambia una vez publicado, por lo que cada
+fecha se obtiene del proveedor externo (API de la CMF) a lo más una vez:
+
+1. Caché en memoria del proceso (sin I/O)
+2. Tabla valores_uf (compartida entre procesos y reinicios)
+3. Proveedor externo: el valor obtenido se guarda en la tabla y en memoria.
+   Las consultas simultáneas de una misma fecha sin caché esperan a la
+   primera en vez de repetir la llamada (las de otras fechas no esperan), y
+   un circuit breaker corta las llamadas cuando la CMF está caída
+4. Si el proveedor falla se usa el último valor conocido anterior a la fecha
+   (marcado como no vigente) para no bloquear la facturación ni los estados
+   de cuenta. Que la CMF no tenga valor para una fecha no es una falla del
+   proveedor y no cuenta para el circuit breaker
+
+El proveedor es reemplazable (configurar_obtenedor) para pruebas o para
+desarrollo local sin API key; con UF_VALOR_FIJO definido se usa un valor
+fijo en vez de la CMF.
+
+Uso por línea de comandos (precarga el valor del día o de una fecha):
+
+    python -m app.services.uf [AAAA-MM-DD]
+"""
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import ValorUF, Vivienda
+
+# Obtiene el valor de la UF de una fecha; lanza una excepción si no puede
+ObtenedorUF = Callable[[date], Decimal]
+
+# Fechas que se conservan en la caché en memoria
+MAXIMO_FECHAS_CACHE = 400
+
+# Circuit breaker compartido por todas las consultas a la CMF del proceso
+circuito_cmf = CircuitBreaker(
+    "CMF (UF)",
+    umbral_fallos=settings.CMF_UMBRAL_FALLOS,
+    enfriamiento_segundos=settings.CMF_ENFRIAMIENTO_SEGUNDOS,
+)
+
+
+class CotizacionUF(NamedTuple):
+    """Valor de la UF en pesos y la fecha a la que corresponde"""
+    fecha: date
+    valor: Decimal
+    fuente: str
+
+
+class UFNoDisponibleError(Exception):
+    """
+    Excepción lanzada cuando no hay valor de la UF para la fecha (ni en caché
+    ni en el proveedor) y tampoco un valor anterior conocido.
+    """
+
+
+def parsear_valor(texto: str) -> Decimal:
+    """
+    Convierte un valor en formato chileno ("39.485,65") a Decimal.
+
+    Raises:
+        ValueError: Si el texto no es un número válido
+    """
+    try:
+        return Decimal(texto.strip().replace(".", "").replace(",", "."))
+    except (InvalidOperation, AttributeError):
+        raise ValueError(f"Valor de UF inválido: {texto!r}")
+
+
+def obtener_uf_cmf(fecha: date) -> Decimal:
+    """
+    Consulta el valor de la UF de una fecha en la API de la CMF.
+
+    Raises:
+        RuntimeError: Si CMF_API_KEY no está configurada
+        LookupError: Si la CMF no tiene valor para la fecha
+    """
+    if not settings.CMF_API_KEY:
+        raise RuntimeError("CMF_API_KEY no está configurada")
+    parametros = urllib.parse.urlencode({"apikey": settings.CMF_API_KEY, "formato": "json"})
+    url = (
+        f"{settings.CMF_API_URL.rstrip('/')}/{fecha.year}/{fecha.month:02d}/dias/{fecha.day:02d}"
+        f"?{parametros}"
+    )
+    try:
+        with urllib.request.urlopen(url, timeout=settings.CMF_TIMEOUT_SEGUNDOS) as respuesta:
+            datos = json.load(respuesta)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            raise LookupError(f"La CMF no informa valor de UF para {fecha.isoformat()}")
+        raise
+    for item in datos.get("UFs") or []:
+        if item.get("Fecha") == fecha.isoformat():
+            return parsear_valor(item["Valor"])
+    raise LookupError(f"La CMF no informa valor de UF para {fecha.isoformat()}")
+
+
+def obtenedor_fijo(valor: Any) -> ObtenedorUF:
+    """Proveedor que retorna siempre el mismo valor (desarrollo local y pruebas)"""
+    valor = Decimal(str(valor))
+    return lambda fecha: valor
+
+
+_obtenedor: ObtenedorUF = obtenedor_fijo(settings.UF_VALOR_FIJO) if settings.UF_VALOR_FIJO else obtener_uf_cmf
+_fuente: str = "fijo" if settings.UF_VALOR_FIJO else "cmf"
+
+_cache: Dict[date, CotizacionUF] = {}
+_lock_cache = threading.Lock()
+# Un lock por fecha en consulta al proveedor: una sola llamada por fecha sin
+# caché. Cada lock se descarta cuando ninguna petición lo usa
+_locks_fecha: Dict[date, threading.Lock] = {}
+_usos_lock_fecha: Dict[date, int] = {}
+_lock_turnos = threading.Lock()
+
+
+def configurar_obtenedor(obtenedor: ObtenedorUF, fuente: str = "manual") -> None:
+    """
+    Reemplaza el proveedor del valor de la UF y vacía la caché en memoria.
+
+    Args:
+        obtenedor: Función fecha -> valor en pesos (lanza excepción si no hay valor)
+        fuente: Nombre que se guarda junto a los valores obtenidos
+    """
+    global _obtenedor, _fuente
+    _obtenedor = obtenedor
+    _fuente = fuente
+    limpiar_cache()
+
+
+def limpiar_cache() -> None:
+    """Vacía la caché en memoria (la tabla valores_uf se conserva)"""
+    with _lock_cache:
+        _cache.clear()
+
+
+@contextmanager
+def _turno_fecha(fecha: date) -> Iterator[None]:
+    """Serializa las consultas al proveedor de una misma fecha"""
+    with _lock_turnos:
+        lock = _locks_fecha.setdefault(fecha, threading.Lock())
+        _usos_lock_fecha[fecha] = _usos_lock_fecha.get(fecha, 0) + 1
+    try:
+        with lock:
+            yield
+    finally:
+        with _lock_turnos:
+            _usos_lock_fecha[fecha] -= 1
+            if not _usos_lock_fecha[fecha]:
+                del _usos_lock_fecha[fecha]
+                del _locks_fecha[fecha]
+
+
+def _guardar_en_cache(cotizacion: CotizacionUF) -> None:
+    with _lock_cache:
+        if len(_cache) >= MAXIMO_FECHAS_CACHE:
+            _cache.clear()
+        _cache[cotizacion.fecha] = cotizacion
+
+
+def _leer_tabla(db: Session, fecha: date) -> Optional[CotizacionUF]:
+    fila = db.query(ValorUF.fecha, ValorUF.valor, ValorUF.fuente).filter(ValorUF.fecha == fecha).first()
+    if fila is None:
+        return None
+    return CotizacionUF(fila.fecha, Decimal(fila.valor), fila.fuente)
+
+
+def _persistir(cotizacion: CotizacionUF) -> None:
+    """
+    Guarda el valor en valores_uf con una sesión propia, para no confirmar
+    la transacción de quien consulta.
+    """
+    sesion = SessionLocal()
+    try:
+        sesion.add(ValorUF(fecha=cotizacion.fecha, valor=cotizacion.valor, fuente=cotizacion.fuente))
+        sesion.commit()
+    except IntegrityError:
+        # Otro proceso guardó la misma fecha
+        sesion.rollback()
+    except Exception as e:
+        sesion.rollback()
+        print(f"Advertencia: no se pudo guardar el valor de la UF del {cotizacion.fecha.isoformat()}: {e}")
+    finally:
+        sesion.close()
+
+
+def _ultimo_conocido(db: Session, fecha: date) -> Optional[CotizacionUF]:
+    fila = (
+        db.query(ValorUF.fecha, ValorUF.valor, ValorUF.fuente)
+        .filter(ValorUF.fecha <= fecha)
+        .order_by(ValorUF.fecha.desc())
+        .first()
+    )
+    if fila is None:
+        return None
+    return CotizacionUF(fila.fecha, Decimal(fila.valor), fila.fuente)
+
+
+def valor_uf(db: Session, fecha: Optional[date] = None) -> CotizacionUF:
+    """
+    Obtiene el valor de la UF de una fecha (por defecto hoy).
+
+    Args:
+        db: Sesión de base de datos (solo lectura)
+        fecha: Fecha del valor
+
+    Returns:
+        Cotización de la fecha; si el proveedor falla, la última conocida
+        anterior (su fecha es distinta de la pedida)
+
+    Raises:
+        UFNoDisponibleError: Si no hay valor para la fecha ni uno anterior
+    """
+    fecha = fecha or date.today()
+    cotizacion = _cache.get(fecha)
+    if cotizacion is not None:
+        return cotizacion
+
+    cotizacion = _leer_tabla(db, fecha)
+    if cotizacion is not None:
+        _guardar_en_cache(cotizacion)
+        return cotizacion
+
+    error: Optional[BaseException] = None
+    with _turno_fecha(fecha):
+        # Otra petición pudo obtener el valor mientras se esperaba el lock
+        cotizacion = _cache.get(fecha)
+        if cotizacion is not None:
+            return cotizacion
+        try:
+            circuito_cmf.verificar()
+            try:
+                valor = _obtenedor(fecha)
+            except LookupError:
+                # El proveedor respondió, pero no tiene valor para la fecha
+                circuito_cmf.registrar_exito()
+                raise
+            except Exception as e:
+                circuito_cmf.registrar_fallo(e)
+                raise
+            circuito_cmf.registrar_exito()
+            cotizacion = CotizacionUF(fecha, valor.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), _fuente)
+            _persistir(cotizacion)
+            _guardar_en_cache(cotizacion)
+            return cotizacion
+        except Exception as e:
+            error = e
+
+    print(f"Advertencia: no se pudo obtener el valor de la UF del {fecha.isoformat()}: {error}")
+    cotizacion = _ultimo_conocido(db, fecha)
+    if cotizacion is None:
+        raise UFNoDisponibleError(
+            f"No hay valor de la UF para {fecha.isoformat()} ni un valor anterior conocido: {error}"
+        )
+    return cotizacion
+
+
+def uf_a_pesos(monto_uf: Any, valor: Decimal) -> Decimal:
+    """Monto en UF convertido a pesos (sin decimales)"""
+    return (Decimal(monto_uf or 0) * valor).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+
+
+def cargos_en_pesos(db: Session, vivienda_ids: Iterable[int], valor: Decimal) -> Dict[int, Decimal]:
+    """
+    Convierte el cargo fijo en UF de varias viviendas a pesos con una sola consulta.
+
+    Args:
+        db: Sesión de base de datos
+        vivienda_ids: IDs de las viviendas
+        valor: Valor de la UF en pesos
+
+    Returns:
+        Cargo fijo en pesos por ID de vivienda
+    """
+    ids = list(vivienda_ids)
+    if not ids:
+        return {}
+    return {
+        vivienda_id: uf_a_pesos(cargo_fijo_uf, valor)
+        for vivienda_id, cargo_fijo_uf in db.query(Vivienda.id, Vivienda.cargo_fijo_uf).filter(
+            Vivienda.id.in_(ids)
+        )
+    }
+
+
+def cotizacion_a_dict(cotizacion: CotizacionUF, fecha: Optional[date] = None) -> Dict[str, Any]:
+    return {
+        "fecha": cotizacion.fecha.isoformat(),
+        "valor": float(cotizacion.valor),
+        "fuente": cotizacion.fuente,
+        "vigente": cotizacion.fecha == (fecha or cotizacion.fecha),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    sesion = SessionLocal()
+    try:
+        consultada = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(json.dumps(cotizacion_a_dict(valor_uf(sesion, consultada), consultada or date.today()), indent=2))
+    finally:
+        sesion.close()
@@ -128,7 +128,7 @@ export default function Gastos() {
   }
 
   const totalGastos = gastos.reduce((sum, gasto) => sum + (gasto.monto || 0), 0)
-  const gastosPendientes = gastos.filter(g => g.estado === 'pendiente').length
+  const gastosPendientes = gastos.filter(g => g.estado === 'pendiente' || g.estado === 'vencido').length
   const gastosPagados = gastos.filter(g => g.estado === 'pagado').length
 
   if (isLoading) {
@@ -226,7 +226,9 @@ export default function Gastos() {
                     <span className={`inline-flex px-2 py-1 text-xs font-semibold rounded-full ${
                       gasto.estado === 'pagado' 
                         ? 'bg-green-100 dark:bg-green-900 text-green-800 dark:text-green-200' 
-                        : 'bg-yellow-100 dark:bg-yellow-900 text-yellow-800 dark:text-yellow-200'
+                        : gasto.estado === 'vencido'
+                          ? 'bg-red-100 dark:bg-red-900 text-red-800 dark:text-red-200'
+                          : 'bg-yellow-100 dark:bg-yellow-900 text-yellow-800 dark:text-yellow-200'
                     }`}>
                       {gasto.estado}
                     </span>
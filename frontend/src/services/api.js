@@ -70,15 +70,49 @@ export const apiGet = async (endpoint, options = {}) => {
   return apiFetch(endpoint, { ...options, method: 'GET' })
 }
 
+/**
+ * Genera una clave única para el header Idempotency-Key
+ */
+const nuevaClaveIdempotencia = () => {
+  if (globalThis.crypto?.randomUUID) {
+    return globalThis.crypto.randomUUID()
+  }
+  return `${Date.now()}-${Math.random().toString(36).slice(2)}`
+}
+
 /**
  * Helper para peticiones POST
+ *
+ * Con `idempotente: true` envía un Idempotency-Key y, si la red falla antes
+ * de recibir respuesta, reintenta una vez con la misma clave: el backend
+ * repite la respuesta original en vez de ejecutar la operación dos veces.
+ * Solo debe usarse con endpoints de routers con RutaIdempotente (reservas,
+ * pagos, multas, facturación, viviendas y perfil); en los demás el header se
+ * ignora y el reintento podría duplicar la operación.
  */
 export const apiPost = async (endpoint, data, options = {}) => {
-  return apiFetch(endpoint, {
-    ...options,
+  const { idempotente = false, ...opciones } = options
+  const config = {
+    ...opciones,
     method: 'POST',
     body: JSON.stringify(data),
-  })
+  }
+  if (!idempotente) {
+    return apiFetch(endpoint, config)
+  }
+
+  config.headers = {
+    'Idempotency-Key': nuevaClaveIdempotencia(),
+    ...opciones.headers,
+  }
+  try {
+    return await apiFetch(endpoint, config)
+  } catch (error) {
+    if (error?.name === 'AbortError') {
+      throw error
+    }
+    return apiFetch(endpoint, config)
+  }
 }
 
 /**
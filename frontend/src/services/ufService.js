@@ -1,47 +1,41 @@
-// Service to fetch current UF value from CMF API
-// Exposes: fetchCurrentUf() -> { valueClp: number, date: string }
+// Service to fetch current UF value from the backend (/uf/hoy)
+// The backend queries the CMF API once per day and caches the value,
+// so the CMF API key is no longer needed in the frontend.
+// Exposes: fetchCurrentUf() -> { valueClp: number, date: string, vigente: boolean }
 
-const isDev = import.meta.env.DEV;
-// In dev, use Vite proxy path to avoid CORS; in prod, call full CMF API URL
-const API_URL = isDev
-  ? (import.meta.env.VITE_CMF_API_PROXY_PATH || '/cmf/uf')
-  : (import.meta.env.VITE_CMF_API_URL || 'https://api.cmfchile.cl/api-sbifv3/recursos_api/uf');
-const API_KEY = import.meta.env.VITE_CMF_API_KEY;
-
-function parseChileanNumber(str) {
-  if (typeof str !== 'string') return NaN;
-  // Convert "20.939,49" -> 20939.49
-  const normalized = str.replace(/\./g, '').replace(',', '.');
-  const n = Number.parseFloat(normalized);
-  return Number.isFinite(n) ? n : NaN;
+const getApiBaseUrl = () => {
+  if (import.meta.env.VITE_API_URL) {
+    return import.meta.env.VITE_API_URL.trim().replace(/\/$/, '')
+  }
+  return import.meta.env.DEV ? '/api/v1' : 'http://localhost:8000/api/v1'
 }
 
+const API_BASE_URL = getApiBaseUrl()
+
 export async function fetchCurrentUf(signal) {
-  if (!API_KEY) {
-    throw new Error('Falta VITE_CMF_API_KEY en variables de entorno');
+  const token = localStorage.getItem('authToken')
+  const headers = { 'Accept': 'application/json' }
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`
   }
-  const url = `${API_URL}?apikey=${API_KEY}&formato=json`;
-  const res = await fetch(url, {
-    signal,
-    headers: { 'Accept': 'application/json' }
-  });
+  const res = await fetch(`${API_BASE_URL}/uf/hoy`, { signal, headers })
   if (!res.ok) {
-    let detail = '';
-    try { detail = await res.text(); } catch {}
-    throw new Error(`Error al consultar UF: ${res.status} ${res.statusText}${detail ? ` - ${detail}` : ''}`);
-  }
-  const data = await res.json();
-  // Expected JSON: { UFs: [ { Valor: "20.939,49", Fecha: "YYYY-MM-DD" } ] }
-  const ufItem = data?.UFs?.[0];
-  if (!ufItem) {
-    throw new Error('Respuesta UF inesperada');
+    let detail = ''
+    try {
+      const errorData = await res.json()
+      detail = errorData.detail || errorData.message || ''
+    } catch {
+      try { detail = await res.text() } catch {}
+    }
+    throw new Error(`Error al consultar UF (${res.status}): ${detail || res.statusText}`)
   }
-  const valueClp = parseChileanNumber(ufItem.Valor);
-  const date = ufItem.Fecha;
+  const data = await res.json()
+  // Expected JSON: { fecha: "YYYY-MM-DD", valor: 39485.65, fuente: "cmf", vigente: true }
+  const valueClp = Number(data?.valor)
   if (!Number.isFinite(valueClp)) {
-    throw new Error('No se pudo parsear el valor UF');
+    throw new Error('Respuesta UF inesperada')
   }
-  return { valueClp, date };
+  return { valueClp, date: data.fecha, vigente: data.vigente !== false }
 }
 
 export function formatClp(amount) {